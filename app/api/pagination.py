@@ -0,0 +1,119 @@
+"""
+Keyset pagination and NDJSON streaming for the list endpoints.
+
+A page is fetched with limit + 1 rows; if the extra row exists, the response
+carries an opaque cursor for the next page in the X-Next-Cursor header (the
+body stays a plain JSON list). The cursor is the (timestamp, id) of the last
+row returned, so the next page starts right after it without an OFFSET scan
+and stays stable while new rows are inserted ahead of it.
+
+With ?format=ndjson the endpoint instead streams every row after the cursor
+as newline-delimited JSON, fetching STREAM_PAGE_SIZE rows at a time, so
+memory stays flat however large the table is.
+
+Both modes honour a column projection (see app/api/projection.py).
+"""
+import base64
+import json
+import re
+from datetime import datetime
+from typing import Awaitable, Callable, List, Optional, Type
+
+from fastapi import HTTPException, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from loguru import logger
+from pydantic import BaseModel
+
+from app.api.projection import Projection
+from app.core.config import settings
+from app.repositories.base import Cursor, Row
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# fetch(limit, after) -> rows, newest first
+FetchPage = Callable[[int, Optional[Cursor]], Awaitable[List[Row]]]
+
+_ID_PATTERN = re.compile(r"^[A-Za-z0-9-]+$")
+
+
+def encode_cursor(row: Row, sort_key: str) -> str:
+    raw = json.dumps([row[sort_key], row["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: Optional[str]) -> Optional[Cursor]:
+    """Parse a cursor from a previous response; 400 if it was not produced by encode_cursor()."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        value, row_id = json.loads(raw)
+        # Both parts end up in a filter expression, so only accept what encode_cursor() emits
+        timestamp = datetime.fromisoformat(value).isoformat()
+        if not isinstance(row_id, str) or not _ID_PATTERN.match(row_id):
+            raise ValueError("bad id")
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return timestamp, row_id
+
+
+async def paginate(fetch: FetchPage, sort_key: str, response: Response, limit: int, after: Optional[Cursor]) -> List[Row]:
+    """One page of rows; sets X-Next-Cursor when more rows follow."""
+    rows = await fetch(limit + 1, after)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1], sort_key)
+    return rows
+
+
+async def stream_ndjson(
+    fetch: FetchPage,
+    sort_key: str,
+    model: Type[BaseModel],
+    after: Optional[Cursor],
+    page_size: Optional[int] = None,
+) -> StreamingResponse:
+    """
+    Stream every row after the cursor as NDJSON, shaped by `model`. The first
+    page is fetched before the response starts so a failing query still gets
+    an error status; a later failure can only cut the stream short.
+    """
+    page_size = page_size or settings.STREAM_PAGE_SIZE
+    first = await fetch(page_size, after)
+
+    async def lines():
+        page = first
+        while page:
+            yield "".join(model.model_validate(row).model_dump_json() + "\n" for row in page)
+            if len(page) < page_size:
+                return
+            try:
+                page = await fetch(page_size, (page[-1][sort_key], page[-1]["id"]))
+            except Exception as e:
+                logger.error(f"NDJSON stream aborted: {e}")
+                raise
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
+
+
+async def list_response(
+    fetch: FetchPage,
+    sort_key: str,
+    projection: Projection,
+    response: Response,
+    limit: int,
+    after: Optional[Cursor],
+    response_format: str = "json",
+):
+    """
+    Body of a paged list endpoint: an NDJSON stream, a page of full rows (left
+    to the route's response_model), or a page shaped by the projected model.
+    """
+    if response_format == "ndjson":
+        return await stream_ndjson(fetch, sort_key, projection.model, after)
+    rows = await paginate(fetch, sort_key, response, limit, after)
+    if not projection.partial:
+        return rows
+    headers = {NEXT_CURSOR_HEADER: response.headers[NEXT_CURSOR_HEADER]} if NEXT_CURSOR_HEADER in response.headers else None
+    return JSONResponse([projection.model.model_validate(row).model_dump(mode="json") for row in rows], headers=headers)
@@ -0,0 +1,45 @@
+"""
+Column projection for the list endpoints (?fields=name,condition,...).
+
+The requested fields are checked against the endpoint's response model and
+become the column list the repository selects, so the database only reads
+and serialises those columns. Keys the endpoint itself needs (the id and the
+pagination sort key) are always selected but only returned when asked for.
+The response is then shaped by a model containing just the requested fields.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional, Tuple, Type
+
+from fastapi import HTTPException
+from pydantic import BaseModel, create_model
+
+
+@dataclass(frozen=True)
+class Projection:
+    columns: Optional[List[str]]  # None = every column
+    model: Type[BaseModel]
+
+    @property
+    def partial(self) -> bool:
+        return self.columns is not None
+
+
+def parse_fields(fields: Optional[str], model: Type[BaseModel], required: Tuple[str, ...] = ("id",)) -> Projection:
+    """Projection for a comma-separated ?fields= value; 400 on a field the model does not have."""
+    if not fields:
+        return Projection(None, model)
+    requested = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in requested if f not in model.model_fields]
+    if unknown or not requested:
+        allowed = ", ".join(model.model_fields)
+        raise HTTPException(status_code=400, detail=f"Unknown field(s) {', '.join(unknown)}; choose from {allowed}")
+    columns = requested + [key for key in required if key not in requested]
+    return Projection(columns, projected_model(model, tuple(requested)))
+
+
+@lru_cache(maxsize=256)
+def projected_model(model: Type[BaseModel], fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """A copy of `model` with only `fields`, keeping their types and defaults."""
+    definitions = {name: (model.model_fields[name].annotation, model.model_fields[name]) for name in fields}
+    return create_model(f"{model.__name__}Projection", **definitions)
@@ -0,0 +1,108 @@
+import hmac
+
+from fastapi import APIRouter, HTTPException, Header
+from app.core.config import settings
+from app.services.risk_engine import registry
+from app.services.analytics_cache import analytics_cache
+from app.services.assistant_cache import assistant_cache
+from app.services.patient_cache import patient_cache
+from app.services.patient_context import patient_context
+from app.services.retrieval import corpus_retriever
+from app.services.rule_engine import alert_rules, fallback_risk_rules
+from loguru import logger
+from typing import Optional
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+def _check_token(token: Optional[str]):
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set ADMIN_TOKEN to enable them")
+    if token is None or not hmac.compare_digest(token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@router.get("/model")
+def get_model_info(x_admin_token: Optional[str] = Header(None)):
+    """Report the active risk model version (loads it if not yet loaded)."""
+    _check_token(x_admin_token)
+    loaded = registry.get()
+    if loaded is None:
+        return {"loaded": False, "model_version": None}
+    return {
+        "loaded": True,
+        "model_version": loaded.version,
+        "scorer": loaded.scorer_kind,
+        "loaded_at": loaded.loaded_at,
+    }
+
+
+@router.post("/model/reload")
+def reload_model(x_admin_token: Optional[str] = Header(None)):
+    """
+    Load the model artefacts currently on disk and swap them in atomically.
+    Requests already scoring finish on the previous version.
+    """
+    _check_token(x_admin_token)
+    try:
+        loaded = registry.reload()
+    except Exception as e:
+        logger.error(f"Model reload failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Model reload failed: {e}")
+    return {
+        "loaded": True,
+        "model_version": loaded.version,
+        "scorer": loaded.scorer_kind,
+        "loaded_at": loaded.loaded_at,
+    }
+
+
+@router.post("/rules/reload")
+def reload_rules(x_admin_token: Optional[str] = Header(None)):
+    """
+    Recompile the alert and fallback risk rule files now instead of waiting
+    for the periodic change check. An invalid file leaves its rules unchanged.
+    """
+    _check_token(x_admin_token)
+    loaded = {}
+    for name, rules in (("alert_rules", alert_rules), ("fallback_risk_rules", fallback_risk_rules)):
+        try:
+            rule_set = rules.reload()
+        except Exception as e:
+            logger.error(f"Rule reload failed for {rules.path}: {e}")
+            raise HTTPException(status_code=422, detail=f"Rule reload failed for {name}: {e}")
+        loaded[name] = {"path": rule_set.source, "rules": [rule.id for rule in rule_set.rules]}
+    return loaded
+
+
+@router.post("/assistant/reload")
+def reload_assistant_corpus(x_admin_token: Optional[str] = Header(None)):
+    """Re-read the assistant corpus, rebuilding the saved index if any file changed."""
+    _check_token(x_admin_token)
+    if not corpus_retriever.enabled:
+        raise HTTPException(status_code=404, detail="No assistant corpus configured")
+    try:
+        index = corpus_retriever.reload()
+    except Exception as e:
+        logger.error(f"Assistant corpus reload failed: {e}")
+        raise HTTPException(status_code=422, detail=f"Assistant corpus reload failed: {e}")
+    assistant_cache.clear()  # cached answers came from the previous index
+    return {
+        "documents": len(index),
+        "topics": len(index.topics),
+        "terms": len(index.vocabulary),
+        "scheme": index.scheme,
+        "fingerprint": index.fingerprint,
+    }
+
+
+@router.get("/cache")
+def get_cache_stats(x_admin_token: Optional[str] = Header(None)):
+    """Hit / miss / eviction counters of this worker's caches."""
+    _check_token(x_admin_token)
+    return {
+        "patients": patient_cache.stats(),
+        "analytics": analytics_cache.stats(),
+        "assistant_context": patient_context.stats(),
+        "assistant_answers": assistant_cache.stats(),
+    }
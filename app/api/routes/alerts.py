@@ -1,49 +1,119 @@
-from fastapi import APIRouter, HTTPException, Depends
-from supabase import Client
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from app.api.pagination import decode_cursor, list_response
+from app.api.projection import parse_fields
+from app.core.config import settings
 from app.schemas.alert import AlertOut
-from app.core.database import get_supabase
+from app.schemas.common import UUIDStr
+from app.repositories import Repository, get_repository
+from app.services.alert_dedup import alert_suppressor
+from app.services.alert_hub import ALERT_ACKNOWLEDGED, alert_hub, format_sse
+from app.services.alert_queue import alert_queue
 from loguru import logger
-from typing import List
+from typing import List, Optional
+import asyncio
 
 router = APIRouter(prefix="/alerts", tags=["Alerts"])
 
 
+@router.get("/stream")
+async def stream_alerts(
+    request: Request,
+    patient_id: Optional[str] = None,
+    severity: Optional[List[str]] = Query(None),
+):
+    """
+    Server-Sent Events stream of new and acknowledged alerts (dashboard push
+    channel, replaces polling GET /alerts/). Optionally filtered by patient
+    and severity; a comment line is sent as a keep-alive when idle.
+    """
+    subscription = alert_hub.subscribe(patient_id, severity)
+
+    async def events():
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                event = await subscription.get(timeout=settings.ALERT_STREAM_HEARTBEAT_SECONDS)
+                yield format_sse(event) if event is not None else ": keep-alive\n\n"
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/ws")
+async def alerts_websocket(
+    websocket: WebSocket,
+    patient_id: Optional[str] = None,
+    severity: Optional[List[str]] = Query(None),
+):
+    """WebSocket counterpart of /alerts/stream: each event is sent as one JSON message."""
+    await websocket.accept()
+
+    with alert_hub.subscribe(patient_id, severity) as subscription:
+        async def forward():
+            async for event in subscription:
+                await websocket.send_json(event)
+
+        sender = asyncio.create_task(forward())
+        try:
+            # Messages from the client are ignored; receiving only detects the disconnect
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            sender.cancel()
+
+
 @router.get("/{patient_id}", response_model=List[AlertOut])
-def get_patient_alerts(
-    patient_id: str,
+async def get_patient_alerts(
+    patient_id: UUIDStr,
+    response: Response,
     unacknowledged_only: bool = False,
-    db: Client = Depends(get_supabase),
+    limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+    response_format: str = Query("json", alias="format", pattern="^(json|ndjson)$"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,created_at"),
+    repo: Repository = Depends(get_repository),
 ):
-    """Retrieve all alerts for a patient, optionally filtered to unacknowledged only."""
+    """
+    Retrieve a patient's alerts newest first, optionally filtered to
+    unacknowledged only. Paged with ?cursor= (from X-Next-Cursor) or
+    streamed with ?format=ndjson.
+    """
+    after = decode_cursor(cursor)
+    projection = parse_fields(fields, AlertOut, required=("id", "created_at"))
+
+    def fetch(n, after):
+        return repo.alerts.for_patient(patient_id, unacknowledged_only, limit=n, after=after, columns=projection.columns)
+
     try:
-        query = (
-            db.table("alerts")
-            .select("*")
-            .eq("patient_id", patient_id)
-            .order("created_at", desc=True)
-        )
-        if unacknowledged_only:
-            query = query.eq("acknowledged", False)
-        response = query.execute()
-        return response.data
+        return await list_response(fetch, "created_at", projection, response, limit, after, response_format)
     except Exception as e:
         logger.error(f"Error fetching alerts for {patient_id}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.patch("/{alert_id}/acknowledge", response_model=AlertOut)
-def acknowledge_alert(alert_id: str, db: Client = Depends(get_supabase)):
-    """Mark an alert as acknowledged by a clinician or patient."""
+async def acknowledge_alert(alert_id: UUIDStr, repo: Repository = Depends(get_repository)):
+    """
+    Mark an alert as acknowledged by a clinician or patient. An alert still
+    waiting in the write-behind queue is acknowledged there and stored so.
+    """
     try:
-        response = (
-            db.table("alerts")
-            .update({"acknowledged": True})
-            .eq("id", alert_id)
-            .execute()
-        )
-        if not response.data:
+        alert = await alert_queue.update_pending(alert_id, {"acknowledged": True})
+        if alert is None:
+            alert = await repo.alerts.acknowledge(alert_id)
+        if not alert:
             raise HTTPException(status_code=404, detail="Alert not found")
-        return response.data[0]
+        alert_suppressor.release(alert_id)
+        alert_hub.publish(ALERT_ACKNOWLEDGED, alert)
+        return alert
     except HTTPException:
         raise
     except Exception as e:
@@ -52,17 +122,26 @@ def acknowledge_alert(alert_id: str, db: Client = Depends(get_supabase)):
 
 
 @router.get("/", response_model=List[AlertOut])
-def get_all_alerts(limit: int = 50, db: Client = Depends(get_supabase)):
-    """Get all recent alerts across all patients (clinician dashboard view)."""
+async def get_all_alerts(
+    response: Response,
+    limit: int = Query(50, ge=1, le=settings.PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+    response_format: str = Query("json", alias="format", pattern="^(json|ndjson)$"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,created_at"),
+    repo: Repository = Depends(get_repository),
+):
+    """
+    Get recent alerts across all patients (clinician dashboard view), newest
+    first. Paged with ?cursor= (from X-Next-Cursor) or streamed with ?format=ndjson.
+    """
+    after = decode_cursor(cursor)
+    projection = parse_fields(fields, AlertOut, required=("id", "created_at"))
+
+    def fetch(n, after):
+        return repo.alerts.recent(n, after=after, columns=projection.columns)
+
     try:
-        response = (
-            db.table("alerts")
-            .select("*, patients(name)")
-            .order("created_at", desc=True)
-            .limit(limit)
-            .execute()
-        )
-        return response.data
+        return await list_response(fetch, "created_at", projection, response, limit, after, response_format)
     except Exception as e:
         logger.error(f"Error fetching all alerts: {e}")
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
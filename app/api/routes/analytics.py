@@ -1,29 +1,118 @@
-from fastapi import APIRouter, HTTPException, Depends
-from supabase import Client
-from app.core.database import get_supabase
-from app.services.analytics import compute_analytics
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Response
+from app.core.config import settings
+from app.repositories import Repository, get_repository
+from app.schemas.common import UUIDStr
+from app.services.analytics import (
+    ANALYTICS_COLUMNS,
+    COHORT_COLUMNS,
+    RANKING_COLUMNS,
+    compute_analytics,
+    compute_cohort_analytics,
+)
+from app.services.analytics_cache import analytics_cache, version_stamp
+from app.services.analytics_state import analytics_store
 from loguru import logger
+from datetime import datetime
+from typing import Literal, Optional
+import asyncio
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
 
+@router.get("/cohort")
+async def get_cohort_analytics(
+    doctor_name: Optional[str] = None,
+    condition: Optional[str] = None,
+    since: Optional[datetime] = Query(None, description="Only readings recorded at or after this ISO-8601 time"),
+    order: Literal["desc", "asc"] = "desc",
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    repo: Repository = Depends(get_repository),
+):
+    """
+    Ward/clinic view: one analytics row per patient with readings, for every
+    patient matching the filters, sorted by latest risk score (patients with
+    no score last) and paginated. Rows match /analytics/{patient_id}.
+
+    Patients are ranked from their newest reading alone; readings (at most
+    ANALYTICS_WINDOW per patient) are then fetched and analysed only for the
+    requested page.
+    """
+    sign = -1 if order == "desc" else 1
+    since_at = since.isoformat() if since else None
+    try:
+        latest = await repo.vitals.for_cohort(
+            doctor_name=doctor_name, condition=condition, since=since_at, columns=RANKING_COLUMNS, per_patient=1
+        )
+        latest.sort(key=lambda row: (
+            row["risk_score"] is None,
+            sign * (row["risk_score"] or 0.0),
+            row["patient_id"],
+        ))
+        page = [row["patient_id"] for row in latest[offset:offset + limit]]
+
+        rows = []
+        if page:
+            readings = await repo.vitals.for_cohort(
+                since=since_at, columns=COHORT_COLUMNS, per_patient=settings.ANALYTICS_WINDOW, patient_ids=page
+            )
+            rows = await asyncio.to_thread(compute_cohort_analytics, readings, settings.ANALYTICS_WINDOW)
+    except Exception as e:
+        logger.error(f"Error computing cohort analytics: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    position = {patient_id: i for i, patient_id in enumerate(page)}
+    rows.sort(key=lambda row: position[row["patient_id"]])
+    return {
+        "total": len(latest),
+        "limit": limit,
+        "offset": offset,
+        "patients": rows,
+    }
+
+
 @router.get("/{patient_id}")
-def get_analytics(patient_id: str, db: Client = Depends(get_supabase)):
+async def get_analytics(
+    patient_id: UUIDStr,
+    if_none_match: Optional[str] = Header(None),
+    repo: Repository = Depends(get_repository),
+):
     """
     Return trend analysis for a patient based on their vital history:
     averages, risk distribution, deterioration flag, and trend direction.
+
+    Results are cached per patient until the next reading is submitted and
+    carry an ETag; a matching If-None-Match gets a 304. With
+    ANALYTICS_INCREMENTAL a miss is served from per-patient running state
+    that submit_vitals keeps up to date; history is only fetched when that
+    state is missing too.
     """
-    try:
-        response = (
-            db.table("vital_readings")
-            .select("*")
-            .eq("patient_id", patient_id)
-            .order("recorded_at", desc=True)
-            .limit(90)  # Last 90 readings
-            .execute()
+    async def compute():
+        if not settings.ANALYTICS_INCREMENTAL:
+            readings = await repo.vitals.history(patient_id, limit=settings.ANALYTICS_WINDOW, columns=ANALYTICS_COLUMNS)
+            return compute_analytics(patient_id, readings), version_stamp(readings[0] if readings else None)
+
+        state = await analytics_store.get_or_rebuild(
+            patient_id,
+            lambda: repo.vitals.history(patient_id, limit=settings.ANALYTICS_WINDOW, columns=ANALYTICS_COLUMNS),
         )
-        readings = response.data or []
-        return compute_analytics(patient_id, readings)
+        return state.snapshot(patient_id), version_stamp(state.latest_reading)
+
+    try:
+        result = await analytics_cache.get_or_compute(patient_id, compute)
     except Exception as e:
         logger.error(f"Error computing analytics for {patient_id}: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+    headers = {"ETag": result.etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(if_none_match, result.etag):
+        analytics_cache.not_modified += 1
+        return Response(status_code=304, headers=headers)
+    return Response(content=result.body, media_type="application/json", headers=headers)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
@@ -1,26 +1,46 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Response
 from pydantic import BaseModel
-from app.services.ai_assistant import get_assistant_response
+from app.services.ai_assistant import answer, get_assistant_response
+from app.services.patient_context import patient_context
 
 router = APIRouter(prefix="/assistant", tags=["Virtual Assistant"])
 
 
 class ChatRequest(BaseModel):
     question: str
-    patient_id: str | None = None  # optional context
+    patient_id: str | None = None  # personalises the answer with the patient's latest risk level and vitals
+    include_related: bool = False  # also list the other topics the question touches
+
+
+class TopicMatch(BaseModel):
+    topic: str
+    score: float
 
 
 class ChatResponse(BaseModel):
     topic: str
     response: str
     disclaimer: str
+    risk_level: str | None = None  # the patient's latest risk level, when patient_id has context
+    related_topics: list[str] | None = None
+    matches: list[TopicMatch] | None = None  # retrieved topics with scores, when a corpus is configured
 
 
 @router.post("/chat", response_model=ChatResponse)
-def chat(request: ChatRequest):
+async def chat(request: ChatRequest):
     """
     Submit a health question and receive structured guidance from the
     virtual health assistant. No external API required.
+
+    With a patient_id, the answer opens with the patient's latest risk level
+    and vitals, taken from the in-memory context refreshed by POST /vitals –
+    a chat turn never queries the database.
+
+    Answers without patient context are cached per folded question and
+    returned as their pre-serialised JSON body.
     """
-    result = get_assistant_response(request.question)
-    return result
\ No newline at end of file
+    context = patient_context.get(request.patient_id) if request.patient_id else None
+    if context is None:
+        body = answer(request.question, include_related=request.include_related).body
+        return Response(content=body, media_type="application/json")
+    return get_assistant_response(request.question, include_related=request.include_related, context=context)
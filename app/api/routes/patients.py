@@ -1,47 +1,70 @@
-from fastapi import APIRouter, HTTPException, Depends
-from supabase import Client
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
+from app.api.pagination import decode_cursor, list_response
+from app.api.projection import parse_fields
+from app.core.config import settings
+from app.schemas.common import UUIDStr
 from app.schemas.patient import PatientCreate, PatientRead, PatientUpdate
-from app.core.database import get_supabase
+from app.repositories import Repository, get_repository
+from app.services.analytics_cache import analytics_cache
+from app.services.analytics_state import analytics_store
+from app.services.patient_cache import patient_cache
+from app.services.patient_context import patient_context
 from loguru import logger
-from typing import List
+from typing import List, Optional
 
 router = APIRouter(prefix="/patients", tags=["Patients"])
 
 
 @router.post("/", response_model=PatientRead, status_code=201)
-def create_patient(patient: PatientCreate, db: Client = Depends(get_supabase)):
+async def create_patient(patient: PatientCreate, repo: Repository = Depends(get_repository)):
     """Register a new patient profile."""
     data = patient.model_dump()
     # Convert date to string for JSON serialisation
     if data.get("date_of_birth"):
         data["date_of_birth"] = str(data["date_of_birth"])
     try:
-        response = db.table("patients").insert(data).execute()
-        return response.data[0]
+        return await repo.patients.create(data)
     except Exception as e:
         logger.error(f"Error creating patient: {e}")
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/", response_model=List[PatientRead])
-def list_patients(db: Client = Depends(get_supabase)):
-    """List all registered patients."""
+async def list_patients(
+    response: Response,
+    limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+    response_format: str = Query("json", alias="format", pattern="^(json|ndjson)$"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,created_at"),
+    repo: Repository = Depends(get_repository),
+):
+    """
+    List registered patients, newest first, a page at a time: pass the
+    X-Next-Cursor header of one page as ?cursor= to get the next.
+    ?format=ndjson streams every patient after the cursor instead, and
+    ?fields=id,name,condition reads and returns only those fields.
+    """
+    after = decode_cursor(cursor)
+    projection = parse_fields(fields, PatientRead, required=("id", "created_at"))
+
+    def fetch(n, after):
+        return repo.patients.list(limit=n, after=after, columns=projection.columns)
+
     try:
-        response = db.table("patients").select("*").order("created_at", desc=True).execute()
-        return response.data
+        return await list_response(fetch, "created_at", projection, response, limit, after, response_format)
     except Exception as e:
         logger.error(f"Error listing patients: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/{patient_id}", response_model=PatientRead)
-def get_patient(patient_id: str, db: Client = Depends(get_supabase)):
-    """Get a single patient by ID."""
+async def get_patient(patient_id: UUIDStr, repo: Repository = Depends(get_repository)):
+    """Get a single patient by ID (served from the patient cache when warm)."""
     try:
-        response = db.table("patients").select("*").eq("id", patient_id).single().execute()
-        if not response.data:
+        patient = await patient_cache.get(patient_id, repo.patients.get)
+        if not patient:
             raise HTTPException(status_code=404, detail="Patient not found")
-        return response.data
+        return patient
     except HTTPException:
         raise
     except Exception as e:
@@ -50,16 +73,17 @@ def get_patient(patient_id: str, db: Client = Depends(get_supabase)):
 
 
 @router.patch("/{patient_id}", response_model=PatientRead)
-def update_patient(patient_id: str, updates: PatientUpdate, db: Client = Depends(get_supabase)):
+async def update_patient(patient_id: UUIDStr, updates: PatientUpdate, repo: Repository = Depends(get_repository)):
     """Update patient profile fields."""
     data = {k: v for k, v in updates.model_dump().items() if v is not None}
     if not data:
         raise HTTPException(status_code=400, detail="No fields to update")
     try:
-        response = db.table("patients").update(data).eq("id", patient_id).execute()
-        if not response.data:
+        patient = await repo.patients.update(patient_id, data)
+        await patient_cache.invalidate(patient_id)
+        if not patient:
             raise HTTPException(status_code=404, detail="Patient not found")
-        return response.data[0]
+        return patient
     except HTTPException:
         raise
     except Exception as e:
@@ -68,10 +92,14 @@ def update_patient(patient_id: str, updates: PatientUpdate, db: Client = Depends
 
 
 @router.delete("/{patient_id}", status_code=204)
-def delete_patient(patient_id: str, db: Client = Depends(get_supabase)):
+async def delete_patient(patient_id: UUIDStr, repo: Repository = Depends(get_repository)):
     """Delete a patient profile."""
     try:
-        db.table("patients").delete().eq("id", patient_id).execute()
+        await repo.patients.delete(patient_id)
+        await patient_cache.invalidate(patient_id)
+        analytics_store.discard(patient_id)
+        analytics_cache.discard(patient_id)
+        patient_context.discard(patient_id)
     except Exception as e:
         logger.error(f"Error deleting patient {patient_id}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -4,10 +4,12 @@ from app.api.routes.vitals import router as vitals_router
 from app.api.routes.alerts import router as alerts_router
 from app.api.routes.assistant import router as assistant_router
 from app.api.routes.analytics import router as analytics_router
+from app.api.routes.admin import router as admin_router
 
 api_router = APIRouter()
 api_router.include_router(patients_router)
 api_router.include_router(vitals_router)
 api_router.include_router(alerts_router)
 api_router.include_router(assistant_router)
-api_router.include_router(analytics_router)
\ No newline at end of file
+api_router.include_router(analytics_router)
+api_router.include_router(admin_router)
\ No newline at end of file
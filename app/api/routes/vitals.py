@@ -1,18 +1,110 @@
-from fastapi import APIRouter, HTTPException, Depends
-from supabase import Client
-from app.schemas.vitals import VitalReading, VitalReadingOut, VitalHistoryEntry
-from app.core.database import get_supabase
-from app.services.risk_engine import calculate_risk
-from app.services.alert_service import create_alert_if_needed
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
+from app.api.pagination import decode_cursor, list_response
+from app.api.projection import parse_fields
+from app.core.config import settings
+from app.schemas.common import UUIDStr
+from app.schemas.vitals import (
+    VitalReading,
+    VitalReadingOut,
+    VitalHistoryEntry,
+    VitalBatchRequest,
+    VitalBatchOut,
+)
+from app.repositories import Repository, get_repository
+from app.services.risk_engine import calculate_risk_async, calculate_risk_batch, RECOMMENDATIONS
+from app.services.alert_service import create_alert_if_needed, create_alerts_batch
+from app.services.analytics_cache import analytics_cache
+from app.services.analytics_state import analytics_store
+from app.services.metrics import RISK_LEVELS
+from app.services.patient_context import patient_context
 from loguru import logger
-from typing import List
+from typing import List, Optional
 from datetime import datetime, timezone
+import asyncio
 
 router = APIRouter(prefix="/vitals", tags=["Vitals"])
 
 
+# Declared before /{patient_id} so "batch" is not captured as a patient ID
+@router.post("/batch", response_model=VitalBatchOut, status_code=201)
+async def submit_vitals_batch(batch: VitalBatchRequest, repo: Repository = Depends(get_repository)):
+    """
+    Submit many vital readings, possibly for different patients, in one request.
+    All readings are risk-scored in a single vectorised model call, stored with
+    one multi-row insert, and any triggered alerts are written in one more insert.
+    """
+    vital_rows = [item.model_dump(exclude={"patient_id"}) for item in batch.readings]
+    # CPU-bound for large batches, so keep it off the event loop
+    scores, levels, model_version = await asyncio.to_thread(calculate_risk_batch, vital_rows)
+    risk_results = [
+        {"risk_score": score, "risk_level": level, "recommendations": RECOMMENDATIONS[level]}
+        for score, level in zip(scores.tolist(), levels.tolist())
+    ]
+    recorded_at = datetime.now(timezone.utc).isoformat()
+
+    records = [
+        {
+            **vital_data,
+            "patient_id": item.patient_id,
+            "risk_score": risk["risk_score"],
+            "risk_level": risk["risk_level"],
+            "model_version": model_version,
+            "recorded_at": recorded_at,
+        }
+        for item, vital_data, risk in zip(batch.readings, vital_rows, risk_results)
+    ]
+
+    try:
+        saved_rows = await repo.vitals.insert_many(records)
+    except Exception as e:
+        logger.error(f"Error saving vitals batch of {len(records)}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if not saved_rows or len(saved_rows) != len(records):
+        logger.error(f"Vitals batch insert returned {len(saved_rows or [])} rows for {len(records)} readings")
+        raise HTTPException(status_code=500, detail="Batch insert returned an unexpected number of rows")
+
+    # Readings in one batch share recorded_at, so their history order is not
+    # defined; drop the incremental state and let the next request rebuild it.
+    for patient_id in {saved["patient_id"] for saved in saved_rows}:
+        analytics_store.discard(patient_id)
+        analytics_cache.discard(patient_id)
+    for saved in saved_rows:
+        patient_context.update(saved["patient_id"], saved)
+    for risk in risk_results:
+        RISK_LEVELS.inc(risk["risk_level"])
+
+    alerts = await create_alerts_batch(
+        repo.alerts,
+        [
+            {
+                "patient_id": saved["patient_id"],
+                "vital_reading_id": saved["id"],
+                "risk_level": risk["risk_level"],
+                "risk_score": risk["risk_score"],
+                "vital_data": vital_data,
+            }
+            for saved, risk, vital_data in zip(saved_rows, risk_results, vital_rows)
+        ],
+    )
+
+    results = [
+        {
+            **saved,
+            "recommendations": risk["recommendations"],
+            "alert_triggered": alert is not None,
+        }
+        for saved, risk, alert in zip(saved_rows, risk_results, alerts)
+    ]
+    return {
+        "count": len(results),
+        "alerts_triggered": sum(alert is not None for alert in alerts),
+        "results": results,
+    }
+
+
 @router.post("/{patient_id}", response_model=VitalReadingOut, status_code=201)
-def submit_vitals(patient_id: str, vitals: VitalReading, db: Client = Depends(get_supabase)):
+async def submit_vitals(patient_id: UUIDStr, vitals: VitalReading, repo: Repository = Depends(get_repository)):
     """
     Submit a vital reading for a patient.
     Runs ML risk scoring, stores the reading, and triggers an alert if thresholds are breached.
@@ -20,26 +112,31 @@ def submit_vitals(patient_id: str, vitals: VitalReading, db: Client = Depends(ge
     vital_data = vitals.model_dump()
 
     # Run risk engine
-    risk_result = calculate_risk(vital_data)
+    risk_result = await calculate_risk_async(vital_data)
 
     record = {
         **vital_data,
         "patient_id": patient_id,
         "risk_score": risk_result["risk_score"],
         "risk_level": risk_result["risk_level"],
+        "model_version": risk_result["model_version"],
         "recorded_at": datetime.now(timezone.utc).isoformat(),
     }
 
     try:
-        response = db.table("vital_readings").insert(record).execute()
-        saved = response.data[0]
+        saved = await repo.vitals.insert(record)
     except Exception as e:
         logger.error(f"Error saving vitals for {patient_id}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+    analytics_store.record(patient_id, saved)
+    analytics_cache.bump(patient_id, saved)
+    patient_context.update(patient_id, saved)
+    RISK_LEVELS.inc(risk_result["risk_level"])
+
     # Trigger alert if needed
-    alert = create_alert_if_needed(
-        supabase=db,
+    alert = await create_alert_if_needed(
+        alerts=repo.alerts,
         patient_id=patient_id,
         vital_reading_id=saved["id"],
         risk_level=risk_result["risk_level"],
@@ -55,18 +152,28 @@ def submit_vitals(patient_id: str, vitals: VitalReading, db: Client = Depends(ge
 
 
 @router.get("/{patient_id}", response_model=List[VitalHistoryEntry])
-def get_vital_history(patient_id: str, limit: int = 30, db: Client = Depends(get_supabase)):
-    """Retrieve the vital reading history for a patient."""
+async def get_vital_history(
+    patient_id: UUIDStr,
+    response: Response,
+    limit: int = Query(30, ge=1, le=settings.PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+    response_format: str = Query("json", alias="format", pattern="^(json|ndjson)$"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,created_at"),
+    repo: Repository = Depends(get_repository),
+):
+    """
+    Retrieve the vital reading history for a patient, newest first. Older
+    pages are reached with the X-Next-Cursor header as ?cursor=;
+    ?format=ndjson streams the whole history after the cursor.
+    """
+    after = decode_cursor(cursor)
+    projection = parse_fields(fields, VitalHistoryEntry, required=("id", "recorded_at"))
+
+    def fetch(n, after):
+        return repo.vitals.history(patient_id, n, after=after, columns=projection.columns)
+
     try:
-        response = (
-            db.table("vital_readings")
-            .select("*")
-            .eq("patient_id", patient_id)
-            .order("recorded_at", desc=True)
-            .limit(limit)
-            .execute()
-        )
-        return response.data
+        return await list_response(fetch, "recorded_at", projection, response, limit, after, response_format)
     except Exception as e:
         logger.error(f"Error fetching vitals for {patient_id}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -9,6 +9,85 @@ class Settings(BaseSettings):
     APP_NAME: str = "Smart Health – Chronic Care Platform"
     DEBUG: bool = True
 
+    # Persistence backend for the API: "supabase" (PostgREST over HTTP) or "postgres" (direct, asyncpg)
+    DATA_BACKEND: str = "supabase"
+
+    # Async PostgREST HTTP pool (shared per worker, HTTP/2 multiplexed)
+    DB_HTTP_MAX_CONNECTIONS: int = 100
+    DB_HTTP_MAX_KEEPALIVE: int = 20
+    DB_HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    DB_HTTP_TIMEOUT: float = 10.0
+
+    # Risk scoring: "compiled" (pure-NumPy, scaler folded into the model) or "sklearn"
+    RISK_SCORER: str = "compiled"
+    MODEL_DIR: str = ""  # directory holding risk_model.joblib / scaler.joblib; defaults to app/services
+    MODEL_MMAP: bool = True  # memory-map model arrays so workers share them
+    # Where calculate_risk() runs: "inprocess" (caller's thread), "thread" or "process" pool
+    SCORING_EXECUTOR: str = "inprocess"
+    SCORING_WORKERS: int = 2
+    SCORING_BATCH_WINDOW_MS: float = 2.0  # collect concurrent requests for this long into one batch
+    SCORING_MAX_BATCH: int = 256
+    # Analytics: readings per patient window, and the incremental per-patient state cache
+    ANALYTICS_WINDOW: int = 90
+    ANALYTICS_INCREMENTAL: bool = True
+    ANALYTICS_STATE_MAX_PATIENTS: int = 10_000
+    ANALYTICS_STATE_TTL_SECONDS: float = 300.0  # bounds staleness when several workers write
+    # Analytics response cache: serialised results keyed by patient + newest reading (ETag / 304)
+    ANALYTICS_CACHE_ENABLED: bool = True
+    ANALYTICS_CACHE_MAX_PATIENTS: int = 10_000
+    ANALYTICS_CACHE_TTL_SECONDS: float = 60.0
+    # Live alert streams (/alerts/stream SSE, /alerts/ws WebSocket)
+    ALERT_STREAM_QUEUE_SIZE: int = 100  # per subscriber; a slow client loses its oldest events
+    ALERT_STREAM_HEARTBEAT_SECONDS: float = 15.0
+    # Write-behind alert persistence: journal on disk, batched background inserts
+    ALERT_WRITE_BEHIND: bool = True
+    ALERT_JOURNAL_PATH: str = "data/alert_journal.jsonl"  # each worker writes data/alert_journal.<pid>.jsonl
+    ALERT_JOURNAL_FSYNC: bool = False  # fsync every append (survives power loss, slower)
+    ALERT_QUEUE_BATCH_SIZE: int = 200
+    ALERT_QUEUE_FLUSH_INTERVAL: float = 1.0
+    ALERT_QUEUE_RETRY_MAX_SECONDS: float = 30.0
+    # Alert suppression: repeats of an open (patient, rule, severity) alert only bump its count
+    ALERT_DEDUP_ENABLED: bool = True
+    ALERT_COOLDOWN_CRITICAL_SECONDS: float = 900.0
+    ALERT_COOLDOWN_WARNING_SECONDS: float = 3600.0
+    ALERT_DEDUP_MAX_KEYS: int = 100_000
+    ALERT_DEDUP_STATE_PATH: str = ""  # if set, open alerts are saved here on shutdown and reloaded on start
+    # Declarative rule files (JSON or YAML); empty = the built-in files in app/services/rules
+    ALERT_RULES_PATH: str = ""
+    FALLBACK_RISK_RULES_PATH: str = ""
+    RULES_RELOAD_CHECK_SECONDS: float = 5.0  # how often a changed rule file is picked up
+    # List endpoints: keyset page sizes, and rows fetched per query when streaming NDJSON
+    PAGE_SIZE_DEFAULT: int = 100
+    PAGE_SIZE_MAX: int = 1000
+    STREAM_PAGE_SIZE: int = 1000
+    # Patient profile read-through cache: per-worker TTL + LRU, optional shared tier
+    PATIENT_CACHE_ENABLED: bool = True
+    PATIENT_CACHE_MAX_ENTRIES: int = 10_000
+    PATIENT_CACHE_TTL_SECONDS: float = 60.0  # bounds staleness of other workers' copies
+    PATIENT_CACHE_SHARED_URL: str = ""  # "" (none), "memory://" (local stand-in) or "redis://host:6379/0"
+    PATIENT_CACHE_SHARED_TTL_SECONDS: float = 600.0
+    # Assistant retrieval: BM25 / TF-IDF index over guidance files; "" = keyword matching on the built-in topics
+    ASSISTANT_CORPUS_DIR: str = ""
+    ASSISTANT_INDEX_DIR: str = "data/assistant_index"  # saved index shared by workers; "" = rebuild in memory
+    ASSISTANT_INDEX_MMAP: bool = True
+    ASSISTANT_RETRIEVAL_SCHEME: str = "bm25"  # "bm25" or "tfidf"
+    ASSISTANT_TOP_K: int = 3  # topics returned with scores per question
+    # Assistant answers cached per folded question (case, punctuation, spacing), with their JSON body
+    ASSISTANT_CACHE_ENABLED: bool = True
+    ASSISTANT_CACHE_MAX_ENTRIES: int = 10_000
+    # Assistant patient context: latest risk level + vitals per patient, refreshed by submit_vitals
+    PATIENT_CONTEXT_MAX_PATIENTS: int = 10_000
+    PATIENT_CONTEXT_TTL_SECONDS: float = 900.0  # bounds staleness when another worker took the reading
+    # Startup warm-up, run in the background by the lifespan; GET /ready answers 200 once it has finished
+    STARTUP_WARM_UP: bool = True  # False: no warm-up, ready immediately
+    WARM_UP_STEPS: str = "all"  # or a subset of: database,connections,model,predict,rules,corpus,caches
+    WARM_UP_MIN_CONNECTIONS: int = 2  # pooled database connections opened before ready
+    WARM_UP_PRIME_PATIENTS: int = 100  # recent patient profiles loaded into the patient cache
+    WARM_UP_TIMEOUT_SECONDS: float = 60.0
+    # Request latency histograms, span timers and counters, served by GET /metrics (Prometheus text format)
+    METRICS_ENABLED: bool = True
+    ADMIN_TOKEN: str = ""  # required in X-Admin-Token for /admin endpoints; unset = /admin disabled (403)
+
     class Config:
         env_file = ".env"
         extra = "ignore"
@@ -1,17 +1,28 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
-from supabase import create_client, Client
+"""
+Database clients, created on first use.
+
+The client libraries (supabase, postgrest/httpx, SQLAlchemy) take most of
+the application's import time, so they are imported inside the functions
+that build the clients rather than at module level: importing app.main
+stays fast, and the first request – or the lifespan warm-up – pays for
+the one backend actually configured.
+"""
 from app.core.config import settings
 from loguru import logger
-from typing import Generator
+from typing import TYPE_CHECKING, Generator
+
+if TYPE_CHECKING:
+    from postgrest import AsyncPostgrestClient
+    from sqlalchemy.orm import Session
+    from supabase import Client
 
 # ---------------------------------------------------------------------------
 # Supabase client  (for auth, storage, realtime, edge-functions, etc.)
 # ---------------------------------------------------------------------------
-_supabase: Client | None = None
+_supabase: "Client | None" = None
 
 
-def get_supabase() -> Client:
+def get_supabase() -> "Client":
     """Return the shared Supabase client, or raise if not configured."""
     global _supabase
     if _supabase is None:
@@ -20,17 +31,74 @@ def get_supabase() -> Client:
                 "Supabase credentials not set. "
                 "Add SUPABASE_URL and SUPABASE_ANON_KEY to your .env file."
             )
+        from supabase import create_client
+
         _supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_ANON_KEY)
         logger.info("Supabase client initialised.")
     return _supabase
 
 
+# ---------------------------------------------------------------------------
+# Async PostgREST client  (used by the API routes)
+#
+# One shared httpx.AsyncClient with HTTP/2 and a bounded keep-alive pool, so
+# concurrent requests multiplex over a few connections instead of each
+# holding a threadpool thread for the duration of its query.
+# ---------------------------------------------------------------------------
+_async_supabase: "AsyncPostgrestClient | None" = None
+
+
+def get_async_supabase() -> "AsyncPostgrestClient":
+    """Return the shared async PostgREST client, or raise if not configured."""
+    global _async_supabase
+    if _async_supabase is None:
+        if not settings.SUPABASE_URL or not settings.SUPABASE_ANON_KEY:
+            raise RuntimeError(
+                "Supabase credentials not set. "
+                "Add SUPABASE_URL and SUPABASE_ANON_KEY to your .env file."
+            )
+        import httpx
+        from postgrest import AsyncPostgrestClient
+
+        http_client = httpx.AsyncClient(
+            http2=True,
+            timeout=settings.DB_HTTP_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=settings.DB_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.DB_HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=settings.DB_HTTP_KEEPALIVE_EXPIRY,
+            ),
+            follow_redirects=True,
+        )
+        _async_supabase = AsyncPostgrestClient(
+            f"{settings.SUPABASE_URL.rstrip('/')}/rest/v1",
+            headers={
+                "apikey": settings.SUPABASE_ANON_KEY,
+                "Authorization": f"Bearer {settings.SUPABASE_ANON_KEY}",
+            },
+            http_client=http_client,
+        )
+        logger.info("Async PostgREST client initialised.")
+    return _async_supabase
+
+
+async def close_async_supabase():
+    """Close the shared async client's connection pool (called on shutdown)."""
+    global _async_supabase
+    if _async_supabase is not None:
+        await _async_supabase.aclose()
+        _async_supabase = None
+
+
 # ---------------------------------------------------------------------------
 # SQLAlchemy engine & session  (for ORM queries via Alembic migrations)
 # ---------------------------------------------------------------------------
 _engine = None
 _SessionLocal = None
 
+# Shared by the sync engine and the async (asyncpg) engine below
+POOL_OPTIONS = {"pool_size": 10, "max_overflow": 20, "pool_pre_ping": True}
+
 
 def _init_engine():
     """Lazily create the SQLAlchemy engine so we don't crash when DATABASE_URL is empty."""
@@ -41,17 +109,15 @@ def _init_engine():
                 "DATABASE_URL not set. "
                 "Add it to your .env file (Supabase → Settings → Database → URI)."
             )
-        _engine = create_engine(
-            settings.DATABASE_URL,
-            pool_size=10,
-            max_overflow=20,
-            pool_pre_ping=True,
-        )
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+
+        _engine = create_engine(settings.DATABASE_URL, **POOL_OPTIONS)
         _SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=_engine)
         logger.info("SQLAlchemy engine initialised.")
 
 
-def get_db() -> Generator[Session, None, None]:
+def get_db() -> Generator["Session", None, None]:
     """FastAPI dependency — yields a SQLAlchemy session, then closes it."""
     _init_engine()
     db = _SessionLocal()
@@ -64,4 +130,34 @@ def get_db() -> Generator[Session, None, None]:
 def get_engine():
     """Return the raw engine (used by Alembic env.py)."""
     _init_engine()
-    return _engine
\ No newline at end of file
+    return _engine
+
+
+# ---------------------------------------------------------------------------
+# Async SQLAlchemy engine  (direct-Postgres repository backend, asyncpg driver)
+# ---------------------------------------------------------------------------
+_async_engine = None
+
+
+def get_async_engine():
+    """Return the shared asyncpg-backed AsyncEngine, using the same pool settings as the sync one."""
+    global _async_engine
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine  # only needed for DATA_BACKEND=postgres
+
+        if not settings.DATABASE_URL:
+            raise RuntimeError(
+                "DATABASE_URL not set. "
+                "Add it to your .env file (Supabase → Settings → Database → URI)."
+            )
+        url = settings.DATABASE_URL.split("://", 1)[-1]
+        _async_engine = create_async_engine(f"postgresql+asyncpg://{url}", **POOL_OPTIONS)
+        logger.info("Async SQLAlchemy engine initialised.")
+    return _async_engine
+
+
+async def close_async_engine():
+    global _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
@@ -1,12 +1,19 @@
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import RedirectResponse
+from fastapi.responses import JSONResponse, RedirectResponse, Response
 from loguru import logger
 import os
 
-from app.api.routes import patients, vitals, alerts, assistant, analytics
+from app.api.pagination import NEXT_CURSOR_HEADER
+from app.api.routes import patients, vitals, alerts, assistant, analytics, admin
 from app.core.config import settings
+from app.services.metrics import CONTENT_TYPE, MetricsMiddleware, metrics
+from app.services.warmup import configured_steps, run_warm_up, warm_up_state
 
 # ---------------------------------------------------------------------------
 # Application
@@ -33,8 +40,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],  # browsers hide non-safelisted response headers from scripts
 )
 
+# ---------------------------------------------------------------------------
+# Metrics – per-route latency histograms (added last, so it times the whole stack)
+# ---------------------------------------------------------------------------
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # ---------------------------------------------------------------------------
 # Routers
 # ---------------------------------------------------------------------------
@@ -43,6 +57,7 @@ app.include_router(vitals.router)
 app.include_router(alerts.router)
 app.include_router(assistant.router)
 app.include_router(analytics.router)
+app.include_router(admin.router)
 
 # ---------------------------------------------------------------------------
 # Static frontend (optional – served if frontend/ directory exists)
@@ -57,12 +72,12 @@ if os.path.isdir(FRONTEND_DIR):
 # Root & health check
 # ---------------------------------------------------------------------------
 @app.get("/", include_in_schema=False)
-def root():
+async def root():
     return RedirectResponse(url="/docs")
 
 
 @app.get("/health", tags=["System"])
-def health_check():
+async def health_check():
     return {
         "status": "healthy",
         "service": settings.APP_NAME,
@@ -70,15 +85,67 @@ def health_check():
     }
 
 
+@app.get("/ready", tags=["System"])
+async def readiness_check():
+    """
+    Readiness for the load balancer: 503 while the startup warm-up is still
+    running, 200 once it has finished. /health only says the process is up.
+    """
+    report = warm_up_state.report()
+    if not warm_up_state.ready:
+        return JSONResponse(status_code=503, content={"status": "warming_up", **report})
+    return {"status": "ready", **report}
+
+
+@app.get("/metrics", tags=["System"])
+async def prometheus_metrics():
+    """
+    This worker's request latencies, span timings and counters in the
+    Prometheus text exposition format.
+    """
+    return Response(content=metrics.render(), media_type=CONTENT_TYPE)
+
+
 # ---------------------------------------------------------------------------
 # Startup
 # ---------------------------------------------------------------------------
 from contextlib import asynccontextmanager
+import asyncio
+from app.services.risk_engine import registry, shutdown_scoring_executor
+from app.services.model_registry import install_reload_signal_handler
+from app.core.database import close_async_supabase, close_async_engine
+from app.services.alert_queue import alert_queue
+from app.services.alert_dedup import alert_suppressor
+
 
 @asynccontextmanager
 async def lifespan(application):
     logger.info(f"🚀 {settings.APP_NAME} starting…")
+    if install_reload_signal_handler(registry, asyncio.get_running_loop()):
+        logger.info("Send SIGHUP to reload the risk model from disk.")
+    alert_suppressor.load()
+    if settings.ALERT_WRITE_BEHIND:
+        try:
+            await alert_queue.start()
+        except OSError as e:
+            logger.error(f"Alert journal unavailable, writing alerts inline – {e}")
+    # In the background: the port is bound and /health answers at once, /ready once this finishes
+    warm_up = None
+    if settings.STARTUP_WARM_UP:
+        steps = configured_steps(settings.WARM_UP_STEPS)
+        warm_up = asyncio.create_task(run_warm_up(warm_up_state, steps, settings.WARM_UP_TIMEOUT_SECONDS))
+    else:
+        warm_up_state.finish()
+    logger.info(f"Serving {(time.perf_counter() - _IMPORT_STARTED) * 1000:.0f} ms after import started.")
     yield
+    if warm_up is not None and not warm_up.done():
+        warm_up.cancel()
+        await asyncio.gather(warm_up, return_exceptions=True)
+    await alert_queue.stop()
+    alert_suppressor.save()
+    shutdown_scoring_executor()
+    await close_async_supabase()
+    await close_async_engine()
     logger.info(f"🔴 {settings.APP_NAME} shutting down.")
 
 # Attach lifespan to the app
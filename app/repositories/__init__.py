@@ -0,0 +1,39 @@
+from app.core.config import settings
+from app.repositories.base import (
+    AlertRepository,
+    PatientRepository,
+    Repository,
+    VitalRepository,
+)
+from app.repositories.instrumented import instrument_repository
+
+__all__ = [
+    "AlertRepository",
+    "PatientRepository",
+    "Repository",
+    "VitalRepository",
+    "get_repository",
+]
+
+
+def get_repository() -> Repository:
+    """
+    FastAPI dependency — return the repositories for the configured DATA_BACKEND.
+    Backends are imported lazily so an unused driver is never loaded.
+    With METRICS_ENABLED every call is timed (see app.repositories.instrumented).
+    """
+    if settings.DATA_BACKEND == "postgres":
+        from app.core.database import get_async_engine
+        from app.repositories.postgres import build_postgres_repository
+
+        return _instrumented(build_postgres_repository(get_async_engine()))
+    if settings.DATA_BACKEND == "supabase":
+        from app.core.database import get_async_supabase
+        from app.repositories.supabase import build_supabase_repository
+
+        return _instrumented(build_supabase_repository(get_async_supabase()))
+    raise RuntimeError(f"Unknown DATA_BACKEND {settings.DATA_BACKEND!r}; expected 'supabase' or 'postgres'")
+
+
+def _instrumented(repo: Repository) -> Repository:
+    return instrument_repository(repo) if settings.METRICS_ENABLED else repo
@@ -0,0 +1,139 @@
+"""
+Repository interfaces – the only persistence API the routes and services use.
+
+Every backend returns plain dicts shaped like the rows of the `patients`,
+`vital_readings` and `alerts` tables (ids as strings, timestamps as ISO-8601
+strings), so callers never see which backend is active.
+
+List methods page with a keyset cursor rather than an offset: rows come
+newest first, ordered by their timestamp and then id (both descending), and
+`after` is the (timestamp, id) of the last row already returned. Each page is
+an index range scan however deep into the table it starts.
+
+Read methods take an optional `columns` list; when given, rows only carry
+those columns (plus any embedded relation the method documents).
+"""
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+Row = Dict[str, Any]
+
+# Keyset position: (timestamp as an ISO-8601 string, id) of the last row seen
+Cursor = Tuple[str, str]
+
+
+class PatientRepository(ABC):
+    @abstractmethod
+    async def create(self, data: Row) -> Row: ...
+
+    @abstractmethod
+    async def list(
+        self,
+        limit: Optional[int] = None,
+        after: Optional[Cursor] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> List[Row]:
+        """Patients newest first (created_at, id), starting after the cursor; all of them if no limit."""
+
+    @abstractmethod
+    async def get(self, patient_id: str) -> Optional[Row]: ...
+
+    @abstractmethod
+    async def update(self, patient_id: str, data: Row) -> Optional[Row]:
+        """Apply a partial update; None if the patient does not exist."""
+
+    @abstractmethod
+    async def delete(self, patient_id: str) -> None: ...
+
+
+class VitalRepository(ABC):
+    @abstractmethod
+    async def insert(self, record: Row) -> Row: ...
+
+    @abstractmethod
+    async def insert_many(self, records: List[Row]) -> List[Row]:
+        """Insert all records in one write; returns saved rows in input order."""
+
+    @abstractmethod
+    async def history(
+        self,
+        patient_id: str,
+        limit: int,
+        after: Optional[Cursor] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> List[Row]:
+        """Most recent readings for a patient, newest first (recorded_at, id), starting after the cursor."""
+
+    @abstractmethod
+    async def for_cohort(
+        self,
+        doctor_name: Optional[str] = None,
+        condition: Optional[str] = None,
+        since: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+        per_patient: Optional[int] = None,
+        patient_ids: Optional[Sequence[str]] = None,
+    ) -> List[Row]:
+        """
+        Readings of every patient matching the filters, ordered by patient and
+        then newest first, each with the patient's name under "patients".
+        With per_patient, only each patient's newest per_patient readings are
+        read; with patient_ids, only those patients'.
+        """
+
+
+class AlertRepository(ABC):
+    @abstractmethod
+    async def insert(self, record: Row) -> Optional[Row]: ...
+
+    @abstractmethod
+    async def insert_many(self, records: List[Row]) -> List[Row]:
+        """Insert all records in one write; returns saved rows in input order."""
+
+    @abstractmethod
+    async def upsert_many(self, records: List[Row]) -> None:
+        """
+        Store records that carry their own id. For an id already stored only
+        acknowledged, occurrences and last_occurrence_at are updated, from the
+        record (a replayed alert may have been acknowledged or repeated since).
+        """
+
+    @abstractmethod
+    async def update_occurrences(self, alert_id: str, occurrences: int, last_occurrence_at: str) -> None:
+        """Set the repeat count of an open alert (absolute, so retries are harmless)."""
+
+    @abstractmethod
+    async def for_patient(
+        self,
+        patient_id: str,
+        unacknowledged_only: bool = False,
+        limit: Optional[int] = None,
+        after: Optional[Cursor] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> List[Row]:
+        """A patient's alerts, newest first (created_at, id), starting after the cursor."""
+
+    @abstractmethod
+    async def acknowledge(self, alert_id: str) -> Optional[Row]:
+        """Mark acknowledged; None if the alert does not exist."""
+
+    @abstractmethod
+    async def recent(
+        self,
+        limit: int,
+        after: Optional[Cursor] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> List[Row]:
+        """
+        Newest alerts across all patients (created_at, id), starting after the
+        cursor, each with the patient's name under "patients".
+        """
+
+
+@dataclass(frozen=True)
+class Repository:
+    """One backend's repositories, handed to routes by get_repository()."""
+    patients: PatientRepository
+    vitals: VitalRepository
+    alerts: AlertRepository
@@ -0,0 +1,30 @@
+"""
+Span timers around every repository call, whichever backend is configured.
+
+instrument_repository() wraps the public coroutine methods of each of a
+Repository's classes so every call is recorded in span_duration_seconds as
+"db.<repository>.<method>", e.g. "db.vitals.insert" – the time the caller
+waits, including pool checkout and the round trip. Methods are wrapped on
+the class, once, so the repositories keep their types and attributes and
+get_repository() pays nothing per request.
+"""
+import inspect
+from dataclasses import fields
+from typing import Set
+
+from app.repositories.base import Repository
+from app.services.metrics import timed
+
+_instrumented: Set[type] = set()
+
+
+def instrument_repository(repo: Repository) -> Repository:
+    for field in fields(repo):
+        cls = type(getattr(repo, field.name))
+        if cls in _instrumented:
+            continue
+        for attr, value in list(vars(cls).items()):
+            if not attr.startswith("_") and inspect.iscoroutinefunction(value):
+                setattr(cls, attr, timed(f"db.{field.name}.{attr}")(value))
+        _instrumented.add(cls)
+    return repo
@@ -0,0 +1,290 @@
+"""
+Repository backend that talks to Postgres directly over the pooled
+SQLAlchemy async engine (asyncpg driver), skipping the PostgREST HTTP hop.
+
+- asyncpg prepares and caches every statement per connection, so the hot
+  queries are planned once per pooled connection.
+- Large vital batches are written with COPY (ids are generated client-side so
+  no RETURNING round trip is needed).
+"""
+import uuid
+from datetime import date, datetime
+from typing import List, Optional, Sequence
+
+from sqlalchemy import Date, DateTime, Table, delete, func, insert, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.repositories import tables
+from app.repositories.base import (
+    AlertRepository,
+    Cursor,
+    PatientRepository,
+    Repository,
+    Row,
+    VitalRepository,
+)
+
+# Batches at least this large go through COPY instead of INSERT … RETURNING
+COPY_THRESHOLD = 50
+
+
+def _to_row(mapping) -> Row:
+    """Convert a result row to the PostgREST-style dict the API returns."""
+    row = {}
+    for key, value in mapping.items():
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, date):
+            value = value.isoformat()
+        elif isinstance(value, uuid.UUID):
+            value = str(value)
+        row[key] = value
+    return row
+
+
+def _to_params(table: Table, record: Row) -> Row:
+    """Parse ISO strings into date/datetime for typed columns and drop unknown keys."""
+    params = {}
+    for key, value in record.items():
+        if key not in table.c:
+            continue
+        column_type = table.c[key].type
+        if isinstance(value, str):
+            if isinstance(column_type, DateTime):
+                value = datetime.fromisoformat(value)
+            elif isinstance(column_type, Date):
+                value = date.fromisoformat(value)
+        params[key] = value
+    return params
+
+
+def _columns(table: Table, columns: Optional[Sequence[str]]) -> list:
+    """Column objects to select: the named ones, or the whole table if None."""
+    return [table.c[name] for name in columns] if columns else [table]
+
+
+def _newest_first(statement, table: Table, column: str, limit: Optional[int], after: Optional[Cursor]):
+    """Order by (column, id) descending and keep the rows after the keyset cursor (a row comparison)."""
+    sort_column = table.c[column]
+    if after is not None:
+        value, row_id = after
+        statement = statement.where(tuple_(sort_column, table.c.id) < tuple_(datetime.fromisoformat(value), row_id))
+    statement = statement.order_by(sort_column.desc(), table.c.id.desc())
+    return statement.limit(limit) if limit is not None else statement
+
+
+class _PostgresRepository:
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+
+    async def _fetch_all(self, statement) -> List[Row]:
+        async with self.engine.connect() as conn:
+            result = await conn.execute(statement)
+            return [_to_row(r) for r in result.mappings()]
+
+    async def _fetch_one(self, statement, commit: bool = False) -> Optional[Row]:
+        async with (self.engine.begin() if commit else self.engine.connect()) as conn:
+            result = await conn.execute(statement)
+            row = result.mappings().first()
+            return _to_row(row) if row is not None else None
+
+    async def _insert_many(self, table: Table, records: List[Row]) -> List[Row]:
+        if not records:
+            return []
+        statement = insert(table).values([_to_params(table, r) for r in records]).returning(*table.c)
+        async with self.engine.begin() as conn:
+            result = await conn.execute(statement)
+            return [_to_row(r) for r in result.mappings()]
+
+
+class PostgresPatientRepository(_PostgresRepository, PatientRepository):
+    table = tables.patients
+
+    async def create(self, data: Row) -> Row:
+        statement = insert(self.table).values(_to_params(self.table, data)).returning(*self.table.c)
+        return await self._fetch_one(statement, commit=True)
+
+    async def list(
+        self,
+        limit: Optional[int] = None,
+        after: Optional[Cursor] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> List[Row]:
+        statement = select(*_columns(self.table, columns))
+        return await self._fetch_all(_newest_first(statement, self.table, "created_at", limit, after))
+
+    async def get(self, patient_id: str) -> Optional[Row]:
+        return await self._fetch_one(select(self.table).where(self.table.c.id == patient_id))
+
+    async def update(self, patient_id: str, data: Row) -> Optional[Row]:
+        statement = (
+            update(self.table)
+            .where(self.table.c.id == patient_id)
+            .values(_to_params(self.table, data))
+            .returning(*self.table.c)
+        )
+        return await self._fetch_one(statement, commit=True)
+
+    async def delete(self, patient_id: str) -> None:
+        async with self.engine.begin() as conn:
+            await conn.execute(delete(self.table).where(self.table.c.id == patient_id))
+
+
+class PostgresVitalRepository(_PostgresRepository, VitalRepository):
+    table = tables.vital_readings
+
+    async def insert(self, record: Row) -> Row:
+        statement = insert(self.table).values(_to_params(self.table, record)).returning(*self.table.c)
+        return await self._fetch_one(statement, commit=True)
+
+    async def insert_many(self, records: List[Row]) -> List[Row]:
+        if len(records) < COPY_THRESHOLD:
+            return await self._insert_many(self.table, records)
+        return await self._copy(records)
+
+    async def _copy(self, records: List[Row]) -> List[Row]:
+        """Bulk-load with COPY; ids are assigned here since COPY cannot return them."""
+        columns = [c.name for c in self.table.c]
+        rows = [{"id": str(uuid.uuid4()), **_to_params(self.table, r)} for r in records]
+        async with self.engine.connect() as conn:
+            raw = await conn.get_raw_connection()
+            await raw.driver_connection.copy_records_to_table(
+                self.table.name,
+                columns=columns,
+                records=[tuple(row.get(c) for c in columns) for row in rows],
+            )
+        return [_to_row(row) for row in rows]
+
+    async def history(
+        self,
+        patient_id: str,
+        limit: int,
+        after: Optional[Cursor] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> List[Row]:
+        statement = select(*_columns(self.table, columns)).where(self.table.c.patient_id == patient_id)
+        return await self._fetch_all(_newest_first(statement, self.table, "recorded_at", limit, after))
+
+    async def for_cohort(
+        self,
+        doctor_name: Optional[str] = None,
+        condition: Optional[str] = None,
+        since: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+        per_patient: Optional[int] = None,
+        patient_ids: Optional[Sequence[str]] = None,
+    ) -> List[Row]:
+        patients, readings = tables.patients, self.table
+        rank = func.row_number().over(
+            partition_by=readings.c.patient_id, order_by=(readings.c.recorded_at.desc(), readings.c.id)
+        )
+        statement = (
+            select(*_columns(readings, columns), patients.c.name.label("patient_name"), rank.label("rank"))
+            .join(patients, patients.c.id == readings.c.patient_id)
+        )
+        if doctor_name:
+            statement = statement.where(patients.c.doctor_name == doctor_name)
+        if condition:
+            statement = statement.where(patients.c.condition == condition)
+        if since:
+            statement = statement.where(readings.c.recorded_at >= datetime.fromisoformat(since))
+        if patient_ids is not None:
+            statement = statement.where(readings.c.patient_id.in_(patient_ids))
+
+        # Rank inside a subquery so only each patient's newest per_patient rows leave the database
+        ranked = statement.subquery()
+        statement = (
+            select(*[column for column in ranked.c if column.name != "rank"])
+            .order_by(ranked.c.patient_id, ranked.c.recorded_at.desc(), ranked.c.id)
+        )
+        if per_patient is not None:
+            statement = statement.where(ranked.c.rank <= per_patient)
+        rows = await self._fetch_all(statement)
+        for row in rows:
+            row["patients"] = {"name": row.pop("patient_name")}
+        return rows
+
+
+class PostgresAlertRepository(_PostgresRepository, AlertRepository):
+    table = tables.alerts
+
+    async def insert(self, record: Row) -> Optional[Row]:
+        statement = insert(self.table).values(_to_params(self.table, record)).returning(*self.table.c)
+        return await self._fetch_one(statement, commit=True)
+
+    async def insert_many(self, records: List[Row]) -> List[Row]:
+        return await self._insert_many(self.table, records)
+
+    async def upsert_many(self, records: List[Row]) -> None:
+        if not records:
+            return
+        statement = pg_insert(self.table).values([_to_params(self.table, r) for r in records])
+        stored, replayed = self.table.c, statement.excluded
+        # Never undo an acknowledgement or lower a count already stored by the row's own update
+        statement = statement.on_conflict_do_update(
+            index_elements=[stored.id],
+            set_={
+                "acknowledged": or_(stored.acknowledged, replayed.acknowledged),
+                "occurrences": func.greatest(stored.occurrences, replayed.occurrences),
+                "last_occurrence_at": func.greatest(stored.last_occurrence_at, replayed.last_occurrence_at),
+            },
+        )
+        async with self.engine.begin() as conn:
+            await conn.execute(statement)
+
+    async def update_occurrences(self, alert_id: str, occurrences: int, last_occurrence_at: str) -> None:
+        statement = (
+            update(self.table)
+            .where(self.table.c.id == alert_id)
+            .values(occurrences=occurrences, last_occurrence_at=datetime.fromisoformat(last_occurrence_at))
+        )
+        async with self.engine.begin() as conn:
+            await conn.execute(statement)
+
+    async def for_patient(
+        self,
+        patient_id: str,
+        unacknowledged_only: bool = False,
+        limit: Optional[int] = None,
+        after: Optional[Cursor] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> List[Row]:
+        statement = select(*_columns(self.table, columns)).where(self.table.c.patient_id == patient_id)
+        if unacknowledged_only:
+            statement = statement.where(self.table.c.acknowledged.is_(False))
+        return await self._fetch_all(_newest_first(statement, self.table, "created_at", limit, after))
+
+    async def acknowledge(self, alert_id: str) -> Optional[Row]:
+        statement = (
+            update(self.table)
+            .where(self.table.c.id == alert_id)
+            .values(acknowledged=True)
+            .returning(*self.table.c)
+        )
+        return await self._fetch_one(statement, commit=True)
+
+    async def recent(
+        self,
+        limit: int,
+        after: Optional[Cursor] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> List[Row]:
+        patients = tables.patients
+        statement = (
+            select(*_columns(self.table, columns), patients.c.name.label("patient_name"))
+            .outerjoin(patients, patients.c.id == self.table.c.patient_id)
+        )
+        rows = await self._fetch_all(_newest_first(statement, self.table, "created_at", limit, after))
+        # Same shape as PostgREST's embedded select("*, patients(name)")
+        for row in rows:
+            row["patients"] = {"name": row.pop("patient_name")}
+        return rows
+
+
+def build_postgres_repository(engine: AsyncEngine) -> Repository:
+    return Repository(
+        patients=PostgresPatientRepository(engine),
+        vitals=PostgresVitalRepository(engine),
+        alerts=PostgresAlertRepository(engine),
+    )
@@ -0,0 +1,201 @@
+"""Repository backend that talks to Supabase over the async PostgREST client."""
+from typing import List, Optional, Sequence
+
+from postgrest import AsyncPostgrestClient
+from postgrest.types import ReturnMethod
+
+from app.repositories.base import (
+    AlertRepository,
+    Cursor,
+    PatientRepository,
+    Repository,
+    Row,
+    VitalRepository,
+)
+
+# Patients requested per PostgREST call when reading a whole cohort
+COHORT_PAGE_SIZE = 1000
+
+
+def _select(columns: Optional[Sequence[str]], embed: str = "") -> str:
+    """PostgREST select list: the given columns (all if None) plus an optional embedded relation."""
+    select = ",".join(columns) if columns else "*"
+    return f"{select}, {embed}" if embed else select
+
+
+def _newest_first(query, column: str, limit: Optional[int], after: Optional[Cursor]):
+    """Order by (column, id) descending and keep the rows after the keyset cursor."""
+    if after is not None:
+        value, row_id = after
+        query = query.or_(f'{column}.lt."{value}",and({column}.eq."{value}",id.lt."{row_id}")')
+    query = query.order(column, desc=True).order("id", desc=True)
+    return query.limit(limit) if limit is not None else query
+
+
+class SupabasePatientRepository(PatientRepository):
+    def __init__(self, db: AsyncPostgrestClient):
+        self.db = db
+
+    async def create(self, data: Row) -> Row:
+        response = await self.db.table("patients").insert(data).execute()
+        return response.data[0]
+
+    async def list(
+        self,
+        limit: Optional[int] = None,
+        after: Optional[Cursor] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> List[Row]:
+        query = _newest_first(self.db.table("patients").select(_select(columns)), "created_at", limit, after)
+        response = await query.execute()
+        return response.data
+
+    async def get(self, patient_id: str) -> Optional[Row]:
+        # maybe_single() answers None for no match; single() would raise
+        response = await self.db.table("patients").select("*").eq("id", patient_id).maybe_single().execute()
+        return response.data if response is not None else None
+
+    async def update(self, patient_id: str, data: Row) -> Optional[Row]:
+        response = await self.db.table("patients").update(data).eq("id", patient_id).execute()
+        return response.data[0] if response.data else None
+
+    async def delete(self, patient_id: str) -> None:
+        await self.db.table("patients").delete().eq("id", patient_id).execute()
+
+
+class SupabaseVitalRepository(VitalRepository):
+    def __init__(self, db: AsyncPostgrestClient):
+        self.db = db
+
+    async def insert(self, record: Row) -> Row:
+        response = await self.db.table("vital_readings").insert(record).execute()
+        return response.data[0]
+
+    async def insert_many(self, records: List[Row]) -> List[Row]:
+        response = await self.db.table("vital_readings").insert(records).execute()
+        return response.data
+
+    async def history(
+        self,
+        patient_id: str,
+        limit: int,
+        after: Optional[Cursor] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> List[Row]:
+        query = self.db.table("vital_readings").select(_select(columns)).eq("patient_id", patient_id)
+        response = await _newest_first(query, "recorded_at", limit, after).execute()
+        return response.data or []
+
+    async def for_cohort(
+        self,
+        doctor_name: Optional[str] = None,
+        condition: Optional[str] = None,
+        since: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+        per_patient: Optional[int] = None,
+        patient_ids: Optional[Sequence[str]] = None,
+    ) -> List[Row]:
+        # Read patients with their readings embedded: PostgREST can order and
+        # limit an embedded relation per parent row, which bounds the readings
+        # per patient in the database. !inner drops patients left with none.
+        readings = "vital_readings"
+        query = self.db.table("patients").select(f"name, {readings}!inner({_select(columns)})")
+        if doctor_name:
+            query = query.eq("doctor_name", doctor_name)
+        if condition:
+            query = query.eq("condition", condition)
+        if patient_ids is not None:
+            query = query.in_("id", patient_ids)
+        if since:
+            query = query.gte(f"{readings}.recorded_at", since)
+        query = query.order("recorded_at", desc=True, foreign_table=readings).order("id", foreign_table=readings)
+        if per_patient is not None:
+            query = query.limit(per_patient, foreign_table=readings)
+        query = query.order("id")
+
+        # PostgREST caps rows per response, so read the ordered patients in pages
+        patients: List[Row] = []
+        while True:
+            response = await query.range(len(patients), len(patients) + COHORT_PAGE_SIZE - 1).execute()
+            page = response.data or []
+            patients.extend(page)
+            if len(page) < COHORT_PAGE_SIZE:
+                break
+        return [
+            {**reading, "patients": {"name": patient["name"]}}
+            for patient in patients
+            for reading in patient[readings]
+        ]
+
+
+class SupabaseAlertRepository(AlertRepository):
+    def __init__(self, db: AsyncPostgrestClient):
+        self.db = db
+
+    async def insert(self, record: Row) -> Optional[Row]:
+        response = await self.db.table("alerts").insert(record).execute()
+        return response.data[0] if response.data else None
+
+    async def insert_many(self, records: List[Row]) -> List[Row]:
+        response = await self.db.table("alerts").insert(records).execute()
+        return response.data or []
+
+    async def upsert_many(self, records: List[Row]) -> None:
+        # PostgREST merges a duplicate by overwriting the sent columns; the rest of an alert never changes
+        await (
+            self.db.table("alerts")
+            .upsert(records, on_conflict="id", ignore_duplicates=False, returning=ReturnMethod.minimal)
+            .execute()
+        )
+
+    async def update_occurrences(self, alert_id: str, occurrences: int, last_occurrence_at: str) -> None:
+        await (
+            self.db.table("alerts")
+            .update(
+                {"occurrences": occurrences, "last_occurrence_at": last_occurrence_at},
+                returning=ReturnMethod.minimal,
+            )
+            .eq("id", alert_id)
+            .execute()
+        )
+
+    async def for_patient(
+        self,
+        patient_id: str,
+        unacknowledged_only: bool = False,
+        limit: Optional[int] = None,
+        after: Optional[Cursor] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> List[Row]:
+        query = self.db.table("alerts").select(_select(columns)).eq("patient_id", patient_id)
+        if unacknowledged_only:
+            query = query.eq("acknowledged", False)
+        response = await _newest_first(query, "created_at", limit, after).execute()
+        return response.data
+
+    async def acknowledge(self, alert_id: str) -> Optional[Row]:
+        response = await (
+            self.db.table("alerts")
+            .update({"acknowledged": True})
+            .eq("id", alert_id)
+            .execute()
+        )
+        return response.data[0] if response.data else None
+
+    async def recent(
+        self,
+        limit: int,
+        after: Optional[Cursor] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> List[Row]:
+        query = self.db.table("alerts").select(_select(columns, "patients(name)"))
+        response = await _newest_first(query, "created_at", limit, after).execute()
+        return response.data
+
+
+def build_supabase_repository(db: AsyncPostgrestClient) -> Repository:
+    return Repository(
+        patients=SupabasePatientRepository(db),
+        vitals=SupabaseVitalRepository(db),
+        alerts=SupabaseAlertRepository(db),
+    )
@@ -0,0 +1,74 @@
+"""
+SQLAlchemy Core definitions of the tables the API reads and writes
+(`patients`, `vital_readings`, `alerts`), used by the direct-Postgres backend.
+
+These mirror the Supabase tables, not the ORM models in app/models, and live
+on their own MetaData so Alembic autogenerate does not pick them up.
+"""
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Date,
+    DateTime,
+    Float,
+    Integer,
+    MetaData,
+    Table,
+    Text,
+    func,
+    text,
+)
+from sqlalchemy.dialects.postgresql import UUID
+
+metadata = MetaData()
+
+
+def _id_column() -> Column:
+    return Column("id", UUID(as_uuid=False), primary_key=True, server_default=text("gen_random_uuid()"))
+
+
+patients = Table(
+    "patients",
+    metadata,
+    _id_column(),
+    Column("name", Text, nullable=False),
+    Column("date_of_birth", Date),
+    Column("condition", Text, nullable=False),
+    Column("doctor_name", Text),
+    Column("phone", Text),
+    Column("notes", Text),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+vital_readings = Table(
+    "vital_readings",
+    metadata,
+    _id_column(),
+    Column("patient_id", UUID(as_uuid=False), nullable=False),
+    Column("cholesterol", Float),
+    Column("hdl", Float),
+    Column("age", Integer),
+    Column("weight", Float),
+    Column("bp_systolic", Float),
+    Column("bp_diastolic", Float),
+    Column("glucose", Float),
+    Column("bmi", Float),
+    Column("risk_score", Float),
+    Column("risk_level", Text),
+    Column("model_version", Text),
+    Column("recorded_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+alerts = Table(
+    "alerts",
+    metadata,
+    _id_column(),
+    Column("patient_id", UUID(as_uuid=False), nullable=False),
+    Column("vital_reading_id", UUID(as_uuid=False)),
+    Column("message", Text, nullable=False),
+    Column("severity", Text, nullable=False),
+    Column("acknowledged", Boolean, nullable=False, server_default=text("false")),
+    Column("occurrences", Integer, nullable=False, server_default=text("1")),
+    Column("last_occurrence_at", DateTime(timezone=True)),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
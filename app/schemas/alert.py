@@ -9,4 +9,6 @@ class AlertOut(BaseModel):
     message: str
     severity: str   # "Warning" | "Critical"
     acknowledged: bool
+    occurrences: int = 1  # readings folded into this alert while it was open
+    last_occurrence_at: Optional[str] = None
     created_at: Optional[str] = None
\ No newline at end of file
@@ -0,0 +1,8 @@
+from typing import Annotated
+from uuid import UUID
+
+from pydantic import AfterValidator
+
+# A uuid column value: validated as a UUID (422 otherwise) and passed on in
+# canonical string form, so a malformed id never reaches the database.
+UUIDStr = Annotated[UUID, AfterValidator(str)]
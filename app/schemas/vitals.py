@@ -2,6 +2,8 @@ from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 
+from app.schemas.common import UUIDStr
+
 
 class VitalReading(BaseModel):
     """Input schema for a patient vital reading submission."""
@@ -30,6 +32,7 @@ class VitalReadingOut(BaseModel):
     bmi: Optional[float] = None
     risk_score: float
     risk_level: str  # "Low" | "Moderate" | "High"
+    model_version: Optional[str] = None  # risk model version that produced the score
     recommendations: List[str]
     alert_triggered: bool
     recorded_at: str
@@ -47,4 +50,25 @@ class VitalHistoryEntry(BaseModel):
     bmi: Optional[float] = None
     risk_score: Optional[float] = None
     risk_level: Optional[str] = None
-    recorded_at: Optional[str] = None
\ No newline at end of file
+    model_version: Optional[str] = None
+    recorded_at: Optional[str] = None
+
+# Upper bound on readings accepted in one bulk upload
+MAX_BATCH_SIZE = 1000
+
+
+class VitalBatchItem(VitalReading):
+    """A single reading inside a bulk upload, tagged with the patient it belongs to."""
+    patient_id: UUIDStr
+
+
+class VitalBatchRequest(BaseModel):
+    """Input schema for bulk ingestion of readings across many patients."""
+    readings: List[VitalBatchItem] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class VitalBatchOut(BaseModel):
+    """Output schema for a bulk upload — one result per submitted reading, in order."""
+    count: int
+    alerts_triggered: int
+    results: List[VitalReadingOut]
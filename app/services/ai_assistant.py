@@ -3,7 +3,15 @@ Rule-based Virtual Health Assistant
 Matches patient questions to clinical topic areas and returns
 structured guidance — no external API required for this prototype.
 """
-from typing import Dict
+import json
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.assistant_cache import CachedAnswer, assistant_cache
+from app.services.keyword_matcher import KeywordMatcher
+from app.services.patient_context import PatientContext
+from app.services.retrieval import corpus_retriever
+from app.services.text_normalize import fold_text
 
 
 # ---------------------------------------------------------------------------
@@ -148,26 +156,138 @@ DEFAULT_RESPONSE = (
 )
 
 
-def get_assistant_response(question: str) -> Dict:
-    """Match question keywords and return appropriate health guidance."""
-    q_lower = question.lower()
-
-    for entry in KNOWLEDGE_BASE:
-        if any(kw in q_lower for kw in entry["keywords"]):
-            return {
-                "topic": entry["topic"],
-                "response": entry["response"],
-                "disclaimer": (
-                    "⚕️ This guidance is for informational purposes only. "
-                    "Always consult your healthcare provider for personalised medical advice."
-                ),
-            }
-
-    return {
-        "topic": "General",
-        "response": DEFAULT_RESPONSE,
-        "disclaimer": (
-            "⚕️ This guidance is for informational purposes only. "
-            "Always consult your healthcare provider for personalised medical advice."
-        ),
-    }
\ No newline at end of file
+DISCLAIMER = (
+    "⚕️ This guidance is for informational purposes only. "
+    "Always consult your healthcare provider for personalised medical advice."
+)
+
+# Compiled once at import: one pass over the folded question finds every keyword hit
+_MATCHER = KeywordMatcher([[fold_text(kw) for kw in entry["keywords"]] for entry in KNOWLEDGE_BASE])
+
+# ChatResponse fields, in its order; pre-serialised answers must match what it would emit
+RESPONSE_FIELDS = ("topic", "response", "disclaimer", "risk_level", "related_topics", "matches")
+
+
+def match_topics(question: str) -> List[str]:
+    """All matched topics, most keyword hits first; ties keep knowledge-base order."""
+    return [KNOWLEDGE_BASE[i]["topic"] for i in _MATCHER.ranked(question_key(question))]
+
+
+def serialize_response(result: Dict) -> bytes:
+    """The JSON body ChatResponse would produce for result (unset fields are null)."""
+    body = {name: result.get(name) for name in RESPONSE_FIELDS}
+    return json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def answer(question: str, include_related: bool = False) -> CachedAnswer:
+    """
+    The answer to a question, before any patient context, with its serialised
+    body. Answers depend only on the folded question, so they are cached
+    under it; "What is  BMI?" and "what is bmi" share an entry.
+    """
+    text = question_key(question)
+
+    def compute() -> CachedAnswer:
+        result = _match(text, include_related)
+        return CachedAnswer(result, serialize_response(result))
+
+    return assistant_cache.get_or_compute(f"{int(include_related)}|{text}", compute)
+
+
+def question_key(question: str) -> str:
+    """The question folded (see text_normalize): the text keywords are matched in and answers cached under."""
+    return fold_text(question)
+
+
+def get_assistant_response(
+    question: str, include_related: bool = False, context: Optional[PatientContext] = None
+) -> Dict:
+    """Match question keywords and return appropriate health guidance.
+
+    With a corpus configured (ASSISTANT_CORPUS_DIR) the best retrieved snippet
+    answers, and the top-k topics are returned with their scores. Otherwise,
+    or if nothing is retrieved, the first knowledge-base entry with a matching
+    keyword answers. With include_related the other matched topics are listed.
+    With a patient context the answer opens with the patient's risk level and
+    latest vitals.
+    """
+    result = dict(answer(question, include_related).result)
+    if context is not None:
+        _personalise(result, context)
+    return result
+
+
+def _match(text: str, include_related: bool) -> Dict:
+    index = corpus_retriever.get()
+    hits = index.top_topics(text, settings.ASSISTANT_TOP_K) if index is not None else []
+    if hits:
+        result = {
+            "topic": hits[0].topic,
+            "response": hits[0].text,
+            "disclaimer": DISCLAIMER,
+            "matches": [{"topic": hit.topic, "score": hit.score} for hit in hits],
+        }
+        if include_related:
+            result["related_topics"] = [hit.topic for hit in hits[1:]]
+        return result
+
+    entry_index = _MATCHER.first(text)
+    if entry_index is None:
+        result = {"topic": "General", "response": DEFAULT_RESPONSE, "disclaimer": DISCLAIMER}
+    else:
+        entry = KNOWLEDGE_BASE[entry_index]
+        result = {"topic": entry["topic"], "response": entry["response"], "disclaimer": DISCLAIMER}
+
+    if include_related:
+        ranked = [KNOWLEDGE_BASE[i]["topic"] for i in _MATCHER.ranked(text)]
+        result["related_topics"] = [t for t in ranked if t != result["topic"]]
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Patient context: fragments pre-rendered per (topic, risk level)
+# ---------------------------------------------------------------------------
+RISK_INTROS: Dict[str, str] = {
+    "High": "🚨 **Your latest risk level is High.** Please contact your care team today.",
+    "Moderate": "⚠️ **Your latest risk level is Moderate.** Book a check-up within the next few days.",
+    "Low": "✅ **Your latest risk level is Low.** Keep up your current routine.",
+}
+
+# Topic-specific next step, added when the risk level is Moderate or High
+TOPIC_RISK_FOCUS: Dict[str, str] = {
+    "Blood Glucose": "Check your glucose more often and log every reading until it has been reviewed.",
+    "Blood Pressure": "Measure your blood pressure twice daily and bring the log to your appointment.",
+    "Cholesterol & Heart Health": "Ask your doctor whether your cholesterol treatment needs reviewing.",
+    "Weight & Nutrition": "Ask for a dietitian referral to plan gradual, sustainable changes.",
+    "Medications": "Do not change or stop any medication before speaking to your doctor.",
+    "Physical Activity": "Keep activity light and stop if you feel chest tightness, dizziness or breathlessness.",
+    "Mental Health & Sleep": "Tell your care team if stress or poor sleep is affecting your routine.",
+}
+
+# Emergency guidance is never prefixed: it must read the same for every patient
+UNPERSONALISED_TOPICS = {"Emergency"}
+
+
+def _render_fragment(topic: str, risk_level: str) -> str:
+    focus = TOPIC_RISK_FOCUS.get(topic) if risk_level != "Low" else None
+    return f"{RISK_INTROS[risk_level]} {focus}" if focus else RISK_INTROS[risk_level]
+
+
+CONTEXT_FRAGMENTS: Dict[Tuple[str, str], str] = {
+    (topic, level): _render_fragment(topic, level)
+    for topic in [entry["topic"] for entry in KNOWLEDGE_BASE] + ["General"]
+    for level in RISK_INTROS
+    if topic not in UNPERSONALISED_TOPICS
+}
+
+
+def _personalise(result: Dict, context: PatientContext):
+    result["risk_level"] = context.risk_level
+    topic = result["topic"]
+    if topic in UNPERSONALISED_TOPICS:
+        return
+    # Topics retrieved from a corpus have no fragment of their own: the risk level intro only
+    fragment = CONTEXT_FRAGMENTS.get((topic, context.risk_level)) or RISK_INTROS.get(context.risk_level, "")
+    opening = "\n".join(part for part in (fragment, context.vitals_line(topic)) if part)
+    if opening:
+        result["response"] = f"{opening}\n\n{result['response']}"
@@ -0,0 +1,189 @@
+"""
+Alert suppression – stops a persistent condition from producing one alert
+row per reading.
+
+Alerts are keyed by (patient, rule, severity). The first occurrence opens an
+alert; further occurrences within that severity's cool-down window are folded
+into it (its `occurrences` count goes up) instead of inserting new rows.
+
+- Escalation bypasses the cool-down: an open Warning for a rule never blocks
+  a Critical for the same rule.
+- De-escalation is folded upwards: while a Critical is open for a rule, a
+  Warning for the same rule counts as another occurrence of the Critical.
+- Acknowledging an alert releases its key, so the next occurrence opens a
+  new alert.
+
+State is a bounded LRU held in memory, per worker process. It can be saved to
+a JSON file on shutdown and reloaded on start (ALERT_DEDUP_STATE_PATH), so a
+restart does not re-fire every open alert.
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional, Tuple
+
+from loguru import logger
+
+from app.core.config import settings
+
+# Higher rank = more severe; used for escalation and de-escalation
+SEVERITY_RANK = {"Warning": 1, "Critical": 2}
+
+Key = Tuple[str, str, str]  # (patient_id, rule, severity)
+
+
+@dataclass
+class OpenAlert:
+    alert_id: Optional[str]
+    opened_at: float
+    last_seen_at: float
+    occurrences: int = 1
+
+
+@dataclass(frozen=True)
+class Decision:
+    fire: bool
+    key: Key
+    open_alert: OpenAlert  # the new alert if fire, else the alert the occurrence was folded into
+
+
+class AlertSuppressor:
+    def __init__(self, cooldowns: Dict[str, float], max_keys: int = 100_000, state_path: str = ""):
+        self.cooldowns = cooldowns
+        self.max_keys = max_keys
+        self.state_path = state_path
+        self._open: "OrderedDict[Key, OpenAlert]" = OrderedDict()
+        self._keys_by_alert: Dict[str, Key] = {}
+        self._lock = threading.Lock()
+        self.fired = 0
+        self.suppressed = 0
+
+    def check(self, patient_id: str, rule: str, severity: str, now: Optional[float] = None) -> Decision:
+        """
+        Decide whether an occurrence opens a new alert. Either way the state is
+        updated: a new key is reserved, or the open alert's count goes up.
+        """
+        now = time.time() if now is None else now
+        key = (patient_id, rule, severity)
+        rank = SEVERITY_RANK.get(severity, 0)
+        # Fold into the most severe open alert for the rule, this severity last
+        higher = sorted((s for s, r in SEVERITY_RANK.items() if r > rank), key=SEVERITY_RANK.get, reverse=True)
+        candidates = higher + [severity]
+
+        with self._lock:
+            for candidate in candidates:
+                open_key = (patient_id, rule, candidate)
+                entry = self._open.get(open_key)
+                if entry is not None and now - entry.opened_at < self._cooldown(candidate):
+                    entry.occurrences += 1
+                    entry.last_seen_at = now
+                    self._open.move_to_end(open_key)
+                    self.suppressed += 1
+                    return Decision(False, open_key, entry)
+
+            entry = OpenAlert(alert_id=None, opened_at=now, last_seen_at=now)
+            self._forget(key)
+            self._open[key] = entry
+            while len(self._open) > self.max_keys:
+                self._forget(next(iter(self._open)))
+            self.fired += 1
+            return Decision(True, key, entry)
+
+    def attach(self, key: Key, alert_id: Optional[str]):
+        """Record the stored alert's id against the key check() opened."""
+        if not alert_id:
+            return
+        with self._lock:
+            entry = self._open.get(key)
+            if entry is not None:
+                entry.alert_id = alert_id
+                self._keys_by_alert[alert_id] = key
+
+    def discard(self, key: Key):
+        """Drop a key check() reserved whose alert was never stored, so the next occurrence fires."""
+        with self._lock:
+            self._forget(key)
+
+    def release(self, alert_id: str):
+        """Close the alert's key (e.g. on acknowledge) so the next occurrence fires."""
+        with self._lock:
+            key = self._keys_by_alert.get(alert_id)
+            if key is not None:
+                self._forget(key)
+
+    def _forget(self, key: Key):
+        entry = self._open.pop(key, None)
+        if entry is not None and entry.alert_id is not None:
+            self._keys_by_alert.pop(entry.alert_id, None)
+
+    def _cooldown(self, severity: str) -> float:
+        return self.cooldowns.get(severity, 0.0)
+
+    def __len__(self):
+        return len(self._open)
+
+    def clear(self):
+        with self._lock:
+            self._open.clear()
+            self._keys_by_alert.clear()
+            self.fired = self.suppressed = 0
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    def save(self):
+        """Write the still-open alerts to state_path (no-op if unset)."""
+        if not self.state_path:
+            return
+        now = time.time()
+        with self._lock:
+            entries = [
+                {"key": list(key), **asdict(entry)}
+                for key, entry in self._open.items()
+                if now - entry.opened_at < self._cooldown(key[2])
+            ]
+        directory = os.path.dirname(os.path.abspath(self.state_path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self.state_path)
+        logger.info(f"Saved {len(entries)} open alert key(s) to {self.state_path}")
+
+    def load(self):
+        """Restore open alerts saved by save(); expired entries are skipped."""
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Alert suppression state not loaded – {e}")
+            return
+        now = time.time()
+        with self._lock:
+            for item in entries:
+                key = tuple(item.pop("key"))
+                entry = OpenAlert(**item)
+                if now - entry.opened_at >= self._cooldown(key[2]):
+                    continue
+                self._open[key] = entry
+                if entry.alert_id:
+                    self._keys_by_alert[entry.alert_id] = key
+            while len(self._open) > self.max_keys:
+                self._forget(next(iter(self._open)))
+        logger.info(f"Restored {len(self._open)} open alert key(s) from {self.state_path}")
+
+
+# Process-wide suppressor used by the alert service (ALERT_DEDUP_ENABLED)
+alert_suppressor = AlertSuppressor(
+    cooldowns={
+        "Critical": settings.ALERT_COOLDOWN_CRITICAL_SECONDS,
+        "Warning": settings.ALERT_COOLDOWN_WARNING_SECONDS,
+    },
+    max_keys=settings.ALERT_DEDUP_MAX_KEYS,
+    state_path=settings.ALERT_DEDUP_STATE_PATH,
+)
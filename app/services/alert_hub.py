@@ -0,0 +1,164 @@
+"""
+Alert hub – in-process fan-out of alert events to live dashboard streams.
+
+create_alert_if_needed() / create_alerts_batch() publish every new alert and
+the acknowledge route publishes acknowledgements; the SSE and WebSocket
+endpoints under /alerts subscribe. Delivery is push-only, so open dashboards
+cost no database queries.
+
+Each subscriber has its own bounded queue and optional filters (patient,
+severities). A subscriber that falls behind loses its oldest queued events
+rather than slowing publishers or growing without bound; the number dropped
+is kept on the subscription.
+
+The hub only reaches subscribers in the same worker process. Events can be
+published from any thread: delivery is handed to the subscriber's event loop.
+"""
+import asyncio
+import json
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from loguru import logger
+
+from app.core.config import settings
+
+ALERT_CREATED = "alert.created"
+ALERT_ACKNOWLEDGED = "alert.acknowledged"
+ALERT_REPEATED = "alert.repeated"  # a suppressed repeat raised an open alert's occurrence count
+
+Event = Dict[str, Any]
+
+
+class Subscription:
+    """One live stream's view of the hub: a bounded queue of matching events."""
+
+    def __init__(
+        self,
+        hub: "AlertHub",
+        patient_id: Optional[str],
+        severities: Optional[Iterable[str]],
+        maxsize: int,
+    ):
+        self.hub = hub
+        self.patient_id = patient_id
+        self.severities = frozenset(severities) if severities else None
+        self.queue: "asyncio.Queue[Event]" = asyncio.Queue(maxsize)
+        self.loop = asyncio.get_running_loop()
+        self.dropped = 0
+
+    def matches(self, event: Event) -> bool:
+        alert = event["alert"]
+        if self.patient_id is not None and alert.get("patient_id") != self.patient_id:
+            return False
+        if self.severities is not None and alert.get("severity") not in self.severities:
+            return False
+        return True
+
+    def offer(self, event: Event):
+        """Enqueue without blocking; a full queue drops its oldest event. Runs on self.loop."""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Event]:
+        """Next event, or None if none arrives within timeout seconds."""
+        if not self.queue.empty():
+            return self.queue.get_nowait()
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Event:
+        return await self.queue.get()
+
+
+class AlertHub:
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: List[Subscription] = []
+        self._lock = threading.Lock()
+
+    def subscribe(
+        self,
+        patient_id: Optional[str] = None,
+        severities: Optional[Iterable[str]] = None,
+    ) -> Subscription:
+        """Register a subscriber; must be called from the event loop that will consume it."""
+        subscription = Subscription(self, patient_id, severities, self.queue_size)
+        with self._lock:
+            self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, event_type: str, alert: Dict[str, Any]) -> int:
+        """
+        Fan an alert event out to every matching subscriber without blocking.
+        Returns the number of subscribers it was handed to.
+        """
+        with self._lock:
+            subscribers = list(self._subscribers)
+        if not subscribers:
+            return 0
+
+        event = {
+            "type": event_type,
+            "alert": alert,
+            "published_at": datetime.now(timezone.utc).isoformat(),
+        }
+        try:
+            current_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            current_loop = None
+
+        delivered = 0
+        for subscription in subscribers:
+            if not subscription.matches(event):
+                continue
+            try:
+                if subscription.loop is current_loop:
+                    subscription.offer(event)
+                else:
+                    subscription.loop.call_soon_threadsafe(subscription.offer, event)
+                delivered += 1
+            except RuntimeError as e:  # subscriber's loop already closed
+                logger.debug(f"Dropping alert subscriber: {e}")
+                self.unsubscribe(subscription)
+        return delivered
+
+    def clear(self):
+        with self._lock:
+            self._subscribers.clear()
+
+
+def format_sse(event: Event) -> str:
+    """Serialise an event as one Server-Sent Events message."""
+    return f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+# Process-wide hub shared by the alert service and the stream endpoints
+alert_hub = AlertHub(queue_size=settings.ALERT_STREAM_QUEUE_SIZE)
@@ -0,0 +1,523 @@
+"""
+Write-behind alert persistence.
+
+With the queue running, create_alert_if_needed() no longer waits for the
+alerts insert: the alert gets a client-side id and created_at, is appended to
+an on-disk journal and queued, and the request returns. A background task
+drains the queue in multi-row writes, retrying with exponential backoff while
+the database is unavailable.
+
+Durability comes from the journal, an append-only JSON-lines file:
+- {"op": "add", "record": {...}} when an alert is queued
+- {"op": "done", "ids": [...]} once a batch is stored, or a record dead-lettered
+On start the journal is replayed and every alert without a "done" entry is
+queued again, so alerts survive restarts and outages. Writes are idempotent
+(upsert on the client-generated id), so an alert stored just before a crash
+is not duplicated by the replay; the upsert brings a stored row's
+acknowledged, occurrences and last_occurrence_at up to date instead, so
+changes made to the replayed record are not lost.
+
+Each worker process writes its own journal, <journal>.<pid>.jsonl, and
+holds an exclusive lock on <that file>.lock for as long as it runs, so no
+worker ever rewrites another's records. On start a worker also adopts the
+journals whose lock nobody holds – those of workers that died or were
+scaled away, and the single shared journal of older versions – by moving
+their unsaved alerts into its own journal and deleting them. A worker that
+stops with nothing pending deletes its journal.
+
+The journal is flushed to the OS on every append, which survives a process
+crash; set ALERT_JOURNAL_FSYNC to also survive a power loss at the cost of
+one fsync per write.
+
+Until its batch is stored a queued alert is not in the alerts table, so an
+acknowledgement is applied to the queued record instead (and journaled) by
+update_pending(); the batch then stores the alert acknowledged.
+
+Occurrence counts of repeated alerts (see alert_dedup) are coalesced here
+too: record_occurrences() only keeps the latest count per alert, and the
+flusher writes each count once per flush interval – onto the queued record
+if the alert is still queued, else with one UPDATE – so a crisis that repeats
+on every reading costs one write per interval, not one per reading. Counts
+are absolute, so one lost in a crash is corrected by the next repeat.
+
+Only errors a retry can fix (connection loss, timeouts, server errors) are
+retried. When the database rejects a batch outright – an integrity or data
+error, i.e. some record in it can never be stored – the batch is split in
+halves until the bad records are isolated; those are moved to a dead-letter
+file next to the journal (<journal>.dead.jsonl) with the error, and the rest
+are stored, so one bad record cannot hold back the alerts queued after it.
+A dead-lettered record is marked done in the journal straight away, so a
+transient error later in the same batch does not dead-letter it again on
+the retry, nor does a replay.
+"""
+import asyncio
+import glob
+import json
+import os
+import re
+import threading
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Set
+
+from loguru import logger
+
+try:
+    import fcntl
+except ImportError:  # no advisory locks (Windows): only run a single worker there
+    fcntl = None
+
+from app.core.config import settings
+
+Record = Dict[str, Any]
+
+# SQLSTATE classes a retry cannot fix: data exceptions, integrity violations, undefined columns etc.
+PERMANENT_SQLSTATE_CLASSES = ("22", "23", "42")
+# PostgREST request (PGRST1xx) and schema (PGRST2xx) errors; PGRST0xx are connection errors
+PERMANENT_POSTGREST_PREFIXES = ("PGRST1", "PGRST2")
+
+
+def is_permanent_error(error: Exception) -> bool:
+    """
+    True if writing the same records again cannot succeed, False for errors
+    worth retrying. Reads the SQLSTATE from postgrest's APIError (.code) or
+    from the driver error SQLAlchemy wraps (.orig.sqlstate / .orig.pgcode).
+    """
+    if isinstance(error, (TypeError, ValueError)):
+        return True  # the records could not be serialised
+    code = getattr(error, "code", None)
+    if not isinstance(code, str):
+        orig = getattr(error, "orig", None)
+        code = getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)
+    if not isinstance(code, str):
+        return False
+    return code[:2] in PERMANENT_SQLSTATE_CLASSES or code.startswith(PERMANENT_POSTGREST_PREFIXES)
+
+
+class AlertJournal:
+    """Append-only JSON-lines log of queued and stored alerts."""
+
+    def __init__(self, path: str, fsync: bool = False):
+        self.path = path
+        self.fsync = fsync
+        self.dead_letter_path = f"{os.path.splitext(path)[0]}.dead.jsonl"
+        self.lock_path = f"{path}.lock"
+        self._lock = threading.Lock()
+        self._file = None
+        self._owner = None
+
+    def for_worker(self, worker_id: int) -> "AlertJournal":
+        """This journal's per-worker file, <root>.<worker_id><ext>."""
+        root, ext = os.path.splitext(self.path)
+        return AlertJournal(f"{root}.{worker_id}{ext}", fsync=self.fsync)
+
+    def worker_journals(self) -> List["AlertJournal"]:
+        """The per-worker journals next to this one, and this one if it exists (a legacy shared journal)."""
+        root, ext = os.path.splitext(self.path)
+        pattern = re.compile(re.escape(os.path.basename(root)) + r"\.\d+" + re.escape(ext) + "$")
+        paths = [p for p in glob.glob(f"{glob.escape(root)}.*{ext}") if pattern.match(os.path.basename(p))]
+        if os.path.exists(self.path):
+            paths.append(self.path)
+        return [AlertJournal(p, fsync=self.fsync) for p in sorted(paths)]
+
+    def claim(self) -> bool:
+        """Take the journal's lock without waiting; False if a live process holds it."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        owner = open(self.lock_path, "a")
+        if fcntl is not None:
+            try:
+                fcntl.flock(owner.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                owner.close()
+                return False
+        self._owner = owner
+        return True
+
+    def release(self):
+        if self._owner is not None:
+            self._owner.close()
+            self._owner = None
+
+    def remove(self):
+        """Delete the journal and its lock file (call while holding the lock)."""
+        for path in (self.path, self.lock_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self.release()
+
+    def open(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def append(self, records: Iterable[Record]):
+        self._write("".join(json.dumps({"op": "add", "record": r}, default=str) + "\n" for r in records))
+
+    def mark_done(self, ids: List[str]):
+        self._write(json.dumps({"op": "done", "ids": ids}) + "\n")
+
+    def dead_letter(self, records: List[Record], error: Exception):
+        """Keep records the database rejected, with the reason, for manual repair and replay."""
+        failed_at = datetime.now(timezone.utc).isoformat()
+        text = "".join(
+            json.dumps({"record": r, "error": str(error), "failed_at": failed_at}, default=str) + "\n"
+            for r in records
+        )
+        with self._lock, open(self.dead_letter_path, "a", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _write(self, text: str):
+        with self._lock:
+            self._file.write(text)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+
+    def replay(self) -> List[Record]:
+        """Alerts queued but never marked done, in the order they were queued."""
+        if not os.path.exists(self.path):
+            return []
+        pending: Dict[str, Record] = {}
+        with open(self.path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-write; nothing after it was acknowledged
+                    logger.warning(f"Skipping unreadable alert journal line {line_number}")
+                    continue
+                if entry.get("op") == "add":
+                    record = entry["record"]
+                    pending[record["id"]] = record
+                elif entry.get("op") == "done":
+                    for alert_id in entry["ids"]:
+                        pending.pop(alert_id, None)
+        return list(pending.values())
+
+    def compact(self, pending: List[Record]):
+        """Atomically rewrite the journal so it only holds the given pending alerts."""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in pending:
+                f.write(json.dumps({"op": "add", "record": record}, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        with self._lock:
+            reopen = self._file is not None
+            if reopen:
+                self._file.close()
+            os.replace(tmp_path, self.path)
+            if reopen:
+                self._file = open(self.path, "a", encoding="utf-8")
+
+    def size(self) -> int:
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+
+class AlertWriteBehindQueue:
+    """
+    Journal-backed queue of alerts flushed to the alert repository in batches.
+    repository_factory returns the Repository to write through (get_repository by default).
+    """
+
+    def __init__(
+        self,
+        journal: AlertJournal,
+        repository_factory: Optional[Callable[[], Any]] = None,
+        batch_size: int = 200,
+        flush_interval: float = 1.0,
+        retry_base: float = 0.5,
+        retry_max: float = 30.0,
+        compact_bytes: int = 1_000_000,
+    ):
+        # journal names the shared location; each worker writes journal.for_worker(pid)
+        self._base_journal = journal
+        self.journal = journal
+        self.repository_factory = repository_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.compact_bytes = compact_bytes
+
+        self._pending: Deque[Record] = deque()
+        self._by_id: Dict[str, Record] = {}
+        self._in_flight: Set[str] = set()
+        self._dead_letter_ids: Set[str] = set()  # dead-lettered, still in _pending until their batch ends
+        self._batch_done: Optional[asyncio.Event] = None
+        self._occurrences: Dict[str, Record] = {}
+        self._occurrences_flushed_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self.flushed = 0
+        self.failures = 0
+        self.dead_lettered = 0
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        """
+        Claim this worker's journal, adopt orphaned ones, and start the
+        background flusher on the running loop.
+        """
+        if self.running:
+            return
+        journal = self._base_journal.for_worker(os.getpid())
+        if not journal.claim():
+            raise OSError(f"Alert journal {journal.path} is locked by another process")
+        self.journal = journal
+
+        recovered: Dict[str, Record] = {r["id"]: r for r in journal.replay()}
+        adopted = []
+        for orphan in self._base_journal.worker_journals():
+            if orphan.path == journal.path or not orphan.claim():
+                continue  # ours, or a live worker's
+            if not os.path.exists(orphan.path):
+                orphan.release()  # adopted by another worker while we waited for the lock
+                continue
+            records = orphan.replay()
+            recovered.update((r["id"], r) for r in records)
+            adopted.append(orphan)
+            if records:
+                logger.warning(f"Adopting {len(records)} unsaved alert(s) from {orphan.path}")
+        pending = list(recovered.values())
+        # Own journal first, durably; only then drop the adopted ones
+        journal.compact(pending)
+        for orphan in adopted:
+            orphan.remove()
+        journal.open()
+        self._pending = deque(pending)
+        self._by_id = {r["id"]: r for r in pending}
+        if pending:
+            logger.warning(f"Recovered {len(pending)} unsaved alert(s) into {journal.path}")
+
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self._batch_done = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="alert-write-behind")
+        if recovered:
+            self._wakeup.set()
+
+    async def stop(self, timeout: float = 5.0):
+        """Flush what can be flushed within timeout; anything left stays in the journal."""
+        if self._task is None:
+            return
+        self._stopping.set()
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(self._task, timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{len(self._pending)} alert(s) left in the journal for the next start")
+        self._task = None
+        self._end_flight()  # a batch cut off by the timeout stays pending
+        self.journal.close()
+        if self._pending:
+            self.journal.release()  # left for the next start, or for another worker to adopt
+        else:
+            self.journal.remove()
+
+    # ------------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------------
+    def enqueue(self, record: Record) -> Record:
+        return self.enqueue_many([record])[0]
+
+    def enqueue_many(self, records: List[Record]) -> List[Record]:
+        """
+        Journal and queue alerts for writing. Each gets a client-side id and
+        created_at so callers can return it as the stored alert right away.
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        queued = [{"id": str(uuid.uuid4()), "created_at": now, **r} for r in records]
+        self.journal.append(queued)
+        self._call_in_loop(self._push, queued)
+        return queued
+
+    def _push(self, records: List[Record]):
+        self._pending.extend(records)
+        self._by_id.update((r["id"], r) for r in records)
+        self._wakeup.set()
+
+    async def update_pending(self, alert_id: str, changes: Record) -> Optional[Record]:
+        """
+        Apply changes to an alert that is still queued and return it; None if
+        the alert is not queued (stored already, or never queued here), in
+        which case the caller updates the alerts table. An alert whose batch
+        is being written is waited for, as the write may already have sent it.
+        Call on the queue's event loop.
+        """
+        if not self.running:
+            return None
+        while alert_id in self._in_flight:
+            self._batch_done.clear()
+            await self._batch_done.wait()
+        record = self._by_id.get(alert_id)
+        if record is None:
+            return None
+        record.update(changes)
+        self.journal.append([record])  # replay keeps the last entry per id
+        return record
+
+    def _call_in_loop(self, fn, *args):
+        try:
+            same_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            same_loop = False
+        if same_loop:
+            fn(*args)
+        else:
+            self._loop.call_soon_threadsafe(fn, *args)
+
+    def record_occurrences(self, alert_id: str, occurrences: int, last_occurrence_at: str):
+        """Set an open alert's repeat count; written by the flusher, at most once per flush interval."""
+        current = self._occurrences.get(alert_id)
+        if current is None or occurrences >= current["occurrences"]:
+            self._occurrences[alert_id] = {"occurrences": occurrences, "last_occurrence_at": last_occurrence_at}
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    # ------------------------------------------------------------------
+    # Flusher
+    # ------------------------------------------------------------------
+    async def _run(self):
+        delay = self.retry_base
+        self._occurrences_flushed_at = self._loop.time()
+        while True:
+            if self._occurrences and (
+                self._stopping.is_set() or self._loop.time() - self._occurrences_flushed_at >= self.flush_interval
+            ):
+                await self._flush_occurrences()
+
+            if not self._pending:
+                if self._stopping.is_set():
+                    return
+                self._wakeup.clear()
+                await self._wait(self._wakeup, self.flush_interval)
+                continue
+
+            batch = [self._pending[i] for i in range(min(self.batch_size, len(self._pending)))]
+            for record in batch:
+                # Queued alerts are stored with their latest count; no UPDATE needed
+                update = self._occurrences.pop(record["id"], None)
+                if update is not None:
+                    record.update(update)
+            self._in_flight = {r["id"] for r in batch}
+            try:
+                await self._write_isolating([r for r in batch if r["id"] not in self._dead_letter_ids])
+            except Exception as e:
+                self._end_flight()
+                self.failures += 1
+                logger.error(f"Alert batch of {len(batch)} not stored, retrying in {delay:.1f}s: {e}")
+                if await self._wait(self._stopping, delay):
+                    return  # shutting down: the journal keeps the rest
+                delay = min(delay * 2, self.retry_max)
+                continue
+
+            delay = self.retry_base
+            for _ in batch:
+                alert_id = self._pending.popleft()["id"]
+                self._by_id.pop(alert_id, None)
+                self._dead_letter_ids.discard(alert_id)
+            self._end_flight()
+            self.journal.mark_done([r["id"] for r in batch])
+            self.flushed += len(batch)
+            if not self._pending and self.journal.size() > self.compact_bytes:
+                self.journal.compact([])
+
+    def _end_flight(self):
+        self._in_flight = set()
+        self._batch_done.set()
+
+    async def _write_isolating(self, batch: List[Record]):
+        """
+        Store the batch, dead-lettering the records the database rejects
+        permanently. A bad batch is split in halves until each bad record is
+        alone (log2(batch) extra round trips per bad record). Transient errors
+        propagate so the caller retries; halves already stored are written
+        again harmlessly by the idempotent upsert, and records already
+        dead-lettered are left out of the retry.
+        """
+        try:
+            await self._write(batch)
+            return
+        except Exception as e:
+            if not is_permanent_error(e):
+                raise
+            if len(batch) == 1:
+                logger.error(f"Alert {batch[0].get('id')} rejected by the database, dead-lettered: {e}")
+                self.journal.dead_letter(batch, e)
+                self.journal.mark_done([batch[0]["id"]])
+                self._dead_letter_ids.add(batch[0]["id"])
+                self.dead_lettered += 1
+                return
+        middle = len(batch) // 2
+        await self._write_isolating(batch[:middle])
+        await self._write_isolating(batch[middle:])
+
+    async def _flush_occurrences(self):
+        updates, self._occurrences = self._occurrences, {}
+        self._occurrences_flushed_at = self._loop.time()
+        for alert_id, update in updates.items():
+            record = self._by_id.get(alert_id)
+            if record is not None:
+                record.update(update)  # still queued: stored with its batch
+                continue
+            try:
+                await self._repository().alerts.update_occurrences(
+                    alert_id, update["occurrences"], update["last_occurrence_at"],
+                )
+            except Exception as e:
+                logger.error(f"Failed to update occurrences on alert {alert_id}: {e}")
+                if not is_permanent_error(e):
+                    self.record_occurrences(alert_id, **update)  # next round, unless a newer count came in
+
+    async def _write(self, batch: List[Record]):
+        await self._repository().alerts.upsert_many(batch)
+
+    def _repository(self):
+        factory = self.repository_factory
+        if factory is None:
+            from app.repositories import get_repository
+            factory = get_repository
+        return factory()
+
+    @staticmethod
+    async def _wait(event: asyncio.Event, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+# Process-wide queue, started and stopped by the app lifespan (ALERT_WRITE_BEHIND)
+alert_queue = AlertWriteBehindQueue(
+    journal=AlertJournal(settings.ALERT_JOURNAL_PATH, fsync=settings.ALERT_JOURNAL_FSYNC),
+    batch_size=settings.ALERT_QUEUE_BATCH_SIZE,
+    flush_interval=settings.ALERT_QUEUE_FLUSH_INTERVAL,
+    retry_max=settings.ALERT_QUEUE_RETRY_MAX_SECONDS,
+)
@@ -1,9 +1,18 @@
 from loguru import logger
-from typing import Optional
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from app.core.config import settings
+from app.repositories import AlertRepository
+from app.services.alert_dedup import Decision, Key, alert_suppressor
+from app.services.alert_hub import ALERT_CREATED, ALERT_REPEATED, alert_hub
+from app.services.alert_queue import alert_queue
+from app.services.metrics import ALERTS, timed
+from app.services.rule_engine import NO_MATCH, Rule, RuleSet, alert_rules
 
 
-def create_alert_if_needed(
-    supabase,
+@timed("alerts.create_alert_if_needed")
+async def create_alert_if_needed(
+    alerts: AlertRepository,
     patient_id: str,
     vital_reading_id: str,
     risk_level: str,
@@ -12,82 +21,218 @@ def create_alert_if_needed(
 ) -> Optional[dict]:
     """
     Evaluate the risk result and rule-based thresholds.
-    If an alert should be triggered, write it to Supabase and return it.
+    If an alert should be triggered, write it through the alert repository and return it.
+    While the write-behind queue is running the alert is journaled and queued
+    instead, and stored in the background.
+
+    A repeat of an alert that is still in its cool-down window is not stored
+    as a new row: the open alert's occurrence count is updated and the open
+    alert is returned (marked "repeated"), so callers still see an active alert.
+    Returns None only if no rule fired.
     """
     alert_info = _evaluate_thresholds(risk_level, risk_score, vital_data)
     if alert_info is None:
         return None
 
-    record = {
+    decision = _check_suppression(patient_id, alert_info)
+    if decision is not None and not decision.fire:
+        ALERTS.inc(alert_info["severity"], "repeated")
+        await _record_occurrences(alerts, [decision])
+        return _repeated_alert(decision, alert_info)
+
+    record = _build_alert_record(patient_id, vital_reading_id, alert_info)
+
+    if alert_queue.running:
+        alert = alert_queue.enqueue(record)
+        logger.warning(
+            f"Alert queued for patient {patient_id}: [{alert_info['severity']}] {alert_info['message']}"
+        )
+    else:
+        try:
+            alert = await alerts.insert(record) or record
+            logger.warning(
+                f"Alert created for patient {patient_id}: [{alert_info['severity']}] {alert_info['message']}"
+            )
+        except Exception as e:
+            logger.error(f"Failed to write alert: {e}")
+            alert = record  # return in-memory record even if DB write fails
+
+    if decision is not None:
+        _settle_reservation(decision, alert)
+    ALERTS.inc(alert_info["severity"], "created")
+    alert_hub.publish(ALERT_CREATED, alert)
+    return alert
+
+
+@timed("alerts.create_alerts_batch")
+async def create_alerts_batch(alerts: AlertRepository, candidates: List[dict]) -> List[Optional[dict]]:
+    """
+    Batch counterpart of create_alert_if_needed().
+
+    Each candidate carries the same keys as create_alert_if_needed's arguments
+    (patient_id, vital_reading_id, risk_level, risk_score, vital_data).
+    All triggered alerts are written in a single multi-row insert; repeats,
+    including repeats within the batch, only update occurrence counts.
+    Returns one entry per candidate: the alert record, the open alert for a
+    repeat, or None if no rule fired.
+    """
+    results: List[Optional[dict]] = [None] * len(candidates)
+    pending: List[tuple[int, dict, Optional[Decision]]] = []
+    repeated: Dict[Key, Decision] = {}
+    repeats: List[tuple[int, Decision, dict]] = []
+
+    for i, (c, alert_info) in enumerate(zip(candidates, _evaluate_thresholds_batch(candidates))):
+        if alert_info is None:
+            continue
+        decision = _check_suppression(c["patient_id"], alert_info)
+        if decision is not None and not decision.fire:
+            ALERTS.inc(alert_info["severity"], "repeated")
+            repeated[decision.key] = decision
+            repeats.append((i, decision, alert_info))
+            continue
+        record = _build_alert_record(c["patient_id"], c["vital_reading_id"], alert_info)
+        pending.append((i, record, decision))
+
+    if pending:
+        records = [record for _, record, _ in pending]
+        if alert_queue.running:
+            saved = alert_queue.enqueue_many(records)
+            logger.warning(f"{len(records)} alert(s) queued from batch.")
+        else:
+            saved = await _insert_alert_batch(alerts, records)
+
+        for (i, record, decision), alert in zip(pending, saved):
+            results[i] = alert
+            if decision is not None:
+                _settle_reservation(decision, alert)
+            ALERTS.inc(record["severity"], "created")
+            alert_hub.publish(ALERT_CREATED, alert)
+
+    if repeated:
+        await _record_occurrences(alerts, list(repeated.values()))
+    # After attach(), so repeats of an alert opened in this batch carry its id
+    for i, decision, alert_info in repeats:
+        results[i] = _repeated_alert(decision, alert_info)
+    return results
+
+
+def _check_suppression(patient_id: str, alert_info: dict) -> Optional[Decision]:
+    if not settings.ALERT_DEDUP_ENABLED:
+        return None
+    return alert_suppressor.check(patient_id, alert_info["rule"], alert_info["severity"])
+
+
+def _settle_reservation(decision: Decision, alert: dict):
+    """
+    Tie the key check() reserved to the stored alert. An alert that was not
+    stored has no id to fold repeats into, so its key is dropped instead and
+    the next occurrence fires again rather than being suppressed unrecorded.
+    """
+    if alert.get("id"):
+        alert_suppressor.attach(decision.key, alert["id"])
+    else:
+        alert_suppressor.discard(decision.key)
+
+
+def _repeated_alert(decision: Decision, alert_info: dict) -> dict:
+    """The open alert a repeat was folded into, shaped like an alert row."""
+    patient_id, _, severity = decision.key
+    open_alert = decision.open_alert
+    return {
+        "id": open_alert.alert_id,
         "patient_id": patient_id,
-        "vital_reading_id": vital_reading_id,
         "message": alert_info["message"],
-        "severity": alert_info["severity"],
+        "severity": severity,
         "acknowledged": False,
+        "occurrences": open_alert.occurrences,
+        "last_occurrence_at": datetime.fromtimestamp(open_alert.last_seen_at, timezone.utc).isoformat(),
+        "repeated": True,
     }
 
+
+async def _record_occurrences(alerts: AlertRepository, decisions: List[Decision]):
+    """
+    Write the current occurrence count onto each open alert. With the
+    write-behind queue running the count is handed to the queue, which
+    coalesces repeats and writes each alert's count once per flush interval;
+    otherwise it is written inline. Counts are absolute, so a lost update is
+    corrected by the next one.
+    """
+    for decision in decisions:
+        open_alert = decision.open_alert
+        if open_alert.alert_id is None:
+            continue
+        last_seen = datetime.fromtimestamp(open_alert.last_seen_at, timezone.utc).isoformat()
+        if alert_queue.running:
+            alert_queue.record_occurrences(open_alert.alert_id, open_alert.occurrences, last_seen)
+        else:
+            try:
+                await alerts.update_occurrences(open_alert.alert_id, open_alert.occurrences, last_seen)
+            except Exception as e:
+                logger.error(f"Failed to update occurrences on alert {open_alert.alert_id}: {e}")
+        patient_id, rule, severity = decision.key
+        alert_hub.publish(ALERT_REPEATED, {
+            "id": open_alert.alert_id,
+            "patient_id": patient_id,
+            "severity": severity,
+            "occurrences": open_alert.occurrences,
+            "last_occurrence_at": last_seen,
+        })
+
+
+async def _insert_alert_batch(alerts: AlertRepository, records: List[dict]) -> List[dict]:
     try:
-        response = supabase.table("alerts").insert(record).execute()
-        alert = response.data[0] if response.data else record
-        logger.warning(
-            f"Alert created for patient {patient_id}: [{alert_info['severity']}] {alert_info['message']}"
-        )
-        return alert
+        saved = await alerts.insert_many(records)
+        if len(saved) != len(records):
+            saved = records
+        logger.warning(f"{len(records)} alert(s) created in batch insert.")
     except Exception as e:
-        logger.error(f"Failed to write alert to Supabase: {e}")
-        return record  # return in-memory record even if DB write fails
+        logger.error(f"Failed to write alert batch: {e}")
+        saved = records  # return in-memory records even if DB write fails
+    return saved
+
+
+def _build_alert_record(patient_id: str, vital_reading_id: str, alert_info: dict) -> dict:
+    return {
+        "patient_id": patient_id,
+        "vital_reading_id": vital_reading_id,
+        "message": alert_info["message"],
+        "severity": alert_info["severity"],
+        "acknowledged": False,
+    }
 
 
 def _evaluate_thresholds(risk_level: str, risk_score: float, vital_data: dict) -> Optional[dict]:
-    """Return alert message and severity, or None if no alert needed."""
-    bp_s = vital_data.get("bp_systolic", 0)
-    bp_d = vital_data.get("bp_diastolic", 0)
-    chol = vital_data.get("cholesterol", 0)
-    glucose = vital_data.get("glucose") or 0
-
-    # Critical hard thresholds (regardless of ML score)
-    if bp_s >= 180 or bp_d >= 120:
-        return {
-            "severity": "Critical",
-            "message": (
-                f"Hypertensive crisis detected: BP {bp_s}/{bp_d} mmHg. "
-                "Immediate medical attention required."
-            ),
-        }
-    if glucose >= 300:
-        return {
-            "severity": "Critical",
-            "message": (
-                f"Critically high blood glucose: {glucose} mg/dL. "
-                "Seek emergency care immediately."
-            ),
-        }
-
-    # ML model risk-level thresholds
-    if risk_level == "High":
-        return {
-            "severity": "Warning",
-            "message": (
-                f"High deterioration risk detected (score: {round(risk_score * 100)}%). "
-                "Clinical review recommended within 24 hours."
-            ),
-        }
-
-    # Warning-level rule triggers
-    if bp_s >= 160:
-        return {
-            "severity": "Warning",
-            "message": f"Elevated blood pressure: {bp_s}/{bp_d} mmHg. Please contact your care team.",
-        }
-    if chol >= 240:
-        return {
-            "severity": "Warning",
-            "message": f"High cholesterol reading: {chol} mg/dL. Schedule a lipid review.",
-        }
-    if glucose >= 200:
-        return {
-            "severity": "Warning",
-            "message": f"Elevated blood glucose: {glucose} mg/dL. Monitor closely and review medications.",
-        }
-
-    return None  # no alert needed
\ No newline at end of file
+    """
+    Return the alert's rule, message and severity, or None if no alert needed.
+    The rules (thresholds, severities, messages, precedence) come from the
+    declarative alert rule set; see app/services/rules/alert_rules.json.
+    A rule's family (e.g. "blood_pressure") is shared by its Warning and
+    Critical levels, so suppression can tell escalations apart.
+    """
+    rule_set = alert_rules.get()
+    reading = {**vital_data, "risk_level": risk_level, "risk_score": risk_score}
+    rule = rule_set.evaluate_one(reading)
+    return _alert_info(rule_set, rule, reading) if rule is not None else None
+
+
+def _evaluate_thresholds_batch(candidates: List[dict]) -> List[Optional[dict]]:
+    """_evaluate_thresholds() for many candidates, with the rules evaluated as vectorised masks."""
+    rule_set = alert_rules.get()
+    readings = [
+        {**c["vital_data"], "risk_level": c["risk_level"], "risk_score": c["risk_score"]}
+        for c in candidates
+    ]
+    matches = rule_set.evaluate(readings)
+    return [
+        _alert_info(rule_set, rule_set.rules[m], reading) if m != NO_MATCH else None
+        for m, reading in zip(matches, readings)
+    ]
+
+
+def _alert_info(rule_set: RuleSet, rule: Rule, reading: dict) -> dict:
+    return {
+        "rule": rule.outputs.get("family", rule.id),
+        "severity": rule.outputs["severity"],
+        "message": rule.render("message", {**reading, **rule_set.values(reading)}),
+    }
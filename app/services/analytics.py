@@ -2,10 +2,28 @@
 Analytics service – computes vital trends and detects deterioration
 patterns from historical readings stored in Supabase.
 """
-from typing import Dict, Any, List, Optional
-from loguru import logger
+from collections import Counter
+from itertools import chain
+from operator import itemgetter
+from typing import Dict, Any, List, Optional, Tuple
 
+import numpy as np
 
+from app.services.metrics import timed
+
+# Fields averaged over the whole window, and the subset used for trend direction
+AVERAGE_FIELDS = ["cholesterol", "hdl", "bp_systolic", "bp_diastolic", "weight", "glucose", "bmi", "risk_score"]
+TREND_FIELDS = ["cholesterol", "bp_systolic", "bp_diastolic", "risk_score", "weight"]
+# The only reading columns the analytics read; history fetches select just these
+ANALYTICS_COLUMNS = AVERAGE_FIELDS + ["risk_level", "recorded_at", "id"]
+COHORT_COLUMNS = ["patient_id"] + ANALYTICS_COLUMNS
+# A patient's newest reading, enough to rank the cohort by latest risk score
+RANKING_COLUMNS = ["patient_id", "risk_score", "recorded_at", "id"]
+
+NO_READINGS_MESSAGE = "No readings available yet."
+
+
+@timed("analytics.compute_analytics")
 def compute_analytics(patient_id: str, readings: List[Dict]) -> Dict[str, Any]:
     """
     Given a list of vital readings (newest first), return:
@@ -13,92 +31,270 @@ def compute_analytics(patient_id: str, readings: List[Dict]) -> Dict[str, Any]:
     - Risk level distribution
     - Deterioration flag (consecutive risk escalations)
     - Trend direction per vital (improving / stable / worsening)
+
+    The readings are converted once into a (field, reading) matrix with NaN
+    for missing values; every statistic is then a vectorised reduction over
+    it, so the cost stays flat per reading for windows of thousands.
     """
     if not readings:
-        return {"message": "No readings available yet.", "patient_id": patient_id}
-
-    # Reverse so oldest → newest for trend detection
-    ordered = list(reversed(readings))
+        return {"message": NO_READINGS_MESSAGE, "patient_id": patient_id}
 
-    avg = _compute_averages(ordered)
-    risk_dist = _risk_distribution(ordered)
-    deteriorating = _detect_deterioration(ordered)
-    trends = _compute_trends(ordered)
-    latest = ordered[-1] if ordered else {}
+    # Columns run oldest → newest for trend detection
+    values, levels = _to_columns(readings)
+    present = ~np.isnan(values)
+    latest = readings[0]
 
     return {
         "patient_id": patient_id,
-        "total_readings": len(ordered),
+        "total_readings": len(readings),
         "latest_risk_level": latest.get("risk_level", "Unknown"),
         "latest_risk_score": latest.get("risk_score"),
-        "averages": avg,
-        "risk_distribution": risk_dist,
-        "deterioration_alert": deteriorating,
-        "trends": trends,
+        "averages": _compute_averages(values, present),
+        "risk_distribution": _risk_distribution(levels),
+        "deterioration_alert": _detect_deterioration(values[_RISK_SCORE]),
+        "trends": _compute_trends(values, present),
         "time_range": {
-            "from": ordered[0].get("recorded_at") if ordered else None,
-            "to": ordered[-1].get("recorded_at") if ordered else None,
+            "from": readings[-1].get("recorded_at"),
+            "to": latest.get("recorded_at"),
         },
     }
 
 
-def _compute_averages(readings: List[Dict]) -> Dict[str, Optional[float]]:
-    fields = ["cholesterol", "hdl", "bp_systolic", "bp_diastolic", "weight", "glucose", "bmi", "risk_score"]
-    result = {}
-    for field in fields:
-        vals = [r[field] for r in readings if r.get(field) is not None]
-        result[field] = round(sum(vals) / len(vals), 2) if vals else None
-    return result
+_RISK_SCORE = AVERAGE_FIELDS.index("risk_score")
+_TREND_ROWS = [AVERAGE_FIELDS.index(field) for field in TREND_FIELDS]
+
+
+def _to_columns(readings: List[Dict]) -> Tuple[np.ndarray, List[Optional[str]]]:
+    """One pass over the dicts: numeric fields as a float matrix (None → NaN), plus risk levels."""
+    # Newest-first readings → (field, reading) columns ordered oldest → newest
+    values = _value_matrix(readings)[:, ::-1]
+    levels = [r.get("risk_level") for r in readings]
+    return values, levels
+
+
+def _value_matrix(readings: List[Dict]) -> np.ndarray:
+    """(field, reading) float matrix in input order, NaN where a value is missing."""
+    try:
+        rows = list(map(_get_fields, readings))
+    except KeyError:  # rows that omit some columns
+        rows = [tuple(r.get(field) for field in AVERAGE_FIELDS) for r in readings]
+    # Flattening first lets NumPy convert one flat list (None → NaN), which is
+    # faster than a list of tuples.
+    flat = np.array(list(chain.from_iterable(rows)), dtype=float)
+    return flat.reshape(len(rows), len(AVERAGE_FIELDS)).T
+
+
+_get_fields = itemgetter(*AVERAGE_FIELDS)
+
+
+def _masked_sums(values: np.ndarray, present: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Per-field sum and count of the present values. cumsum adds strictly left
+    to right, so the sums are bit-identical to Python's sum() over the same
+    values (np.sum's pairwise summation would not be).
+    """
+    sums = np.cumsum(np.where(present, values, 0.0), axis=1)[:, -1]
+    return sums, present.sum(axis=1)
+
+
+def _compute_averages(values: np.ndarray, present: np.ndarray) -> Dict[str, Optional[float]]:
+    sums, counts = _masked_sums(values, present)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / counts
+    return {
+        field: round(float(mean), 2) if count else None
+        for field, mean, count in zip(AVERAGE_FIELDS, means, counts)
+    }
 
 
-def _risk_distribution(readings: List[Dict]) -> Dict[str, int]:
+def _risk_distribution(levels: List[Optional[str]]) -> Dict[str, int]:
     dist = {"Low": 0, "Moderate": 0, "High": 0}
-    for r in readings:
-        level = r.get("risk_level")
-        if level in dist:
-            dist[level] += 1
+    counts = Counter(levels)
+    for level in dist:
+        dist[level] = counts[level]
     return dist
 
 
-def _detect_deterioration(readings: List[Dict]) -> bool:
+def _detect_deterioration(risk_scores: np.ndarray) -> bool:
     """
     Flag deterioration if the last 3 readings show a monotonic
     increase in risk score (each reading worse than the previous).
     """
-    if len(readings) < 3:
+    recent = risk_scores[-3:]
+    if len(recent) < 3 or np.isnan(recent).any():
         return False
-    recent = readings[-3:]
-    scores = [r.get("risk_score") for r in recent if r.get("risk_score") is not None]
-    if len(scores) < 3:
-        return False
-    return scores[0] < scores[1] < scores[2]
+    return bool(recent[0] < recent[1] < recent[2])
 
 
-def _compute_trends(readings: List[Dict]) -> Dict[str, str]:
+def _compute_trends(values: np.ndarray, present: np.ndarray) -> Dict[str, str]:
     """Compare first half average vs second half average for each vital."""
-    if len(readings) < 4:
+    total = values.shape[1]
+    if total < 4:
         return {}
 
-    mid = len(readings) // 2
-    first_half = readings[:mid]
-    second_half = readings[mid:]
-
-    fields = ["cholesterol", "bp_systolic", "bp_diastolic", "risk_score", "weight"]
-    trends = {}
-
-    for field in fields:
-        v1 = [r[field] for r in first_half if r.get(field) is not None]
-        v2 = [r[field] for r in second_half if r.get(field) is not None]
-        if not v1 or not v2:
-            continue
-        avg1 = sum(v1) / len(v1)
-        avg2 = sum(v2) / len(v2)
-        delta = avg2 - avg1
-        if abs(delta) < 0.02 * avg1:  # <2% change = stable
-            trends[field] = "stable"
-        elif delta > 0:
-            trends[field] = "worsening"
-        else:
-            trends[field] = "improving"
-
-    return trends
\ No newline at end of file
+    mid = total // 2
+    sub_values, sub_present = values[_TREND_ROWS], present[_TREND_ROWS]
+    sums1, counts1 = _masked_sums(sub_values[:, :mid], sub_present[:, :mid])
+    sums2, counts2 = _masked_sums(sub_values[:, mid:], sub_present[:, mid:])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        avg1 = sums1 / counts1
+        avg2 = sums2 / counts2
+    labels = _classify_trends(avg1, avg2)
+
+    return {
+        field: str(label)
+        for field, label, c1, c2 in zip(TREND_FIELDS, labels, counts1, counts2)
+        if c1 and c2
+    }
+
+
+def _classify_trends(avg1: np.ndarray, avg2: np.ndarray) -> np.ndarray:
+    """Vectorised classify_trend()."""
+    delta = avg2 - avg1
+    return np.select(
+        [np.abs(delta) < 0.02 * avg1, delta > 0],
+        ["stable", "worsening"],
+        default="improving",
+    )
+
+
+# ---------------------------------------------------------------------------
+# Cohort analytics
+# ---------------------------------------------------------------------------
+_LEVEL_CODES = {"Low": 0, "Moderate": 1, "High": 2}  # anything else → 3, not counted
+
+
+@timed("analytics.compute_cohort_analytics")
+def compute_cohort_analytics(readings: List[Dict], window: int) -> List[Dict[str, Any]]:
+    """
+    Analytics for every patient in one list of readings, grouped by patient
+    and newest first within each patient (as VitalRepository.for_cohort
+    returns them). Each row is what compute_analytics() returns for that
+    patient's latest `window` readings, plus the patient's name.
+
+    All patients are reduced together: readings are laid out in a
+    (field, patient, position) array padded with NaN, so every statistic is
+    one masked reduction along the last axis. Sums use cumsum so they add in
+    the same order as compute_analytics() and give identical results.
+    """
+    if not readings:
+        return []
+
+    # Group codes in order of first appearance; the stable sort keeps each
+    # patient's readings newest first even if patients arrive interleaved
+    codes: Dict[str, int] = {}
+    group = np.fromiter(
+        (codes.setdefault(r["patient_id"], len(codes)) for r in readings),
+        dtype=np.intp,
+        count=len(readings),
+    )
+    order = np.argsort(group, kind="stable")
+    group = group[order]
+    counts = np.bincount(group)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    position = np.arange(len(group)) - starts[group]  # 0 = newest
+
+    keep = position < window
+    order, group, position = order[keep], group[keep], position[keep]
+    lengths = np.minimum(counts, window)
+    n_groups, width = len(counts), int(lengths.max())
+
+    # Dense (field, patient, position) layout, oldest → newest along the last axis
+    values = _value_matrix(readings)
+    dense = np.full((len(AVERAGE_FIELDS), n_groups, width), np.nan)
+    dense[:, group, lengths[group] - 1 - position] = values[:, order]
+    present = ~np.isnan(dense)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sums = np.cumsum(np.where(present, dense, 0.0), axis=2)[..., -1]
+        means = sums / present.sum(axis=2)
+    averages = _round_or_none(means, present.any(axis=2))
+
+    trends = _cohort_trends(dense, present, lengths)
+    deteriorating = _cohort_deterioration(dense[_RISK_SCORE], lengths)
+
+    level_codes = np.fromiter(
+        (_LEVEL_CODES.get(r.get("risk_level"), 3) for r in readings),
+        dtype=np.intp,
+        count=len(readings),
+    )
+    distribution = np.bincount(group * 4 + level_codes[order], minlength=n_groups * 4).reshape(n_groups, 4)
+
+    latest_index = order[position == 0]
+    oldest_index = order[position == lengths[group] - 1]
+
+    patient_ids = list(codes)
+    rows = []
+    for g, patient_id in enumerate(patient_ids):
+        latest = readings[latest_index[g]]
+        rows.append({
+            "patient_id": patient_id,
+            "patient_name": (latest.get("patients") or {}).get("name"),
+            "total_readings": int(lengths[g]),
+            "latest_risk_level": latest.get("risk_level", "Unknown"),
+            "latest_risk_score": latest.get("risk_score"),
+            "averages": dict(zip(AVERAGE_FIELDS, (column[g] for column in averages))),
+            "risk_distribution": {
+                "Low": int(distribution[g, 0]),
+                "Moderate": int(distribution[g, 1]),
+                "High": int(distribution[g, 2]),
+            },
+            "deterioration_alert": bool(deteriorating[g]),
+            "trends": trends[g],
+            "time_range": {
+                "from": readings[oldest_index[g]].get("recorded_at"),
+                "to": latest.get("recorded_at"),
+            },
+        })
+    return rows
+
+
+def _round_or_none(means: np.ndarray, has_values: np.ndarray) -> List[List[Optional[float]]]:
+    return [
+        [round(float(mean), 2) if has else None for mean, has in zip(field_means, field_has)]
+        for field_means, field_has in zip(means, has_values)
+    ]
+
+
+def _cohort_trends(dense: np.ndarray, present: np.ndarray, lengths: np.ndarray) -> List[Dict[str, str]]:
+    """First-half vs second-half averages for every patient at once."""
+    sub_values, sub_present = dense[_TREND_ROWS], present[_TREND_ROWS]
+    first_half = np.arange(dense.shape[2]) < (lengths // 2)[:, None]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        halves = []
+        for in_half in (first_half, ~first_half):
+            mask = sub_present & in_half
+            sums = np.cumsum(np.where(mask, sub_values, 0.0), axis=2)[..., -1]
+            counts = mask.sum(axis=2)
+            halves.append((sums / counts, counts))
+    (avg1, counts1), (avg2, counts2) = halves
+    labels = _classify_trends(avg1, avg2)
+    reported = (counts1 > 0) & (counts2 > 0) & (lengths >= 4)
+
+    return [
+        {field: str(labels[i, g]) for i, field in enumerate(TREND_FIELDS) if reported[i, g]}
+        for g in range(len(lengths))
+    ]
+
+
+def _cohort_deterioration(risk_scores: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Last three risk scores strictly increasing, per patient."""
+    last = np.clip(lengths[:, None] - 3 + np.arange(3), 0, None)
+    recent = np.take_along_axis(risk_scores, last, axis=1)
+    return (
+        (lengths >= 3)
+        & ~np.isnan(recent).any(axis=1)
+        & (recent[:, 0] < recent[:, 1])
+        & (recent[:, 1] < recent[:, 2])
+    )
+
+
+def classify_trend(avg1: float, avg2: float) -> str:
+    """Classify the change from the older-half average to the newer-half average."""
+    delta = avg2 - avg1
+    if abs(delta) < 0.02 * avg1:  # <2% change = stable
+        return "stable"
+    elif delta > 0:
+        return "worsening"
+    return "improving"
\ No newline at end of file
@@ -0,0 +1,172 @@
+"""
+Response cache for GET /analytics/{patient_id}.
+
+A patient's analytics only change when a reading is added, so each computed
+result is kept together with a version stamp – the (recorded_at, id) of the
+newest reading it covers – and its serialised JSON body. submit_vitals bumps
+the version with the reading it stored, which drops the cached result, so
+the next request recomputes exactly once per new reading. A back-dated
+reading leaves the newest reading unchanged, so it is not the cached version
+either and drops the result all the same.
+
+The ETag is a digest of the body, so it changes whenever the analytics do –
+including after a back-dated reading, which changes the window but not the
+version. A client sending it back in If-None-Match gets a 304 straight from
+the cache, with no compute and no serialisation.
+
+Concurrent misses for the same patient are coalesced: the first request
+starts the computation as a task and every request, the first included,
+awaits it, so cancelling one request leaves the others their result. A
+reading stored while a result is being computed marks that result stale,
+so it is returned to the waiting requests but not cached.
+
+Like the incremental analytics state, entries are per worker; the TTL bounds
+how long a worker that did not see a write can serve the older result.
+"""
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from app.core.config import settings
+
+# compute() -> (analytics payload, version stamp)
+Compute = Callable[[], Awaitable[Tuple[Dict[str, Any], str]]]
+
+
+def version_stamp(reading: Optional[Dict[str, Any]]) -> str:
+    """Version of the analytics whose newest reading is `reading` (None: no readings yet)."""
+    if not reading:
+        return "empty"
+    return f"{reading.get('recorded_at')}/{reading.get('id')}"
+
+
+def make_etag(body: bytes) -> str:
+    digest = hashlib.sha1(body).hexdigest()
+    return f'"{digest[:20]}"'
+
+
+@dataclass
+class CachedAnalytics:
+    version: str
+    etag: str
+    body: bytes
+    stored_at: float = field(default_factory=time.monotonic)
+
+
+def _retrieve_exception(task: asyncio.Future):
+    """Mark a failure as seen, so one no request awaited is not logged as lost."""
+    if not task.cancelled():
+        task.exception()
+
+
+class AnalyticsResultCache:
+    def __init__(self, max_patients: int, ttl_seconds: float, enabled: bool = True):
+        self.max_patients = max_patients
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._entries: "OrderedDict[str, CachedAnalytics]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._stale: Set[str] = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.not_modified = 0
+
+    def peek(self, patient_id: str) -> Optional[CachedAnalytics]:
+        """The cached result if still fresh, without computing."""
+        with self._lock:
+            entry = self._entries.get(patient_id)
+            if entry is None:
+                return None
+            if time.monotonic() - entry.stored_at > self.ttl_seconds:
+                del self._entries[patient_id]
+                return None
+            self._entries.move_to_end(patient_id)
+            return entry
+
+    async def get_or_compute(self, patient_id: str, compute: Compute) -> CachedAnalytics:
+        entry = self.peek(patient_id) if self.enabled else None
+        if entry is not None:
+            self.hits += 1
+            return entry
+
+        pending = self._inflight.get(patient_id)
+        if pending is not None and not pending.done():
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        # The computation runs as its own task, so a cancelled first request
+        # (e.g. its client disconnected) does not cancel the requests awaiting it
+        task = asyncio.ensure_future(self._compute(patient_id, compute))
+        task.add_done_callback(_retrieve_exception)
+        self._inflight[patient_id] = task
+        return await asyncio.shield(task)
+
+    async def _compute(self, patient_id: str, compute: Compute) -> CachedAnalytics:
+        try:
+            payload, version = await compute()
+            body = json.dumps(payload, default=str).encode()
+            entry = CachedAnalytics(version, make_etag(body), body)
+            if self.enabled and patient_id not in self._stale:
+                self._store(patient_id, entry)
+            return entry
+        finally:
+            self._inflight.pop(patient_id, None)
+            self._stale.discard(patient_id)
+
+    def _store(self, patient_id: str, entry: CachedAnalytics):
+        with self._lock:
+            self._entries[patient_id] = entry
+            self._entries.move_to_end(patient_id)
+            while len(self._entries) > self.max_patients:
+                self._entries.popitem(last=False)
+
+    def bump(self, patient_id: str, reading: Dict[str, Any]):
+        """A reading was stored: unless it is the cached result's newest reading, that result is no longer served."""
+        version = version_stamp(reading)
+        with self._lock:
+            entry = self._entries.get(patient_id)
+            if entry is not None and entry.version != version:
+                del self._entries[patient_id]
+        if patient_id in self._inflight:
+            self._stale.add(patient_id)
+
+    def discard(self, patient_id: str):
+        with self._lock:
+            self._entries.pop(patient_id, None)
+        if patient_id in self._inflight:
+            self._stale.add(patient_id)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "max_patients": self.max_patients,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "not_modified": self.not_modified,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else None,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        self._stale.clear()
+        self.hits = self.misses = self.coalesced = self.not_modified = 0
+
+
+# Process-wide cache used by the analytics and vitals routes
+analytics_cache = AnalyticsResultCache(
+    max_patients=settings.ANALYTICS_CACHE_MAX_PATIENTS,
+    ttl_seconds=settings.ANALYTICS_CACHE_TTL_SECONDS,
+    enabled=settings.ANALYTICS_CACHE_ENABLED,
+)
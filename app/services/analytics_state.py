@@ -0,0 +1,322 @@
+"""
+Incremental analytics – per-patient running state that produces the same
+result as compute_analytics() over the latest `window` readings, without
+re-fetching history.
+
+Each patient's window is held as two deques (older half / newer half, split
+exactly where compute_analytics splits for trends) with per-field counts, a
+risk-level counter and the last three risk scores. Adding a reading is O(1):
+append to the newer half, evict the oldest reading once the window is full,
+and shift at most one reading across the midpoint.
+
+Sums are not kept running: adding and subtracting floats drifts, and the
+averages would no longer round like compute_analytics'. A snapshot sums the
+deques oldest → newest, the order compute_analytics' cumsum adds in, so the
+result is identical; the sums are kept until the next reading.
+
+State is only ever created from a full history fetch (rebuild), so an entry
+that exists always covers the whole window. A reading that is not newer than
+the window's newest (a back-dated reading, or two submits finishing out of
+order) cannot be appended; the store drops the state instead, and the next
+request rebuilds it from history.
+"""
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from datetime import datetime
+from functools import reduce
+from operator import add, itemgetter
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.services.analytics import AVERAGE_FIELDS, TREND_FIELDS, NO_READINGS_MESSAGE, classify_trend
+from app.services.metrics import timed
+
+RISK_LEVELS = ("Low", "Moderate", "High")
+
+# Compact per-reading entry: (values for AVERAGE_FIELDS..., risk_level, recorded_at, id)
+Entry = Tuple[Any, ...]
+_LEVEL = len(AVERAGE_FIELDS)
+_RECORDED_AT = _LEVEL + 1
+_ID = _RECORDED_AT + 1
+_RISK_SCORE = AVERAGE_FIELDS.index("risk_score")
+_TREND_INDEXES = [AVERAGE_FIELDS.index(field) for field in TREND_FIELDS]
+_FIELD_GETTERS = [itemgetter(i) for i in range(len(AVERAGE_FIELDS))]
+
+
+class _Half:
+    """One half of the window: its readings plus per-field counts of present values."""
+
+    def __init__(self):
+        self.entries: deque = deque()
+        self.counts = [0] * len(AVERAGE_FIELDS)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _count(self, entry: Entry, sign: int):
+        for i in range(len(AVERAGE_FIELDS)):
+            if entry[i] is not None:
+                self.counts[i] += sign
+
+    def push_right(self, entry: Entry):
+        self.entries.append(entry)
+        self._count(entry, 1)
+
+    def push_left(self, entry: Entry):
+        self.entries.appendleft(entry)
+        self._count(entry, 1)
+
+    def pop_left(self) -> Entry:
+        entry = self.entries.popleft()
+        self._count(entry, -1)
+        return entry
+
+    def pop_right(self) -> Entry:
+        entry = self.entries.pop()
+        self._count(entry, -1)
+        return entry
+
+
+def _is_later(recorded_at: Any, than: Any) -> bool:
+    """Whether timestamp `recorded_at` is strictly after `than`; a tie is not later."""
+    try:
+        return datetime.fromisoformat(str(recorded_at)) > datetime.fromisoformat(str(than))
+    except (TypeError, ValueError):
+        # Unparseable or naive vs aware: the database's own format sorts as text
+        return str(recorded_at) > str(than)
+
+
+def _add_in_order(sums: List[float], entries: Iterable[Entry]) -> List[float]:
+    """Add the entries' present values onto sums one at a time, oldest first (like cumsum)."""
+    return [
+        reduce(add, filter(None, map(get_field, entries)), total)  # None and 0 add nothing
+        for total, get_field in zip(sums, _FIELD_GETTERS)
+    ]
+
+
+class PatientAnalyticsState:
+    def __init__(self, window: int):
+        if window < 4:
+            raise ValueError("Analytics window must hold at least 4 readings")
+        self.window = window
+        self.older = _Half()
+        self.newer = _Half()
+        self.risk_levels: Counter = Counter()
+        self.last_scores: deque = deque(maxlen=3)
+        self.updated_at = time.monotonic()
+        self._sums: Optional[Tuple[List[float], List[float], List[float]]] = None
+
+    @classmethod
+    def from_history(cls, readings: List[Dict], window: int) -> "PatientAnalyticsState":
+        """Cold-start path: build state from readings ordered newest first (as fetched)."""
+        state = cls(window)
+        for reading in reversed(readings[:window]):
+            state.add(reading)
+        return state
+
+    @property
+    def total(self) -> int:
+        return len(self.older) + len(self.newer)
+
+    def add(self, reading: Dict):
+        """Append a reading newer than every reading already in the window."""
+        entry = tuple(reading.get(f) for f in AVERAGE_FIELDS) + (
+            reading.get("risk_level", "Unknown"),
+            reading.get("recorded_at"),
+            reading.get("id"),
+        )
+        self.newer.push_right(entry)
+        self.risk_levels[entry[_LEVEL]] += 1
+        self.last_scores.append(entry[_RISK_SCORE])
+
+        if self.total > self.window:
+            evicted = self.older.pop_left() if len(self.older) else self.newer.pop_left()
+            self.risk_levels[evicted[_LEVEL]] -= 1
+
+        # Keep the split where compute_analytics puts it: older half = total // 2
+        mid = self.total // 2
+        while len(self.older) < mid:
+            self.older.push_right(self.newer.pop_left())
+        while len(self.older) > mid:
+            self.newer.push_left(self.older.pop_right())
+
+        self.updated_at = time.monotonic()
+        self._sums = None
+
+    def follows(self, reading: Dict) -> bool:
+        """Whether `reading` is newer than every reading in the window, so add() can append it."""
+        if self.total == 0:
+            return True
+        return _is_later(reading.get("recorded_at"), self.newer.entries[-1][_RECORDED_AT])
+
+    @property
+    def latest_reading(self) -> Optional[Dict[str, Any]]:
+        """The newest reading in the window – its AVERAGE_FIELDS, risk_level, recorded_at and id (None if empty)."""
+        if self.total == 0:
+            return None
+        entry = self.newer.entries[-1]
+        return {
+            **dict(zip(AVERAGE_FIELDS, entry)),
+            "risk_level": entry[_LEVEL],
+            "recorded_at": entry[_RECORDED_AT],
+            "id": entry[_ID],
+        }
+
+    def _window_sums(self) -> Tuple[List[float], List[float], List[float]]:
+        """Per-field sums of the older half, the newer half and the whole window."""
+        if self._sums is None:
+            zeros = [0.0] * len(AVERAGE_FIELDS)
+            older = _add_in_order(zeros, self.older.entries)
+            newer = _add_in_order(zeros, self.newer.entries)
+            whole = _add_in_order(older, self.newer.entries)
+            self._sums = (older, newer, whole)
+        return self._sums
+
+    @timed("analytics.snapshot")
+    def snapshot(self, patient_id: str) -> Dict[str, Any]:
+        """Return the analytics payload, shaped exactly like compute_analytics()."""
+        if self.total == 0:
+            return {"message": NO_READINGS_MESSAGE, "patient_id": patient_id}
+
+        oldest = self.older.entries[0] if len(self.older) else self.newer.entries[0]
+        latest = self.newer.entries[-1]
+        older_sums, newer_sums, sums = self._window_sums()
+
+        averages = {}
+        for i, field in enumerate(AVERAGE_FIELDS):
+            count = self.older.counts[i] + self.newer.counts[i]
+            averages[field] = round(sums[i] / count, 2) if count else None
+
+        return {
+            "patient_id": patient_id,
+            "total_readings": self.total,
+            "latest_risk_level": latest[_LEVEL],
+            "latest_risk_score": latest[_RISK_SCORE],
+            "averages": averages,
+            "risk_distribution": {level: self.risk_levels[level] for level in RISK_LEVELS},
+            "deterioration_alert": self._deteriorating(),
+            "trends": self._trends(older_sums, newer_sums),
+            "time_range": {"from": oldest[_RECORDED_AT], "to": latest[_RECORDED_AT]},
+        }
+
+    def _deteriorating(self) -> bool:
+        if self.total < 3 or any(score is None for score in self.last_scores):
+            return False
+        first, second, third = self.last_scores
+        return first < second < third
+
+    def _trends(self, older_sums: List[float], newer_sums: List[float]) -> Dict[str, str]:
+        if self.total < 4:
+            return {}
+        trends = {}
+        for field, i in zip(TREND_FIELDS, _TREND_INDEXES):
+            if not self.older.counts[i] or not self.newer.counts[i]:
+                continue
+            avg1 = older_sums[i] / self.older.counts[i]
+            avg2 = newer_sums[i] / self.newer.counts[i]
+            trends[field] = classify_trend(avg1, avg2)
+        return trends
+
+
+class AnalyticsStateStore:
+    """
+    Bounded LRU of per-patient state. Entries older than ttl_seconds are
+    treated as missing so that, with several workers, a worker that did not
+    see a write rebuilds from history within a bounded time.
+
+    A reading recorded while a rebuild's history fetch is in flight may be
+    missing from that history, and record() has no state to add it to yet.
+    Such a raced rebuild still answers its own request but is not kept, so
+    the next request rebuilds from a history that includes the reading.
+    """
+
+    def __init__(self, window: int, max_patients: int, ttl_seconds: float):
+        self.window = window
+        self.max_patients = max_patients
+        self.ttl_seconds = ttl_seconds
+        self._states: "OrderedDict[str, PatientAnalyticsState]" = OrderedDict()
+        self._rebuilding: Dict[str, int] = {}  # patient → history fetches in flight
+        self._stale: Set[str] = set()  # written to while a fetch was in flight
+        self._lock = threading.Lock()
+
+    def get(self, patient_id: str) -> Optional[PatientAnalyticsState]:
+        with self._lock:
+            state = self._states.get(patient_id)
+            if state is None:
+                return None
+            if time.monotonic() - state.updated_at > self.ttl_seconds:
+                del self._states[patient_id]
+                return None
+            self._states.move_to_end(patient_id)
+            return state
+
+    async def get_or_rebuild(
+        self, patient_id: str, fetch: Callable[[], Awaitable[List[Dict]]]
+    ) -> PatientAnalyticsState:
+        """The patient's state, rebuilt from fetch() (history, newest first) if missing."""
+        state = self.get(patient_id)
+        if state is not None:
+            return state
+
+        with self._lock:
+            self._rebuilding[patient_id] = self._rebuilding.get(patient_id, 0) + 1
+        try:
+            readings = await fetch()
+        finally:
+            with self._lock:
+                raced = patient_id in self._stale
+                if self._rebuilding[patient_id] == 1:
+                    del self._rebuilding[patient_id]
+                    self._stale.discard(patient_id)
+                else:
+                    self._rebuilding[patient_id] -= 1
+        if raced:
+            return PatientAnalyticsState.from_history(readings, self.window)
+        return self.rebuild(patient_id, readings)
+
+    def rebuild(self, patient_id: str, readings: List[Dict]) -> PatientAnalyticsState:
+        """Replace the patient's state from a history fetch (newest first)."""
+        state = PatientAnalyticsState.from_history(readings, self.window)
+        with self._lock:
+            self._states[patient_id] = state
+            self._states.move_to_end(patient_id)
+            while len(self._states) > self.max_patients:
+                self._states.popitem(last=False)
+        return state
+
+    def record(self, patient_id: str, reading: Dict):
+        """
+        O(1) update after a reading is stored. Patients without state are
+        skipped: their next analytics request rebuilds from history. So are
+        patients whose window already holds a newer reading – the state is
+        dropped rather than appended to out of order.
+        """
+        with self._lock:
+            state = self._states.get(patient_id)
+            if state is not None:
+                if state.follows(reading):
+                    state.add(reading)
+                else:
+                    del self._states[patient_id]
+            if patient_id in self._rebuilding:
+                self._stale.add(patient_id)
+
+    def discard(self, patient_id: str):
+        with self._lock:
+            self._states.pop(patient_id, None)
+            if patient_id in self._rebuilding:
+                self._stale.add(patient_id)
+
+    def clear(self):
+        with self._lock:
+            self._states.clear()
+            self._stale.clear()
+
+
+# Process-wide store used by the vitals and analytics routes
+analytics_store = AnalyticsStateStore(
+    window=settings.ANALYTICS_WINDOW,
+    max_patients=settings.ANALYTICS_STATE_MAX_PATIENTS,
+    ttl_seconds=settings.ANALYTICS_STATE_TTL_SECONDS,
+)
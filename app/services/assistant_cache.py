@@ -0,0 +1,66 @@
+"""
+Answer cache for the virtual assistant.
+
+Patients ask the same few questions over and over. Answers are a function
+of the folded question (see ai_assistant.question_key) and the
+include_related flag only, so each distinct question is matched once and its answer kept in
+a bounded LRU, together with the response body already serialised to JSON.
+A repeat of a question not personalised by patient context is served as
+those bytes, skipping matching, ChatResponse validation and serialisation.
+
+The cache is cleared when the assistant corpus is reloaded. Counters (hits,
+misses, evictions) are exposed through stats() and GET /admin/cache.
+"""
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+from app.services.patient_cache import TTLCache
+
+
+@dataclass(frozen=True)
+class CachedAnswer:
+    result: Dict[str, Any]  # shared: callers copy before changing it
+    body: bytes
+
+
+class AssistantResponseCache:
+    def __init__(self, max_entries: int, enabled: bool = True):
+        self.enabled = enabled
+        self.answers = TTLCache(max_entries, ttl_seconds=float("inf"))
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key: str, compute: Callable[[], CachedAnswer]) -> CachedAnswer:
+        answer: Optional[CachedAnswer] = self.answers.get(key) if self.enabled else None
+        if answer is not None:
+            self.hits += 1
+            return answer
+        self.misses += 1
+        answer = compute()
+        if self.enabled:
+            self.answers.set(key, answer)
+        return answer
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self.answers),
+            "max_entries": self.answers.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.answers.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+    def clear(self):
+        self.answers.clear()
+        self.hits = self.misses = 0
+
+
+# Process-wide cache used by /assistant/chat
+assistant_cache = AssistantResponseCache(
+    max_entries=settings.ASSISTANT_CACHE_MAX_ENTRIES,
+    enabled=settings.ASSISTANT_CACHE_ENABLED,
+)
@@ -0,0 +1,136 @@
+"""
+Compiled risk scorer – folds the StandardScaler into the model at load time
+so a prediction is pure NumPy with no sklearn input validation.
+
+Two model families are supported:
+- Linear classifiers (coef_ / intercept_): the scaler's mean and scale are
+  folded into the coefficients, so scoring is one dot product plus a sigmoid.
+- Tree ensembles (RandomForest / ExtraTrees / DecisionTree): the scaler is
+  folded into every split threshold, so trees compare raw feature values.
+  All trees are flattened into shared node arrays and walked together.
+
+Both produce the same probabilities as
+model.predict_proba(scaler.transform(X))[:, 1].
+"""
+from typing import Callable
+
+import numpy as np
+
+# Signature shared by every scorer: (n, 6) raw feature matrix -> (n,) P(class 1)
+Scorer = Callable[[np.ndarray], np.ndarray]
+
+
+def compile_scorer(model, scaler) -> Scorer:
+    """
+    Build a pure-NumPy scorer for the given fitted model and scaler.
+    Raises TypeError if the model type cannot be compiled.
+    """
+    mean = np.asarray(scaler.mean_, dtype=float)
+    scale = np.asarray(scaler.scale_, dtype=float)
+
+    if hasattr(model, "coef_") and np.ndim(model.coef_) == 2 and model.coef_.shape[0] == 1:
+        return LinearScorer(model, mean, scale)
+    if hasattr(model, "estimators_") or hasattr(model, "tree_"):
+        return ForestScorer(model, mean, scale)
+    raise TypeError(f"Cannot compile model of type {type(model).__name__}")
+
+
+class LinearScorer:
+    """Binary linear classifier with the scaler folded into its weights."""
+
+    def __init__(self, model, mean: np.ndarray, scale: np.ndarray):
+        coef = np.asarray(model.coef_, dtype=float)[0]
+        # w·((x - mean) / scale) + b  ==  (w / scale)·x + (b - w·(mean / scale))
+        self.weights = coef / scale
+        self.bias = float(np.asarray(model.intercept_, dtype=float)[0] - coef @ (mean / scale))
+
+    def __call__(self, features: np.ndarray) -> np.ndarray:
+        return 1.0 / (1.0 + np.exp(-(features @ self.weights + self.bias)))
+
+
+class ForestScorer:
+    """Tree ensemble with the scaler folded into the split thresholds."""
+
+    def __init__(self, model, mean: np.ndarray, scale: np.ndarray):
+        trees = [est.tree_ for est in getattr(model, "estimators_", [model])]
+        offsets = np.cumsum([0] + [t.node_count for t in trees[:-1]])
+
+        feature, threshold, left, right, leaf_proba = [], [], [], [], []
+        for tree, offset in zip(trees, offsets):
+            node_ids = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(tree.threshold)
+            # Leaves point at themselves so every row can take max_depth steps
+            left.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            right.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+
+            value = tree.value[:, 0, :]
+            total = value.sum(axis=1)
+            total[total == 0] = 1.0
+            leaf_proba.append(value[:, 1] / total)
+
+        self.feature = np.concatenate(feature).astype(np.intp)
+        self.left = np.concatenate(left).astype(np.intp)
+        self.right = np.concatenate(right).astype(np.intp)
+        self.leaf_proba = np.concatenate(leaf_proba)
+        self.roots = offsets.astype(np.intp)
+        self.max_depth = max(t.max_depth for t in trees)
+        self.threshold = _fold_thresholds(
+            np.concatenate(threshold), mean[self.feature], scale[self.feature]
+        )
+
+    def __call__(self, features: np.ndarray) -> np.ndarray:
+        features = np.asarray(features, dtype=float)
+        rows = np.arange(len(features))[:, None]
+        nodes = np.broadcast_to(self.roots, (len(features), len(self.roots)))
+        for _ in range(self.max_depth):
+            go_left = features[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return self.leaf_proba[nodes].mean(axis=1)
+
+
+def _fold_thresholds(threshold: np.ndarray, mean: np.ndarray, scale: np.ndarray) -> np.ndarray:
+    """
+    Map each scaled-space split threshold t to the largest raw value T with
+    float32((T - mean) / scale) <= t, which is exactly the test sklearn performs
+    (trees cast scaled input to float32). The transform is monotonic, so
+    x <= T takes the same branch as sklearn for every x.
+
+    The algebraic inverse t*scale+mean is only approximate because of the
+    float32 cast, so T is found by bisecting over the bit patterns of doubles
+    in a bracket around it.
+    """
+    def passes(raw):
+        return ((raw - mean) / scale).astype(np.float32).astype(float) <= threshold
+
+    estimate = threshold * scale + mean
+    width = scale * (np.abs(threshold) + 1.0) * 1e-5
+    while True:
+        lo, hi = estimate - width, estimate + width
+        bracketed = passes(lo) & ~passes(hi)
+        if bracketed.all():
+            break
+        width = np.where(bracketed, width, width * 16)
+
+    lo, hi = _ordered_bits(lo), _ordered_bits(hi)
+    while (hi - lo > 1).any():
+        mid = lo + (hi - lo) // 2
+        ok = passes(_from_ordered_bits(mid))
+        lo = np.where(ok, mid, lo)
+        hi = np.where(ok, hi, mid)
+    return _from_ordered_bits(lo)
+
+
+_INT64_MIN = np.int64(np.iinfo(np.int64).min)
+
+
+def _ordered_bits(x: np.ndarray) -> np.ndarray:
+    """Reinterpret doubles as int64 so that integer order matches float order."""
+    bits = np.ascontiguousarray(x, dtype=np.float64).view(np.int64)
+    return np.where(bits >= 0, bits, _INT64_MIN - bits)
+
+
+def _from_ordered_bits(ordered: np.ndarray) -> np.ndarray:
+    bits = np.where(ordered >= 0, ordered, _INT64_MIN - ordered)
+    return np.ascontiguousarray(bits, dtype=np.int64).view(np.float64)
@@ -0,0 +1,96 @@
+"""
+Multi-keyword matcher – an Aho-Corasick automaton over groups of keywords.
+
+The assistant's knowledge base maps groups of keywords to topics. Checking
+`kw in text` for every keyword costs O(keywords × len(text)) per question;
+the automaton finds every keyword occurrence in one pass over the text,
+however many keywords there are.
+
+Matching is on plain substrings of the lower-cased text, the same as
+`kw in text.lower()`, so "walk" matches "walking". The automaton is built
+once and then only read, so one instance can be shared across threads.
+
+- first(text): the lowest-numbered group with any keyword in the text, i.e.
+  the group an ordered `for group: if any(kw in text)` scan would pick.
+- counts(text) / ranked(text): keyword hits per group, for multi-topic
+  ranking.
+"""
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Tuple
+
+_NONE = 1 << 30  # "no group" sentinel, larger than any group index
+
+
+class KeywordMatcher:
+    def __init__(self, groups: Sequence[Sequence[str]]):
+        self.group_count = len(groups)
+        # Trie: transitions[node] maps a character to the next node; node 0 is the root
+        transitions: List[Dict[str, int]] = [{}]
+        outputs: List[List[int]] = [[]]
+        for group, keywords in enumerate(groups):
+            for keyword in keywords:
+                keyword = keyword.lower()
+                if not keyword:
+                    continue
+                node = 0
+                for ch in keyword:
+                    child = transitions[node].get(ch)
+                    if child is None:
+                        child = len(transitions)
+                        transitions[node][ch] = child
+                        transitions.append({})
+                        outputs.append([])
+                    node = child
+                outputs[node].append(group)
+
+        # Breadth-first: failure links, then complete every node's transitions
+        # with its failure node's, so matching is one dict lookup per character.
+        # A node's failure node is shallower, so it is already complete when used.
+        fail = [0] * len(transitions)
+        queue = deque(transitions[0].values())
+        while queue:
+            node = queue.popleft()
+            outputs[node] = outputs[node] + outputs[fail[node]]
+            for ch, child in transitions[node].items():
+                fail[child] = transitions[fail[node]].get(ch, 0)
+                queue.append(child)
+            for ch, target in transitions[fail[node]].items():
+                transitions[node].setdefault(ch, target)
+
+        self._transitions = transitions
+        self._outputs: List[Tuple[int, ...]] = [tuple(o) for o in outputs]
+        self._best: List[int] = [min(o) if o else _NONE for o in outputs]
+
+    @property
+    def states(self) -> int:
+        return len(self._transitions)
+
+    def first(self, text: str) -> Optional[int]:
+        """Lowest-numbered group with a keyword anywhere in text, or None."""
+        transitions, best = self._transitions, self._best
+        found = _NONE
+        node = 0
+        for ch in text.lower():
+            node = transitions[node].get(ch, 0)
+            group = best[node]
+            if group < found:
+                found = group
+                if found == 0:
+                    break
+        return None if found == _NONE else found
+
+    def counts(self, text: str) -> Dict[int, int]:
+        """Keyword occurrences per group (overlapping occurrences all count)."""
+        transitions, outputs = self._transitions, self._outputs
+        hits: Dict[int, int] = {}
+        node = 0
+        for ch in text.lower():
+            node = transitions[node].get(ch, 0)
+            for group in outputs[node]:
+                hits[group] = hits.get(group, 0) + 1
+        return hits
+
+    def ranked(self, text: str) -> List[int]:
+        """Matched groups, most hits first; ties keep group order."""
+        hits = self.counts(text)
+        return sorted(hits, key=lambda group: (-hits[group], group))
@@ -0,0 +1,296 @@
+"""
+In-process metrics, exposed by GET /metrics in the Prometheus text format.
+
+- http_request_duration_seconds: latency per method, route template and
+  status, recorded by MetricsMiddleware
+- span_duration_seconds: time spent in named spans – database calls
+  ("db.<table>.<method>"), risk scoring, alert evaluation and analytics
+- alerts_total: alerts raised, by severity and outcome (created / repeated)
+- risk_levels_total: risk levels produced for stored readings
+
+Aggregation is per thread. Every thread that records a value gets its own
+shard (a dict of plain lists), so recording is a dict lookup and two list
+increments, with no lock and no contention between the event loop and the
+worker threads. Only the first record on a new thread takes a lock, to
+register its shard. A scrape sums the shards; a value recorded while the
+scrape is reading may land in this scrape or the next one.
+
+Counts are per worker process, like the caches; Prometheus sums workers.
+"""
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+
+# Seconds; from sub-millisecond cache hits up to slow cohort queries
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Route label for requests that matched no route, so unknown paths cannot grow the label set
+UNMATCHED_ROUTE = "<unmatched>"
+
+Labels = Tuple[str, ...]
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.enabled = True
+        self._local = threading.local()
+        self._shards: List[Dict[Labels, List[float]]] = []
+        self._lock = threading.Lock()
+
+    def _shard(self) -> Dict[Labels, List[float]]:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append(shard)
+            return shard
+
+    def _new_row(self) -> List[float]:
+        raise NotImplementedError
+
+    def _row(self, labels: Labels) -> List[float]:
+        shard = self._shard()
+        row = shard.get(labels)
+        if row is None:
+            row = shard[labels] = self._new_row()
+        return row
+
+    def collect(self) -> Dict[Labels, List[float]]:
+        """Rows summed over all threads' shards."""
+        with self._lock:
+            shards = list(self._shards)
+        totals: Dict[Labels, List[float]] = {}
+        for shard in shards:
+            for labels, row in shard.copy().items():
+                total = totals.get(labels)
+                if total is None:
+                    totals[labels] = list(row)
+                else:
+                    for i, value in enumerate(row):
+                        total[i] += value
+        return totals
+
+    def clear(self):
+        with self._lock:
+            for shard in self._shards:
+                shard.clear()
+
+    def _label_text(self, labels: Labels, extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labels)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for labels, row in sorted(self.collect().items()):
+            lines.extend(self._render_row(labels, row))
+        return lines
+
+    def _render_row(self, labels: Labels, row: List[float]) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_row(self) -> List[float]:
+        return [0.0]
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        if self.enabled:
+            self._row(labels)[0] += amount
+
+    def value(self, *labels: str) -> float:
+        row = self.collect().get(labels)
+        return row[0] if row else 0.0
+
+    def _render_row(self, labels: Labels, row: List[float]) -> List[str]:
+        return [f"{self.name}{self._label_text(labels)} {_number(row[0])}"]
+
+
+class Histogram(_Metric):
+    """
+    Row layout: one count per bucket, then the +Inf count, then the sum.
+    Counts are stored per bucket and made cumulative when rendered.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_row(self) -> List[float]:
+        return [0] * (len(self.buckets) + 1) + [0.0]
+
+    def observe(self, value: float, *labels: str):
+        if self.enabled:
+            row = self._row(labels)
+            row[bisect_left(self.buckets, value)] += 1
+            row[-1] += value
+
+    def count(self, *labels: str) -> int:
+        row = self.collect().get(labels)
+        return int(sum(row[:-1])) if row else 0
+
+    def _render_row(self, labels: Labels, row: List[float]) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), row):
+            cumulative += count
+            le = 'le="+Inf"' if bound == float("inf") else f'le="{_number(bound)}"'
+            lines.append(f"{self.name}_bucket{self._label_text(labels, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{self._label_text(labels)} {_number(row[-1])}")
+        lines.append(f"{self.name}_count{self._label_text(labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._metrics: List[_Metric] = []
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(
+        self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def _register(self, metric: _Metric):
+        metric.enabled = self.enabled
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        for metric in self._metrics:
+            metric.clear()
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+# ---------------------------------------------------------------------------
+# Spans
+# ---------------------------------------------------------------------------
+class span:
+    """
+    Time a block into span_duration_seconds{span=name}:
+
+        with span("risk.calculate_risk"):
+            ...
+
+    A class rather than @contextmanager, which costs a generator per use.
+    """
+    __slots__ = ("name", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        SPAN_SECONDS.observe(time.perf_counter() - self.started, self.name)
+
+
+def timed(name: str) -> Callable[[Callable], Callable]:
+    """Decorator form of span() for plain and async functions."""
+    def decorate(fn: Callable) -> Callable:
+        if inspect.iscoroutinefunction(fn):
+            @wraps(fn)
+            async def timed_async(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    SPAN_SECONDS.observe(time.perf_counter() - started, name)
+            return timed_async
+
+        @wraps(fn)
+        def timed_sync(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                SPAN_SECONDS.observe(time.perf_counter() - started, name)
+        return timed_sync
+
+    return decorate
+
+
+# ---------------------------------------------------------------------------
+# ASGI middleware
+# ---------------------------------------------------------------------------
+class MetricsMiddleware:
+    """
+    Record every HTTP request's latency under its route template
+    ("/patients/{patient_id}", not the concrete path), method and status.
+    Latency runs until the response is complete, so for streaming responses
+    (/alerts/stream) it is the lifetime of the stream. WebSockets are not timed.
+    """
+
+    def __init__(self, app, histogram: Optional[Histogram] = None):
+        self.app = app
+        self.histogram = histogram or HTTP_REQUEST_SECONDS
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.histogram.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router records the matched route on the (shared) scope
+            route = scope.get("route")
+            template = getattr(route, "path", None) or UNMATCHED_ROUTE
+            self.histogram.observe(time.perf_counter() - started, scope["method"], template, str(status))
+
+
+# Process-wide registry and the application's metrics, rendered by GET /metrics
+metrics = MetricsRegistry(enabled=settings.METRICS_ENABLED)
+
+HTTP_REQUEST_SECONDS = metrics.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route", "status"),
+)
+SPAN_SECONDS = metrics.histogram(
+    "span_duration_seconds", "Time spent in database calls, risk scoring, alert evaluation and analytics.", ("span",),
+)
+ALERTS = metrics.counter("alerts_total", "Alerts raised, by severity and outcome (created / repeated).", ("severity", "outcome"))
+RISK_LEVELS = metrics.counter("risk_levels_total", "Risk levels produced for stored vital readings.", ("level",))
@@ -0,0 +1,167 @@
+"""
+Model registry – owns the risk model artefacts and the scorer built from them.
+
+- Artefacts are loaded lazily on first use, not at import time.
+- NumPy arrays inside the joblib files are memory-mapped (mmap_mode="r"), so
+  uvicorn workers on the same host share one copy through the page cache.
+- reload() loads a new version from disk and swaps it in atomically. Callers
+  take one snapshot (registry.get()) per scoring call, so in-flight requests
+  finish on the version they started with and no request is dropped.
+
+To deploy a new model, replace risk_model.joblib / scaler.joblib (and
+optionally MODEL_VERSION) in MODEL_DIR, then send SIGHUP to the worker or call
+POST /admin/model/reload.
+"""
+import hashlib
+import os
+import signal
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, List, Optional
+
+import numpy as np
+from loguru import logger
+
+from app.services.compiled_model import compile_scorer
+
+MODEL_FILE = "risk_model.joblib"
+SCALER_FILE = "scaler.joblib"
+VERSION_FILE = "MODEL_VERSION"
+
+
+@dataclass(frozen=True)
+class LoadedModel:
+    """An immutable snapshot of one model version and its scoring function."""
+    version: str
+    model: Any
+    scaler: Any
+    # (n, 6) raw feature matrix -> (n,) probability of the positive class
+    scorer: Callable[[np.ndarray], np.ndarray]
+    scorer_kind: str
+    loaded_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+
+
+class ModelRegistry:
+    def __init__(self, model_dir: str, mmap: bool = True, scorer_kind: str = "compiled"):
+        self.model_dir = model_dir
+        self.mmap = mmap
+        self.scorer_kind = scorer_kind
+        self._current: Optional[LoadedModel] = None
+        self._load_failed = False
+        self._lock = threading.Lock()
+        self._reload_listeners: List[Callable[[LoadedModel], Any]] = []
+
+    def get(self) -> Optional[LoadedModel]:
+        """
+        Return the active model, loading it on first use.
+        Returns None if the artefacts cannot be loaded (callers fall back to rules).
+        """
+        current = self._current
+        if current is not None or self._load_failed:
+            return current
+        with self._lock:
+            if self._current is None and not self._load_failed:
+                try:
+                    self._current = self._load()
+                    logger.info(f"Risk model {self._current.version} loaded ({self._current.scorer_kind} scorer).")
+                except Exception as e:
+                    self._load_failed = True
+                    logger.warning(f"ML model not loaded – {e}")
+            return self._current
+
+    def reload(self) -> LoadedModel:
+        """
+        Load the artefacts currently on disk and atomically make them active.
+        If loading fails the previous version stays active and the error is raised.
+        """
+        with self._lock:
+            loaded = self._load()
+            previous = self._current
+            self._current = loaded
+            self._load_failed = False
+        logger.info(
+            f"Risk model reloaded: {previous.version if previous else 'none'} → {loaded.version}"
+        )
+        for listener in self._reload_listeners:
+            try:
+                listener(loaded)
+            except Exception as e:
+                logger.error(f"Model reload listener failed: {e}")
+        return loaded
+
+    def add_reload_listener(self, listener: Callable[[LoadedModel], Any]):
+        """Call listener(new_model) after every successful reload()."""
+        self._reload_listeners.append(listener)
+
+    @property
+    def version(self) -> Optional[str]:
+        current = self.get()
+        return current.version if current else None
+
+    def _load(self) -> LoadedModel:
+        import joblib  # deferred: only needed when a model is actually loaded
+
+        mmap_mode = "r" if self.mmap else None
+        model_path = os.path.join(self.model_dir, MODEL_FILE)
+        scaler_path = os.path.join(self.model_dir, SCALER_FILE)
+        model = joblib.load(model_path, mmap_mode=mmap_mode)
+        scaler = joblib.load(scaler_path, mmap_mode=mmap_mode)
+
+        scorer, scorer_kind = _build_scorer(model, scaler, self.scorer_kind)
+        return LoadedModel(
+            version=self._read_version(model_path, scaler_path),
+            model=model,
+            scaler=scaler,
+            scorer=scorer,
+            scorer_kind=scorer_kind,
+        )
+
+    def _read_version(self, *artefact_paths: str) -> str:
+        """Use MODEL_VERSION if present, else a short content hash of the artefacts."""
+        version_path = os.path.join(self.model_dir, VERSION_FILE)
+        if os.path.isfile(version_path):
+            with open(version_path) as f:
+                version = f.read().strip()
+            if version:
+                return version
+        digest = hashlib.sha256()
+        for path in artefact_paths:
+            with open(path, "rb") as f:
+                digest.update(f.read())
+        return f"sha256:{digest.hexdigest()[:12]}"
+
+
+def _build_scorer(model, scaler, scorer_kind: str):
+    if scorer_kind == "compiled":
+        try:
+            return compile_scorer(model, scaler), "compiled"
+        except Exception as e:
+            logger.warning(f"Compiled scorer unavailable, using sklearn – {e}")
+
+    def sklearn_scorer(features: np.ndarray) -> np.ndarray:
+        return model.predict_proba(scaler.transform(features))[:, 1]
+
+    return sklearn_scorer, "sklearn"
+
+
+def install_reload_signal_handler(registry: ModelRegistry, loop) -> bool:
+    """
+    Reload the model on SIGHUP. The load runs in the default executor so the
+    event loop keeps serving requests meanwhile. Returns False where SIGHUP is
+    not available (e.g. Windows).
+    """
+    if not hasattr(signal, "SIGHUP"):
+        return False
+
+    def _reload_in_background():
+        future = loop.run_in_executor(None, registry.reload)
+        future.add_done_callback(
+            lambda f: f.exception() and logger.error(f"Model reload via SIGHUP failed: {f.exception()}")
+        )
+
+    try:
+        loop.add_signal_handler(signal.SIGHUP, _reload_in_background)
+    except (NotImplementedError, RuntimeError):
+        return False
+    return True
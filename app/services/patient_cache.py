@@ -0,0 +1,275 @@
+"""
+Read-through cache for patient profiles.
+
+GET /patients/{id} is served from a per-worker TTL + LRU map first; a miss
+falls through to an optional shared backend, and then to the repository,
+whose row is stored in both. update_patient and delete_patient invalidate
+the id explicitly, in both tiers.
+
+The shared backend lets workers share fills and invalidations:
+- "memory://" is the local stand-in – same interface and JSON
+  serialisation as a remote store, held in this process (tests, single
+  worker, development).
+- "redis://…" uses Redis (needs the optional `redis` package).
+Shared entries are versioned: an invalidation increments the patient's
+version key, and an entry is only served if it was filled at the current
+version. A worker whose load raced another worker's write stores its row
+under the old version, where no reader will use it.
+Another worker's local tier is not told about an invalidation, so keep
+PATIENT_CACHE_TTL_SECONDS short when running several workers.
+
+Counters (hits, shared_hits, misses, evictions, expirations,
+invalidations) are exposed through stats() and GET /admin/cache.
+"""
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from app.core.config import settings
+
+Row = Dict[str, Any]
+
+
+class TTLCache:
+    """Bounded LRU map whose entries expire ttl_seconds after they are stored."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.evictions = self.expirations = 0
+
+
+# ---------------------------------------------------------------------------
+# Shared backends
+# ---------------------------------------------------------------------------
+class SharedCacheBackend(ABC):
+    """A key/value store shared by workers; values are JSON strings."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[str]: ...
+
+    @abstractmethod
+    async def get_many(self, keys: List[str]) -> List[Optional[str]]: ...
+
+    @abstractmethod
+    async def set(self, key: str, value: str, ttl_seconds: float) -> None: ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None: ...
+
+    @abstractmethod
+    async def incr(self, key: str) -> int:
+        """Atomically add one to the integer at key (0 if missing); the key never expires."""
+
+
+class MemorySharedBackend(SharedCacheBackend):
+    """In-process stand-in for a shared store, serialising like a remote one would."""
+
+    def __init__(self, max_entries: int = 1_000_000):
+        self._cache = TTLCache(max_entries, ttl_seconds=0.0)
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._cache.get(key)
+
+    async def get_many(self, keys: List[str]) -> List[Optional[str]]:
+        return [self._cache.get(key) for key in keys]
+
+    async def set(self, key: str, value: str, ttl_seconds: float) -> None:
+        self._cache.set(key, value, ttl_seconds)
+
+    async def delete(self, key: str) -> None:
+        self._cache.delete(key)
+
+    async def incr(self, key: str) -> int:
+        value = int(self._cache.get(key) or 0) + 1
+        self._cache.set(key, str(value), float("inf"))
+        return value
+
+
+class RedisSharedBackend(SharedCacheBackend):
+    def __init__(self, url: str):
+        import redis.asyncio as redis  # optional: only needed for a Redis-backed cache
+
+        self._client = redis.from_url(url, decode_responses=True)
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self._client.get(key)
+
+    async def get_many(self, keys: List[str]) -> List[Optional[str]]:
+        return await self._client.mget(keys)
+
+    async def set(self, key: str, value: str, ttl_seconds: float) -> None:
+        await self._client.set(key, value, px=max(1, int(ttl_seconds * 1000)))
+
+    async def delete(self, key: str) -> None:
+        await self._client.delete(key)
+
+    async def incr(self, key: str) -> int:
+        return await self._client.incr(key)
+
+
+def build_shared_backend(url: str) -> Optional[SharedCacheBackend]:
+    if not url:
+        return None
+    if url.startswith("memory://"):
+        return MemorySharedBackend()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisSharedBackend(url)
+    raise ValueError(f"Unsupported PATIENT_CACHE_SHARED_URL {url!r}; expected memory:// or redis://")
+
+
+# ---------------------------------------------------------------------------
+# Read-through cache
+# ---------------------------------------------------------------------------
+class PatientCache:
+    def __init__(
+        self,
+        local: TTLCache,
+        shared: Optional[SharedCacheBackend] = None,
+        shared_ttl_seconds: float = 600.0,
+        enabled: bool = True,
+        namespace: str = "patient:",
+    ):
+        self.local = local
+        self.shared = shared
+        self.shared_ttl_seconds = shared_ttl_seconds
+        self.enabled = enabled
+        self.namespace = namespace
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def get(self, patient_id: str, load: Callable[[str], Awaitable[Optional[Row]]]) -> Optional[Row]:
+        """The patient's row from cache, else from load() (stored on the way back). Missing patients are not cached."""
+        if not self.enabled:
+            return await load(patient_id)
+
+        row = self.local.get(patient_id)
+        if row is not None:
+            self.hits += 1
+            return dict(row)
+
+        version = None
+        if self.shared is not None:
+            row, version = await self._shared_get(patient_id)
+            if row is not None:
+                self.shared_hits += 1
+                self.local.set(patient_id, row)
+                return dict(row)
+
+        self.misses += 1
+        invalidations = self.invalidations
+        row = await load(patient_id)
+        # A write that invalidated while the load was in flight may have made this row stale
+        if row and invalidations == self.invalidations:
+            self.local.set(patient_id, dict(row))
+            if version is not None:
+                await self._shared_set(patient_id, row, version)
+        return row
+
+    async def invalidate(self, patient_id: str):
+        """Forget the patient in both tiers; call after every write to the profile."""
+        self.invalidations += 1
+        self.local.delete(patient_id)
+        if self.shared is not None:
+            key = self.namespace + patient_id
+            try:
+                await self.shared.incr(key + ":version")
+                await self.shared.delete(key)
+            except Exception as e:
+                logger.warning(f"Shared patient cache invalidation failed for {patient_id}: {e}")
+
+    async def _shared_get(self, patient_id: str) -> Tuple[Optional[Row], Optional[str]]:
+        """The shared row if it was filled at the patient's current version, and that version."""
+        key = self.namespace + patient_id
+        try:
+            version, raw = await self.shared.get_many([key + ":version", key])
+        except Exception as e:
+            logger.warning(f"Shared patient cache unavailable, reading through: {e}")
+            return None, None
+        version = version or "0"
+        entry = json.loads(raw) if raw else None
+        if entry is None or entry["version"] != version:
+            return None, version
+        return entry["row"], version
+
+    async def _shared_set(self, patient_id: str, row: Row, version: str):
+        """Store row as read at version; once the version moves on, readers ignore it."""
+        entry = json.dumps({"version": version, "row": row}, default=str)
+        try:
+            await self.shared.set(self.namespace + patient_id, entry, self.shared_ttl_seconds)
+        except Exception as e:
+            logger.warning(f"Shared patient cache write failed for {patient_id}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "backend": type(self.shared).__name__ if self.shared is not None else "local",
+            "size": len(self.local),
+            "max_entries": self.local.max_entries,
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.shared_hits) / lookups, 4) if lookups else None,
+            "evictions": self.local.evictions,
+            "expirations": self.local.expirations,
+            "invalidations": self.invalidations,
+        }
+
+    def clear(self):
+        """Empty this worker's tier and reset the counters (the shared tier is left alone)."""
+        self.local.clear()
+        self.hits = self.shared_hits = self.misses = self.invalidations = 0
+
+
+# Process-wide cache used by the patient routes
+patient_cache = PatientCache(
+    local=TTLCache(settings.PATIENT_CACHE_MAX_ENTRIES, settings.PATIENT_CACHE_TTL_SECONDS),
+    shared=build_shared_backend(settings.PATIENT_CACHE_SHARED_URL),
+    shared_ttl_seconds=settings.PATIENT_CACHE_SHARED_TTL_SECONDS,
+    enabled=settings.PATIENT_CACHE_ENABLED,
+)
@@ -0,0 +1,127 @@
+"""
+Per-patient context for the virtual assistant – the latest risk level and
+vitals, so /assistant/chat can personalise an answer without a database
+query per message.
+
+submit_vitals (and the batch endpoint) refresh a patient's context with the
+reading they just stored. The vitals phrases the assistant quotes are
+rendered then, once per reading, so a chat turn only does dictionary
+lookups. A worker that has no context for a patient takes the newest
+reading from its incremental analytics state if it has one; otherwise the
+answer is not personalised until the patient's next reading.
+
+Entries are per worker and bounded (LRU + TTL), like the other caches.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.services.analytics_state import analytics_store
+from app.services.patient_cache import TTLCache
+
+# key -> (reading fields it needs, phrase template)
+VITAL_PHRASES: Dict[str, Tuple[Tuple[str, ...], str]] = {
+    "bp": (("bp_systolic", "bp_diastolic"), "blood pressure {bp_systolic:.0f}/{bp_diastolic:.0f} mmHg"),
+    "glucose": (("glucose",), "glucose {glucose:.0f} mg/dL"),
+    "cholesterol": (("cholesterol", "hdl"), "cholesterol {cholesterol:.0f} mg/dL (HDL {hdl:.0f})"),
+    "bmi": (("bmi",), "BMI {bmi:.1f}"),
+    "weight": (("weight",), "weight {weight:.1f} kg"),
+}
+
+# The vitals quoted with each assistant topic; other topics get DEFAULT_VITALS
+TOPIC_VITALS: Dict[str, Tuple[str, ...]] = {
+    "Blood Glucose": ("glucose",),
+    "Blood Pressure": ("bp",),
+    "Cholesterol & Heart Health": ("cholesterol", "bp"),
+    "Weight & Nutrition": ("bmi", "weight"),
+    "Physical Activity": ("bp", "glucose"),
+}
+DEFAULT_VITALS: Tuple[str, ...] = ("bp", "glucose")
+
+
+def _vitals_line(reading: Dict[str, Any], keys: Tuple[str, ...]) -> str:
+    phrases = []
+    for key in keys:
+        fields, template = VITAL_PHRASES[key]
+        if all(reading.get(f) is not None for f in fields):
+            phrases.append(template.format(**{f: float(reading[f]) for f in fields}))
+    if not phrases:
+        return ""
+    return f"Your latest reading: {', '.join(phrases)}."
+
+
+@dataclass(frozen=True)
+class PatientContext:
+    risk_level: str
+    risk_score: Optional[float]
+    recorded_at: Optional[str]
+    # topic -> pre-rendered vitals sentence ("" key: DEFAULT_VITALS)
+    vitals_lines: Dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_reading(cls, reading: Dict[str, Any]) -> "PatientContext":
+        lines = {topic: _vitals_line(reading, keys) for topic, keys in TOPIC_VITALS.items()}
+        lines[""] = _vitals_line(reading, DEFAULT_VITALS)
+        return cls(
+            risk_level=reading.get("risk_level") or "Unknown",
+            risk_score=reading.get("risk_score"),
+            recorded_at=reading.get("recorded_at"),
+            vitals_lines=lines,
+        )
+
+    def vitals_line(self, topic: str) -> str:
+        line = self.vitals_lines.get(topic)
+        return self.vitals_lines[""] if line is None else line
+
+
+class PatientContextCache:
+    def __init__(self, max_patients: int, ttl_seconds: float):
+        self.contexts = TTLCache(max_patients, ttl_seconds)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, patient_id: str) -> Optional[PatientContext]:
+        context = self.contexts.get(patient_id)
+        if context is not None:
+            self.hits += 1
+            return context
+        self.misses += 1
+        state = analytics_store.get(patient_id)
+        reading = state.latest_reading if state is not None else None
+        if reading is None:
+            return None
+        context = PatientContext.from_reading(reading)
+        self.contexts.set(patient_id, context)
+        return context
+
+    def update(self, patient_id: str, reading: Dict[str, Any]):
+        """A reading was stored for the patient; older readings never replace newer ones."""
+        current = self.contexts.get(patient_id)
+        recorded_at = reading.get("recorded_at")
+        if current is not None and current.recorded_at and recorded_at and recorded_at < current.recorded_at:
+            return
+        self.contexts.set(patient_id, PatientContext.from_reading(reading))
+
+    def discard(self, patient_id: str):
+        self.contexts.delete(patient_id)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.contexts),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.contexts.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+    def clear(self):
+        self.contexts.clear()
+        self.hits = self.misses = 0
+
+
+# Process-wide cache refreshed by the vitals routes and read by /assistant/chat
+patient_context = PatientContextCache(
+    max_patients=settings.PATIENT_CONTEXT_MAX_PATIENTS,
+    ttl_seconds=settings.PATIENT_CONTEXT_TTL_SECONDS,
+)
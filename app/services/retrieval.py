@@ -0,0 +1,347 @@
+"""
+Local retrieval over the assistant's guidance corpus – a BM25 / TF-IDF
+inverted index built from files on disk, no external service.
+
+Corpus (ASSISTANT_CORPUS_DIR, read recursively):
+- *.jsonl: one snippet per line, {"topic": ..., "text": ..., "id": optional}
+- *.md / *.txt: one snippet per file; the first non-empty line (without
+  leading "#") is the topic, the whole file is the text.
+
+The index is a term-major sparse matrix in CSR form: for term t,
+postings[indptr[t]:indptr[t + 1]] are the documents containing it and
+weights[...] their precomputed BM25 (or TF-IDF) weights. A query sums the
+posting weights of its terms with one np.bincount and takes the top k.
+
+With an index directory, the arrays are saved as .npy files next to a
+meta.json holding the vocabulary, the documents and a fingerprint of the
+corpus files. Workers memory-map the arrays (mmap_mode="r"), so they share
+one copy through the page cache, and only rebuild when the corpus or the
+scoring scheme changes.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from loguru import logger
+
+from app.core.config import settings
+from app.services.text_normalize import stem
+
+INDEX_FORMAT = 2  # 2: terms are stemmed
+SCHEMES = ("bm25", "tfidf")
+CORPUS_EXTENSIONS = (".jsonl", ".md", ".txt")
+META_FILE = "meta.json"
+ARRAY_FILES = ("indptr", "postings", "weights", "doc_topics")
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i if in is it me my of on or "
+    "should so that the this to was what when which with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [stem(t) for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+@dataclass(frozen=True)
+class Document:
+    id: str
+    topic: str
+    text: str
+
+
+@dataclass(frozen=True)
+class Hit:
+    doc_id: str
+    topic: str
+    score: float
+    text: str
+
+
+# ---------------------------------------------------------------------------
+# Corpus files
+# ---------------------------------------------------------------------------
+def _corpus_files(directory: str) -> List[str]:
+    paths = []
+    for root, _, names in os.walk(directory):
+        paths.extend(os.path.join(root, n) for n in names if n.endswith(CORPUS_EXTENSIONS))
+    return sorted(paths)
+
+
+def read_corpus(directory: str) -> List[Document]:
+    documents = []
+    for path in _corpus_files(directory):
+        name = os.path.relpath(path, directory)
+        with open(path, encoding="utf-8") as f:
+            if path.endswith(".jsonl"):
+                for n, line in enumerate(f, 1):
+                    if line.strip():
+                        record = json.loads(line)
+                        documents.append(Document(str(record.get("id", f"{name}:{n}")), record["topic"], record["text"]))
+                continue
+            text = f.read().strip()
+        if text:
+            topic = next(line for line in text.splitlines() if line.strip()).lstrip("#").strip()
+            documents.append(Document(name, topic, text))
+    return documents
+
+
+def corpus_fingerprint(directory: str, scheme: str) -> str:
+    """Changes whenever a corpus file is added, removed or modified."""
+    digest = hashlib.sha1(f"{INDEX_FORMAT}|{scheme}".encode())
+    for path in _corpus_files(directory):
+        stat = os.stat(path)
+        digest.update(f"|{os.path.relpath(path, directory)}|{stat.st_size}|{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Index
+# ---------------------------------------------------------------------------
+class RetrievalIndex:
+    def __init__(
+        self,
+        vocabulary: Sequence[str],
+        indptr: np.ndarray,
+        postings: np.ndarray,
+        weights: np.ndarray,
+        topics: Sequence[str],
+        doc_topics: np.ndarray,
+        documents: Sequence[Document],
+        scheme: str,
+        fingerprint: str = "",
+    ):
+        self.vocabulary = list(vocabulary)
+        self.term_ids: Dict[str, int] = {term: i for i, term in enumerate(self.vocabulary)}
+        self.indptr = indptr
+        self.postings = postings
+        self.weights = weights
+        self.topics = list(topics)
+        self.doc_topics = doc_topics
+        self.documents = list(documents)
+        self.scheme = scheme
+        self.fingerprint = fingerprint
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    @classmethod
+    def build(
+        cls, documents: Sequence[Document], scheme: str = "bm25", k1: float = 1.2, b: float = 0.75,
+        fingerprint: str = "",
+    ) -> "RetrievalIndex":
+        if scheme not in SCHEMES:
+            raise ValueError(f"Unknown retrieval scheme {scheme!r}; expected one of {SCHEMES}")
+        term_counts = [Counter(tokenize(f"{doc.topic} {doc.text}")) for doc in documents]
+        vocabulary = sorted({term for counts in term_counts for term in counts})
+        term_ids = {term: i for i, term in enumerate(vocabulary)}
+
+        # Coordinate form, then sorted term-major
+        terms, docs, tfs = [], [], []
+        for doc, counts in enumerate(term_counts):
+            for term, tf in counts.items():
+                terms.append(term_ids[term])
+                docs.append(doc)
+                tfs.append(tf)
+        terms = np.asarray(terms, dtype=np.int64)
+        docs = np.asarray(docs, dtype=np.int32)
+        tfs = np.asarray(tfs, dtype=np.float64)
+        order = np.lexsort((docs, terms))
+        terms, docs, tfs = terms[order], docs[order], tfs[order]
+
+        n_docs = len(documents)
+        df = np.bincount(terms, minlength=len(vocabulary)).astype(np.float64)
+        if scheme == "bm25":
+            doc_len = np.array([sum(c.values()) for c in term_counts], dtype=np.float64)
+            avg_len = doc_len.mean() if n_docs else 1.0
+            idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+            norm = k1 * (1.0 - b + b * doc_len[docs] / max(avg_len, 1e-9))
+            weights = idf[terms] * tfs * (k1 + 1.0) / (tfs + norm)
+        else:
+            idf = np.log((1.0 + n_docs) / (1.0 + df)) + 1.0
+            weights = (1.0 + np.log(tfs)) * idf[terms]
+            doc_norm = np.sqrt(np.bincount(docs, weights=weights ** 2, minlength=n_docs))
+            weights = weights / np.maximum(doc_norm[docs], 1e-12)
+
+        topics = sorted({doc.topic for doc in documents})
+        topic_ids = {topic: i for i, topic in enumerate(topics)}
+        return cls(
+            vocabulary=vocabulary,
+            indptr=np.concatenate(([0], np.cumsum(df))).astype(np.int64),
+            postings=docs,
+            weights=weights.astype(np.float32),
+            topics=topics,
+            doc_topics=np.array([topic_ids[doc.topic] for doc in documents], dtype=np.int32),
+            documents=documents,
+            scheme=scheme,
+            fingerprint=fingerprint,
+        )
+
+    def scores(self, query: str) -> np.ndarray:
+        """Score of every document for the query (0 where no term matches)."""
+        term_ids = [self.term_ids[t] for t in tokenize(query) if t in self.term_ids]
+        if not term_ids:
+            return np.zeros(len(self.documents), dtype=np.float64)
+        indptr = self.indptr
+        slices = [slice(indptr[t], indptr[t + 1]) for t in term_ids]
+        docs = np.concatenate([self.postings[s] for s in slices])
+        weights = np.concatenate([self.weights[s] for s in slices])
+        return np.bincount(docs, weights=weights, minlength=len(self.documents))
+
+    def search(self, query: str, k: int = 5) -> List[Hit]:
+        """The k best-scoring documents, best first."""
+        scores = self.scores(query)
+        matched = np.flatnonzero(scores)
+        if len(matched) > k:
+            matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        matched = matched[np.argsort(-scores[matched], kind="stable")]
+        return [self._hit(int(doc), scores[doc]) for doc in matched]
+
+    def top_topics(self, query: str, k: int = 3) -> List[Hit]:
+        """The best document of each of the k best-scoring topics, best first."""
+        scores = self.scores(query)
+        matched = np.flatnonzero(scores)
+        best = np.zeros(len(self.topics), dtype=np.float64)
+        np.maximum.at(best, self.doc_topics[matched], scores[matched])
+        hits = []
+        for topic in np.argsort(-best, kind="stable")[:k]:
+            if best[topic] <= 0:
+                break
+            in_topic = matched[self.doc_topics[matched] == topic]
+            hits.append(self._hit(int(in_topic[np.argmax(scores[in_topic])]), best[topic]))
+        return hits
+
+    def _hit(self, doc: int, score: float) -> Hit:
+        document = self.documents[doc]
+        return Hit(document.id, document.topic, round(float(score), 4), document.text)
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    def save(self, directory: str):
+        """Write the index; meta.json goes last, so a reader never sees new meta with old arrays."""
+        os.makedirs(directory, exist_ok=True)
+        suffix = f".tmp-{os.getpid()}"
+        for name in ARRAY_FILES:
+            path = os.path.join(directory, f"{name}.npy")
+            with open(path + suffix, "wb") as f:
+                np.save(f, np.ascontiguousarray(getattr(self, name)))
+            os.replace(path + suffix, path)
+        meta = {
+            "format": INDEX_FORMAT,
+            "scheme": self.scheme,
+            "fingerprint": self.fingerprint,
+            "vocabulary": self.vocabulary,
+            "topics": self.topics,
+            "documents": [[doc.id, doc.topic, doc.text] for doc in self.documents],
+        }
+        path = os.path.join(directory, META_FILE)
+        with open(path + suffix, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(path + suffix, path)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "RetrievalIndex":
+        with open(os.path.join(directory, META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format") != INDEX_FORMAT:
+            raise ValueError(f"Unsupported index format {meta.get('format')!r}")
+        mmap_mode = "r" if mmap else None
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode) for name in ARRAY_FILES}
+        return cls(
+            vocabulary=meta["vocabulary"],
+            topics=meta["topics"],
+            documents=[Document(*doc) for doc in meta["documents"]],
+            scheme=meta["scheme"],
+            fingerprint=meta["fingerprint"],
+            **arrays,
+        )
+
+
+def stored_fingerprint(directory: str) -> Optional[str]:
+    try:
+        with open(os.path.join(directory, META_FILE), encoding="utf-8") as f:
+            return json.load(f).get("fingerprint")
+    except (OSError, ValueError):
+        return None
+
+
+def load_or_build(corpus_dir: str, index_dir: str = "", scheme: str = "bm25", mmap: bool = True) -> RetrievalIndex:
+    """Memory-map the saved index if it matches the corpus, else build (and save) it."""
+    fingerprint = corpus_fingerprint(corpus_dir, scheme)
+    if index_dir and stored_fingerprint(index_dir) == fingerprint:
+        try:
+            return RetrievalIndex.load(index_dir, mmap=mmap)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Saved assistant index unusable, rebuilding – {e}")
+    index = RetrievalIndex.build(read_corpus(corpus_dir), scheme=scheme, fingerprint=fingerprint)
+    if index_dir:
+        try:
+            index.save(index_dir)
+        except OSError as e:
+            logger.warning(f"Assistant index not saved to {index_dir} – {e}")
+    return index
+
+
+# ---------------------------------------------------------------------------
+# Process-wide index
+# ---------------------------------------------------------------------------
+class CorpusRetriever:
+    """Owns the active index; built on first use (or at startup) and swapped on reload()."""
+
+    def __init__(self, corpus_dir: str, index_dir: str = "", scheme: str = "bm25", mmap: bool = True):
+        self.corpus_dir = corpus_dir
+        self.index_dir = index_dir
+        self.scheme = scheme
+        self.mmap = mmap
+        self._index: Optional[RetrievalIndex] = None
+        self._load_failed = False
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.corpus_dir)
+
+    def get(self) -> Optional[RetrievalIndex]:
+        """The active index, or None if no corpus is configured or it cannot be read."""
+        index = self._index
+        if index is not None or self._load_failed or not self.enabled:
+            return index
+        with self._lock:
+            if self._index is None and not self._load_failed:
+                try:
+                    self._index = self._load()
+                except Exception as e:
+                    self._load_failed = True
+                    logger.warning(f"Assistant corpus not loaded, using built-in topics – {e}")
+            return self._index
+
+    def reload(self) -> RetrievalIndex:
+        """Re-read the corpus (rebuilding the index if it changed) and swap it in."""
+        with self._lock:
+            self._index = self._load()
+            self._load_failed = False
+        return self._index
+
+    def _load(self) -> RetrievalIndex:
+        index = load_or_build(self.corpus_dir, self.index_dir, self.scheme, self.mmap)
+        logger.info(
+            f"Assistant corpus indexed: {len(index):,} snippets, {len(index.topics):,} topics, "
+            f"{len(index.vocabulary):,} terms ({index.scheme})."
+        )
+        return index
+
+
+corpus_retriever = CorpusRetriever(
+    corpus_dir=settings.ASSISTANT_CORPUS_DIR,
+    index_dir=settings.ASSISTANT_INDEX_DIR,
+    scheme=settings.ASSISTANT_RETRIEVAL_SCHEME,
+    mmap=settings.ASSISTANT_INDEX_MMAP,
+)
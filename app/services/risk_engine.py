@@ -1,21 +1,50 @@
-import joblib
+import asyncio
 import os
+import threading
 import numpy as np
-from typing import Dict, Any
+from typing import Dict, Any, List, NamedTuple, Union
+from app.core.config import settings
+from app.services.metrics import timed
+from app.services.model_registry import ModelRegistry
+from app.services.rule_engine import fallback_risk_rules
+from app.services.scoring_executor import ScoringExecutor, MODES as EXECUTOR_MODES
 
 BASE_DIR = os.path.dirname(__file__)
 
 # ---------------------------------------------------------------------------
-# Load trained model artefacts
+# Trained model artefacts – loaded lazily by the registry on first use
 # Model features (in order): chol, hdl, age, weight, bp.1s, bp.1d
 # ---------------------------------------------------------------------------
-try:
-    model = joblib.load(os.path.join(BASE_DIR, "risk_model.joblib"))
-    scaler = joblib.load(os.path.join(BASE_DIR, "scaler.joblib"))
-    _model_loaded = True
-except Exception as e:
-    _model_loaded = False
-    print(f"Warning: ML model not loaded – {e}")
+registry = ModelRegistry(
+    model_dir=settings.MODEL_DIR or BASE_DIR,
+    mmap=settings.MODEL_MMAP,
+    scorer_kind=settings.RISK_SCORER,
+)
+
+# Recorded as the model version when the rule-based fallback produced a score
+FALLBACK_VERSION = "rule-based"
+
+
+# Input dict key -> default used when the key is missing, in model feature order
+FEATURE_DEFAULTS = {
+    "cholesterol": 200,
+    "hdl": 50,
+    "age": 50,
+    "weight": 75,
+    "bp_systolic": 120,
+    "bp_diastolic": 80,
+}
+
+RISK_LEVELS = np.array(["Low", "Moderate", "High"])
+
+# A batch of readings: list of dicts, or a structured array keyed like the dicts
+VitalsBatch = Union[List[Dict[str, Any]], np.ndarray]
+
+
+class RiskBatchResult(NamedTuple):
+    risk_scores: np.ndarray   # float64, rounded to 4 dp
+    risk_levels: np.ndarray   # "Low" | "Moderate" | "High"
+    model_version: str
 
 
 # ---------------------------------------------------------------------------
@@ -46,32 +75,164 @@ RECOMMENDATIONS = {
 }
 
 
+@timed("risk.calculate_risk")
 def calculate_risk(vital_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Run the ML risk model against the six core features and return
     a risk score, risk level label, and tailored recommendations.
+
+    With SCORING_EXECUTOR set to "thread" or "process" the reading is
+    micro-batched with concurrent calls and scored on the executor's pool.
     """
-    if not _model_loaded:
+    executor = get_scoring_executor()
+    if executor is not None:
+        return _executor_result(*executor.score(vital_data))
+    return _score_reading(vital_data)
+
+
+@timed("risk.calculate_risk_async")
+async def calculate_risk_async(vital_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    calculate_risk() for async handlers: awaits the scoring executor's future,
+    or runs the in-process scorer on a worker thread, so the event loop is
+    never blocked by inference.
+    """
+    executor = get_scoring_executor()
+    if executor is None:
+        return await asyncio.to_thread(_score_reading, vital_data)
+    risk_score, risk_level, model_version = await asyncio.wrap_future(executor.submit(vital_data))
+    return _executor_result(risk_score, risk_level, model_version)
+
+
+def _executor_result(risk_score: float, risk_level: str, model_version: str) -> Dict[str, Any]:
+    return {
+        "risk_score": risk_score,
+        "risk_level": risk_level,
+        "recommendations": RECOMMENDATIONS[risk_level],
+        "model_version": model_version,
+    }
+
+
+def _score_reading(vital_data: Dict[str, Any]) -> Dict[str, Any]:
+    loaded = registry.get()
+    if loaded is None:
         # Graceful fallback when model artefacts are missing
         return _rule_based_fallback(vital_data)
 
-    features = np.array([[
-        vital_data.get("cholesterol", 200),
-        vital_data.get("hdl", 50),
-        vital_data.get("age", 50),
-        vital_data.get("weight", 75),
-        vital_data.get("bp_systolic", 120),
-        vital_data.get("bp_diastolic", 80),
-    ]])
-
-    scaled = scaler.transform(features)
-    probability = float(model.predict_proba(scaled)[0][1])
-    risk_level = _stratify(probability)
+    features = _feature_matrix([vital_data])
+    probability = float(loaded.scorer(features)[0])
+    return _build_result(probability, loaded.version)
+
+
+@timed("risk.calculate_risk_batch")
+def calculate_risk_batch(vitals: VitalsBatch) -> RiskBatchResult:
+    """
+    Vectorised counterpart of calculate_risk().
+
+    Accepts a list of reading dicts or a NumPy structured array whose field
+    names match the reading keys (missing fields fall back to defaults).
+    All rows go through a single scorer call over an (n, 6) matrix and
+    stratification is done with np.select, so no Python work is done per row.
+
+    Returns a RiskBatchResult: a float64 score array rounded to 4 dp and a
+    string array of "Low" / "Moderate" / "High", both in input order, plus
+    the version of the model that produced them.
+    """
+    loaded = registry.get()
+    columns = _feature_columns(vitals)
+    if loaded is None:
+        return _rule_based_fallback_batch(columns)
 
+    features = np.column_stack([columns[key] for key in FEATURE_DEFAULTS])
+    if len(features) == 0:
+        return RiskBatchResult(np.empty(0, dtype=float), np.empty(0, dtype=RISK_LEVELS.dtype), loaded.version)
+    probabilities = loaded.scorer(features)
+    return RiskBatchResult(np.round(probabilities, 4), _stratify_batch(probabilities), loaded.version)
+
+
+def warm_up():
+    """Load the model and run one dummy prediction (also the process-pool worker initializer)."""
+    calculate_risk_batch([dict(FEATURE_DEFAULTS)])
+
+
+# ---------------------------------------------------------------------------
+# Scoring executor – created on first use according to SCORING_EXECUTOR
+# ---------------------------------------------------------------------------
+_executor: ScoringExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_scoring_executor() -> ScoringExecutor | None:
+    """Return the configured scoring executor, or None for in-process scoring."""
+    global _executor
+    mode = settings.SCORING_EXECUTOR
+    if mode == "inprocess":
+        return None
+    if mode not in EXECUTOR_MODES:
+        raise RuntimeError(f"Unknown SCORING_EXECUTOR {mode!r}; expected one of {EXECUTOR_MODES}")
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ScoringExecutor(
+                    score_batch=calculate_risk_batch,
+                    mode=mode,
+                    workers=settings.SCORING_WORKERS,
+                    window_ms=settings.SCORING_BATCH_WINDOW_MS,
+                    max_batch=settings.SCORING_MAX_BATCH,
+                    initializer=warm_up,
+                )
+                if mode == "process":
+                    # Worker processes hold their own registry; recycle them on reload
+                    registry.add_reload_listener(lambda _loaded: _executor.restart_workers())
+    return _executor
+
+
+def shutdown_scoring_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown()
+            _executor = None
+
+
+def _feature_matrix(vital_rows: List[Dict[str, Any]]) -> np.ndarray:
+    """Build the (n, 6) model input matrix, filling missing keys with defaults."""
+    return np.array(
+        [[row.get(key, default) for key, default in FEATURE_DEFAULTS.items()] for row in vital_rows],
+        dtype=float,
+    )
+
+
+def _feature_columns(vitals: VitalsBatch) -> Dict[str, np.ndarray]:
+    """
+    Extract one float64 column per model feature (plus glucose, used by the
+    fallback) from a list of dicts or a structured array.
+    Missing keys/fields take their default; a None glucose becomes NaN.
+    """
+    defaults = {**FEATURE_DEFAULTS, "glucose": np.nan}
+
+    if isinstance(vitals, np.ndarray):
+        names = vitals.dtype.names or ()
+        n = len(vitals)
+        return {
+            key: vitals[key].astype(float) if key in names else np.full(n, default, dtype=float)
+            for key, default in defaults.items()
+        }
+
+    columns = {}
+    for key, default in defaults.items():
+        values = [row.get(key, default) for row in vitals]
+        columns[key] = np.array([np.nan if v is None else v for v in values], dtype=float)
+    return columns
+
+
+def _build_result(probability: float, model_version: str) -> Dict[str, Any]:
+    risk_level = _stratify(probability)
     return {
         "risk_score": round(probability, 4),
         "risk_level": risk_level,
         "recommendations": RECOMMENDATIONS[risk_level],
+        "model_version": model_version,
     }
 
 
@@ -83,21 +244,25 @@ def _stratify(probability: float) -> str:
     return "Low"
 
 
+def _stratify_batch(probabilities: np.ndarray) -> np.ndarray:
+    """Vectorised _stratify(): same thresholds, NaN falls through to "Low"."""
+    return np.select(
+        [probabilities >= 0.7, probabilities >= 0.4],
+        [RISK_LEVELS[2], RISK_LEVELS[1]],
+        default=RISK_LEVELS[0],
+    )
+
+
 def _rule_based_fallback(vital_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Simple threshold-based fallback when ML model is unavailable."""
-    score = 0.2
-    bp_s = vital_data.get("bp_systolic", 120)
-    chol = vital_data.get("cholesterol", 200)
-    glucose = vital_data.get("glucose", 100)
-
-    if bp_s >= 160 or chol >= 240 or (glucose and glucose >= 200):
-        score = 0.80
-    elif bp_s >= 130 or chol >= 200 or (glucose and glucose >= 140):
-        score = 0.50
-
-    risk_level = _stratify(score)
-    return {
-        "risk_score": round(score, 4),
-        "risk_level": risk_level,
-        "recommendations": RECOMMENDATIONS[risk_level],
-    }
\ No newline at end of file
+    """Threshold-based fallback when the ML model is unavailable (rules in fallback_risk_rules.json)."""
+    rule_set = fallback_risk_rules.get()
+    rule = rule_set.evaluate_one(vital_data)
+    score = rule.outputs["score"] if rule is not None else rule_set.default_outputs["score"]
+    return _build_result(score, FALLBACK_VERSION)
+
+
+def _rule_based_fallback_batch(columns: Dict[str, np.ndarray]) -> RiskBatchResult:
+    """Vectorised _rule_based_fallback() over feature columns. NaN glucose never triggers."""
+    rule_set = fallback_risk_rules.get()
+    scores = rule_set.output_array("score", rule_set.evaluate(columns), dtype=float)
+    return RiskBatchResult(scores, _stratify_batch(scores), FALLBACK_VERSION)
@@ -0,0 +1,327 @@
+"""
+Declarative rule engine – threshold rules loaded from JSON (or YAML) and
+compiled once into an evaluator.
+
+A rule set file looks like:
+
+    {
+      "defaults": {"bp_systolic": 0},          # value used when a field is missing
+      "default": {"score": 0.2},               # outputs when no rule matches (optional)
+      "rules": [
+        {
+          "id": "hypertensive_crisis",
+          "priority": 10,                      # lower is checked first; ties keep file order
+          "any": [                             # or "all"
+            {"field": "bp_systolic", "op": ">=", "value": 180},
+            {"field": "bp_diastolic", "op": ">=", "value": 120}
+          ],
+          "severity": "Critical",              # every other key is an output
+          "message": "Hypertensive crisis detected: BP {bp_systolic}/{bp_diastolic} mmHg."
+        }
+      ]
+    }
+
+Operators: >=, >, <=, <, ==, !=. A missing value with no default never
+matches. Message templates use str.format field names plus a ":pct"
+format spec that renders round(value * 100).
+
+Each reading gets the first matching rule in priority order, exactly like an
+if/elif chain. evaluate_one() walks the compiled conditions for a single
+dict; evaluate() runs every rule over a whole batch with vectorised NumPy
+masks and picks the first match per row with argmax.
+
+RuleRegistry holds the compiled set for a file and reloads it when the file
+changes, so thresholds can be edited without a deploy.
+"""
+import json
+import operator
+import os
+import string
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from loguru import logger
+
+from app.core.config import settings
+
+NO_MATCH = -1
+
+# op -> (scalar operator, vectorised ufunc)
+OPERATORS: Dict[str, Tuple[Callable[[Any, Any], bool], np.ufunc]] = {
+    ">=": (operator.ge, np.greater_equal),
+    ">": (operator.gt, np.greater),
+    "<=": (operator.le, np.less_equal),
+    "<": (operator.lt, np.less),
+    "==": (operator.eq, np.equal),
+    "!=": (operator.ne, np.not_equal),
+}
+
+Readings = Union[Sequence[Dict[str, Any]], np.ndarray, Dict[str, np.ndarray]]
+
+
+class RuleSetError(ValueError):
+    """The rule set file is malformed."""
+
+
+class _TemplateFormatter(string.Formatter):
+    def format_field(self, value, format_spec):
+        if format_spec == "pct":
+            return str(round(value * 100))
+        return super().format_field(value, format_spec)
+
+
+_formatter = _TemplateFormatter()
+
+
+@dataclass(frozen=True)
+class Condition:
+    field: str
+    op: str
+    value: Any
+
+    def test(self, value) -> bool:
+        return value is not None and OPERATORS[self.op][0](value, self.value)
+
+
+@dataclass(frozen=True)
+class Rule:
+    id: str
+    priority: float
+    conditions: Tuple[Condition, ...]
+    match_all: bool
+    outputs: Dict[str, Any] = field(default_factory=dict)
+
+    def __post_init__(self):
+        # (field, scalar operator, threshold) triples, so matches() does no lookups per call
+        compiled = tuple((c.field, OPERATORS[c.op][0], c.value) for c in self.conditions)
+        object.__setattr__(self, "_compiled", compiled)
+
+    def matches(self, values: Dict[str, Any]) -> bool:
+        if self.match_all:
+            for name, op, threshold in self._compiled:
+                value = values.get(name)
+                if value is None or not op(value, threshold):
+                    return False
+            return True
+        for name, op, threshold in self._compiled:
+            value = values.get(name)
+            if value is not None and op(value, threshold):
+                return True
+        return False
+
+    def render(self, template_key: str, context: Dict[str, Any]) -> str:
+        return _formatter.vformat(self.outputs[template_key], (), context)
+
+
+class RuleSet:
+    """A compiled, immutable rule set."""
+
+    def __init__(self, spec: Dict[str, Any], source: str = "<dict>"):
+        self.source = source
+        self.defaults: Dict[str, Any] = dict(spec.get("defaults", {}))
+        self.default_outputs: Dict[str, Any] = dict(spec.get("default", {}))
+        self.rules: List[Rule] = _compile_rules(spec.get("rules", []), source)
+
+        self.fields = sorted({c.field for rule in self.rules for c in rule.conditions})
+        self._text_fields = {
+            c.field for rule in self.rules for c in rule.conditions if isinstance(c.value, str)
+        }
+
+    # ------------------------------------------------------------------
+    # One reading
+    # ------------------------------------------------------------------
+    def values(self, reading: Dict[str, Any]) -> Dict[str, Any]:
+        """The reading's rule fields with defaults filled in for missing / None values."""
+        values = {}
+        for name in self.fields:
+            value = reading.get(name)
+            values[name] = self.defaults.get(name) if value is None else value
+        return values
+
+    def evaluate_one(self, reading: Dict[str, Any]) -> Optional[Rule]:
+        """First matching rule for a single reading, or None."""
+        values = self.values(reading)
+        for rule in self.rules:
+            if rule.matches(values):
+                return rule
+        return None
+
+    # ------------------------------------------------------------------
+    # Batches
+    # ------------------------------------------------------------------
+    def columns(self, readings: Readings) -> Dict[str, np.ndarray]:
+        """
+        Column arrays for the rule fields from a list of dicts, a structured
+        array or a dict of arrays. Missing numeric values become NaN unless the
+        rule set has a default for the field.
+        """
+        n = _batch_length(readings)
+        if isinstance(readings, dict):
+            get_column = lambda name: readings.get(name)
+        elif isinstance(readings, np.ndarray) and readings.dtype.names:
+            get_column = lambda name: readings[name] if name in readings.dtype.names else None
+        else:
+            get_column = lambda name: [r.get(name) for r in readings]
+
+        columns = {}
+        for name in self.fields:
+            raw = get_column(name)
+            default = self.defaults.get(name)
+            if name in self._text_fields:
+                column = np.empty(n, dtype=object)
+                if raw is not None:
+                    column[:] = list(raw)
+                column[np.equal(column, None)] = default
+            else:
+                column = np.full(n, np.nan) if raw is None else np.array(raw, dtype=float)
+                if default is not None:
+                    column[np.isnan(column)] = default
+            columns[name] = column
+        return columns
+
+    def evaluate(self, readings: Readings) -> np.ndarray:
+        """
+        Index into self.rules of the first matching rule for every reading
+        (NO_MATCH where none match). All rules are evaluated as boolean masks
+        over the batch; np.argmax over the stacked masks gives the first match.
+        """
+        n = _batch_length(readings)
+        if not self.rules or n == 0:
+            return np.full(n, NO_MATCH, dtype=np.intp)
+        columns = self.columns(readings)
+
+        masks = np.empty((len(self.rules), n), dtype=bool)
+        for i, rule in enumerate(self.rules):
+            tests = [_vector_test(columns[c.field], c) for c in rule.conditions]
+            masks[i] = np.logical_and.reduce(tests) if rule.match_all else np.logical_or.reduce(tests)
+        first = masks.argmax(axis=0)
+        return np.where(masks[first, np.arange(n)], first, NO_MATCH)
+
+    def output_array(self, key: str, matches: np.ndarray, dtype=None) -> np.ndarray:
+        """Gather one output per reading from evaluate() results (default output where none matched)."""
+        table = [rule.outputs.get(key) for rule in self.rules] + [self.default_outputs.get(key)]
+        return np.asarray(table, dtype=dtype)[matches]
+
+
+def _vector_test(column: np.ndarray, condition: Condition) -> np.ndarray:
+    ufunc = OPERATORS[condition.op][1]
+    if column.dtype == object:
+        present = np.not_equal(column, None)
+        if condition.op in ("==", "!="):
+            return present & ufunc(column, condition.value).astype(bool)
+        op = OPERATORS[condition.op][0]
+        return np.array([v is not None and op(v, condition.value) for v in column], dtype=bool)
+    with np.errstate(invalid="ignore"):
+        result = ufunc(column, condition.value)
+    if condition.op == "!=":
+        result &= ~np.isnan(column)  # a missing value never matches
+    return result
+
+
+def _batch_length(readings: Readings) -> int:
+    if isinstance(readings, dict):
+        return len(next(iter(readings.values()))) if readings else 0
+    return len(readings)
+
+
+def _compile_rules(raw_rules: List[Dict[str, Any]], source: str) -> List[Rule]:
+    rules = []
+    for position, raw in enumerate(raw_rules):
+        raw = dict(raw)
+        rule_id = raw.pop("id", f"rule-{position}")
+        if ("any" in raw) == ("all" in raw):
+            raise RuleSetError(f"{source}: rule {rule_id!r} needs exactly one of 'any' or 'all'")
+        match_all = "all" in raw
+        conditions = []
+        for c in raw.pop("all" if match_all else "any"):
+            if c.get("op") not in OPERATORS:
+                raise RuleSetError(f"{source}: rule {rule_id!r} has unknown operator {c.get('op')!r}")
+            conditions.append(Condition(field=c["field"], op=c["op"], value=c["value"]))
+        if not conditions:
+            raise RuleSetError(f"{source}: rule {rule_id!r} has no conditions")
+        priority = raw.pop("priority", position)
+        rules.append((priority, position, Rule(rule_id, priority, tuple(conditions), match_all, raw)))
+    return [rule for _, _, rule in sorted(rules, key=lambda item: item[:2])]
+
+
+def load_rule_set(path: str) -> RuleSet:
+    """Parse and compile a JSON or YAML (.yaml / .yml, needs PyYAML) rule set file."""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            import yaml  # optional: only needed for YAML rule files
+            spec = yaml.safe_load(f)
+        else:
+            spec = json.load(f)
+    return RuleSet(spec, source=path)
+
+
+class RuleRegistry:
+    """
+    The compiled rule set for one file. get() recompiles it when the file's
+    mtime changes (checked at most every check_interval seconds); a file that
+    fails to compile leaves the previous rule set active.
+    """
+
+    def __init__(self, path: str, check_interval: float = 5.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._current: Optional[RuleSet] = None
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> RuleSet:
+        now = time.monotonic()
+        if self._current is None or now - self._checked_at >= self.check_interval:
+            with self._lock:
+                if self._current is None or now - self._checked_at >= self.check_interval:
+                    self._checked_at = now
+                    self._refresh()
+        return self._current
+
+    def reload(self) -> RuleSet:
+        """Recompile the file now; raises if it is invalid (the previous set stays active)."""
+        with self._lock:
+            self._swap()
+            self._checked_at = time.monotonic()
+            return self._current
+
+    def _refresh(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError as e:
+            if self._current is None:
+                raise
+            logger.warning(f"Rule file {self.path} unavailable, keeping loaded rules – {e}")
+            return
+        if mtime == self._mtime and self._current is not None:
+            return
+        try:
+            self._swap()
+        except Exception as e:
+            if self._current is None:
+                raise
+            logger.error(f"Rule file {self.path} not reloaded, keeping previous rules – {e}")
+            self._mtime = mtime  # do not retry until the file changes again
+
+    def _swap(self):
+        mtime = os.path.getmtime(self.path)
+        rule_set = load_rule_set(self.path)
+        self._current, self._mtime = rule_set, mtime
+        logger.info(f"Loaded {len(rule_set.rules)} rule(s) from {self.path}")
+
+
+RULES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules")
+
+# Rule sets used by the alert service and the risk engine's no-model fallback
+alert_rules = RuleRegistry(
+    settings.ALERT_RULES_PATH or os.path.join(RULES_DIR, "alert_rules.json"),
+    check_interval=settings.RULES_RELOAD_CHECK_SECONDS,
+)
+fallback_risk_rules = RuleRegistry(
+    settings.FALLBACK_RISK_RULES_PATH or os.path.join(RULES_DIR, "fallback_risk_rules.json"),
+    check_interval=settings.RULES_RELOAD_CHECK_SECONDS,
+)
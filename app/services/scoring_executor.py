@@ -0,0 +1,150 @@
+"""
+Scoring executor – runs risk inference off the request threads.
+
+Requests submitted within a short window (SCORING_BATCH_WINDOW_MS) are
+collected into one micro-batch and scored with a single vectorised call,
+either on a thread pool or on a process pool whose workers preload the model.
+A process pool lets scoring use every core regardless of the GIL and of how
+many HTTP workers are running.
+"""
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+MODES = ("inprocess", "thread", "process")
+
+# Sentinel telling the dispatcher thread to exit
+_STOP = object()
+
+
+class ScoringExecutor:
+    """
+    Micro-batching front end for a batch scoring function.
+
+    score_batch must take a list of reading dicts and return
+    (scores, levels, model_version), where scores and levels are sequences
+    aligned with the input. For mode="process" both score_batch and
+    initializer must be importable module-level functions.
+    """
+
+    def __init__(
+        self,
+        score_batch: Callable[[List[Dict[str, Any]]], Tuple[Sequence, Sequence, str]],
+        mode: str = "thread",
+        workers: int = 2,
+        window_ms: float = 2.0,
+        max_batch: int = 256,
+        initializer: Optional[Callable[[], Any]] = None,
+    ):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"ScoringExecutor mode must be 'thread' or 'process', got {mode!r}")
+        self.score_batch = score_batch
+        self.mode = mode
+        self.workers = workers
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.initializer = initializer
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._pool_lock = threading.Lock()
+        self._pool = self._create_pool()
+        self._dispatcher = threading.Thread(target=self._run, name="scoring-dispatcher", daemon=True)
+        self._dispatcher.start()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def submit(self, vital_data: Dict[str, Any]) -> Future:
+        """Queue one reading; the Future resolves to (risk_score, risk_level, model_version)."""
+        future: Future = Future()
+        self._queue.put((vital_data, future))
+        return future
+
+    def score(self, vital_data: Dict[str, Any]) -> Tuple[float, str, str]:
+        """Blocking convenience wrapper around submit()."""
+        return self.submit(vital_data).result()
+
+    def restart_workers(self):
+        """
+        Replace the worker pool, e.g. after a model reload so process workers
+        pick up the new version. Batches already running finish on the old pool.
+        """
+        with self._pool_lock:
+            old, self._pool = self._pool, self._create_pool()
+        old.shutdown(wait=False)
+        logger.info(f"Scoring {self.mode} pool restarted with {self.workers} worker(s).")
+
+    def shutdown(self, wait: bool = True):
+        self._queue.put(_STOP)
+        self._dispatcher.join(timeout=5 if wait else 0)
+        with self._pool_lock:
+            self._pool.shutdown(wait=wait)
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+    def _create_pool(self) -> Executor:
+        if self.mode == "process":
+            # spawn, not fork: the parent already runs threads (dispatcher, HTTP server)
+            return ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=self.initializer,
+            )
+        return ThreadPoolExecutor(
+            max_workers=self.workers,
+            thread_name_prefix="scoring",
+            initializer=self.initializer,
+        )
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: List[Tuple[Dict[str, Any], Future]]):
+        rows = [vital_data for vital_data, _ in batch]
+        futures = [future for _, future in batch]
+        try:
+            with self._pool_lock:
+                result = self._pool.submit(self.score_batch, rows)
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+        result.add_done_callback(lambda done: _resolve(done, futures))
+
+
+def _resolve(done: Future, futures: List[Future]):
+    """Fan a batch result out to the per-reading futures."""
+    error = done.exception()
+    if error is not None:
+        logger.error(f"Scoring batch of {len(futures)} failed: {error}")
+        for future in futures:
+            future.set_exception(error)
+        return
+    scores, levels, model_version = done.result()
+    for future, score, level in zip(futures, scores, levels):
+        future.set_result((float(score), str(level), model_version))
@@ -0,0 +1,53 @@
+"""
+Text normalisation shared by the assistant's keyword matcher, its answer
+cache and the retrieval index.
+
+fold_text() lower-cases, turns punctuation into spaces and collapses
+whitespace, so "What is  BLOOD-pressure?" and "what is blood pressure" are
+the same question. Keywords are folded the same way, so matching on folded
+text keeps the plain-substring semantics. It does not stem: a stemmed
+keyword is found inside unrelated words ("missed" stems to "miss", which is
+in "mission").
+
+stem() is for the retrieval index, which stems whole tokens. It is
+deliberately light – a few English inflections and a trailing "e", never
+below four letters – so the forms of a word share a stem ("collapse",
+"collapsed", "collapses", "collapsing" -> "collap"). It is idempotent.
+"""
+import re
+from functools import lru_cache
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]+")
+MIN_STEM = 4
+
+
+def _strip_suffix(word: str) -> str:
+    if len(word) <= MIN_STEM:
+        return word
+    if word.endswith("ies"):
+        word = word[:-3] + "y"
+    elif word.endswith("sses"):
+        word = word[:-2]
+    elif word.endswith("ing") and len(word) - 3 >= MIN_STEM:
+        word = word[:-3]
+    elif word.endswith("ed") and len(word) - 2 >= MIN_STEM:
+        word = word[:-2]
+    elif word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        word = word[:-1]
+    if word.endswith("e") and len(word) > MIN_STEM:
+        word = word[:-1]
+    return word
+
+
+@lru_cache(maxsize=65_536)
+def stem(word: str) -> str:
+    """Strip suffixes until nothing changes, so stemming a stem is a no-op."""
+    while True:
+        shorter = _strip_suffix(word)
+        if shorter == word:
+            return word
+        word = shorter
+
+
+def fold_text(text: str) -> str:
+    return " ".join(_PUNCTUATION_RE.sub(" ", text.lower()).split())
@@ -0,0 +1,178 @@
+"""
+Startup warm-up and readiness.
+
+The first requests to a fresh worker would otherwise pay for: importing
+and creating the database client, opening pooled connections, loading the
+risk model, the first prediction (input validation, BLAS initialisation),
+compiling the rule files, indexing the assistant corpus and filling the
+caches. run_warm_up() does all of that during the lifespan, in the
+background, step by step (WARM_UP_STEPS):
+
+- database:    create the configured repository's client
+- connections: open WARM_UP_MIN_CONNECTIONS pooled connections, by running
+               that many small queries concurrently
+- model:       load the risk model artefacts
+- predict:     one dummy single and batch prediction, and start the
+               scoring executor if one is configured
+- rules:       compile the alert and fallback rule files
+- corpus:      index (or memory-map) the assistant corpus, if configured
+- caches:      prime the patient cache with WARM_UP_PRIME_PATIENTS recent
+               patients and the assistant answers for the topic keywords
+
+GET /ready answers 503 until the warm-up has finished, then 200, so the
+load balancer only routes to warm workers; GET /health stays a liveness
+check. A failed step is logged and reported but does not keep the worker
+out of rotation: it serves, paying that cost on first use as before. The
+warm-up as a whole is bounded by WARM_UP_TIMEOUT_SECONDS.
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from loguru import logger
+
+from app.core.config import settings
+from app.repositories import get_repository
+from app.services.ai_assistant import KNOWLEDGE_BASE, answer
+from app.services.patient_cache import patient_cache
+from app.services.retrieval import corpus_retriever
+from app.services.risk_engine import FEATURE_DEFAULTS, calculate_risk, get_scoring_executor, registry, warm_up
+from app.services.rule_engine import alert_rules, fallback_risk_rules
+
+STEPS = ("database", "connections", "model", "predict", "rules", "corpus", "caches")
+
+
+class WarmUpState:
+    def __init__(self):
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.steps: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def ready(self) -> bool:
+        return self.finished_at is not None
+
+    def start(self):
+        self.started_at = time.monotonic()
+        self.finished_at = None
+        self.steps = {}
+
+    def finish(self):
+        if self.started_at is None:
+            self.started_at = time.monotonic()
+        self.finished_at = time.monotonic()
+
+    def report(self) -> Dict[str, Any]:
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = round(((self.finished_at or time.monotonic()) - self.started_at) * 1000, 1)
+        return {"ready": self.ready, "elapsed_ms": elapsed, "steps": self.steps}
+
+    def reset(self):
+        self.started_at = self.finished_at = None
+        self.steps = {}
+
+
+# ---------------------------------------------------------------------------
+# Steps
+# ---------------------------------------------------------------------------
+async def _warm_database():
+    await asyncio.to_thread(get_repository)
+
+
+async def _warm_connections():
+    # Concurrent queries each check out a pooled connection (asyncpg), or open
+    # the HTTP/2 connection and its TLS session (PostgREST)
+    repo = await asyncio.to_thread(get_repository)
+    await asyncio.gather(*(repo.patients.list(limit=1) for _ in range(settings.WARM_UP_MIN_CONNECTIONS)))
+
+
+async def _warm_model():
+    if await asyncio.to_thread(registry.get) is None:
+        raise RuntimeError("model artefacts not loaded, scoring uses the rule-based fallback")
+
+
+async def _warm_predict():
+    await asyncio.to_thread(warm_up)
+    await asyncio.to_thread(calculate_risk, dict(FEATURE_DEFAULTS))
+    await asyncio.to_thread(get_scoring_executor)
+
+
+async def _warm_rules():
+    await asyncio.to_thread(alert_rules.get)
+    await asyncio.to_thread(fallback_risk_rules.get)
+
+
+async def _warm_corpus():
+    if corpus_retriever.enabled:
+        await asyncio.to_thread(corpus_retriever.get)
+
+
+async def _warm_caches():
+    def prime_answers():
+        for entry in KNOWLEDGE_BASE:
+            for keyword in entry["keywords"]:
+                answer(keyword)
+
+    await asyncio.to_thread(prime_answers)
+    if settings.WARM_UP_PRIME_PATIENTS > 0:
+        repo = await asyncio.to_thread(get_repository)
+        for row in await repo.patients.list(limit=settings.WARM_UP_PRIME_PATIENTS):
+            async def load(_patient_id, row=row):
+                return row
+
+            await patient_cache.get(row["id"], load)
+
+
+STEP_FUNCTIONS: Dict[str, Callable[[], Awaitable[None]]] = {
+    "database": _warm_database,
+    "connections": _warm_connections,
+    "model": _warm_model,
+    "predict": _warm_predict,
+    "rules": _warm_rules,
+    "corpus": _warm_corpus,
+    "caches": _warm_caches,
+}
+
+
+def configured_steps(spec: str) -> List[str]:
+    """Parse WARM_UP_STEPS ("all", "" for none, or a comma-separated list)."""
+    spec = spec.strip()
+    if spec == "all":
+        return list(STEPS)
+    steps = [s.strip() for s in spec.split(",") if s.strip()]
+    unknown = [s for s in steps if s not in STEP_FUNCTIONS]
+    if unknown:
+        raise ValueError(f"Unknown warm-up step(s) {unknown}; expected some of {STEPS}")
+    return steps
+
+
+async def run_warm_up(state: WarmUpState, steps: List[str], timeout_seconds: float):
+    """Run the steps in order, recording each; the state is ready when this returns."""
+    state.start()
+    deadline = time.monotonic() + timeout_seconds
+    try:
+        for name in steps:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                state.steps[name] = {"status": "timed_out"}
+                continue
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(STEP_FUNCTIONS[name](), timeout=remaining)
+                status = {"status": "ok"}
+            except asyncio.TimeoutError:
+                status = {"status": "timed_out"}
+                logger.warning(f"Warm-up step {name} timed out")
+            except Exception as e:
+                status = {"status": "failed", "error": str(e)}
+                logger.warning(f"Warm-up step {name} failed – {e}")
+            status["ms"] = round((time.perf_counter() - started) * 1000, 1)
+            state.steps[name] = status
+    finally:
+        state.finish()
+    logger.info(f"Warm-up finished in {state.report()['elapsed_ms']:.0f} ms; worker is ready.")
+
+
+# Process-wide readiness, reported by GET /ready
+warm_up_state = WarmUpState()
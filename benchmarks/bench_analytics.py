@@ -0,0 +1,77 @@
+"""
+Latency benchmark for patient analytics.
+
+Times compute_analytics() over history windows of increasing size, and the
+incremental path (one PatientAnalyticsState.add() plus snapshot()) that
+serves requests once per-patient state is warm.
+
+Run from the repo root:
+    python -m benchmarks.bench_analytics
+    python -m benchmarks.bench_analytics --windows 90 1000 10000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.services.analytics import AVERAGE_FIELDS, compute_analytics
+from app.services.analytics_state import PatientAnalyticsState
+
+DEFAULT_WINDOWS = [90, 1_000, 5_000, 20_000]
+PATIENT_ID = "bench-patient"
+
+
+def synthetic_history(n: int, seed: int = 0):
+    """n readings, newest first, with ~10% of values missing."""
+    rng = np.random.default_rng(seed)
+    values = rng.normal(100.0, 20.0, (n, len(AVERAGE_FIELDS))).round(2)
+    missing = rng.random(values.shape) < 0.1
+    levels = rng.choice(["Low", "Moderate", "High"], n)
+    history = []
+    for i in range(n):
+        reading = {
+            field: None if missing[i, j] else float(values[i, j])
+            for j, field in enumerate(AVERAGE_FIELDS)
+        }
+        reading["risk_level"] = str(levels[i])
+        reading["recorded_at"] = f"2026-01-01T00:00:{i:06d}"
+        history.append(reading)
+    return history[::-1]
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--windows", type=int, nargs="+", default=DEFAULT_WINDOWS)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'window':>8} {'path':<22} {'ms':>10}")
+    for window in args.windows:
+        history = synthetic_history(window + 1)
+        state = PatientAnalyticsState.from_history(history[1:], window)
+        newest = history[0]
+
+        def incremental():
+            state.add(newest)
+            state.snapshot(PATIENT_ID)
+
+        paths = {
+            "compute_analytics": lambda: compute_analytics(PATIENT_ID, history[:window]),
+            "incremental add+read": incremental,
+        }
+        for name, fn in paths.items():
+            elapsed = _time(fn, args.repeat)
+            print(f"{window:>8} {name:<22} {elapsed * 1000:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
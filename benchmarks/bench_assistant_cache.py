@@ -0,0 +1,73 @@
+"""
+Benchmark for the assistant's answer cache.
+
+Replays a stream of patient questions – a few hundred distinct questions,
+each asked in several spellings, with Zipf-distributed popularity – and
+compares the per-question cost of:
+- uncached: match, then validate and serialise through ChatResponse
+  (what /assistant/chat did before the cache),
+- cached: fold the question, LRU lookup, return the pre-serialised body.
+
+Run from the repo root:
+    python -m benchmarks.bench_assistant_cache
+    python -m benchmarks.bench_assistant_cache --distinct 2000 --asks 200000
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from app.api.routes.assistant import ChatResponse
+from app.services.ai_assistant import KNOWLEDGE_BASE, _match, answer, question_key
+from app.services.assistant_cache import assistant_cache
+
+OPENERS = ["what is", "how do i manage", "i missed my", "is it normal to have high", "help with my", "tips for"]
+SPELLINGS = [str.lower, str.upper, str.capitalize, lambda q: q + "?", lambda q: q.replace(" ", "  ") + "!"]
+
+
+def question_stream(distinct: int, asks: int, rng: random.Random):
+    keywords = [kw for entry in KNOWLEDGE_BASE for kw in entry["keywords"]]
+    base = [f"{rng.choice(OPENERS)} {rng.choice(keywords)} {rng.choice(['', 'today', 'at night', 'after meals'])}".strip()
+            for _ in range(distinct)]
+    popularity = 1.0 / np.arange(1, distinct + 1)
+    picks = np.random.default_rng(0).choice(distinct, size=asks, p=popularity / popularity.sum())
+    return [rng.choice(SPELLINGS)(base[i]) for i in picks]
+
+
+def _time(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--distinct", type=int, default=300)
+    parser.add_argument("--asks", type=int, default=50_000)
+    args = parser.parse_args()
+
+    questions = question_stream(args.distinct, args.asks, random.Random(0))
+
+    def uncached():
+        for q in questions:
+            ChatResponse(**_match(question_key(q), False)).model_dump_json().encode()
+
+    def cached():
+        for q in questions:
+            answer(q).body
+
+    base = _time(uncached) / len(questions)
+    assistant_cache.clear()
+    hot = _time(cached) / len(questions)
+    stats = assistant_cache.stats()
+    print(f"questions: {len(questions):,} ({args.distinct:,} distinct, several spellings each)")
+    print(f"distinct cache keys: {stats['size']:,}   hit rate: {stats['hits'] / (stats['hits'] + stats['misses']):.1%}")
+    print(f"uncached: {base * 1e6:.2f} µs/question   cached: {hot * 1e6:.2f} µs/question   ({base / hot:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Throughput benchmark for assistant topic matching.
+
+Compares the ordered `any(kw in question)` scan over every knowledge-base
+entry with the compiled Aho-Corasick KeywordMatcher, on the shipped
+knowledge base and on synthetic ones with thousands of keywords. Questions
+mix real keywords with filler words, so some match early entries, some
+late ones and some nothing.
+
+Run from the repo root:
+    python -m benchmarks.bench_keyword_matcher
+    python -m benchmarks.bench_keyword_matcher --keywords 1000 5000 20000 --questions 5000
+"""
+import argparse
+import random
+import string
+import time
+
+from app.services.ai_assistant import KNOWLEDGE_BASE
+from app.services.keyword_matcher import KeywordMatcher
+
+FILLER = "what should i do about my the is it normal to have after today and when how much".split()
+
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 10)))
+
+
+def synthetic_groups(keywords: int, per_topic: int, rng: random.Random):
+    words = [_word(rng) for _ in range(keywords)]
+    # Some multi-word phrases, like "blood sugar" or "chest pain"
+    for i in range(0, keywords, 5):
+        words[i] = f"{words[i]} {_word(rng)}"
+    return [words[i:i + per_topic] for i in range(0, keywords, per_topic)]
+
+
+def questions(groups, count: int, rng: random.Random):
+    keywords = [kw for group in groups for kw in group]
+    out = []
+    for _ in range(count):
+        words = [rng.choice(FILLER) for _ in range(rng.randint(6, 16))]
+        for _ in range(rng.choice((0, 1, 1, 2))):
+            words.insert(rng.randrange(len(words) + 1), rng.choice(keywords))
+        out.append(" ".join(words))
+    return out
+
+
+def legacy_first(groups, question: str):
+    q_lower = question.lower()
+    for index, keywords in enumerate(groups):
+        if any(kw in q_lower for kw in keywords):
+            return index
+    return None
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keywords", type=int, nargs="+", default=[1_000, 5_000, 20_000])
+    parser.add_argument("--per-topic", type=int, default=8, help="Keywords per synthetic topic")
+    parser.add_argument("--questions", type=int, default=2_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    cases = [("shipped", [entry["keywords"] for entry in KNOWLEDGE_BASE])]
+    cases += [(f"{n:,} keywords", synthetic_groups(n, args.per_topic, rng)) for n in args.keywords]
+
+    print(f"{'knowledge base':<18} {'build ms':>9} {'states':>8} {'scan µs/q':>10} {'automaton µs/q':>15} {'speedup':>8}")
+    for name, groups in cases:
+        start = time.perf_counter()
+        matcher = KeywordMatcher(groups)
+        build = time.perf_counter() - start
+        qs = questions(groups, args.questions, rng)
+        assert all(matcher.first(q) == legacy_first(groups, q) for q in qs)
+
+        scan = _time(lambda: [legacy_first(groups, q) for q in qs], args.repeat) / len(qs)
+        automaton = _time(lambda: [matcher.first(q) for q in qs], args.repeat) / len(qs)
+        print(
+            f"{name:<18} {build * 1e3:>9.1f} {matcher.states:>8,} {scan * 1e6:>10.2f} "
+            f"{automaton * 1e6:>15.2f} {scan / automaton:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
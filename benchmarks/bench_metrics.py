@@ -0,0 +1,145 @@
+"""
+Benchmark for the metrics layer's overhead.
+
+Reports the per-operation cost of a counter increment, a histogram
+observation, a span and a @timed call, and the per-request cost of
+MetricsMiddleware around a trivial ASGI app. It then has --threads threads
+record concurrently into the per-thread shards and, for comparison, into a
+single lock-protected histogram.
+
+Run from the repo root:
+    python -m benchmarks.bench_metrics
+    python -m benchmarks.bench_metrics --ops 500000 --threads 16
+"""
+import argparse
+import asyncio
+import threading
+import time
+from bisect import bisect_left
+
+from app.services.metrics import DEFAULT_BUCKETS, MetricsMiddleware, MetricsRegistry, span, timed
+
+
+class LockedHistogram:
+    """Baseline: one shared row per label set, every observation under a lock."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.rows = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self.lock:
+            row = self.rows.get(labels)
+            if row is None:
+                row = self.rows[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            row[bisect_left(self.buckets, value)] += 1
+            row[-1] += value
+
+
+def _time(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def per_op(ops: int):
+    registry = MetricsRegistry()
+    counter = registry.counter("c_total", "", ("level",))
+    histogram = registry.histogram("h_seconds", "", ("span",))
+
+    @timed("noop")
+    def noop():
+        pass
+
+    def baseline():
+        for _ in range(ops):
+            pass
+
+    def increments():
+        for _ in range(ops):
+            counter.inc("High")
+
+    def observations():
+        for _ in range(ops):
+            histogram.observe(0.003, "db.vitals.insert")
+
+    def spans():
+        for _ in range(ops):
+            with span("noop"):
+                pass
+
+    def timed_calls():
+        for _ in range(ops):
+            noop()
+
+    base = _time(baseline)
+    for name, fn in [("counter.inc", increments), ("histogram.observe", observations),
+                     ("with span()", spans), ("@timed call", timed_calls)]:
+        print(f"{name:<20} {(_time(fn) - base) / ops * 1e9:>8.0f} ns/op")
+
+
+def middleware_overhead(requests: int):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    wrapped = MetricsMiddleware(app)
+    scope = {"type": "http", "method": "GET", "path": "/health"}
+
+    async def receive():
+        return {"type": "http.request"}
+
+    async def send(message):
+        pass
+
+    def run(asgi):
+        async def loop():
+            for _ in range(requests):
+                await asgi(dict(scope), receive, send)
+        return lambda: asyncio.run(loop())
+
+    plain, timed_app = _time(run(app)), _time(run(wrapped))
+    print(f"{'middleware':<20} {(timed_app - plain) / requests * 1e9:>8.0f} ns/request")
+
+
+def contention(threads: int, ops: int):
+    sharded = MetricsRegistry().histogram("h_seconds", "", ("span",))
+    locked = LockedHistogram(DEFAULT_BUCKETS)
+
+    def hammer(histogram):
+        def work():
+            for _ in range(ops):
+                histogram.observe(0.003, "db.vitals.insert")
+
+        def run():
+            workers = [threading.Thread(target=work) for _ in range(threads)]
+            for w in workers:
+                w.start()
+            for w in workers:
+                w.join()
+        return run
+
+    total = threads * ops
+    for name, histogram in [("per-thread shards", sharded), ("single lock", locked)]:
+        elapsed = _time(hammer(histogram))
+        print(f"{name:<20} {total / elapsed / 1e6:>8.2f} M observations/s with {threads} threads")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ops", type=int, default=200_000)
+    parser.add_argument("--requests", type=int, default=50_000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    per_op(args.ops)
+    middleware_overhead(args.requests)
+    contention(args.threads, args.ops // args.threads)
+
+
+if __name__ == "__main__":
+    main()
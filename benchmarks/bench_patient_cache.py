@@ -0,0 +1,81 @@
+"""
+Latency benchmark for the patient read-through cache.
+
+Reads a hot set of patient ids through PatientCache – local tier only, and
+with the in-process shared stand-in behind it – against a loader that
+sleeps for a simulated database round trip, and reports the per-read cost
+of hits and misses.
+
+Run from the repo root:
+    python -m benchmarks.bench_patient_cache
+    python -m benchmarks.bench_patient_cache --patients 50000 --reads 200000 --db-ms 20
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from app.services.patient_cache import MemorySharedBackend, PatientCache, TTLCache
+
+
+def _patient(i: int) -> dict:
+    return {
+        "id": f"patient-{i}",
+        "name": f"Patient {i}",
+        "date_of_birth": "1970-05-14",
+        "condition": "Hypertension",
+        "doctor_name": "Dr. Smith",
+        "phone": "+27801234567",
+        "notes": "x" * 500,
+        "created_at": "2026-01-01T00:00:00+00:00",
+    }
+
+
+async def run(cache: PatientCache, ids, db_seconds: float):
+    async def load(patient_id):
+        await asyncio.sleep(db_seconds)
+        return _patient(int(patient_id.split("-")[1]))
+
+    miss_time = hit_time = 0.0
+    for patient_id in ids:
+        misses = cache.misses
+        start = time.perf_counter()
+        await cache.get(patient_id, load)
+        elapsed = time.perf_counter() - start
+        if cache.misses > misses:
+            miss_time += elapsed
+        else:
+            hit_time += elapsed
+    stats = cache.stats()
+    hits = stats["hits"] + stats["shared_hits"]
+    return stats, hit_time / max(hits, 1), miss_time / max(stats["misses"], 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patients", type=int, default=10_000, help="Distinct patients read")
+    parser.add_argument("--hot", type=float, default=0.1, help="Fraction of patients receiving 90%% of reads")
+    parser.add_argument("--reads", type=int, default=100_000)
+    parser.add_argument("--max-entries", type=int, default=5_000)
+    parser.add_argument("--db-ms", type=float, default=5.0, help="Simulated database round trip")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    hot = max(1, int(args.patients * args.hot))
+    ids = [
+        f"patient-{rng.randrange(hot) if rng.random() < 0.9 else rng.randrange(args.patients)}"
+        for _ in range(args.reads)
+    ]
+
+    print(f"{'tier':<16} {'hit rate':>9} {'evictions':>10} {'hit µs':>9} {'miss ms':>9}")
+    for name, shared in (("local", None), ("local+shared", MemorySharedBackend())):
+        cache = PatientCache(TTLCache(args.max_entries, ttl_seconds=600), shared=shared)
+        stats, hit_seconds, miss_seconds = asyncio.run(run(cache, ids, args.db_ms / 1000))
+        print(
+            f"{name:<16} {stats['hit_rate']:>9.1%} {stats['evictions']:>10,} "
+            f"{hit_seconds * 1e6:>9.2f} {miss_seconds * 1e3:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Latency benchmark for the assistant's retrieval index.
+
+Generates a synthetic guidance corpus (topics with Zipf-distributed
+vocabulary, like real clinical snippets), writes it to a temporary
+directory and reports:
+- build time from the files, save time and memory-mapped load time
+  (what a second worker pays instead of rebuilding),
+- per-question latency of search() and top_topics() (p50 / p99).
+
+Run from the repo root:
+    python -m benchmarks.bench_retrieval
+    python -m benchmarks.bench_retrieval --docs 1000 10000 50000 --scheme tfidf
+"""
+import argparse
+import json
+import os
+import random
+import string
+import tempfile
+import time
+
+import numpy as np
+
+from app.services.retrieval import RetrievalIndex, load_or_build
+
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9)))
+
+
+def write_corpus(directory: str, docs: int, topics: int, vocabulary: int, rng: random.Random):
+    words = [_word(rng) for _ in range(vocabulary)]
+    weights = 1.0 / np.arange(1, vocabulary + 1)  # Zipf: a few very common terms
+    weights /= weights.sum()
+    np_rng = np.random.default_rng(0)
+    with open(os.path.join(directory, "snippets.jsonl"), "w") as f:
+        for i in range(docs):
+            text = " ".join(words[j] for j in np_rng.choice(vocabulary, size=rng.randint(20, 80), p=weights))
+            f.write(json.dumps({"id": f"doc-{i}", "topic": f"Topic {i % topics}", "text": text}) + "\n")
+    return words
+
+
+def _percentiles(fn, questions):
+    times = []
+    for q in questions:
+        start = time.perf_counter()
+        fn(q)
+        times.append(time.perf_counter() - start)
+    return np.percentile(times, 50) * 1e3, np.percentile(times, 99) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--topics", type=int, default=500)
+    parser.add_argument("--vocabulary", type=int, default=20_000)
+    parser.add_argument("--questions", type=int, default=1_000)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--scheme", choices=["bm25", "tfidf"], default="bm25")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(
+        f"{'docs':>8} {'build ms':>9} {'load ms':>8} {'search p50/p99 ms':>18} {'top_topics p50/p99 ms':>22}"
+    )
+    for docs in args.docs:
+        with tempfile.TemporaryDirectory() as tmp:
+            corpus_dir, index_dir = os.path.join(tmp, "corpus"), os.path.join(tmp, "index")
+            os.mkdir(corpus_dir)
+            words = write_corpus(corpus_dir, docs, args.topics, args.vocabulary, rng)
+
+            start = time.perf_counter()
+            load_or_build(corpus_dir, index_dir, args.scheme)
+            build = time.perf_counter() - start
+            start = time.perf_counter()
+            index = RetrievalIndex.load(index_dir, mmap=True)
+            load = time.perf_counter() - start
+
+            questions = [" ".join(rng.choice(words[:2000]) for _ in range(rng.randint(3, 10))) for _ in range(args.questions)]
+            search = _percentiles(lambda q: index.search(q, args.k), questions)
+            topics = _percentiles(lambda q: index.top_topics(q, args.k), questions)
+            print(
+                f"{docs:>8,} {build * 1e3:>9.0f} {load * 1e3:>8.1f} "
+                f"{search[0]:>9.3f}/{search[1]:<8.3f} {topics[0]:>11.3f}/{topics[1]:<8.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Throughput benchmark for the risk engine.
+
+Compares the per-reading calculate_risk() loop against the vectorised
+calculate_risk_batch() on structured arrays and lists of dicts.
+
+Run from the repo root:
+    python -m benchmarks.bench_risk_engine
+    python -m benchmarks.bench_risk_engine --sizes 1 100 10000 --loop-max 1000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.services.risk_engine import calculate_risk, calculate_risk_batch
+
+DEFAULT_SIZES = [1, 100, 10_000, 1_000_000]
+
+FIELDS = [
+    # name, mean, std
+    ("cholesterol", 210.0, 40.0),
+    ("hdl", 50.0, 15.0),
+    ("age", 55.0, 15.0),
+    ("weight", 85.0, 20.0),
+    ("bp_systolic", 135.0, 20.0),
+    ("bp_diastolic", 85.0, 12.0),
+    ("glucose", 120.0, 40.0),
+]
+
+
+def synthetic_readings(n: int, seed: int = 0) -> np.ndarray:
+    """Structured array of n plausible readings."""
+    rng = np.random.default_rng(seed)
+    readings = np.empty(n, dtype=[(name, "f8") for name, _, _ in FIELDS])
+    for name, mean, std in FIELDS:
+        readings[name] = rng.normal(mean, std, n).round(1)
+    return readings
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--loop-max", type=int, default=100,
+                        help="Largest size timed with the per-reading loop (it is slow)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'path':<18} {'seconds':>10} {'rows/s':>14}")
+    for n in args.sizes:
+        structured = synthetic_readings(n)
+        repeat = args.repeat if n <= 10_000 else 1
+        paths = {"batch[structured]": lambda: calculate_risk_batch(structured)}
+        if n <= 10_000:
+            dicts = [dict(zip(structured.dtype.names, map(float, row))) for row in structured]
+            paths["batch[dicts]"] = lambda: calculate_risk_batch(dicts)
+            if n <= args.loop_max:
+                paths["loop[dicts]"] = lambda: [calculate_risk(d) for d in dicts]
+
+        for name, fn in paths.items():
+            elapsed = _time(fn, repeat)
+            print(f"{n:>10} {name:<18} {elapsed:>10.4f} {n / elapsed:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
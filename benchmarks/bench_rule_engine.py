@@ -0,0 +1,106 @@
+"""
+Throughput benchmark for the declarative rule engine.
+
+Evaluates the shipped alert rule set three ways – a hand-written if/elif chain
+(what the rules replaced), RuleSet.evaluate_one() per reading, and the
+vectorised RuleSet.evaluate() over the whole batch, from dicts and from
+ready-made columns – and reports readings per second for each. Only rule
+matching is timed, not message rendering.
+
+Run from the repo root:
+    python -m benchmarks.bench_rule_engine
+    python -m benchmarks.bench_rule_engine --sizes 1000 100000 --loop-max 100000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.services.rule_engine import NO_MATCH, alert_rules
+
+DEFAULT_SIZES = [1_000, 100_000]
+
+
+def synthetic_readings(n: int, seed: int = 0):
+    """List of n reading dicts spread around the alert thresholds."""
+    rng = np.random.default_rng(seed)
+    sys = rng.normal(150, 20, n).round(1)
+    dia = rng.normal(92, 12, n).round(1)
+    glucose = rng.normal(180, 60, n).round(1)
+    chol = rng.normal(220, 30, n).round(1)
+    risk = rng.random(n).round(4)
+    return [
+        {
+            "bp_systolic": float(sys[i]),
+            "bp_diastolic": float(dia[i]),
+            "glucose": float(glucose[i]),
+            "cholesterol": float(chol[i]),
+            "risk_score": float(risk[i]),
+            "risk_level": "High" if risk[i] >= 0.7 else "Low",
+        }
+        for i in range(n)
+    ]
+
+
+def if_chain(reading) -> int:
+    """The alert thresholds as they were hard-coded before the rule set (index of the rule hit)."""
+    bp_s = reading.get("bp_systolic", 0)
+    bp_d = reading.get("bp_diastolic", 0)
+    chol = reading.get("cholesterol", 0)
+    glucose = reading.get("glucose") or 0
+    if bp_s >= 180 or bp_d >= 120:
+        return 0
+    if glucose >= 300:
+        return 1
+    if reading.get("risk_level") == "High":
+        return 2
+    if bp_s >= 160:
+        return 3
+    if chol >= 240:
+        return 4
+    if glucose >= 200:
+        return 5
+    return NO_MATCH
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--loop-max", type=int, default=100_000,
+                        help="Largest size timed with the per-reading paths")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rule_set = alert_rules.get()
+    print(f"{'rows':>10} {'path':<18} {'seconds':>10} {'rows/s':>14}")
+    for n in args.sizes:
+        readings = synthetic_readings(n)
+        index = {rule.id: i for i, rule in enumerate(rule_set.rules)}
+        expected = [if_chain(r) for r in readings]
+        single = [index[rule.id] if rule else NO_MATCH for rule in map(rule_set.evaluate_one, readings)]
+        assert single == expected == rule_set.evaluate(readings).tolist(), "rule set disagrees with the if-chain"
+
+        columns = rule_set.columns(readings)
+        paths = {
+            "evaluate[dicts]": lambda: rule_set.evaluate(readings),
+            "evaluate[columns]": lambda: rule_set.evaluate(columns),
+        }
+        if n <= args.loop_max:
+            paths["if-chain"] = lambda: [if_chain(r) for r in readings]
+            paths["evaluate_one"] = lambda: [rule_set.evaluate_one(r) for r in readings]
+        for name, fn in paths.items():
+            elapsed = _time(fn, args.repeat)
+            print(f"{n:>10} {name:<18} {elapsed:>10.4f} {n / elapsed:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
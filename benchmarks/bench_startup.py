@@ -0,0 +1,107 @@
+"""
+Cold-start benchmark and startup profile.
+
+Default mode starts the API with uvicorn in a fresh interpreter, polls
+GET /health until it answers 200, and reports the time from process launch
+to that first 200 (median over --runs).
+
+--profile runs `import app.main` under `python -X importtime` instead and
+reports where import time goes: the slowest modules by cumulative and by
+self time, and self time summed per top-level package.
+
+Run from the repo root:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --profile --top 25
+"""
+import argparse
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_to_first_health(timeout: float) -> float:
+    port = _free_port()
+    env = {**os.environ, "ALERT_WRITE_BEHIND": "false"}
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+                conn.request("GET", "/health")
+                if conn.getresponse().status == 200:
+                    return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.005)
+        raise TimeoutError(f"/health did not answer within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def import_profile(module: str):
+    """[(name, self µs, cumulative µs)] for every module imported by `import module`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def print_profile(module: str, top: int):
+    rows = import_profile(module)
+    total = next(cumulative for name, _, cumulative in rows if name == module)
+    print(f"import {module}: {total / 1e3:.0f} ms, {len(rows)} modules\n")
+
+    print(f"{'slowest (cumulative)':<48} {'ms':>8}")
+    for name, _, cumulative in sorted(rows, key=lambda r: -r[2])[:top]:
+        print(f"{name:<48} {cumulative / 1e3:>8.1f}")
+
+    packages = defaultdict(int)
+    for name, self_us, _ in rows:
+        packages[name.split(".")[0]] += self_us
+    print(f"\n{'per package (self time)':<48} {'ms':>8} {'share':>7}")
+    for package, self_us in sorted(packages.items(), key=lambda p: -p[1])[:top]:
+        print(f"{package:<48} {self_us / 1e3:>8.1f} {self_us / total:>7.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", action="store_true", help="Report per-module import times instead")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    if args.profile:
+        print_profile(args.module, args.top)
+        return
+
+    times = [time_to_first_health(args.timeout) for _ in range(args.runs)]
+    print(f"time to first /health 200 over {args.runs} runs: "
+          f"median {statistics.median(times) * 1e3:.0f} ms, min {min(times) * 1e3:.0f} ms, max {max(times) * 1e3:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,17 +5,25 @@ Supabase is mocked at the dependency level so tests run fully offline
 without needing a real database connection.
 """
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 from fastapi.testclient import TestClient
 
 from app.main import app
-from app.core.database import get_supabase
+from app.repositories import get_repository
+from app.repositories.supabase import build_supabase_repository
+from app.services.alert_dedup import alert_suppressor
+from app.services.analytics_cache import analytics_cache
+from app.services.assistant_cache import assistant_cache
+from app.services.analytics_state import analytics_store
+from app.services.metrics import metrics
+from app.services.patient_cache import patient_cache
+from app.services.patient_context import patient_context
 
 
 # ---------------------------------------------------------------------------
 # Reusable sample data
 # ---------------------------------------------------------------------------
-PATIENT_ID = "test-patient-uuid-001"
+PATIENT_ID = "3f1c2a9e-6b7d-4c2e-9a51-0d8e7f6a5b4c"
 
 SAMPLE_PATIENT = {
     "id": PATIENT_ID,
@@ -45,7 +53,7 @@ SAMPLE_VITAL = {
 }
 
 SAMPLE_ALERT = {
-    "id": "alert-uuid-001",
+    "id": "c7a9e0d4-52b1-4f86-9e3d-6b1f8a2c4d05",
     "patient_id": PATIENT_ID,
     "vital_reading_id": "vital-uuid-001",
     "message": "Hypertensive crisis detected: BP 185/125 mmHg.",
@@ -59,14 +67,14 @@ SAMPLE_ALERT = {
 # Supabase mock factory
 # ---------------------------------------------------------------------------
 def make_supabase_mock(return_data=None):
-    """Return a MagicMock that mimics the Supabase chained query API."""
+    """Return a MagicMock that mimics the async PostgREST chained query API."""
     mock_db = MagicMock()
     mock_response = MagicMock()
     mock_response.data = return_data if return_data is not None else []
 
-    # Chain: db.table(...).select/insert/update/delete/eq/order/limit/single -> .execute()
+    # Chain: db.table(...).select/insert/update/delete/eq/in_/or_/order/limit/range/gte/maybe_single -> await .execute()
     chain = MagicMock()
-    chain.execute.return_value = mock_response
+    chain.execute = AsyncMock(return_value=mock_response)
     chain.select.return_value = chain
     chain.insert.return_value = chain
     chain.update.return_value = chain
@@ -74,7 +82,11 @@ def make_supabase_mock(return_data=None):
     chain.eq.return_value = chain
     chain.order.return_value = chain
     chain.limit.return_value = chain
-    chain.single.return_value = chain
+    chain.range.return_value = chain
+    chain.gte.return_value = chain
+    chain.in_.return_value = chain
+    chain.or_.return_value = chain
+    chain.maybe_single.return_value = chain
 
     mock_db.table.return_value = chain
     return mock_db, mock_response
@@ -83,38 +95,92 @@ def make_supabase_mock(return_data=None):
 # ---------------------------------------------------------------------------
 # Pytest fixtures
 # ---------------------------------------------------------------------------
+ADMIN_TOKEN = "test-admin-token"
+
+
+@pytest.fixture
+def admin_headers():
+    """Enable the /admin endpoints for the test and return the headers that authorise a call."""
+    with patch("app.api.routes.admin.settings.ADMIN_TOKEN", ADMIN_TOKEN):
+        yield {"X-Admin-Token": ADMIN_TOKEN}
+
+
+@pytest.fixture(autouse=True)
+def reset_analytics_state():
+    """Incremental analytics state and cached results are process-wide; start every test without them."""
+    analytics_store.clear()
+    analytics_cache.clear()
+    yield
+    analytics_store.clear()
+    analytics_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_alert_suppression():
+    """Open-alert suppression state is process-wide; start every test without it."""
+    alert_suppressor.clear()
+    yield
+    alert_suppressor.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_patient_cache():
+    """The patient cache is process-wide; start every test cold."""
+    patient_cache.clear()
+    yield
+    patient_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_assistant_state():
+    """The assistant's per-patient context and cached answers are process-wide; start every test without them."""
+    patient_context.clear()
+    assistant_cache.clear()
+    yield
+    patient_context.clear()
+    assistant_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    """Metrics are process-wide; start every test from zero."""
+    metrics.clear()
+    yield
+    metrics.clear()
+
+
 @pytest.fixture
 def mock_supabase_patient():
-    """Override get_supabase to return a patient-focused mock."""
+    """Override get_repository with a Supabase repository over a patient-focused mock."""
     mock_db, _ = make_supabase_mock([SAMPLE_PATIENT])
-    app.dependency_overrides[get_supabase] = lambda: mock_db
+    app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
     yield mock_db
     app.dependency_overrides.clear()
 
 
 @pytest.fixture
 def mock_supabase_vital():
-    """Override get_supabase to return a vitals-focused mock."""
+    """Override get_repository with a Supabase repository over a vitals-focused mock."""
     mock_db, _ = make_supabase_mock([SAMPLE_VITAL])
-    app.dependency_overrides[get_supabase] = lambda: mock_db
+    app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
     yield mock_db
     app.dependency_overrides.clear()
 
 
 @pytest.fixture
 def mock_supabase_alert():
-    """Override get_supabase to return an alert-focused mock."""
+    """Override get_repository with a Supabase repository over an alert-focused mock."""
     mock_db, _ = make_supabase_mock([SAMPLE_ALERT])
-    app.dependency_overrides[get_supabase] = lambda: mock_db
+    app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
     yield mock_db
     app.dependency_overrides.clear()
 
 
 @pytest.fixture
 def mock_supabase_empty():
-    """Override get_supabase to return empty results (simulates 404 scenarios)."""
+    """Override get_repository with a Supabase repository over empty results (simulates 404 scenarios)."""
     mock_db, _ = make_supabase_mock([])
-    app.dependency_overrides[get_supabase] = lambda: mock_db
+    app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
     yield mock_db
     app.dependency_overrides.clear()
 
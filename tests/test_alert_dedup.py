@@ -0,0 +1,188 @@
+"""Tests for alert suppression (dedup, cool-down, escalation) and its use by the alert service."""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.repositories import get_repository
+from app.repositories.supabase import build_supabase_repository
+from app.services.alert_dedup import AlertSuppressor
+from app.services.alert_service import create_alert_if_needed, create_alerts_batch
+from tests.conftest import PATIENT_ID, SAMPLE_VITAL, make_supabase_mock
+
+COOLDOWNS = {"Critical": 900.0, "Warning": 3600.0}
+CRISIS = {"bp_systolic": 185, "bp_diastolic": 125}
+ELEVATED = {"bp_systolic": 165, "bp_diastolic": 95}
+
+
+def _alerts_repo():
+    alerts = MagicMock()
+    counter = iter(range(1_000))
+    alerts.insert = AsyncMock(side_effect=lambda record: {**record, "id": f"alert-{next(counter)}"})
+    alerts.insert_many = AsyncMock(
+        side_effect=lambda records: [{**r, "id": f"alert-{next(counter)}"} for r in records]
+    )
+    alerts.update_occurrences = AsyncMock()
+    return alerts
+
+
+class TestAlertSuppressor:
+    def test_repeats_within_cooldown_are_folded(self):
+        suppressor = AlertSuppressor(COOLDOWNS)
+        first = suppressor.check(PATIENT_ID, "blood_pressure", "Critical", now=0)
+        suppressor.attach(first.key, "alert-1")
+        repeat = suppressor.check(PATIENT_ID, "blood_pressure", "Critical", now=60)
+
+        assert first.fire and not repeat.fire
+        assert repeat.open_alert.alert_id == "alert-1"
+        assert repeat.open_alert.occurrences == 2
+        assert suppressor.check(PATIENT_ID, "blood_pressure", "Critical", now=901).fire
+
+    def test_keys_are_per_patient_and_rule(self):
+        suppressor = AlertSuppressor(COOLDOWNS)
+        assert suppressor.check("a", "blood_pressure", "Critical", now=0).fire
+        assert suppressor.check("b", "blood_pressure", "Critical", now=0).fire
+        assert suppressor.check("a", "glucose", "Critical", now=0).fire
+
+    def test_escalation_bypasses_and_deescalation_folds_up(self):
+        suppressor = AlertSuppressor(COOLDOWNS)
+        assert suppressor.check(PATIENT_ID, "blood_pressure", "Warning", now=0).fire
+        critical = suppressor.check(PATIENT_ID, "blood_pressure", "Critical", now=10)
+        assert critical.fire
+        warning_again = suppressor.check(PATIENT_ID, "blood_pressure", "Warning", now=20)
+        assert not warning_again.fire
+        assert warning_again.key == (PATIENT_ID, "blood_pressure", "Critical")
+
+    def test_release_reopens_key(self):
+        suppressor = AlertSuppressor(COOLDOWNS)
+        decision = suppressor.check(PATIENT_ID, "glucose", "Warning", now=0)
+        suppressor.attach(decision.key, "alert-1")
+        suppressor.release("alert-1")
+        assert suppressor.check(PATIENT_ID, "glucose", "Warning", now=1).fire
+
+    def test_lru_is_bounded(self):
+        suppressor = AlertSuppressor(COOLDOWNS, max_keys=2)
+        for patient in "abc":
+            suppressor.check(patient, "glucose", "Warning", now=0)
+        assert len(suppressor) == 2
+        assert suppressor.check("a", "glucose", "Warning", now=1).fire
+
+    def test_state_persists_across_instances(self, tmp_path):
+        path = str(tmp_path / "dedup.json")
+        suppressor = AlertSuppressor(COOLDOWNS, state_path=path)
+        decision = suppressor.check(PATIENT_ID, "blood_pressure", "Critical")
+        suppressor.attach(decision.key, "alert-1")
+        suppressor.save()
+
+        restored = AlertSuppressor(COOLDOWNS, state_path=path)
+        restored.load()
+        repeat = restored.check(PATIENT_ID, "blood_pressure", "Critical")
+        assert not repeat.fire
+        assert repeat.open_alert.alert_id == "alert-1"
+
+
+class TestAlertServiceSuppression:
+    def test_persistent_crisis_creates_one_row(self):
+        alerts = _alerts_repo()
+
+        async def scenario():
+            return [
+                await create_alert_if_needed(alerts, PATIENT_ID, f"v-{i}", "Low", 0.1, CRISIS)
+                for i in range(50)
+            ]
+
+        results = asyncio.run(scenario())
+        assert results[0]["id"] == "alert-0" and "repeated" not in results[0]
+        # Repeats still report the active alert, so POST /vitals says alert_triggered
+        assert [(r["id"], r["repeated"], r["occurrences"]) for r in results[1:3]] == [
+            ("alert-0", True, 2), ("alert-0", True, 3),
+        ]
+        assert results[-1]["severity"] == "Critical" and results[-1]["occurrences"] == 50
+        assert alerts.insert.await_count == 1
+        last_call = alerts.update_occurrences.await_args_list[-1]
+        assert last_call.args[:2] == ("alert-0", 50)
+
+    def test_failed_write_does_not_suppress_the_next_occurrence(self):
+        alerts = _alerts_repo()
+        store = alerts.insert.side_effect
+        failures = iter([ConnectionError("DB down")])
+
+        def insert_failing_once(record):
+            error = next(failures, None)
+            if error is not None:
+                raise error
+            return store(record)
+
+        alerts.insert.side_effect = insert_failing_once
+
+        async def scenario():
+            first = await create_alert_if_needed(alerts, PATIENT_ID, "v-1", "Low", 0.1, CRISIS)
+            second = await create_alert_if_needed(alerts, PATIENT_ID, "v-2", "Low", 0.1, CRISIS)
+            return first, second
+
+        first, second = asyncio.run(scenario())
+        assert "id" not in first
+        assert second["id"] == "alert-0" and "repeated" not in second
+        assert alerts.insert.await_count == 2
+
+    def test_failed_batch_write_does_not_suppress_the_next_occurrence(self):
+        alerts = _alerts_repo()
+        alerts.insert_many.side_effect = ConnectionError("DB down")
+        candidate = {"patient_id": PATIENT_ID, "vital_reading_id": "v-1", "risk_level": "Low",
+                     "risk_score": 0.1, "vital_data": CRISIS}
+
+        asyncio.run(create_alerts_batch(alerts, [candidate]))
+        second = asyncio.run(create_alert_if_needed(alerts, PATIENT_ID, "v-2", "Low", 0.1, CRISIS))
+        assert second["id"] == "alert-0" and "repeated" not in second
+
+    def test_escalation_creates_new_row(self):
+        alerts = _alerts_repo()
+
+        async def scenario():
+            warning = await create_alert_if_needed(alerts, PATIENT_ID, "v-1", "Low", 0.1, ELEVATED)
+            critical = await create_alert_if_needed(alerts, PATIENT_ID, "v-2", "Low", 0.1, CRISIS)
+            return warning, critical
+
+        warning, critical = asyncio.run(scenario())
+        assert warning["severity"] == "Warning"
+        assert critical["severity"] == "Critical"
+        assert alerts.insert.await_count == 2
+
+    def test_batch_folds_repeats_within_the_batch(self):
+        alerts = _alerts_repo()
+        candidates = [
+            {"patient_id": PATIENT_ID, "vital_reading_id": f"v-{i}", "risk_level": "Low",
+             "risk_score": 0.1, "vital_data": CRISIS}
+            for i in range(5)
+        ]
+        results = asyncio.run(create_alerts_batch(alerts, candidates))
+
+        assert results[0]["id"] == "alert-0" and "repeated" not in results[0]
+        assert {r["id"] for r in results[1:]} == {"alert-0"} and all(r["repeated"] for r in results[1:])
+        assert len(alerts.insert_many.await_args.args[0]) == 1
+        alerts.update_occurrences.assert_awaited_once()
+        assert alerts.update_occurrences.await_args.args[:2] == ("alert-0", 5)
+
+    def test_disabled_fires_every_time(self, monkeypatch):
+        from app.services import alert_service
+        monkeypatch.setattr(alert_service.settings, "ALERT_DEDUP_ENABLED", False)
+        alerts = _alerts_repo()
+
+        async def scenario():
+            for i in range(3):
+                await create_alert_if_needed(alerts, PATIENT_ID, f"v-{i}", "Low", 0.1, CRISIS)
+
+        asyncio.run(scenario())
+        assert alerts.insert.await_count == 3
+
+    def test_repeated_crisis_is_still_reported_as_an_alert(self):
+        mock_db, _ = make_supabase_mock([SAMPLE_VITAL])
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
+        payload = {"cholesterol": 200.0, "hdl": 50.0, "age": 55, "weight": 85.0, **CRISIS}
+        try:
+            client = TestClient(app)
+            responses = [client.post(f"/vitals/{PATIENT_ID}", json=payload).json() for _ in range(3)]
+        finally:
+            app.dependency_overrides.clear()
+        assert [r["alert_triggered"] for r in responses] == [True, True, True]
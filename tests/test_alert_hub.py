@@ -0,0 +1,153 @@
+"""Tests for the in-process alert hub and the live alert stream endpoints."""
+import asyncio
+import json
+import threading
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.routes.alerts import stream_alerts
+from app.main import app
+from app.repositories import get_repository
+from app.repositories.supabase import build_supabase_repository
+from app.services.alert_hub import ALERT_ACKNOWLEDGED, ALERT_CREATED, AlertHub, alert_hub, format_sse
+from app.services.alert_service import create_alert_if_needed
+from tests.conftest import PATIENT_ID, SAMPLE_ALERT, make_supabase_mock
+
+CRITICAL = {**SAMPLE_ALERT, "severity": "Critical"}
+WARNING = {**SAMPLE_ALERT, "id": "alert-uuid-002", "severity": "Warning"}
+
+
+@pytest.fixture(autouse=True)
+def reset_hub():
+    alert_hub.clear()
+    yield
+    alert_hub.clear()
+
+
+def _wait_for_subscribers(count=1, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while alert_hub.subscriber_count < count:
+        assert time.monotonic() < deadline, "subscriber never registered"
+        time.sleep(0.01)
+
+
+class TestAlertHub:
+    def test_fan_out_with_filters(self):
+        async def scenario():
+            hub = AlertHub()
+            everything = hub.subscribe()
+            critical_only = hub.subscribe(severities=["Critical"])
+            other_patient = hub.subscribe(patient_id="someone-else")
+
+            assert hub.publish(ALERT_CREATED, CRITICAL) == 2
+            assert hub.publish(ALERT_CREATED, WARNING) == 1
+
+            assert [e["alert"]["id"] for e in (await everything.get(0), await everything.get(0))] == \
+                [CRITICAL["id"], WARNING["id"]]
+            assert (await critical_only.get(0))["alert"] == CRITICAL
+            assert await critical_only.get(0.01) is None
+            assert await other_patient.get(0.01) is None
+
+        asyncio.run(scenario())
+
+    def test_slow_subscriber_drops_oldest(self):
+        async def scenario():
+            hub = AlertHub(queue_size=2)
+            subscription = hub.subscribe()
+            for i in range(5):
+                hub.publish(ALERT_CREATED, {**CRITICAL, "id": str(i)})
+            assert subscription.dropped == 3
+            assert [(await subscription.get(0))["alert"]["id"] for _ in range(2)] == ["3", "4"]
+
+        asyncio.run(scenario())
+
+    def test_publish_from_another_thread(self):
+        async def scenario():
+            hub = AlertHub()
+            subscription = hub.subscribe()
+            threading.Thread(target=hub.publish, args=(ALERT_CREATED, CRITICAL)).start()
+            return await subscription.get(timeout=5)
+
+        assert asyncio.run(scenario())["alert"] == CRITICAL
+
+    def test_closed_subscription_is_removed(self):
+        async def scenario():
+            hub = AlertHub()
+            with hub.subscribe():
+                assert hub.subscriber_count == 1
+            assert hub.subscriber_count == 0
+            assert hub.publish(ALERT_CREATED, CRITICAL) == 0
+
+        asyncio.run(scenario())
+
+    def test_format_sse(self):
+        event = {"type": ALERT_CREATED, "alert": CRITICAL}
+        message = format_sse(event)
+        assert message.startswith(f"event: {ALERT_CREATED}\ndata: ")
+        assert message.endswith("\n\n")
+        assert json.loads(message.split("data: ", 1)[1]) == event
+
+
+class TestAlertServicePublishes:
+    def test_create_alert_publishes(self):
+        async def scenario():
+            subscription = alert_hub.subscribe(patient_id=PATIENT_ID)
+            repo = build_supabase_repository(make_supabase_mock([CRITICAL])[0])
+            await create_alert_if_needed(
+                repo.alerts, PATIENT_ID, "vital-uuid-001", "Low", 0.1, {"bp_systolic": 185, "bp_diastolic": 125},
+            )
+            return await subscription.get(0)
+
+        event = asyncio.run(scenario())
+        assert event["type"] == ALERT_CREATED
+        assert event["alert"] == CRITICAL
+
+    def test_no_alert_publishes_nothing(self):
+        async def scenario():
+            subscription = alert_hub.subscribe()
+            repo = build_supabase_repository(make_supabase_mock([])[0])
+            await create_alert_if_needed(repo.alerts, PATIENT_ID, "v", "Low", 0.1, {"bp_systolic": 120})
+            return await subscription.get(0.01)
+
+        assert asyncio.run(scenario()) is None
+
+
+class TestSseEndpoint:
+    def test_streams_matching_events(self):
+        async def scenario():
+            request = MagicMock()
+            request.is_disconnected = AsyncMock(side_effect=[False, True])
+            response = await stream_alerts(request, patient_id=None, severity=["Critical"])
+            assert response.media_type == "text/event-stream"
+
+            alert_hub.publish(ALERT_CREATED, WARNING)
+            alert_hub.publish(ALERT_ACKNOWLEDGED, CRITICAL)
+            chunks = [chunk async for chunk in response.body_iterator]
+            return chunks
+
+        chunks = asyncio.run(scenario())
+        assert chunks[0].startswith("retry:")
+        assert chunks[1].startswith(f"event: {ALERT_ACKNOWLEDGED}\n")
+        assert len(chunks) == 2
+        assert alert_hub.subscriber_count == 0
+
+
+class TestWebSocketEndpoint:
+    def test_acknowledge_is_pushed_to_websocket(self):
+        client = TestClient(app)
+        acknowledged = {**SAMPLE_ALERT, "acknowledged": True}
+        mock_db, _ = make_supabase_mock([acknowledged])
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
+
+        with client.websocket_connect(f"/alerts/ws?patient_id={PATIENT_ID}") as websocket:
+            _wait_for_subscribers()
+            response = client.patch(f"/alerts/{SAMPLE_ALERT['id']}/acknowledge")
+            assert response.status_code == 200
+            event = websocket.receive_json()
+
+        app.dependency_overrides.clear()
+        assert event["type"] == ALERT_ACKNOWLEDGED
+        assert event["alert"] == acknowledged
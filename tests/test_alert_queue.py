@@ -0,0 +1,318 @@
+"""Tests for the journal-backed write-behind alert queue."""
+import asyncio
+import json
+import os
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.api.routes import alerts as alerts_route
+from app.services import alert_service
+from app.services.alert_queue import AlertJournal, AlertWriteBehindQueue, is_permanent_error
+from tests.conftest import PATIENT_ID
+
+CRISIS_VITALS = {"bp_systolic": 185, "bp_diastolic": 125}
+
+
+def _record(n: int) -> dict:
+    return {"patient_id": PATIENT_ID, "vital_reading_id": f"v-{n}", "message": f"m{n}",
+            "severity": "Critical", "acknowledged": False}
+
+
+def _queue(tmp_path, upsert: AsyncMock, **kwargs) -> AlertWriteBehindQueue:
+    repo = MagicMock()
+    repo.alerts.upsert_many = upsert
+    options = {"flush_interval": 0.01, "retry_base": 0.01, "retry_max": 0.05, **kwargs}
+    return AlertWriteBehindQueue(AlertJournal(str(tmp_path / "alerts.jsonl")), lambda: repo, **options)
+
+
+async def _until(predicate, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "condition not reached"
+        await asyncio.sleep(0.005)
+
+
+class TestAlertJournal:
+    def test_replay_returns_only_unfinished_alerts(self, tmp_path):
+        journal = AlertJournal(str(tmp_path / "alerts.jsonl"))
+        journal.open()
+        journal.append([{"id": "a"}, {"id": "b"}, {"id": "c"}])
+        journal.mark_done(["a", "c"])
+        journal.close()
+        assert journal.replay() == [{"id": "b"}]
+
+    def test_torn_last_line_is_skipped(self, tmp_path):
+        path = tmp_path / "alerts.jsonl"
+        path.write_text(json.dumps({"op": "add", "record": {"id": "a"}}) + "\n" + '{"op": "add", "rec')
+        assert AlertJournal(str(path)).replay() == [{"id": "a"}]
+
+    def test_compact_keeps_pending(self, tmp_path):
+        journal = AlertJournal(str(tmp_path / "alerts.jsonl"))
+        journal.open()
+        journal.append([{"id": "a"}, {"id": "b"}])
+        journal.mark_done(["a"])
+        journal.compact([{"id": "b"}])
+        journal.append([{"id": "c"}])
+        journal.close()
+        assert journal.replay() == [{"id": "b"}, {"id": "c"}]
+        assert len((tmp_path / "alerts.jsonl").read_text().splitlines()) == 2
+
+
+class TestAlertWriteBehindQueue:
+    def test_flushes_in_batches_and_marks_done(self, tmp_path):
+        upsert = AsyncMock()
+
+        async def scenario():
+            queue = _queue(tmp_path, upsert, batch_size=3)
+            await queue.start()
+            queued = queue.enqueue_many([_record(i) for i in range(7)])
+            await _until(lambda: queue.flushed == 7)
+            await queue.stop()
+            return queue, queued
+
+        queue, queued = asyncio.run(scenario())
+        assert all(r["id"] and r["created_at"] for r in queued)
+        written = [r for call in upsert.await_args_list for r in call.args[0]]
+        assert written == queued
+        assert max(len(call.args[0]) for call in upsert.await_args_list) <= 3
+        assert queue.journal.replay() == []
+
+    def test_retries_with_backoff_until_stored(self, tmp_path):
+        upsert = AsyncMock(side_effect=[Exception("db down"), Exception("db down"), None])
+
+        async def scenario():
+            queue = _queue(tmp_path, upsert)
+            await queue.start()
+            queue.enqueue(_record(1))
+            await _until(lambda: queue.flushed == 1)
+            await queue.stop()
+            return queue
+
+        queue = asyncio.run(scenario())
+        assert queue.failures == 2
+        assert upsert.await_count == 3
+        assert queue.journal.replay() == []
+
+    def test_unsaved_alerts_survive_restart(self, tmp_path):
+        async def first_run():
+            queue = _queue(tmp_path, AsyncMock(side_effect=Exception("db down")))
+            await queue.start()
+            queued = queue.enqueue(_record(1))
+            await queue.stop(timeout=0.5)
+            return queued
+
+        queued = asyncio.run(first_run())
+
+        upsert = AsyncMock()
+
+        async def second_run():
+            queue = _queue(tmp_path, upsert)
+            await queue.start()
+            await _until(lambda: queue.flushed == 1)
+            await queue.stop()
+
+        asyncio.run(second_run())
+        upsert.assert_awaited_once_with([queued])
+
+    def test_each_worker_has_its_own_journal_and_adopts_orphaned_ones(self, tmp_path):
+        base = AlertJournal(str(tmp_path / "alerts.jsonl"))
+        orphan, live = base.for_worker(11111), base.for_worker(22222)
+        for journal, alert_id in ((orphan, "orphaned"), (live, "live"), (base, "legacy")):
+            journal.open()
+            journal.append([{**_record(0), "id": alert_id}])
+            journal.close()
+        assert live.claim()  # another running worker
+
+        upsert = AsyncMock()
+
+        async def scenario():
+            queue = _queue(tmp_path, upsert)
+            await queue.start()
+            own_path = queue.journal.path
+            await _until(lambda: queue.flushed == 2)
+            await queue.stop()
+            return own_path
+
+        own_path = asyncio.run(scenario())
+        live.release()
+        assert own_path == str(tmp_path / f"alerts.{os.getpid()}.jsonl")
+        assert sorted(r["id"] for call in upsert.await_args_list for r in call.args[0]) == ["legacy", "orphaned"]
+        assert sorted(os.listdir(tmp_path)) == ["alerts.22222.jsonl", "alerts.22222.jsonl.lock"]
+
+    def test_permanently_rejected_records_are_dead_lettered_and_the_rest_stored(self, tmp_path):
+        class IntegrityError(Exception):
+            code = "23503"  # foreign_key_violation, as postgrest's APIError reports it
+
+        stored = []
+
+        async def upsert(batch):
+            if any(r["vital_reading_id"] == "v-3" for r in batch):
+                raise IntegrityError("insert or update on table alerts violates foreign key constraint")
+            stored.extend(batch)
+
+        async def scenario():
+            queue = _queue(tmp_path, AsyncMock(side_effect=upsert), batch_size=8)
+            await queue.start()
+            queue.enqueue_many([_record(i) for i in range(8)])
+            await _until(lambda: queue.pending == 0)
+            queue.enqueue(_record(9))
+            await _until(lambda: queue.flushed == 9)
+            await queue.stop()
+            return queue
+
+        queue = asyncio.run(scenario())
+        assert sorted(r["vital_reading_id"] for r in stored) == [f"v-{i}" for i in (0, 1, 2, 4, 5, 6, 7, 9)]
+        assert queue.dead_lettered == 1 and queue.failures == 0
+        dead = [json.loads(line) for line in open(queue.journal.dead_letter_path)]
+        assert [d["record"]["vital_reading_id"] for d in dead] == ["v-3"]
+        assert "foreign key" in dead[0]["error"]
+        assert queue.journal.replay() == []
+
+    def test_retry_after_a_dead_letter_does_not_dead_letter_again(self, tmp_path):
+        class IntegrityError(Exception):
+            code = "23503"
+
+        transient = [ConnectionError("reset")]
+
+        async def upsert(batch):
+            ids = {r["vital_reading_id"] for r in batch}
+            if "v-1" in ids:
+                raise IntegrityError("violates foreign key constraint")
+            if "v-3" in ids and transient:
+                raise transient.pop()
+
+        async def scenario():
+            queue = _queue(tmp_path, AsyncMock(side_effect=upsert), batch_size=4)
+            await queue.start()
+            queue.enqueue_many([_record(i) for i in range(4)])
+            await _until(lambda: queue.pending == 0)
+            await queue.stop()
+            return queue
+
+        queue = asyncio.run(scenario())
+        assert queue.dead_lettered == 1 and queue.failures == 1 and queue.flushed == 4
+        dead = [json.loads(line) for line in open(queue.journal.dead_letter_path)]
+        assert [d["record"]["vital_reading_id"] for d in dead] == ["v-1"]
+
+    @pytest.mark.parametrize("error, permanent", [
+        (type("APIError", (Exception,), {"code": "23505"})(), True),
+        (type("APIError", (Exception,), {"code": "PGRST204"})(), True),
+        (type("APIError", (Exception,), {"code": "PGRST001"})(), False),
+        (type("DBAPIError", (Exception,), {"orig": type("E", (), {"sqlstate": "22P02"})()})(), True),
+        (ConnectionError("reset"), False),
+        (asyncio.TimeoutError(), False),
+    ])
+    def test_permanent_errors_are_told_from_transient_ones(self, error, permanent):
+        assert is_permanent_error(error) is permanent
+
+
+class TestCreateAlertWithQueue:
+    def test_alert_is_queued_not_inserted(self, tmp_path, monkeypatch):
+        upsert = AsyncMock()
+        alerts = MagicMock()
+        alerts.insert = AsyncMock()
+
+        async def scenario():
+            queue = _queue(tmp_path, upsert)
+            monkeypatch.setattr(alert_service, "alert_queue", queue)
+            await queue.start()
+            alert = await alert_service.create_alert_if_needed(
+                alerts, PATIENT_ID, "vital-uuid-001", "Low", 0.1, CRISIS_VITALS,
+            )
+            await _until(lambda: queue.flushed == 1)
+            await queue.stop()
+            return alert
+
+        alert = asyncio.run(scenario())
+        assert alert["severity"] == "Critical"
+        assert alert["id"]
+        alerts.insert.assert_not_awaited()
+        upsert.assert_awaited_once_with([alert])
+
+    def test_repeats_and_acknowledgement_of_a_queued_alert_are_stored_with_it(self, tmp_path, monkeypatch):
+        alerts = MagicMock()
+        alerts.update_occurrences = AsyncMock()
+        alerts.acknowledge = AsyncMock(side_effect=lambda alert_id: {"id": alert_id, "acknowledged": True})
+
+        async def scenario():
+            db_up = asyncio.Event()
+
+            async def upsert(batch):
+                await db_up.wait()
+
+            queue = _queue(tmp_path, AsyncMock(side_effect=upsert))
+            monkeypatch.setattr(alert_service, "alert_queue", queue)
+            monkeypatch.setattr(alerts_route, "alert_queue", queue)
+            await queue.start()
+            alert = await alert_service.create_alert_if_needed(
+                alerts, PATIENT_ID, "v-1", "Low", 0.1, CRISIS_VITALS,
+            )
+            for i in range(2, 4):
+                await alert_service.create_alert_if_needed(alerts, PATIENT_ID, f"v-{i}", "Low", 0.1, CRISIS_VITALS)
+            acknowledged = asyncio.create_task(alerts_route.acknowledge_alert(alert["id"], MagicMock(alerts=alerts)))
+            await asyncio.sleep(0.05)
+            assert not acknowledged.done()  # its batch is being written: waits for it
+            db_up.set()
+            acknowledged = await acknowledged
+            await _until(lambda: queue.flushed == 1)
+            await queue.stop()
+            return queue, acknowledged
+
+        queue, acknowledged = asyncio.run(scenario())
+        # Stored before the acknowledgement reached it: the table row is acknowledged
+        alerts.acknowledge.assert_awaited_once_with(acknowledged["id"])
+        alerts.update_occurrences.assert_not_awaited()
+        stored = queue.repository_factory().alerts.upsert_many.await_args.args[0][0]
+        assert stored["occurrences"] == 3 and stored["last_occurrence_at"]
+
+    def test_occurrence_updates_are_coalesced_per_flush_interval(self, tmp_path, monkeypatch):
+        alerts = MagicMock()
+        alerts.update_occurrences = AsyncMock()
+
+        async def scenario():
+            queue = _queue(tmp_path, AsyncMock(), flush_interval=0.2)
+            stored = queue.repository_factory().alerts
+            stored.update_occurrences = AsyncMock()
+            monkeypatch.setattr(alert_service, "alert_queue", queue)
+            await queue.start()
+            alert = await alert_service.create_alert_if_needed(alerts, PATIENT_ID, "v-0", "Low", 0.1, CRISIS_VITALS)
+            await _until(lambda: queue.flushed == 1)
+            for i in range(1, 20):
+                await alert_service.create_alert_if_needed(alerts, PATIENT_ID, f"v-{i}", "Low", 0.1, CRISIS_VITALS)
+            await _until(lambda: stored.update_occurrences.await_count >= 1)
+            await queue.stop()
+            return alert, stored
+
+        alert, stored = asyncio.run(scenario())
+        alerts.update_occurrences.assert_not_awaited()  # nothing written in the request path
+        stored.update_occurrences.assert_awaited_once()
+        assert stored.update_occurrences.await_args.args[:2] == (alert["id"], 20)
+
+    def test_acknowledging_a_queued_alert_does_not_404(self, tmp_path, monkeypatch):
+        upsert = AsyncMock(side_effect=ConnectionError("db down"))
+
+        async def scenario():
+            queue = _queue(tmp_path, upsert, retry_base=10)
+            monkeypatch.setattr(alert_service, "alert_queue", queue)
+            monkeypatch.setattr(alerts_route, "alert_queue", queue)
+            await queue.start()
+            alert = await alert_service.create_alert_if_needed(
+                MagicMock(), PATIENT_ID, "v-1", "Low", 0.1, CRISIS_VITALS,
+            )
+            await _until(lambda: upsert.await_count == 1)
+            acknowledged = await alerts_route.acknowledge_alert(alert["id"], MagicMock())
+            await queue.stop(timeout=0.1)
+            return queue, alert, acknowledged
+
+        queue, alert, acknowledged = asyncio.run(scenario())
+        assert acknowledged["id"] == alert["id"] and acknowledged["acknowledged"] is True
+        assert queue.journal.replay() == [acknowledged]
+
+    def test_inline_insert_when_queue_not_running(self):
+        alerts = MagicMock()
+        alerts.insert = AsyncMock(return_value={"id": "db-id"})
+        alert = asyncio.run(alert_service.create_alert_if_needed(
+            alerts, PATIENT_ID, "vital-uuid-001", "Low", 0.1, CRISIS_VITALS,
+        ))
+        assert alert == {"id": "db-id"}
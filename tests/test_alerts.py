@@ -3,7 +3,8 @@ import pytest
 from fastapi.testclient import TestClient
 
 from app.main import app
-from app.core.database import get_supabase
+from app.repositories import get_repository
+from app.repositories.supabase import build_supabase_repository
 from tests.conftest import SAMPLE_ALERT, PATIENT_ID, make_supabase_mock
 
 
@@ -12,7 +13,7 @@ def client():
     return TestClient(app)
 
 
-ALERT_ID = "alert-uuid-001"
+ALERT_ID = SAMPLE_ALERT["id"]
 
 
 # ---------------------------------------------------------------------------
@@ -21,7 +22,7 @@ ALERT_ID = "alert-uuid-001"
 class TestGetPatientAlerts:
     def test_get_alerts_for_patient(self, client):
         mock_db, _ = make_supabase_mock([SAMPLE_ALERT])
-        app.dependency_overrides[get_supabase] = lambda: mock_db
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
 
         response = client.get(f"/alerts/{PATIENT_ID}")
         assert response.status_code == 200
@@ -34,7 +35,7 @@ class TestGetPatientAlerts:
 
     def test_get_alerts_empty(self, client):
         mock_db, _ = make_supabase_mock([])
-        app.dependency_overrides[get_supabase] = lambda: mock_db
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
 
         response = client.get(f"/alerts/{PATIENT_ID}")
         assert response.status_code == 200
@@ -44,7 +45,7 @@ class TestGetPatientAlerts:
 
     def test_get_unacknowledged_only(self, client):
         mock_db, _ = make_supabase_mock([SAMPLE_ALERT])
-        app.dependency_overrides[get_supabase] = lambda: mock_db
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
 
         response = client.get(f"/alerts/{PATIENT_ID}?unacknowledged_only=true")
         assert response.status_code == 200
@@ -59,7 +60,7 @@ class TestAcknowledgeAlert:
     def test_acknowledge_alert_success(self, client):
         acknowledged = {**SAMPLE_ALERT, "acknowledged": True}
         mock_db, _ = make_supabase_mock([acknowledged])
-        app.dependency_overrides[get_supabase] = lambda: mock_db
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
 
         response = client.patch(f"/alerts/{ALERT_ID}/acknowledge")
         assert response.status_code == 200
@@ -69,9 +70,9 @@ class TestAcknowledgeAlert:
 
     def test_acknowledge_alert_not_found(self, client):
         mock_db, _ = make_supabase_mock([])
-        app.dependency_overrides[get_supabase] = lambda: mock_db
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
 
-        response = client.patch(f"/alerts/nonexistent-id/acknowledge")
+        response = client.patch("/alerts/00000000-0000-4000-8000-000000000000/acknowledge")
         assert response.status_code == 404
 
         app.dependency_overrides.clear()
@@ -83,7 +84,7 @@ class TestAcknowledgeAlert:
 class TestGetAllAlerts:
     def test_get_all_alerts(self, client):
         mock_db, _ = make_supabase_mock([SAMPLE_ALERT])
-        app.dependency_overrides[get_supabase] = lambda: mock_db
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
 
         response = client.get("/alerts/")
         assert response.status_code == 200
@@ -93,7 +94,7 @@ class TestGetAllAlerts:
 
     def test_get_all_alerts_with_limit(self, client):
         mock_db, _ = make_supabase_mock([SAMPLE_ALERT])
-        app.dependency_overrides[get_supabase] = lambda: mock_db
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
 
         response = client.get("/alerts/?limit=5")
         assert response.status_code == 200
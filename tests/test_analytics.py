@@ -1,10 +1,11 @@
 """Tests for /analytics endpoint."""
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 from app.main import app
-from app.core.database import get_supabase
+from app.repositories import get_repository
+from app.repositories.supabase import build_supabase_repository
 from tests.conftest import SAMPLE_VITAL, PATIENT_ID, make_supabase_mock
 
 MOCK_ANALYTICS = {
@@ -28,7 +29,7 @@ def client():
 class TestGetAnalytics:
     def test_analytics_returns_computed_data(self, client):
         mock_db, _ = make_supabase_mock([SAMPLE_VITAL] * 5)
-        app.dependency_overrides[get_supabase] = lambda: mock_db
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
 
         with patch("app.api.routes.analytics.compute_analytics", return_value=MOCK_ANALYTICS):
             response = client.get(f"/analytics/{PATIENT_ID}")
@@ -42,7 +43,7 @@ class TestGetAnalytics:
 
     def test_analytics_empty_history(self, client):
         mock_db, _ = make_supabase_mock([])
-        app.dependency_overrides[get_supabase] = lambda: mock_db
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
 
         empty_analytics = {**MOCK_ANALYTICS, "total_readings": 0}
         with patch("app.api.routes.analytics.compute_analytics", return_value=empty_analytics):
@@ -57,9 +58,208 @@ class TestGetAnalytics:
         mock_db = MagicMock()
         mock_db.table.return_value.select.return_value.eq.return_value \
                .order.return_value.limit.return_value.execute.side_effect = Exception("DB error")
-        app.dependency_overrides[get_supabase] = lambda: mock_db
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
 
         response = client.get(f"/analytics/{PATIENT_ID}")
         assert response.status_code == 500
 
         app.dependency_overrides.clear()
+
+
+# ---------------------------------------------------------------------------
+# Columnar kernel parity with the original row-wise implementation
+# ---------------------------------------------------------------------------
+def _rowwise_analytics(patient_id, readings):
+    """The original list-of-dicts compute_analytics, kept as the parity reference."""
+    from app.services.analytics import AVERAGE_FIELDS, TREND_FIELDS, NO_READINGS_MESSAGE, classify_trend
+
+    if not readings:
+        return {"message": NO_READINGS_MESSAGE, "patient_id": patient_id}
+    ordered = list(reversed(readings))
+
+    averages = {}
+    for field in AVERAGE_FIELDS:
+        vals = [r[field] for r in ordered if r.get(field) is not None]
+        averages[field] = round(sum(vals) / len(vals), 2) if vals else None
+
+    dist = {"Low": 0, "Moderate": 0, "High": 0}
+    for r in ordered:
+        if r.get("risk_level") in dist:
+            dist[r.get("risk_level")] += 1
+
+    deteriorating = False
+    if len(ordered) >= 3:
+        scores = [r.get("risk_score") for r in ordered[-3:] if r.get("risk_score") is not None]
+        deteriorating = len(scores) == 3 and scores[0] < scores[1] < scores[2]
+
+    trends = {}
+    if len(ordered) >= 4:
+        mid = len(ordered) // 2
+        for field in TREND_FIELDS:
+            v1 = [r[field] for r in ordered[:mid] if r.get(field) is not None]
+            v2 = [r[field] for r in ordered[mid:] if r.get(field) is not None]
+            if v1 and v2:
+                trends[field] = classify_trend(sum(v1) / len(v1), sum(v2) / len(v2))
+
+    return {
+        "patient_id": patient_id,
+        "total_readings": len(ordered),
+        "latest_risk_level": ordered[-1].get("risk_level", "Unknown"),
+        "latest_risk_score": ordered[-1].get("risk_score"),
+        "averages": averages,
+        "risk_distribution": dist,
+        "deterioration_alert": deteriorating,
+        "trends": trends,
+        "time_range": {"from": ordered[0].get("recorded_at"), "to": ordered[-1].get("recorded_at")},
+    }
+
+
+def _random_readings(n, seed):
+    import random
+    rng = random.Random(seed)
+    maybe = lambda value: None if rng.random() < 0.15 else value
+    return [
+        {
+            "cholesterol": maybe(rng.uniform(150, 300)),
+            "hdl": maybe(rng.randint(30, 80)),  # ints mixed in, as the DB may return them
+            "bp_systolic": maybe(rng.uniform(100, 190)),
+            "bp_diastolic": rng.uniform(60, 120),
+            "weight": maybe(rng.uniform(50, 120)),
+            "glucose": maybe(rng.uniform(70, 250)),
+            "bmi": None,
+            "risk_score": maybe(round(rng.random(), 4)),
+            "risk_level": rng.choice(["Low", "Moderate", "High", None]),
+            "recorded_at": f"2026-01-01T00:00:{i:06d}",
+        }
+        for i in range(n)
+    ]
+
+
+class TestColumnarComputeAnalytics:
+    @pytest.mark.parametrize("n", [0, 1, 2, 3, 4, 5, 90, 91, 5000])
+    def test_identical_to_rowwise(self, n):
+        import json
+        from app.services.analytics import compute_analytics
+
+        for seed in range(5):
+            readings = _random_readings(n, seed)
+            expected = _rowwise_analytics(PATIENT_ID, readings)
+            actual = compute_analytics(PATIENT_ID, readings)
+            assert actual == expected
+            assert json.dumps(actual) == json.dumps(expected)
+
+    def test_readings_without_risk_level(self):
+        from app.services.analytics import compute_analytics
+
+        readings = [{"bp_systolic": 120, "recorded_at": "t"}]
+        assert compute_analytics(PATIENT_ID, readings) == _rowwise_analytics(PATIENT_ID, readings)
+
+
+# ---------------------------------------------------------------------------
+# Cohort analytics
+# ---------------------------------------------------------------------------
+def _cohort_readings(sizes, seed=0):
+    """Readings ordered by patient, newest first, as VitalRepository.for_cohort returns them."""
+    rows = []
+    for p, n in enumerate(sizes):
+        for reading in _random_readings(n, seed + p)[::-1]:
+            reading.update({"patient_id": f"patient-{p:03d}", "patients": {"name": f"Patient {p}"}})
+            rows.append(reading)
+    return rows
+
+
+class TestComputeCohortAnalytics:
+    @pytest.mark.parametrize("window", [4, 90])
+    def test_rows_match_per_patient_analytics(self, window):
+        from app.services.analytics import compute_analytics, compute_cohort_analytics
+
+        sizes = [1, 2, 3, 4, 5, 17, 90, 91, 250]
+        readings = _cohort_readings(sizes)
+        rows = compute_cohort_analytics(readings, window)
+
+        assert len(rows) == len(sizes)
+        for row in rows:
+            own = [r for r in readings if r["patient_id"] == row["patient_id"]]
+            expected = compute_analytics(row["patient_id"], own[:window])
+            assert row.pop("patient_name") == own[0]["patients"]["name"]
+            assert row == expected
+
+    def test_empty_cohort(self):
+        from app.services.analytics import compute_cohort_analytics
+        assert compute_cohort_analytics([], 90) == []
+
+
+def _embedded(readings):
+    """Readings nested under their patients, as the cohort query reads them from PostgREST."""
+    patients = {}
+    for reading in readings:
+        patient = patients.setdefault(reading["patient_id"], {"name": reading["patient_id"], "vital_readings": []})
+        patient["vital_readings"].append(reading)
+    return [patients[patient_id] for patient_id in sorted(patients)]
+
+
+class TestCohortEndpoint:
+    def _get(self, client, ranking, page, **params):
+        """One response for the ranking query (newest reading per patient), one for the page's readings."""
+        mock_db, _ = make_supabase_mock()
+        chain = mock_db.table.return_value
+        chain.execute = AsyncMock(side_effect=[MagicMock(data=_embedded(rows)) for rows in (ranking, page)])
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
+        response = client.get("/analytics/cohort", params=params)
+        app.dependency_overrides.clear()
+        return response, mock_db
+
+    def test_sorted_by_latest_risk_score_and_paginated(self, client):
+        readings = {
+            pid: {**SAMPLE_VITAL, "patient_id": pid, "risk_score": score}
+            for pid, score in [("a", 0.2), ("b", 0.9), ("c", None), ("d", 0.5)]
+        }
+        ranking = list(readings.values())
+
+        response, _ = self._get(client, ranking, [readings["b"], readings["d"]], limit=2, offset=0)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 4
+        assert [row["patient_id"] for row in data["patients"]] == ["b", "d"]
+
+        response, _ = self._get(client, ranking, [readings["a"], readings["c"]], limit=2, offset=2)
+        assert [row["patient_id"] for row in response.json()["patients"]] == ["a", "c"]
+
+        response, _ = self._get(client, ranking, ranking, order="asc")
+        assert [row["patient_id"] for row in response.json()["patients"]] == ["a", "d", "b", "c"]
+
+    def test_only_the_page_is_read_with_readings_bounded_per_patient(self, client):
+        from app.core.config import settings
+        from app.services.analytics import COHORT_COLUMNS, RANKING_COLUMNS
+        response, mock_db = self._get(client, [SAMPLE_VITAL], [SAMPLE_VITAL], doctor_name="Dr. Smith", since="2026-01-01T00:00:00+00:00")
+        assert response.status_code == 200
+        chain = mock_db.table.return_value
+        assert [c.args for c in mock_db.table.call_args_list] == [("patients",), ("patients",)]
+        assert [c.args for c in chain.select.call_args_list] == [
+            (f"name, vital_readings!inner({','.join(RANKING_COLUMNS)})",),
+            (f"name, vital_readings!inner({','.join(COHORT_COLUMNS)})",),
+        ]
+        chain.eq.assert_called_once_with("doctor_name", "Dr. Smith")
+        chain.in_.assert_called_once_with("id", [PATIENT_ID])
+        assert chain.gte.call_count == 2
+        chain.gte.assert_called_with("vital_readings.recorded_at", "2026-01-01T00:00:00+00:00")
+        assert [c.args for c in chain.limit.call_args_list] == [(1,), (settings.ANALYTICS_WINDOW,)]
+        assert chain.execute.await_count == 2
+
+    def test_malformed_since_returns_422(self, client):
+        response, mock_db = self._get(client, [SAMPLE_VITAL], [SAMPLE_VITAL], since="last tuesday")
+        assert response.status_code == 422
+        mock_db.table.assert_not_called()
+
+    def test_empty_page_reads_no_readings(self, client):
+        response, mock_db = self._get(client, [SAMPLE_VITAL], [], offset=5)
+        assert response.json()["patients"] == [] and response.json()["total"] == 1
+        assert mock_db.table.return_value.execute.await_count == 1
+
+    def test_db_error_returns_500(self, client):
+        mock_db, _ = make_supabase_mock([])
+        mock_db.table.return_value.execute.side_effect = Exception("DB error")
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
+        response = client.get("/analytics/cohort")
+        app.dependency_overrides.clear()
+        assert response.status_code == 500
@@ -0,0 +1,167 @@
+"""Tests for the versioned analytics response cache, ETag revalidation and miss coalescing."""
+import asyncio
+import json
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.repositories import get_repository
+from app.repositories.supabase import build_supabase_repository
+from app.services.analytics_cache import AnalyticsResultCache, analytics_cache, version_stamp
+from tests.conftest import PATIENT_ID, SAMPLE_VITAL, make_supabase_mock
+from tests.test_vitals import VITAL_PAYLOAD
+
+NEW_READING = {**SAMPLE_VITAL, "id": "vital-2", "recorded_at": "2026-01-02T08:00:00+00:00"}
+
+
+def _cache():
+    return AnalyticsResultCache(max_patients=10, ttl_seconds=60)
+
+
+class TestAnalyticsResultCache:
+    def test_concurrent_misses_share_one_computation(self):
+        cache = _cache()
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"patient_id": PATIENT_ID}, "v1"
+
+        async def main():
+            return await asyncio.gather(*(cache.get_or_compute(PATIENT_ID, compute) for _ in range(5)))
+
+        results = asyncio.run(main())
+        assert calls == 1
+        assert len({r.etag for r in results}) == 1
+        assert cache.stats()["coalesced"] == 4
+
+    def test_reading_stored_during_compute_is_not_cached(self):
+        cache = _cache()
+
+        async def compute():
+            cache.bump(PATIENT_ID, NEW_READING)
+            return {"patient_id": PATIENT_ID}, "old"
+
+        asyncio.run(cache.get_or_compute(PATIENT_ID, compute))
+        assert cache.peek(PATIENT_ID) is None
+
+    def test_failure_reaches_waiters_and_is_not_cached(self):
+        cache = _cache()
+
+        async def compute():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("DB down")
+
+        async def main():
+            return await asyncio.gather(
+                *(cache.get_or_compute(PATIENT_ID, compute) for _ in range(3)), return_exceptions=True
+            )
+
+        results = asyncio.run(main())
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert cache.peek(PATIENT_ID) is None
+
+    def test_cancelled_first_request_does_not_cancel_waiters(self):
+        cache = _cache()
+
+        async def compute():
+            await asyncio.sleep(0.01)
+            return {"patient_id": PATIENT_ID}, "v1"
+
+        async def main():
+            leader = asyncio.ensure_future(cache.get_or_compute(PATIENT_ID, compute))
+            await asyncio.sleep(0)
+            waiter = asyncio.ensure_future(cache.get_or_compute(PATIENT_ID, compute))
+            await asyncio.sleep(0)
+            leader.cancel()
+            return await waiter
+
+        assert asyncio.run(main()).version == "v1"
+        assert cache.peek(PATIENT_ID) is not None and cache.stats()["coalesced"] == 1
+
+    def test_bump_with_the_cached_version_keeps_the_entry(self):
+        cache = _cache()
+
+        async def compute():
+            return {}, version_stamp(NEW_READING)
+
+        asyncio.run(cache.get_or_compute(PATIENT_ID, compute))
+        cache.bump(PATIENT_ID, NEW_READING)
+        assert cache.peek(PATIENT_ID) is not None
+        cache.bump(PATIENT_ID, {**NEW_READING, "id": "vital-3"})
+        assert cache.peek(PATIENT_ID) is None
+
+    def test_bump_with_an_older_reading_drops_the_entry(self):
+        cache = _cache()
+
+        async def compute():
+            return {}, version_stamp(NEW_READING)
+
+        asyncio.run(cache.get_or_compute(PATIENT_ID, compute))
+        cache.bump(PATIENT_ID, SAMPLE_VITAL)
+        assert cache.peek(PATIENT_ID) is None
+
+    def test_etag_follows_the_body_not_only_the_version(self):
+        cache = _cache()
+
+        async def compute(total):
+            return {"total_readings": total}, version_stamp(NEW_READING)
+
+        first = asyncio.run(cache.get_or_compute(PATIENT_ID, lambda: compute(2)))
+        cache.discard(PATIENT_ID)
+        second = asyncio.run(cache.get_or_compute(PATIENT_ID, lambda: compute(3)))
+        assert first.version == second.version and first.etag != second.etag
+
+
+class TestAnalyticsRoute:
+    @pytest.fixture
+    def vitals_db(self):
+        mock_db, _ = make_supabase_mock([SAMPLE_VITAL] * 3)
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
+        yield mock_db
+        app.dependency_overrides.clear()
+
+    def test_unchanged_analytics_revalidate_with_304(self, vitals_db):
+        client = TestClient(app)
+        first = client.get(f"/analytics/{PATIENT_ID}")
+        etag = first.headers["etag"]
+
+        with patch("app.services.analytics_state.PatientAnalyticsState.snapshot") as snapshot:
+            revalidated = client.get(f"/analytics/{PATIENT_ID}", headers={"If-None-Match": etag})
+            weak = client.get(f"/analytics/{PATIENT_ID}", headers={"If-None-Match": f'"other", W/{etag}'})
+        snapshot.assert_not_called()
+
+        assert first.status_code == 200 and first.json()["total_readings"] == 3
+        assert revalidated.status_code == weak.status_code == 304
+        assert revalidated.content == b""
+        assert vitals_db.table.return_value.execute.await_count == 1
+        assert analytics_cache.stats()["not_modified"] == 2
+
+    def test_submit_vitals_changes_the_etag(self, vitals_db):
+        client = TestClient(app)
+        first = client.get(f"/analytics/{PATIENT_ID}")
+
+        vitals_db.table.return_value.execute.return_value.data = [NEW_READING]
+        risk = {"risk_score": 0.45, "risk_level": "Moderate", "recommendations": [], "model_version": "v1"}
+        with patch("app.api.routes.vitals.calculate_risk_async", return_value=risk), \
+             patch("app.api.routes.vitals.create_alert_if_needed", return_value=None):
+            assert client.post(f"/vitals/{PATIENT_ID}", json=VITAL_PAYLOAD).status_code == 201
+
+        second = client.get(f"/analytics/{PATIENT_ID}", headers={"If-None-Match": first.headers["etag"]})
+        assert second.status_code == 200
+        assert second.headers["etag"] != first.headers["etag"]
+        assert json.loads(second.content)["total_readings"] == 4
+
+    def test_errors_are_not_cached(self):
+        mock_db, _ = make_supabase_mock()
+        mock_db.table.return_value.execute.side_effect = Exception("DB error")
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
+        client = TestClient(app)
+
+        assert client.get(f"/analytics/{PATIENT_ID}").status_code == 500
+        assert analytics_cache.peek(PATIENT_ID) is None
+        app.dependency_overrides.clear()
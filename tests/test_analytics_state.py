@@ -0,0 +1,182 @@
+"""Tests for incremental per-patient analytics state."""
+import asyncio
+import random
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.repositories import get_repository
+from app.repositories.supabase import build_supabase_repository
+from app.services.analytics import AVERAGE_FIELDS, compute_analytics
+from app.services.analytics_state import AnalyticsStateStore, PatientAnalyticsState, analytics_store
+from tests.conftest import PATIENT_ID, SAMPLE_VITAL, make_supabase_mock
+from tests.test_vitals import VITAL_PAYLOAD
+
+LATER_VITAL = {**SAMPLE_VITAL, "id": "vital-2", "recorded_at": "2026-01-02T08:00:00+00:00"}
+
+
+def _reading(i: int, rng: random.Random) -> dict:
+    maybe = lambda value: None if rng.random() < 0.1 else value
+    return {
+        "id": f"vital-{i}",
+        "cholesterol": maybe(rng.uniform(150, 300)),
+        "hdl": maybe(rng.uniform(30, 80)),
+        "bp_systolic": rng.uniform(100, 190),
+        "bp_diastolic": rng.uniform(60, 120),
+        "weight": maybe(rng.uniform(50, 120)),
+        "glucose": maybe(rng.uniform(70, 250)),
+        "bmi": maybe(rng.uniform(18, 40)),
+        "risk_score": maybe(round(rng.random(), 4)),
+        "risk_level": rng.choice(["Low", "Moderate", "High"]),
+        "recorded_at": f"2026-01-01T00:00:{i:06d}",
+    }
+
+
+class TestPatientAnalyticsState:
+    @pytest.mark.parametrize("window", [4, 7, 90])
+    def test_matches_compute_analytics_over_a_stream(self, window):
+        rng = random.Random(window)
+        history = []  # newest first, as the repository returns it
+        state = PatientAnalyticsState(window)
+        for i in range(window * 3):
+            reading = _reading(i, rng)
+            history.insert(0, reading)
+            state.add(reading)
+            assert state.snapshot(PATIENT_ID) == compute_analytics(PATIENT_ID, history[:window])
+
+    def test_sums_do_not_drift_over_a_long_stream(self):
+        rng = random.Random(7)
+        state = PatientAnalyticsState(window=90)
+        history = []
+        for i in range(5_000):
+            reading = {**_reading(i, rng), "glucose": rng.choice([0.1, 1e6, 0.3, 7e-3])}
+            history.insert(0, reading)
+            state.add(reading)
+        window = [r["glucose"] for r in reversed(history[:90])]
+        assert state._window_sums()[2][AVERAGE_FIELDS.index("glucose")] == np.cumsum(window)[-1]
+
+    def test_from_history_matches_compute_analytics(self):
+        rng = random.Random(1)
+        history = [_reading(i, rng) for i in range(120)][::-1]
+        state = PatientAnalyticsState.from_history(history, window=90)
+        assert state.snapshot(PATIENT_ID) == compute_analytics(PATIENT_ID, history[:90])
+
+    def test_empty_history(self):
+        state = PatientAnalyticsState.from_history([], window=90)
+        assert state.snapshot(PATIENT_ID) == compute_analytics(PATIENT_ID, [])
+
+    def test_window_too_small_rejected(self):
+        with pytest.raises(ValueError):
+            PatientAnalyticsState(3)
+
+
+class TestAnalyticsStateStore:
+    def test_record_skips_patients_without_state(self):
+        store = AnalyticsStateStore(window=90, max_patients=10, ttl_seconds=60)
+        store.record(PATIENT_ID, SAMPLE_VITAL)
+        assert store.get(PATIENT_ID) is None
+
+    def test_record_updates_existing_state(self):
+        store = AnalyticsStateStore(window=90, max_patients=10, ttl_seconds=60)
+        store.rebuild(PATIENT_ID, [SAMPLE_VITAL])
+        store.record(PATIENT_ID, LATER_VITAL)
+        assert store.get(PATIENT_ID).total == 2
+
+    def test_older_reading_after_a_newer_one_drops_the_state(self):
+        store = AnalyticsStateStore(window=90, max_patients=10, ttl_seconds=60)
+        store.rebuild(PATIENT_ID, [SAMPLE_VITAL])
+        store.record(PATIENT_ID, LATER_VITAL)
+        store.record(PATIENT_ID, {**SAMPLE_VITAL, "id": "vital-3", "recorded_at": "2026-01-01T20:00:00+00:00"})
+        assert store.get(PATIENT_ID) is None
+
+    def test_reading_with_the_newest_timestamp_drops_the_state(self):
+        store = AnalyticsStateStore(window=90, max_patients=10, ttl_seconds=60)
+        store.rebuild(PATIENT_ID, [SAMPLE_VITAL])
+        store.record(PATIENT_ID, {**SAMPLE_VITAL, "id": "vital-2"})
+        assert store.get(PATIENT_ID) is None
+
+    def test_lru_eviction(self):
+        store = AnalyticsStateStore(window=90, max_patients=2, ttl_seconds=60)
+        store.rebuild("a", [SAMPLE_VITAL])
+        store.rebuild("b", [SAMPLE_VITAL])
+        store.get("a")
+        store.rebuild("c", [SAMPLE_VITAL])
+        assert store.get("b") is None
+        assert store.get("a") is not None and store.get("c") is not None
+
+    def test_rebuild_raced_by_a_write_is_not_kept(self):
+        store = AnalyticsStateStore(window=90, max_patients=10, ttl_seconds=60)
+
+        async def fetch_during_a_write():
+            # The reading lands after the history was read but before the rebuild finishes
+            store.record(PATIENT_ID, {**SAMPLE_VITAL, "id": "vital-2"})
+            return [SAMPLE_VITAL]
+
+        async def fetch_both():
+            return [{**SAMPLE_VITAL, "id": "vital-2"}, SAMPLE_VITAL]
+
+        raced = asyncio.run(store.get_or_rebuild(PATIENT_ID, fetch_during_a_write))
+        assert raced.total == 1 and store.get(PATIENT_ID) is None
+        assert asyncio.run(store.get_or_rebuild(PATIENT_ID, fetch_both)).total == 2
+        assert store.get(PATIENT_ID).latest_reading["id"] == "vital-2"
+
+    def test_expired_state_is_dropped(self):
+        store = AnalyticsStateStore(window=90, max_patients=10, ttl_seconds=0)
+        store.rebuild(PATIENT_ID, [SAMPLE_VITAL])
+        with patch("app.services.analytics_state.time.monotonic", return_value=1e12):
+            assert store.get(PATIENT_ID) is None
+
+
+class TestAnalyticsRouteIncremental:
+    def test_second_request_skips_history_fetch(self):
+        client = TestClient(app)
+        mock_db, _ = make_supabase_mock([SAMPLE_VITAL] * 5)
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
+
+        first = client.get(f"/analytics/{PATIENT_ID}")
+        second = client.get(f"/analytics/{PATIENT_ID}")
+
+        assert first.status_code == second.status_code == 200
+        assert first.json() == second.json() == compute_analytics(PATIENT_ID, [SAMPLE_VITAL] * 5)
+        assert mock_db.table.return_value.execute.await_count == 1
+        app.dependency_overrides.clear()
+
+    def test_submit_vitals_updates_state(self):
+        client = TestClient(app)
+        analytics_store.rebuild(PATIENT_ID, [SAMPLE_VITAL])
+        mock_db, _ = make_supabase_mock([LATER_VITAL])
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
+        risk = {"risk_score": 0.45, "risk_level": "Moderate", "recommendations": [], "model_version": "v1"}
+
+        with patch("app.api.routes.vitals.calculate_risk_async", return_value=risk), \
+             patch("app.api.routes.vitals.create_alert_if_needed", return_value=None):
+            response = client.post(f"/vitals/{PATIENT_ID}", json=VITAL_PAYLOAD)
+
+        assert response.status_code == 201
+        assert analytics_store.get(PATIENT_ID).total == 2
+        app.dependency_overrides.clear()
+
+    def test_back_dated_reading_is_served_in_history_order(self):
+        client = TestClient(app)
+        back_dated = {**SAMPLE_VITAL, "id": "vital-3", "risk_score": 0.9, "recorded_at": "2026-01-01T20:00:00+00:00"}
+        mock_db, _ = make_supabase_mock([LATER_VITAL, SAMPLE_VITAL])
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
+        first = client.get(f"/analytics/{PATIENT_ID}")
+
+        mock_db.table.return_value.execute.return_value.data = [back_dated]
+        risk = {"risk_score": 0.9, "risk_level": "High", "recommendations": [], "model_version": "v1"}
+        with patch("app.api.routes.vitals.calculate_risk_async", return_value=risk), \
+             patch("app.api.routes.vitals.create_alert_if_needed", return_value=None):
+            assert client.post(f"/vitals/{PATIENT_ID}", json=VITAL_PAYLOAD).status_code == 201
+
+        history = [LATER_VITAL, back_dated, SAMPLE_VITAL]
+        mock_db.table.return_value.execute.return_value.data = history
+        second = client.get(f"/analytics/{PATIENT_ID}", headers={"If-None-Match": first.headers["etag"]})
+
+        assert second.status_code == 200
+        assert second.json() == compute_analytics(PATIENT_ID, history)
+        assert second.json()["latest_risk_score"] == LATER_VITAL["risk_score"]
+        app.dependency_overrides.clear()
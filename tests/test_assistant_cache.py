@@ -0,0 +1,94 @@
+"""Tests for question normalisation, keyword matching and the cached, pre-serialised assistant answers."""
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.routes.assistant import ChatResponse
+from app.main import app
+from app.services.ai_assistant import answer, get_assistant_response, question_key
+from app.services.assistant_cache import AssistantResponseCache, CachedAnswer, assistant_cache
+from app.services.patient_context import PatientContext
+from app.services.text_normalize import stem
+from tests.conftest import SAMPLE_VITAL
+
+
+class TestNormalisation:
+    @pytest.mark.parametrize("a, b", [
+        ("What is normal blood pressure?", "what is  NORMAL blood-pressure"),
+        ("what  is   hypertension", "What is hypertension?"),
+        ("Can't breathe!", "can't  breathe"),
+    ])
+    def test_variants_share_a_key(self, a, b):
+        assert question_key(a) == question_key(b)
+
+    def test_stemming_is_idempotent(self):
+        for word in ["proceeded", "diabetes", "pressures", "collapsing", "studies", "bp"]:
+            assert stem(stem(word)) == stem(word)
+
+    def test_inflected_keywords_still_match(self):
+        assert get_assistant_response("I collapsed yesterday")["topic"] == "Emergency"
+        assert get_assistant_response("I can't breathe")["topic"] == "Emergency"
+        assert get_assistant_response("Living with DIABETES")["topic"] == "Blood Glucose"
+
+    @pytest.mark.parametrize("question, topic", [
+        ("Is it an emergency if I'm missing meals and feel faint?", "Emergency"),
+        ("I am on a mission to walk more", "Physical Activity"),
+        ("bmies", "Weight & Nutrition"),
+    ])
+    def test_keywords_match_the_original_text_not_stems(self, question, topic):
+        assert get_assistant_response(question)["topic"] == topic
+
+    def test_folded_keywords_match_folded_questions(self):
+        assert question_key("  What is BMI?! ") == "what is bmi"
+        assert get_assistant_response("I CAN'T   breathe")["topic"] == "Emergency"
+        assert get_assistant_response("my blood-pressure")["topic"] == "Blood Pressure"
+
+
+class TestAssistantResponseCache:
+    def test_lru_counts_hits_and_evictions(self):
+        cache = AssistantResponseCache(max_entries=1)
+        computed = CachedAnswer({"topic": "x"}, b"{}")
+        cache.get_or_compute("a", lambda: computed)
+        assert cache.get_or_compute("a", lambda: None) is computed
+        cache.get_or_compute("b", lambda: computed)
+        stats = cache.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 2 and stats["evictions"] == 1
+
+    def test_disabled_cache_always_computes(self):
+        cache = AssistantResponseCache(max_entries=10, enabled=False)
+        cache.get_or_compute("a", lambda: CachedAnswer({}, b""))
+        cache.get_or_compute("a", lambda: CachedAnswer({}, b""))
+        assert cache.stats()["misses"] == 2 and cache.stats()["size"] == 0
+
+    def test_repeat_questions_are_served_from_the_cache(self):
+        first = answer("What is normal blood pressure?")
+        assert answer("WHAT is normal   blood-pressure!") is first
+        assert answer("what is normal blood pressure", include_related=True) is not first
+        assert assistant_cache.stats()["hits"] == 1
+
+    @pytest.mark.parametrize("question, include_related", [
+        ("my blood sugar and my bp", True),
+        ("hello there", False),
+        ("I forgot my medication and feel stressed", True),
+    ])
+    def test_body_matches_chat_response_serialisation(self, question, include_related):
+        cached = answer(question, include_related)
+        assert cached.body == ChatResponse(**cached.result).model_dump_json().encode()
+
+    def test_personalising_does_not_touch_the_cached_answer(self):
+        cached = answer("is my blood pressure ok")
+        original = cached.result["response"]
+        get_assistant_response("is my blood pressure ok", context=PatientContext.from_reading(SAMPLE_VITAL))
+        assert cached.result["response"] == original and "risk_level" not in cached.result
+
+
+class TestChatRoute:
+    def test_hot_answers_are_the_pre_serialised_body(self, admin_headers):
+        client = TestClient(app)
+        first = client.post("/assistant/chat", json={"question": "I missed my pill"})
+        second = client.post("/assistant/chat", json={"question": "i MISSED my pill."})
+        assert first.content == second.content == answer("i missed my pill").body
+        assert first.headers["content-type"] == "application/json"
+        assert json.loads(second.content)["topic"] == "Medications"
+        assert client.get("/admin/cache", headers=admin_headers).json()["assistant_answers"]["hit_rate"] == pytest.approx(2 / 3, abs=1e-4)
@@ -0,0 +1,74 @@
+"""Parity tests: the compiled scorer must match the sklearn scaler + model path."""
+import numpy as np
+import pytest
+
+sklearn = pytest.importorskip("sklearn")
+from sklearn.linear_model import LogisticRegression  # noqa: E402
+from sklearn.preprocessing import StandardScaler  # noqa: E402
+
+from app.services import risk_engine  # noqa: E402
+from app.services.compiled_model import compile_scorer, ForestScorer, LinearScorer  # noqa: E402
+
+# (mean, std) per feature, in model order: chol, hdl, age, weight, bp_s, bp_d
+FEATURE_DISTRIBUTIONS = [(210, 40), (50, 15), (55, 15), (85, 20), (135, 20), (85, 12)]
+
+
+def _synthetic_features(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.column_stack([rng.normal(mu, sd, n).round(1) for mu, sd in FEATURE_DISTRIBUTIONS])
+
+
+def _sklearn_proba(model, scaler, features):
+    return model.predict_proba(scaler.transform(features))[:, 1]
+
+
+class TestForestScorer:
+    @pytest.fixture
+    def artefacts(self):
+        loaded = risk_engine.registry.get()
+        if loaded is None:
+            pytest.skip("Model artefacts not loadable in this environment")
+        return loaded.model, loaded.scaler
+
+    def test_matches_sklearn_on_shipped_model(self, artefacts):
+        model, scaler = artefacts
+        scorer = compile_scorer(model, scaler)
+        assert isinstance(scorer, ForestScorer)
+
+        features = _synthetic_features(20_000)
+        np.testing.assert_allclose(scorer(features), _sklearn_proba(model, scaler, features), rtol=0, atol=1e-12)
+
+    def test_matches_sklearn_exactly_at_split_thresholds(self, artefacts):
+        model, scaler = artefacts
+        scorer = compile_scorer(model, scaler)
+
+        # Raw values sitting on and either side of every folded threshold
+        base = _synthetic_features(1)[0]
+        rows = []
+        for feature, threshold in zip(scorer.feature, scorer.threshold):
+            for value in (np.nextafter(threshold, -np.inf), threshold, np.nextafter(threshold, np.inf)):
+                row = base.copy()
+                row[feature] = value
+                rows.append(row)
+        features = np.array(rows)
+        np.testing.assert_allclose(scorer(features), _sklearn_proba(model, scaler, features), rtol=0, atol=1e-12)
+
+
+class TestLinearScorer:
+    def test_matches_sklearn_logistic_regression(self):
+        features = _synthetic_features(2_000, seed=1)
+        labels = (features[:, 4] + features[:, 0] / 4 > 190).astype(int)
+        scaler = StandardScaler().fit(features)
+        model = LogisticRegression().fit(scaler.transform(features), labels)
+
+        scorer = compile_scorer(model, scaler)
+        assert isinstance(scorer, LinearScorer)
+
+        test_features = _synthetic_features(5_000, seed=2)
+        np.testing.assert_allclose(
+            scorer(test_features), _sklearn_proba(model, scaler, test_features), rtol=0, atol=1e-12
+        )
+
+    def test_unsupported_model_raises(self):
+        with pytest.raises(TypeError):
+            compile_scorer(object(), StandardScaler().fit(_synthetic_features(10)))
@@ -0,0 +1,31 @@
+"""Tests for the shared async PostgREST client."""
+import asyncio
+
+import pytest
+from unittest.mock import patch
+
+from app.core import database
+
+
+@pytest.fixture(autouse=True)
+def reset_client():
+    database._async_supabase = None
+    yield
+    database._async_supabase = None
+
+
+class TestAsyncSupabaseClient:
+    def test_missing_credentials_raise(self):
+        with patch.object(database.settings, "SUPABASE_URL", ""):
+            with pytest.raises(RuntimeError):
+                database.get_async_supabase()
+
+    def test_client_is_shared_and_closed(self):
+        with patch.object(database.settings, "SUPABASE_URL", "https://example.supabase.co"), \
+             patch.object(database.settings, "SUPABASE_ANON_KEY", "anon-key"):
+            client = database.get_async_supabase()
+            assert database.get_async_supabase() is client
+            assert str(client.base_url).rstrip("/") == "https://example.supabase.co/rest/v1"
+
+            asyncio.run(database.close_async_supabase())
+            assert database._async_supabase is None
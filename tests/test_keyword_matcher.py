@@ -0,0 +1,68 @@
+"""Tests for the Aho-Corasick keyword matcher and the assistant's topic matching."""
+import random
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.ai_assistant import KNOWLEDGE_BASE, get_assistant_response, match_topics
+from app.services.keyword_matcher import KeywordMatcher
+
+
+def _legacy_first(groups, text):
+    text = text.lower()
+    for index, keywords in enumerate(groups):
+        if any(kw in text for kw in keywords):
+            return index
+    return None
+
+
+class TestKeywordMatcher:
+    def test_overlapping_and_nested_keywords_are_all_found(self):
+        matcher = KeywordMatcher([["she", "hers"], ["he"], ["his"]])
+        assert matcher.counts("ushers") == {0: 2, 1: 1}
+        assert matcher.first("ahishers") == 0
+        assert matcher.first("this") == 2
+        assert matcher.first("nothing") is None
+
+    def test_first_matches_the_ordered_scan(self):
+        rng = random.Random(7)
+        alphabet = "abcde "
+        groups = [
+            ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(3)]
+            for _ in range(20)
+        ]
+        matcher = KeywordMatcher(groups)
+        for _ in range(2000):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+            assert matcher.first(text) == _legacy_first(groups, text)
+
+    def test_ranked_orders_by_hits_then_group(self):
+        matcher = KeywordMatcher([["a"], ["b"], ["c"]])
+        assert matcher.ranked("c b b c a") == [1, 2, 0]
+
+
+class TestAssistantMatching:
+    def test_knowledge_base_precedence_is_unchanged(self):
+        groups = [entry["keywords"] for entry in KNOWLEDGE_BASE]
+        words = [kw for keywords in groups for kw in keywords] + ["my", "the", "is", "Painful", "WALKING", "??"]
+        rng = random.Random(3)
+        for _ in range(2000):
+            question = " ".join(rng.choice(words) for _ in range(rng.randint(0, 6)))
+            expected = _legacy_first(groups, question)
+            topic = "General" if expected is None else KNOWLEDGE_BASE[expected]["topic"]
+            assert get_assistant_response(question)["topic"] == topic
+
+    def test_related_topics_are_ranked(self):
+        question = "Chest pain and pain in my arm after my blood pressure pill"
+        result = get_assistant_response(question, include_related=True)
+        assert result["topic"] == "Blood Pressure"
+        assert result["related_topics"] == ["Emergency", "Medications"]
+        assert match_topics(question) == ["Emergency", "Blood Pressure", "Medications"]
+
+    def test_chat_returns_related_topics_on_request(self):
+        client = TestClient(app)
+        body = {"question": "I forgot my pills and feel stressed", "include_related": True}
+        data = client.post("/assistant/chat", json=body).json()
+        assert data["topic"] == "Medications"
+        assert data["related_topics"] == ["Mental Health & Sleep"]
+        assert client.post("/assistant/chat", json={"question": "hello"}).json()["related_topics"] is None
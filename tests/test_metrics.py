@@ -0,0 +1,141 @@
+"""Tests for the metrics registry, span timers, request middleware and GET /metrics."""
+import asyncio
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.repositories.instrumented import instrument_repository
+from app.repositories.supabase import build_supabase_repository
+from app.services.alert_service import create_alert_if_needed
+from app.services.metrics import (
+    ALERTS,
+    HTTP_REQUEST_SECONDS,
+    RISK_LEVELS,
+    SPAN_SECONDS,
+    MetricsRegistry,
+    span,
+    timed,
+)
+from tests.conftest import PATIENT_ID, SAMPLE_PATIENT, SAMPLE_VITAL, make_supabase_mock
+
+CRITICAL_VITALS = {**SAMPLE_VITAL, "bp_systolic": 185.0, "bp_diastolic": 125.0}
+
+
+class TestRegistry:
+    def test_counter_and_histogram_render_in_the_text_format(self):
+        registry = MetricsRegistry()
+        requests = registry.counter("requests_total", "Requests.", ("code",))
+        latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+        requests.inc("200")
+        requests.inc("200", amount=2)
+        requests.inc('5"0\\0')
+        for value in (0.05, 0.1, 0.5, 3.0):
+            latency.observe(value)
+
+        assert registry.render().splitlines() == [
+            "# HELP requests_total Requests.",
+            "# TYPE requests_total counter",
+            'requests_total{code="200"} 3',
+            'requests_total{code="5\\"0\\\\0"} 1',
+            "# HELP latency_seconds Latency.",
+            "# TYPE latency_seconds histogram",
+            'latency_seconds_bucket{le="0.1"} 2',
+            'latency_seconds_bucket{le="1"} 3',
+            'latency_seconds_bucket{le="+Inf"} 4',
+            "latency_seconds_sum 3.65",
+            "latency_seconds_count 4",
+        ]
+
+    def test_threads_record_into_their_own_shards_and_are_summed(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("work_total", "Work.", ("kind",))
+
+        def work():
+            for _ in range(10_000):
+                counter.inc("a")
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert counter.value("a") == 80_000
+        assert len(counter._shards) == 8
+
+    def test_disabled_registry_records_nothing(self):
+        registry = MetricsRegistry(enabled=False)
+        counter = registry.counter("off_total", "Off.")
+        counter.inc()
+        assert counter.value() == 0
+
+
+class TestSpans:
+    def test_span_and_timed_record_durations(self):
+        with span("block"):
+            pass
+
+        @timed("sync")
+        def add(a, b):
+            return a + b
+
+        @timed("async")
+        async def fail():
+            raise ValueError
+
+        assert add(1, 2) == 3 and add.__name__ == "add"
+        with pytest.raises(ValueError):
+            asyncio.run(fail())
+        assert [SPAN_SECONDS.count(name) for name in ("block", "sync", "async")] == [1, 1, 1]
+
+    def test_repository_calls_are_timed_per_method(self):
+        mock_db, _ = make_supabase_mock([SAMPLE_PATIENT])
+        repo = instrument_repository(build_supabase_repository(mock_db))
+
+        async def calls():
+            await repo.patients.get(PATIENT_ID)
+            await repo.patients.get(PATIENT_ID)
+            await repo.vitals.history(PATIENT_ID, limit=5)
+
+        asyncio.run(calls())
+        assert SPAN_SECONDS.count("db.patients.get") == 2
+        assert SPAN_SECONDS.count("db.vitals.history") == 1
+
+    def test_alerts_are_counted_by_severity_and_outcome(self):
+        mock_db, _ = make_supabase_mock([{"id": "alert-1"}])
+        alerts = build_supabase_repository(mock_db).alerts
+
+        async def submit():
+            for _ in range(3):
+                await create_alert_if_needed(alerts, PATIENT_ID, "vital-1", "High", 0.9, CRITICAL_VITALS)
+
+        asyncio.run(submit())
+        assert ALERTS.value("Critical", "created") == 1
+        assert ALERTS.value("Critical", "repeated") == 2
+        assert SPAN_SECONDS.count("alerts.create_alert_if_needed") == 3
+
+
+class TestEndpoint:
+    def test_requests_are_recorded_by_route_template(self, mock_supabase_alert):
+        client = TestClient(app)
+        client.get(f"/alerts/{PATIENT_ID}")
+        client.get("/alerts/00000000-0000-4000-8000-000000000000")
+        client.get("/no/such/path")
+
+        assert HTTP_REQUEST_SECONDS.count("GET", "/alerts/{patient_id}", "200") == 2
+        assert HTTP_REQUEST_SECONDS.count("GET", "<unmatched>", "404") == 1
+
+        response = client.get("/metrics")
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert 'http_request_duration_seconds_count{method="GET",route="/alerts/{patient_id}",status="200"} 2' \
+            in response.text
+        assert "# TYPE alerts_total counter" in response.text
+
+    def test_risk_levels_are_counted_for_stored_readings(self, mock_supabase_vital):
+        client = TestClient(app)
+        payload = {k: SAMPLE_VITAL[k] for k in ("cholesterol", "hdl", "age", "weight", "bp_systolic", "bp_diastolic")}
+        for _ in range(2):
+            assert client.post(f"/vitals/{PATIENT_ID}", json=payload).status_code == 201
+        assert sum(row[0] for row in RISK_LEVELS.collect().values()) == 2
+        assert SPAN_SECONDS.count("risk.calculate_risk_async") == 2
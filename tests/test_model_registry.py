@@ -0,0 +1,88 @@
+"""Tests for the lazy, hot-reloadable model registry and the /admin model endpoints."""
+import shutil
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+
+from app.main import app
+from app.services import risk_engine
+from app.services.model_registry import ModelRegistry, MODEL_FILE, SCALER_FILE, VERSION_FILE
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    if risk_engine.registry.get() is None:
+        pytest.skip("Model artefacts not loadable in this environment")
+    for name in (MODEL_FILE, SCALER_FILE):
+        shutil.copy(f"{risk_engine.BASE_DIR}/{name}", tmp_path / name)
+    return tmp_path
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+class TestModelRegistry:
+    def test_loads_lazily_on_first_get(self, model_dir):
+        registry = ModelRegistry(str(model_dir))
+        assert registry._current is None
+
+        loaded = registry.get()
+        assert loaded is not None
+        assert loaded.version.startswith("sha256:")
+        assert registry.get() is loaded
+
+    def test_version_file_takes_precedence(self, model_dir):
+        (model_dir / VERSION_FILE).write_text("risk-v7\n")
+        assert ModelRegistry(str(model_dir)).version == "risk-v7"
+
+    def test_reload_swaps_version_and_old_snapshot_keeps_working(self, model_dir):
+        registry = ModelRegistry(str(model_dir))
+        old = registry.get()
+
+        (model_dir / VERSION_FILE).write_text("risk-v8")
+        new = registry.reload()
+
+        assert new.version == "risk-v8"
+        assert registry.get() is new
+        features = np.array([[200.0, 50.0, 55.0, 85.0, 130.0, 85.0]])
+        np.testing.assert_allclose(old.scorer(features), new.scorer(features))
+
+    def test_failed_reload_keeps_previous_version(self, model_dir):
+        registry = ModelRegistry(str(model_dir))
+        old = registry.get()
+
+        (model_dir / MODEL_FILE).write_bytes(b"not a joblib file")
+        with pytest.raises(Exception):
+            registry.reload()
+        assert registry.get() is old
+
+    def test_missing_artefacts_return_none(self, tmp_path):
+        assert ModelRegistry(str(tmp_path)).get() is None
+
+
+class TestAdminModelEndpoints:
+    def test_reload_endpoint_reports_new_version(self, client, model_dir, admin_headers):
+        registry = ModelRegistry(str(model_dir))
+        (model_dir / VERSION_FILE).write_text("risk-v9")
+
+        with patch("app.api.routes.admin.registry", registry):
+            response = client.post("/admin/model/reload", headers=admin_headers)
+            info = client.get("/admin/model", headers=admin_headers)
+
+        assert response.status_code == 200
+        assert response.json()["model_version"] == "risk-v9"
+        assert info.json()["model_version"] == "risk-v9"
+
+    def test_reload_requires_token_when_configured(self, client):
+        with patch("app.api.routes.admin.settings.ADMIN_TOKEN", "secret"):
+            response = client.post("/admin/model/reload", headers={"X-Admin-Token": "wrong"})
+        assert response.status_code == 403
+
+    def test_admin_is_disabled_without_a_configured_token(self, client):
+        with patch("app.api.routes.admin.settings.ADMIN_TOKEN", ""):
+            assert client.get("/admin/model").status_code == 403
+            assert client.post("/admin/model/reload", headers={"X-Admin-Token": ""}).status_code == 403
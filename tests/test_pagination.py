@@ -0,0 +1,136 @@
+"""Tests for keyset (cursor) pagination and NDJSON streaming on the list endpoints."""
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.api.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from app.main import app
+from app.repositories import get_repository, tables
+from app.repositories.postgres import _newest_first
+from app.repositories.supabase import build_supabase_repository
+from tests.conftest import PATIENT_ID, SAMPLE_ALERT, SAMPLE_PATIENT, SAMPLE_VITAL, make_supabase_mock
+
+
+def _rows(template, n, time_key):
+    """n rows newest first, ids row-00n … row-001."""
+    return [
+        {**template, "id": f"row-{i:03d}", time_key: f"2026-01-01T00:{i:02d}:00+00:00"}
+        for i in range(n, 0, -1)
+    ]
+
+
+def _override(mock_db):
+    app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
+
+
+@pytest.fixture(autouse=True)
+def clear_overrides():
+    yield
+    app.dependency_overrides.clear()
+
+
+class TestCursor:
+    def test_round_trip(self):
+        row = {"id": "row-001", "created_at": "2026-01-01T08:00:00+00:00"}
+        assert decode_cursor(encode_cursor(row, "created_at")) == ("2026-01-01T08:00:00+00:00", "row-001")
+
+    @pytest.mark.parametrize("token", ["not-base64!", "W10", encode_cursor({"id": 'x",id.gt."', "t": "2026-01-01"}, "t")])
+    def test_rejects_tampered_cursor(self, client, token):
+        _override(make_supabase_mock([])[0])
+        response = client.get("/patients/", params={"cursor": token})
+        assert response.status_code == 400
+
+
+class TestPagedLists:
+    def test_next_cursor_only_when_more_rows_follow(self, client):
+        mock_db, mock_response = make_supabase_mock(_rows(SAMPLE_PATIENT, 3, "created_at"))
+        _override(mock_db)
+
+        response = client.get("/patients/", params={"limit": 2})
+        assert [p["id"] for p in response.json()] == ["row-003", "row-002"]
+        assert decode_cursor(response.headers[NEXT_CURSOR_HEADER]) == ("2026-01-01T00:02:00+00:00", "row-002")
+        mock_db.table.return_value.limit.assert_called_with(3)  # one extra row tells us a next page exists
+
+        mock_response.data = _rows(SAMPLE_PATIENT, 2, "created_at")
+        response = client.get("/patients/", params={"limit": 2})
+        assert NEXT_CURSOR_HEADER not in response.headers
+
+    def test_next_cursor_is_readable_cross_origin(self, client):
+        mock_db, _ = make_supabase_mock(_rows(SAMPLE_PATIENT, 3, "created_at"))
+        _override(mock_db)
+        response = client.get("/patients/", params={"limit": 2}, headers={"Origin": "https://clinic.example"})
+        assert NEXT_CURSOR_HEADER in response.headers["access-control-expose-headers"]
+
+    def test_cursor_becomes_keyset_filter(self, client):
+        mock_db, _ = make_supabase_mock([SAMPLE_VITAL])
+        _override(mock_db)
+        cursor = encode_cursor({"id": "row-002", "recorded_at": "2026-01-01T00:02:00+00:00"}, "recorded_at")
+
+        response = client.get(f"/vitals/{PATIENT_ID}", params={"cursor": cursor})
+        assert response.status_code == 200
+        chain = mock_db.table.return_value
+        chain.or_.assert_called_once_with(
+            'recorded_at.lt."2026-01-01T00:02:00+00:00",'
+            'and(recorded_at.eq."2026-01-01T00:02:00+00:00",id.lt."row-002")'
+        )
+        chain.order.assert_any_call("recorded_at", desc=True)
+        chain.order.assert_any_call("id", desc=True)
+
+    @pytest.mark.parametrize("path", [f"/alerts/{PATIENT_ID}", "/alerts/"])
+    def test_alert_lists_are_paged(self, client, path):
+        mock_db, _ = make_supabase_mock(_rows(SAMPLE_ALERT, 4, "created_at"))
+        _override(mock_db)
+
+        response = client.get(path, params={"limit": 3})
+        assert len(response.json()) == 3
+        assert NEXT_CURSOR_HEADER in response.headers
+
+    def test_limit_is_bounded(self, client):
+        _override(make_supabase_mock([])[0])
+        assert client.get("/patients/", params={"limit": 0}).status_code == 422
+        assert client.get("/patients/", params={"limit": 100_000}).status_code == 422
+
+
+class TestNdjsonStreaming:
+    def test_streams_every_page(self, client):
+        rows = _rows(SAMPLE_PATIENT, 5, "created_at")
+        mock_db, _ = make_supabase_mock()
+        pages = [rows[:2], rows[2:4], rows[4:]]
+        mock_db.table.return_value.execute = AsyncMock(
+            side_effect=[type("R", (), {"data": page})() for page in pages]
+        )
+        _override(mock_db)
+
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr("app.api.pagination.settings.STREAM_PAGE_SIZE", 2)
+            response = client.get("/patients/", params={"format": "ndjson"})
+
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["id"] for line in lines] == [r["id"] for r in rows]
+        # Each follow-up page starts after the last row of the previous one
+        filters = [c.args[0] for c in mock_db.table.return_value.or_.call_args_list]
+        assert 'id.lt."row-004"' in filters[0] and 'id.lt."row-002"' in filters[1]
+
+    def test_first_page_error_is_a_500(self, client):
+        mock_db, _ = make_supabase_mock()
+        mock_db.table.return_value.execute = AsyncMock(side_effect=Exception("DB down"))
+        _override(mock_db)
+
+        response = client.get(f"/alerts/{PATIENT_ID}", params={"format": "ndjson"})
+        assert response.status_code == 500
+
+
+class TestPostgresKeyset:
+    def test_row_comparison_after_cursor(self):
+        statement = _newest_first(
+            select(tables.patients), tables.patients, "created_at", 10,
+            ("2026-01-01T00:02:00+00:00", "row-002"),
+        )
+        sql = str(statement.compile(dialect=postgresql.dialect()))
+        assert "(patients.created_at, patients.id) < (" in sql
+        assert "ORDER BY patients.created_at DESC, patients.id DESC" in sql
+        assert "LIMIT" in sql
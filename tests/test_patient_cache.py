@@ -0,0 +1,143 @@
+"""Tests for the patient read-through cache and its invalidation by the patient routes."""
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.main import app
+from app.repositories import get_repository
+from app.repositories.supabase import build_supabase_repository
+from app.services.patient_cache import (
+    MemorySharedBackend,
+    PatientCache,
+    TTLCache,
+    build_shared_backend,
+    patient_cache,
+)
+from tests.conftest import PATIENT_ID, SAMPLE_PATIENT, make_supabase_mock
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+class TestTTLCache:
+    def test_lru_eviction_is_counted(self):
+        cache = TTLCache(max_entries=2, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")  # a is now most recent
+        cache.set("c", 3)
+        assert cache.get("b") is None and cache.get("a") == 1
+        assert cache.evictions == 1
+
+    def test_entries_expire(self):
+        cache = TTLCache(max_entries=10, ttl_seconds=60)
+        with patch("app.services.patient_cache.time.monotonic", return_value=0.0):
+            cache.set("a", 1)
+        with patch("app.services.patient_cache.time.monotonic", return_value=61.0):
+            assert cache.get("a") is None
+        assert cache.expirations == 1
+
+
+class TestPatientCache:
+    def test_read_through_then_hit(self):
+        cache = PatientCache(TTLCache(10, 60))
+        load = AsyncMock(return_value=dict(SAMPLE_PATIENT))
+
+        assert _run(cache.get(PATIENT_ID, load)) == SAMPLE_PATIENT
+        assert _run(cache.get(PATIENT_ID, load)) == SAMPLE_PATIENT
+        assert load.await_count == 1
+        assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+    def test_missing_patients_are_not_cached(self):
+        cache = PatientCache(TTLCache(10, 60))
+        load = AsyncMock(return_value=None)
+        _run(cache.get(PATIENT_ID, load))
+        _run(cache.get(PATIENT_ID, load))
+        assert load.await_count == 2
+
+    def test_callers_cannot_mutate_the_cached_row(self):
+        cache = PatientCache(TTLCache(10, 60))
+        load = AsyncMock(return_value=dict(SAMPLE_PATIENT))
+        _run(cache.get(PATIENT_ID, load))
+        _run(cache.get(PATIENT_ID, load))["name"] = "changed"
+        assert _run(cache.get(PATIENT_ID, load))["name"] == SAMPLE_PATIENT["name"]
+
+    def test_shared_tier_serves_other_workers_and_is_invalidated(self):
+        shared = MemorySharedBackend()
+        worker_a = PatientCache(TTLCache(10, 60), shared=shared)
+        worker_b = PatientCache(TTLCache(10, 60), shared=shared)
+        load = AsyncMock(return_value=dict(SAMPLE_PATIENT))
+
+        _run(worker_a.get(PATIENT_ID, load))
+        assert _run(worker_b.get(PATIENT_ID, load)) == SAMPLE_PATIENT
+        assert load.await_count == 1 and worker_b.shared_hits == 1
+
+        _run(worker_a.invalidate(PATIENT_ID))
+        assert _run(shared.get("patient:" + PATIENT_ID)) is None
+
+    def test_shared_tier_failure_reads_through(self):
+        shared = MemorySharedBackend()
+        shared.get_many = AsyncMock(side_effect=ConnectionError("down"))
+        cache = PatientCache(TTLCache(10, 60), shared=shared)
+        load = AsyncMock(return_value=dict(SAMPLE_PATIENT))
+        assert _run(cache.get(PATIENT_ID, load)) == SAMPLE_PATIENT
+
+    def test_load_racing_another_workers_write_is_not_served(self):
+        shared = MemorySharedBackend()
+        worker_a = PatientCache(TTLCache(10, 60), shared=shared)
+        worker_b = PatientCache(TTLCache(10, 60), shared=shared)
+        updated = {**SAMPLE_PATIENT, "name": "Jane Smith"}
+
+        async def load_before_the_update(patient_id):
+            await worker_b.invalidate(patient_id)  # worker B updates the row and invalidates
+            return dict(SAMPLE_PATIENT)  # ...but worker A had already read the old one
+
+        _run(worker_a.get(PATIENT_ID, load_before_the_update))
+        worker_c = PatientCache(TTLCache(10, 60), shared=shared)
+        assert _run(worker_c.get(PATIENT_ID, AsyncMock(return_value=updated))) == updated
+        assert worker_c.shared_hits == 0
+
+    def test_load_racing_an_invalidation_is_not_stored(self):
+        cache = PatientCache(TTLCache(10, 60))
+
+        async def load(patient_id):
+            await cache.invalidate(patient_id)  # an update lands while the read is in flight
+            return dict(SAMPLE_PATIENT)
+
+        _run(cache.get(PATIENT_ID, load))
+        assert len(cache.local) == 0
+
+    def test_shared_backend_urls(self):
+        assert build_shared_backend("") is None
+        assert isinstance(build_shared_backend("memory://"), MemorySharedBackend)
+        with pytest.raises(ValueError):
+            build_shared_backend("memcached://localhost")
+
+
+class TestPatientRoutes:
+    @pytest.fixture
+    def patient_db(self):
+        mock_db, _ = make_supabase_mock(SAMPLE_PATIENT)
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
+        yield mock_db
+        app.dependency_overrides.clear()
+
+    def test_repeat_reads_skip_the_database(self, client, patient_db):
+        for _ in range(3):
+            assert client.get(f"/patients/{PATIENT_ID}").status_code == 200
+        assert patient_db.table.return_value.execute.await_count == 1
+
+    @pytest.mark.parametrize("method, kwargs", [("patch", {"json": {"doctor_name": "Dr. Jones"}}), ("delete", {})])
+    def test_writes_invalidate(self, client, patient_db, method, kwargs):
+        client.get(f"/patients/{PATIENT_ID}")
+        patient_db.table.return_value.execute.return_value.data = [SAMPLE_PATIENT]
+        getattr(client, method)(f"/patients/{PATIENT_ID}", **kwargs)
+        assert len(patient_cache.local) == 0
+
+    def test_admin_reports_cache_stats(self, client, patient_db, admin_headers):
+        client.get(f"/patients/{PATIENT_ID}")
+        client.get(f"/patients/{PATIENT_ID}")
+        stats = client.get("/admin/cache", headers=admin_headers).json()["patients"]
+        assert stats["hits"] == 1 and stats["misses"] == 1 and stats["hit_rate"] == 0.5
@@ -0,0 +1,95 @@
+"""Tests for patient-context-aware assistant answers."""
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.repositories import get_repository
+from app.repositories.supabase import build_supabase_repository
+from app.services.ai_assistant import CONTEXT_FRAGMENTS, RISK_INTROS, get_assistant_response
+from app.services.analytics_state import analytics_store
+from app.services.patient_context import PatientContext, PatientContextCache, patient_context
+from tests.conftest import PATIENT_ID, SAMPLE_VITAL, make_supabase_mock
+from tests.test_vitals import VITAL_PAYLOAD
+
+HIGH_READING = {**SAMPLE_VITAL, "id": "vital-2", "risk_level": "High", "bp_systolic": 182.0,
+                "bp_diastolic": 121.0, "recorded_at": "2026-01-02T08:00:00+00:00"}
+
+
+class TestPatientContext:
+    def test_vitals_lines_are_rendered_per_topic(self):
+        context = PatientContext.from_reading(SAMPLE_VITAL)
+        assert context.vitals_line("Blood Pressure") == "Your latest reading: blood pressure 130/85 mmHg."
+        assert context.vitals_line("Weight & Nutrition") == "Your latest reading: BMI 27.5, weight 85.0 kg."
+        assert "glucose 110 mg/dL" in context.vitals_line("Some corpus topic")
+
+    def test_missing_vitals_are_left_out(self):
+        context = PatientContext.from_reading({**SAMPLE_VITAL, "glucose": None})
+        assert context.vitals_line("Blood Glucose") == ""
+
+    def test_older_readings_do_not_replace_newer_ones(self):
+        cache = PatientContextCache(max_patients=10, ttl_seconds=60)
+        cache.update(PATIENT_ID, HIGH_READING)
+        cache.update(PATIENT_ID, SAMPLE_VITAL)
+        assert cache.get(PATIENT_ID).risk_level == "High"
+
+    def test_miss_uses_the_analytics_state_without_a_query(self):
+        cache = PatientContextCache(max_patients=10, ttl_seconds=60)
+        assert cache.get(PATIENT_ID) is None
+        analytics_store.rebuild(PATIENT_ID, [HIGH_READING, SAMPLE_VITAL])
+        context = cache.get(PATIENT_ID)
+        assert context.risk_level == "High" and context.recorded_at == HIGH_READING["recorded_at"]
+        assert cache.stats()["misses"] == 2
+
+
+class TestPersonalisedAnswers:
+    def test_fragments_are_pre_rendered_per_topic_and_level(self):
+        assert ("Blood Pressure", "High") in CONTEXT_FRAGMENTS
+        assert CONTEXT_FRAGMENTS[("Blood Pressure", "Low")] == RISK_INTROS["Low"]
+        assert not any(topic == "Emergency" for topic, _ in CONTEXT_FRAGMENTS)
+
+    def test_answer_opens_with_risk_level_and_vitals(self):
+        context = PatientContext.from_reading(HIGH_READING)
+        result = get_assistant_response("is my blood pressure ok?", context=context)
+        assert result["risk_level"] == "High"
+        assert result["response"].startswith(CONTEXT_FRAGMENTS[("Blood Pressure", "High")])
+        assert "blood pressure 182/121 mmHg" in result["response"]
+        assert result["response"].endswith(get_assistant_response("is my blood pressure ok?")["response"])
+
+    def test_emergency_guidance_is_not_prefixed(self):
+        context = PatientContext.from_reading(SAMPLE_VITAL)
+        result = get_assistant_response("I have chest pain", context=context)
+        assert result["response"] == get_assistant_response("I have chest pain")["response"]
+
+
+class TestChatRoute:
+    def test_submit_vitals_refreshes_the_chat_context(self):
+        mock_db, _ = make_supabase_mock([HIGH_READING])
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
+        client = TestClient(app)
+        risk = {"risk_score": 0.9, "risk_level": "High", "recommendations": [], "model_version": "v1"}
+        with patch("app.api.routes.vitals.calculate_risk_async", return_value=risk), \
+             patch("app.api.routes.vitals.create_alert_if_needed", return_value=None):
+            assert client.post(f"/vitals/{PATIENT_ID}", json=VITAL_PAYLOAD).status_code == 201
+        app.dependency_overrides.clear()
+        calls = mock_db.table.call_count
+
+        data = client.post("/assistant/chat", json={"question": "my bp", "patient_id": PATIENT_ID}).json()
+        assert data["risk_level"] == "High"
+        assert "182/121" in data["response"]
+        assert mock_db.table.call_count == calls
+
+    @pytest.mark.parametrize("body", [{"question": "my bp"}, {"question": "my bp", "patient_id": "unknown"}])
+    def test_without_context_the_answer_is_generic(self, body):
+        data = TestClient(app).post("/assistant/chat", json=body).json()
+        assert data["risk_level"] is None
+        assert data["response"] == get_assistant_response("my bp")["response"]
+
+    def test_deleting_the_patient_drops_the_context(self):
+        patient_context.update(PATIENT_ID, SAMPLE_VITAL)
+        mock_db, _ = make_supabase_mock([])
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
+        TestClient(app).delete(f"/patients/{PATIENT_ID}")
+        app.dependency_overrides.clear()
+        assert patient_context.get(PATIENT_ID) is None
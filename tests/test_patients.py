@@ -1,10 +1,11 @@
 """Tests for /patients endpoints."""
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 
 from app.main import app
-from app.core.database import get_supabase
+from app.repositories import get_repository
+from app.repositories.supabase import build_supabase_repository
 from tests.conftest import SAMPLE_PATIENT, PATIENT_ID, make_supabase_mock
 
 
@@ -19,7 +20,7 @@ def client():
 class TestCreatePatient:
     def test_create_patient_success(self, client):
         mock_db, _ = make_supabase_mock([SAMPLE_PATIENT])
-        app.dependency_overrides[get_supabase] = lambda: mock_db
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
 
         payload = {
             "name": "Jane Doe",
@@ -40,7 +41,7 @@ class TestCreatePatient:
     def test_create_patient_db_error(self, client):
         mock_db = MagicMock()
         mock_db.table.return_value.insert.return_value.execute.side_effect = Exception("DB error")
-        app.dependency_overrides[get_supabase] = lambda: mock_db
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
 
         response = client.post("/patients/", json={"name": "X", "condition": "Hypertension"})
         assert response.status_code == 400
@@ -54,7 +55,7 @@ class TestCreatePatient:
 class TestListPatients:
     def test_list_patients_returns_list(self, client):
         mock_db, _ = make_supabase_mock([SAMPLE_PATIENT])
-        app.dependency_overrides[get_supabase] = lambda: mock_db
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
 
         response = client.get("/patients/")
         assert response.status_code == 200
@@ -65,7 +66,7 @@ class TestListPatients:
 
     def test_list_patients_empty(self, client):
         mock_db, _ = make_supabase_mock([])
-        app.dependency_overrides[get_supabase] = lambda: mock_db
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
 
         response = client.get("/patients/")
         assert response.status_code == 200
@@ -80,7 +81,7 @@ class TestListPatients:
 class TestGetPatient:
     def test_get_existing_patient(self, client):
         mock_db, _ = make_supabase_mock(SAMPLE_PATIENT)
-        app.dependency_overrides[get_supabase] = lambda: mock_db
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
 
         response = client.get(f"/patients/{PATIENT_ID}")
         assert response.status_code == 200
@@ -88,6 +89,27 @@ class TestGetPatient:
 
         app.dependency_overrides.clear()
 
+    def test_unknown_patient_returns_404(self, client):
+        mock_db, _ = make_supabase_mock()
+        mock_db.table.return_value.execute.return_value = None  # maybe_single() with no matching row
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
+
+        response = client.get(f"/patients/{PATIENT_ID}")
+        assert response.status_code == 404
+        mock_db.table.return_value.maybe_single.assert_called_once()
+
+        app.dependency_overrides.clear()
+
+    def test_malformed_id_returns_422_without_a_query(self, client):
+        mock_db, _ = make_supabase_mock(SAMPLE_PATIENT)
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
+
+        response = client.get("/patients/not-a-uuid")
+        assert response.status_code == 422
+        mock_db.table.assert_not_called()
+
+        app.dependency_overrides.clear()
+
 
 # ---------------------------------------------------------------------------
 # PATCH /patients/{patient_id}
@@ -96,7 +118,7 @@ class TestUpdatePatient:
     def test_update_patient_success(self, client):
         updated = {**SAMPLE_PATIENT, "doctor_name": "Dr. Jones"}
         mock_db, _ = make_supabase_mock([updated])
-        app.dependency_overrides[get_supabase] = lambda: mock_db
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
 
         response = client.patch(f"/patients/{PATIENT_ID}", json={"doctor_name": "Dr. Jones"})
         assert response.status_code == 200
@@ -106,7 +128,7 @@ class TestUpdatePatient:
 
     def test_update_patient_empty_body_returns_400(self, client):
         mock_db, _ = make_supabase_mock([SAMPLE_PATIENT])
-        app.dependency_overrides[get_supabase] = lambda: mock_db
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
 
         response = client.patch(f"/patients/{PATIENT_ID}", json={})
         assert response.status_code == 400
@@ -115,7 +137,7 @@ class TestUpdatePatient:
 
     def test_update_patient_not_found(self, client):
         mock_db, _ = make_supabase_mock([])
-        app.dependency_overrides[get_supabase] = lambda: mock_db
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
 
         response = client.patch(f"/patients/{PATIENT_ID}", json={"doctor_name": "Dr. X"})
         assert response.status_code == 404
@@ -129,8 +151,8 @@ class TestUpdatePatient:
 class TestDeletePatient:
     def test_delete_patient_returns_204(self, client):
         mock_db = MagicMock()
-        mock_db.table.return_value.delete.return_value.eq.return_value.execute.return_value = MagicMock()
-        app.dependency_overrides[get_supabase] = lambda: mock_db
+        mock_db.table.return_value.delete.return_value.eq.return_value.execute = AsyncMock()
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
 
         response = client.delete(f"/patients/{PATIENT_ID}")
         assert response.status_code == 204
@@ -0,0 +1,87 @@
+"""Tests for ?fields= column projection and the narrowed internal reads."""
+import json
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.api.pagination import NEXT_CURSOR_HEADER
+from app.api.projection import parse_fields, projected_model
+from app.main import app
+from app.repositories import get_repository, tables
+from app.repositories.postgres import _columns
+from app.repositories.supabase import build_supabase_repository
+from app.schemas.alert import AlertOut
+from app.schemas.patient import PatientRead
+from app.services.analytics import ANALYTICS_COLUMNS
+from tests.conftest import PATIENT_ID, SAMPLE_ALERT, SAMPLE_PATIENT, SAMPLE_VITAL, make_supabase_mock
+
+
+@pytest.fixture
+def patients_db():
+    rows = [{**SAMPLE_PATIENT, "id": f"p-{i}"} for i in range(3)]
+    mock_db, _ = make_supabase_mock(rows)
+    app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
+    yield mock_db
+    app.dependency_overrides.clear()
+
+
+class TestParseFields:
+    def test_required_keys_are_selected_but_not_returned(self):
+        projection = parse_fields("name, condition,name", PatientRead, required=("id", "created_at"))
+        assert projection.columns == ["name", "condition", "id", "created_at"]
+        assert list(projection.model.model_fields) == ["name", "condition"]
+
+    def test_no_fields_means_everything(self):
+        projection = parse_fields(None, PatientRead)
+        assert projection.columns is None and projection.model is PatientRead
+
+    def test_projected_model_keeps_defaults_and_is_cached(self):
+        model = projected_model(AlertOut, ("id", "occurrences"))
+        assert model.model_validate({"id": "a"}).occurrences == 1
+        assert projected_model(AlertOut, ("id", "occurrences")) is model
+
+
+class TestFieldsParameter:
+    def test_selects_and_returns_only_requested_fields(self, client, patients_db):
+        response = client.get("/patients/", params={"fields": "id,name", "limit": 2})
+        assert response.status_code == 200
+        assert response.json() == [{"id": "p-0", "name": "Jane Doe"}, {"id": "p-1", "name": "Jane Doe"}]
+        assert NEXT_CURSOR_HEADER in response.headers
+        patients_db.table.return_value.select.assert_called_once_with("id,name,created_at")
+
+    def test_unknown_field_is_rejected(self, client, patients_db):
+        response = client.get("/patients/", params={"fields": "id,password"})
+        assert response.status_code == 400
+        assert "password" in response.json()["detail"]
+
+    def test_ndjson_stream_is_projected(self, client, patients_db):
+        response = client.get("/patients/", params={"fields": "name", "format": "ndjson"})
+        assert [json.loads(line) for line in response.text.splitlines()] == [{"name": "Jane Doe"}] * 3
+
+    def test_alert_and_vital_lists_accept_fields(self, client):
+        for path, row, fields in [
+            (f"/alerts/{PATIENT_ID}", SAMPLE_ALERT, "severity"),
+            ("/alerts/", SAMPLE_ALERT, "severity"),
+            (f"/vitals/{PATIENT_ID}", SAMPLE_VITAL, "risk_score"),
+        ]:
+            mock_db, _ = make_supabase_mock([row])
+            app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
+            response = client.get(path, params={"fields": fields})
+            assert response.json() == [{fields: row[fields]}]
+        app.dependency_overrides.clear()
+
+
+class TestInternalReads:
+    def test_analytics_history_selects_only_analytics_columns(self, client):
+        mock_db, _ = make_supabase_mock([SAMPLE_VITAL])
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
+        response = client.get(f"/analytics/{PATIENT_ID}")
+        app.dependency_overrides.clear()
+
+        assert response.status_code == 200
+        mock_db.table.return_value.select.assert_called_once_with(",".join(ANALYTICS_COLUMNS))
+
+    def test_postgres_selects_named_columns(self):
+        sql = str(select(*_columns(tables.patients, ["id", "name"])).compile(dialect=postgresql.dialect()))
+        assert sql.startswith("SELECT patients.id, patients.name \nFROM patients")
@@ -0,0 +1,144 @@
+"""Tests for repository backend selection and the direct-Postgres row mapping."""
+import uuid
+from datetime import date, datetime, timezone
+
+import pytest
+from unittest.mock import patch
+
+from app.core import database
+from app.repositories import get_repository, tables
+from app.repositories.postgres import PostgresAlertRepository, PostgresVitalRepository, _to_params, _to_row
+from app.repositories.supabase import SupabaseVitalRepository
+
+
+@pytest.fixture(autouse=True)
+def reset_clients():
+    database._async_supabase = None
+    database._async_engine = None
+    yield
+    database._async_supabase = None
+    database._async_engine = None
+
+
+class TestGetRepository:
+    def test_supabase_backend(self):
+        with patch.object(database.settings, "DATA_BACKEND", "supabase"), \
+             patch.object(database.settings, "SUPABASE_URL", "https://example.supabase.co"), \
+             patch.object(database.settings, "SUPABASE_ANON_KEY", "anon-key"):
+            repo = get_repository()
+        assert isinstance(repo.vitals, SupabaseVitalRepository)
+
+    def test_postgres_backend_uses_asyncpg_pool(self):
+        with patch.object(database.settings, "DATA_BACKEND", "postgres"), \
+             patch.object(database.settings, "DATABASE_URL", "postgresql://u:p@localhost:5432/db"):
+            repo = get_repository()
+        assert isinstance(repo.vitals, PostgresVitalRepository)
+        engine = repo.vitals.engine
+        assert engine.url.drivername == "postgresql+asyncpg"
+        assert engine.pool.size() == database.POOL_OPTIONS["pool_size"]
+
+    def test_unknown_backend_raises(self):
+        with patch.object(database.settings, "DATA_BACKEND", "mongo"):
+            with pytest.raises(RuntimeError):
+                get_repository()
+
+
+class TestPostgresRowMapping:
+    def test_params_parse_iso_strings_and_drop_unknown_keys(self):
+        params = _to_params(tables.vital_readings, {
+            "patient_id": "p-1",
+            "bp_systolic": 130.0,
+            "recorded_at": "2026-01-01T08:00:00+00:00",
+            "recommendations": ["not a column"],
+        })
+        assert params == {
+            "patient_id": "p-1",
+            "bp_systolic": 130.0,
+            "recorded_at": datetime(2026, 1, 1, 8, tzinfo=timezone.utc),
+        }
+        assert _to_params(tables.patients, {"date_of_birth": "1970-05-14"}) == {"date_of_birth": date(1970, 5, 14)}
+
+    def test_rows_match_postgrest_json_shape(self):
+        row_id = uuid.uuid4()
+        row = _to_row({
+            "id": row_id,
+            "recorded_at": datetime(2026, 1, 1, 8, tzinfo=timezone.utc),
+            "date_of_birth": date(1970, 5, 14),
+            "risk_score": 0.45,
+        })
+        assert row == {
+            "id": str(row_id),
+            "recorded_at": "2026-01-01T08:00:00+00:00",
+            "date_of_birth": "1970-05-14",
+            "risk_score": 0.45,
+        }
+
+
+class TestSupabaseCohortPaging:
+    async def _for_cohort(self, pages):
+        from unittest.mock import AsyncMock, MagicMock
+        from tests.conftest import make_supabase_mock
+
+        mock_db, _ = make_supabase_mock()
+        chain = mock_db.table.return_value
+        chain.execute = AsyncMock(side_effect=[MagicMock(data=page) for page in pages])
+        rows = await SupabaseVitalRepository(mock_db).for_cohort()
+        return rows, chain
+
+    def test_reads_pages_until_a_short_one(self):
+        import asyncio
+        from app.repositories.supabase import COHORT_PAGE_SIZE
+
+        full = [{"name": str(i), "vital_readings": [{"id": str(i)}]} for i in range(COHORT_PAGE_SIZE)]
+        rows, chain = asyncio.run(self._for_cohort([full, full[:3]]))
+        assert len(rows) == COHORT_PAGE_SIZE + 3
+        assert rows[0] == {"id": "0", "patients": {"name": "0"}}
+        assert [c.args for c in chain.range.call_args_list] == [
+            (0, COHORT_PAGE_SIZE - 1),
+            (COHORT_PAGE_SIZE, 2 * COHORT_PAGE_SIZE - 1),
+        ]
+
+
+class TestPostgresCohortQuery:
+    def test_readings_per_patient_are_bounded_in_the_query(self):
+        import asyncio
+        from sqlalchemy.dialects import postgresql
+
+        repo = PostgresVitalRepository(engine=None)
+        statements = []
+
+        async def fetch_all(statement):
+            statements.append(str(statement.compile(dialect=postgresql.dialect())))
+            return []
+
+        repo._fetch_all = fetch_all
+        asyncio.run(repo.for_cohort(columns=["patient_id", "recorded_at", "id"], per_patient=90, patient_ids=["a"]))
+        sql = statements[0]
+        assert "row_number() OVER (PARTITION BY vital_readings.patient_id" in sql
+        assert "anon_1.rank <= " in sql and "vital_readings.patient_id IN" in sql
+
+
+class TestPostgresAlertUpsert:
+    def test_replayed_alerts_update_acknowledgement_and_counts(self):
+        import asyncio
+        from contextlib import asynccontextmanager
+        from sqlalchemy.dialects import postgresql
+
+        statements = []
+
+        class Connection:
+            async def execute(self, statement):
+                statements.append(str(statement.compile(dialect=postgresql.dialect())))
+
+        class Engine:
+            @asynccontextmanager
+            async def begin(self):
+                yield Connection()
+
+        repo = PostgresAlertRepository(engine=Engine())
+        asyncio.run(repo.upsert_many([{"id": "a", "patient_id": "p", "message": "m", "severity": "High",
+                                       "acknowledged": True, "occurrences": 3}]))
+        sql = statements[0]
+        assert "ON CONFLICT (id) DO UPDATE SET" in sql
+        assert "acknowledged = (alerts.acknowledged OR excluded.acknowledged)" in sql
+        assert "occurrences = greatest(alerts.occurrences, excluded.occurrences)" in sql
@@ -0,0 +1,92 @@
+"""Tests for the assistant's local BM25 / TF-IDF retrieval index."""
+import json
+import os
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.ai_assistant import get_assistant_response
+from app.services.retrieval import CorpusRetriever, RetrievalIndex, load_or_build, read_corpus, tokenize
+
+SNIPPETS = [
+    {"id": "bp-1", "topic": "Blood Pressure", "text": "Home blood pressure readings: sit quietly, same arm, twice daily."},
+    {"id": "bp-2", "topic": "Blood Pressure", "text": "Reduce salt to lower blood pressure; aim under 2.3 g sodium."},
+    {"id": "gl-1", "topic": "Blood Glucose", "text": "Check fasting glucose before breakfast; under 100 mg/dL is normal."},
+    {"id": "ft-1", "topic": "Foot Care", "text": "Inspect your feet daily for cuts or blisters if you have diabetes."},
+]
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    directory = tmp_path / "corpus"
+    directory.mkdir()
+    (directory / "snippets.jsonl").write_text("\n".join(json.dumps(s) for s in SNIPPETS) + "\n")
+    (directory / "sleep.md").write_text("# Sleep\n\nKeep a regular bedtime and limit screens before sleep.\n")
+    return str(directory)
+
+
+class TestRetrievalIndex:
+    def test_corpus_files_are_read(self, corpus):
+        documents = read_corpus(corpus)
+        assert [d.id for d in documents] == ["sleep.md", "bp-1", "bp-2", "gl-1", "ft-1"]
+        assert documents[0].topic == "Sleep"
+
+    @pytest.mark.parametrize("scheme", ["bm25", "tfidf"])
+    def test_most_relevant_snippet_ranks_first(self, corpus, scheme):
+        index = RetrievalIndex.build(read_corpus(corpus), scheme=scheme)
+        hits = index.search("how much salt lowers my blood pressure?", k=2)
+        assert [h.doc_id for h in hits] == ["bp-2", "bp-1"]
+        assert hits[0].score > hits[1].score > 0
+        assert index.search("quantum entanglement") == []
+
+    def test_top_topics_keep_one_snippet_per_topic(self, corpus):
+        index = RetrievalIndex.build(read_corpus(corpus))
+        hits = index.top_topics("blood pressure and glucose with diabetes", k=5)
+        assert len({h.topic for h in hits}) == len(hits)
+        assert [h.score for h in hits] == sorted((h.score for h in hits), reverse=True)
+        assert {"Blood Pressure", "Blood Glucose", "Foot Care"} <= {h.topic for h in hits}
+
+    def test_saved_index_is_memory_mapped_and_rebuilt_on_change(self, corpus, tmp_path):
+        index_dir = str(tmp_path / "index")
+        built = load_or_build(corpus, index_dir)
+        loaded = load_or_build(corpus, index_dir)
+        assert isinstance(loaded.weights, np.memmap)
+        assert loaded.search("salt blood pressure") == built.search("salt blood pressure")
+
+        with open(os.path.join(corpus, "kidney.md"), "w") as f:
+            f.write("# Kidney Health\n\nStay hydrated and keep blood pressure controlled.\n")
+        rebuilt = load_or_build(corpus, index_dir)
+        assert not isinstance(rebuilt.weights, np.memmap)
+        assert "Kidney Health" in rebuilt.topics
+
+    def test_stopwords_are_dropped(self):
+        assert tokenize("What is my BP?") == ["bp"]
+
+
+class TestAssistantRetrieval:
+    def test_answers_come_from_the_corpus_when_configured(self, corpus, tmp_path):
+        retriever = CorpusRetriever(corpus, str(tmp_path / "index"))
+        with patch("app.services.ai_assistant.corpus_retriever", retriever):
+            result = get_assistant_response("Should I check my feet every day?", include_related=True)
+            fallback = get_assistant_response("I forgot my medication")
+        assert result["topic"] == "Foot Care"
+        assert result["matches"][0]["topic"] == "Foot Care"
+        assert result["related_topics"] == [m["topic"] for m in result["matches"][1:]]
+        assert fallback["topic"] == "Medications" and "matches" not in fallback
+
+    def test_unreadable_corpus_falls_back_to_builtin_topics(self, tmp_path):
+        retriever = CorpusRetriever(str(tmp_path / "missing"))
+        with patch("app.services.retrieval.read_corpus", side_effect=OSError("gone")):
+            assert retriever.get() is None
+        with patch("app.services.ai_assistant.corpus_retriever", retriever):
+            assert get_assistant_response("my blood sugar is high")["topic"] == "Blood Glucose"
+
+    def test_chat_returns_scored_matches(self, corpus):
+        retriever = CorpusRetriever(corpus)
+        with patch("app.services.ai_assistant.corpus_retriever", retriever):
+            data = TestClient(app).post("/assistant/chat", json={"question": "fasting glucose"}).json()
+        assert data["topic"] == "Blood Glucose"
+        assert data["matches"][0]["topic"] == "Blood Glucose" and data["matches"][0]["score"] > 0
@@ -0,0 +1,68 @@
+"""Tests for the risk engine's single and batch scoring paths."""
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+from app.services import risk_engine
+from app.services.risk_engine import calculate_risk, calculate_risk_batch
+
+READINGS = [
+    {"cholesterol": 200.0, "hdl": 50.0, "age": 55, "weight": 85.0, "bp_systolic": 130.0, "bp_diastolic": 85.0},
+    {"cholesterol": 280.0, "hdl": 35.0, "age": 70, "weight": 110.0, "bp_systolic": 185.0, "bp_diastolic": 125.0,
+     "glucose": 310.0},
+    {"cholesterol": 160.0, "hdl": 70.0, "age": 30, "weight": 60.0, "bp_systolic": 110.0, "bp_diastolic": 70.0,
+     "glucose": None},
+    {"cholesterol": 210.0, "hdl": 45.0, "age": 62, "weight": 95.0, "bp_systolic": 150.0, "bp_diastolic": 95.0,
+     "glucose": 150.0},
+]
+
+
+def _as_structured(rows):
+    dtype = [(key, "f8") for key in ("cholesterol", "hdl", "age", "weight", "bp_systolic", "bp_diastolic", "glucose")]
+    return np.array(
+        [tuple(np.nan if r.get(k) is None else r[k] for k, _ in dtype) for r in rows],
+        dtype=dtype,
+    )
+
+
+@pytest.fixture(params=[True, False], ids=["model", "fallback"])
+def model_state(request):
+    if request.param:
+        if risk_engine.registry.get() is None:
+            pytest.skip("Model artefacts not loadable in this environment")
+        yield True
+    else:
+        with patch.object(risk_engine.registry, "get", return_value=None):
+            yield False
+
+
+class TestCalculateRiskBatch:
+    def test_matches_single_reading_path(self, model_state):
+        scores, levels, version = calculate_risk_batch(READINGS)
+        for reading, score, level in zip(READINGS, scores, levels):
+            single = calculate_risk(reading)
+            assert score == pytest.approx(single["risk_score"], abs=1e-4)
+            assert level == single["risk_level"]
+            assert version == single["model_version"]
+
+    def test_structured_array_matches_dicts(self, model_state):
+        from_dicts = calculate_risk_batch(READINGS)
+        from_array = calculate_risk_batch(_as_structured(READINGS))
+        np.testing.assert_array_equal(from_dicts[0], from_array[0])
+        np.testing.assert_array_equal(from_dicts[1], from_array[1])
+
+    def test_fallback_records_rule_based_version(self):
+        with patch.object(risk_engine.registry, "get", return_value=None):
+            assert calculate_risk(READINGS[0])["model_version"] == risk_engine.FALLBACK_VERSION
+            assert calculate_risk_batch(READINGS).model_version == risk_engine.FALLBACK_VERSION
+
+    def test_empty_batch(self, model_state):
+        scores, levels, _ = calculate_risk_batch([])
+        assert scores.shape == (0,) and levels.shape == (0,)
+
+
+class TestStratifyBatch:
+    def test_matches_scalar_stratify_at_boundaries(self):
+        probabilities = np.array([0.0, 0.3999, 0.4, 0.6999, 0.7, 1.0, np.nan])
+        expected = [risk_engine._stratify(p) for p in probabilities]
+        assert risk_engine._stratify_batch(probabilities).tolist() == expected
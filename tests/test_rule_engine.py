@@ -0,0 +1,216 @@
+"""Tests for the declarative rule engine, its hot reload and the rule sets shipped with the app."""
+import json
+import os
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from app.services import risk_engine
+from app.services.alert_service import _evaluate_thresholds, _evaluate_thresholds_batch
+from app.services.rule_engine import (
+    NO_MATCH,
+    RuleRegistry,
+    RuleSet,
+    RuleSetError,
+    alert_rules,
+    fallback_risk_rules,
+    load_rule_set,
+)
+
+SPEC = {
+    "defaults": {"x": 0},
+    "default": {"label": "none"},
+    "rules": [
+        {"id": "late", "priority": 20, "any": [{"field": "x", "op": ">=", "value": 1}], "label": "low"},
+        {"id": "early", "priority": 10, "all": [
+            {"field": "x", "op": ">=", "value": 5},
+            {"field": "y", "op": "<", "value": 3},
+        ], "label": "high"},
+    ],
+}
+
+
+# ---------------------------------------------------------------------------
+# Reference implementations: the hard-coded chains the shipped rule sets replaced
+# ---------------------------------------------------------------------------
+def _legacy_alert(risk_level, risk_score, vital_data):
+    bp_s = vital_data.get("bp_systolic", 0)
+    bp_d = vital_data.get("bp_diastolic", 0)
+    chol = vital_data.get("cholesterol", 0)
+    glucose = vital_data.get("glucose") or 0
+    if bp_s >= 180 or bp_d >= 120:
+        return ("blood_pressure", "Critical",
+                f"Hypertensive crisis detected: BP {bp_s}/{bp_d} mmHg. Immediate medical attention required.")
+    if glucose >= 300:
+        return ("glucose", "Critical",
+                f"Critically high blood glucose: {glucose} mg/dL. Seek emergency care immediately.")
+    if risk_level == "High":
+        return ("risk_score", "Warning",
+                f"High deterioration risk detected (score: {round(risk_score * 100)}%). "
+                "Clinical review recommended within 24 hours.")
+    if bp_s >= 160:
+        return ("blood_pressure", "Warning",
+                f"Elevated blood pressure: {bp_s}/{bp_d} mmHg. Please contact your care team.")
+    if chol >= 240:
+        return ("cholesterol", "Warning", f"High cholesterol reading: {chol} mg/dL. Schedule a lipid review.")
+    if glucose >= 200:
+        return ("glucose", "Warning",
+                f"Elevated blood glucose: {glucose} mg/dL. Monitor closely and review medications.")
+    return None
+
+
+def _legacy_fallback_score(vital_data):
+    bp_s = vital_data.get("bp_systolic", 120)
+    chol = vital_data.get("cholesterol", 200)
+    glucose = vital_data.get("glucose", 100)
+    if bp_s >= 160 or chol >= 240 or (glucose and glucose >= 200):
+        return 0.80
+    if bp_s >= 130 or chol >= 200 or (glucose and glucose >= 140):
+        return 0.50
+    return 0.2
+
+
+def _random_cases(n, seed=0):
+    rng = np.random.default_rng(seed)
+    cases = []
+    for _ in range(n):
+        vital_data = {
+            "bp_systolic": float(rng.integers(100, 200)),
+            "bp_diastolic": float(rng.integers(60, 130)),
+            "cholesterol": float(rng.integers(150, 300)),
+        }
+        if rng.random() < 0.8:
+            vital_data["glucose"] = float(rng.integers(70, 350))
+        risk_score = round(float(rng.random()), 4)
+        risk_level = "High" if risk_score >= 0.7 else "Moderate" if risk_score >= 0.4 else "Low"
+        cases.append({"vital_data": vital_data, "risk_level": risk_level, "risk_score": risk_score})
+    return cases
+
+
+def _as_tuple(info):
+    return None if info is None else (info["rule"], info["severity"], info["message"])
+
+
+class TestRuleSet:
+    def test_priority_decides_first_match(self):
+        rule_set = RuleSet(SPEC)
+        assert [r.id for r in rule_set.rules] == ["early", "late"]
+        assert rule_set.evaluate_one({"x": 6, "y": 1}).id == "early"
+        assert rule_set.evaluate_one({"x": 6, "y": 4}).id == "late"
+        assert rule_set.evaluate_one({"x": 0}) is None
+
+    def test_defaults_fill_missing_values_and_missing_never_match(self):
+        rule_set = RuleSet(SPEC)
+        assert rule_set.values({"x": None}) == {"x": 0, "y": None}
+        # y has no default, so "all" cannot match without it
+        assert rule_set.evaluate_one({"x": 9}).id == "late"
+
+    def test_vectorised_matches_single_reading_path(self):
+        rule_set = RuleSet(SPEC)
+        readings = [{"x": 6, "y": 1}, {"x": 6, "y": 4}, {"x": None}, {"x": 2, "y": None}, {}]
+        matches = rule_set.evaluate(readings)
+        expected = []
+        for r in readings:
+            rule = rule_set.evaluate_one(r)
+            expected.append(NO_MATCH if rule is None else rule_set.rules.index(rule))
+        assert matches.tolist() == expected
+        assert rule_set.output_array("label", matches).tolist() == ["high", "low", "none", "low", "none"]
+
+    def test_accepts_columns_and_structured_arrays(self):
+        rule_set = RuleSet(SPEC)
+        columns = {"x": np.array([6.0, 6.0, np.nan]), "y": np.array([1.0, 4.0, 1.0])}
+        structured = np.array([(6.0, 1.0), (6.0, 4.0), (np.nan, 1.0)], dtype=[("x", "f8"), ("y", "f8")])
+        assert rule_set.evaluate(columns).tolist() == [0, 1, NO_MATCH]
+        assert rule_set.evaluate(structured).tolist() == [0, 1, NO_MATCH]
+        assert rule_set.evaluate([]).tolist() == []
+
+    def test_rejects_malformed_rules(self):
+        with pytest.raises(RuleSetError):
+            RuleSet({"rules": [{"id": "r", "any": [{"field": "x", "op": "~", "value": 1}]}]})
+        with pytest.raises(RuleSetError):
+            RuleSet({"rules": [{"id": "r", "any": [], "all": []}]})
+
+    def test_loads_yaml(self, tmp_path):
+        pytest.importorskip("yaml")
+        path = tmp_path / "rules.yaml"
+        path.write_text(
+            "rules:\n"
+            "  - id: high\n"
+            "    any: [{field: x, op: '>', value: 3}]\n"
+            "    message: 'x is {x}'\n"
+        )
+        rule = load_rule_set(str(path)).evaluate_one({"x": 4})
+        assert rule.id == "high"
+        assert rule.render("message", {"x": 4}) == "x is 4"
+
+
+class TestShippedRuleSets:
+    def test_alert_rules_match_legacy_chain(self):
+        cases = _random_cases(2_000)
+        batch = _evaluate_thresholds_batch(cases)
+        for case, batched in zip(cases, batch):
+            legacy = _legacy_alert(case["risk_level"], case["risk_score"], case["vital_data"])
+            single = _evaluate_thresholds(case["risk_level"], case["risk_score"], case["vital_data"])
+            assert _as_tuple(single) == legacy
+            assert _as_tuple(batched) == legacy
+
+    def test_fallback_rules_match_legacy_chain(self):
+        readings = [c["vital_data"] for c in _random_cases(2_000, seed=1)]
+        with patch.object(risk_engine.registry, "get", return_value=None):
+            batch_scores = risk_engine.calculate_risk_batch(readings).risk_scores
+            for reading, batch_score in zip(readings, batch_scores):
+                expected = _legacy_fallback_score(reading)
+                assert risk_engine.calculate_risk(reading)["risk_score"] == pytest.approx(expected, abs=1e-4)
+                assert batch_score == pytest.approx(expected, abs=1e-4)
+
+
+class TestRuleRegistry:
+    def _write(self, path, threshold):
+        spec = {"rules": [{"id": f"over-{threshold}", "any": [{"field": "x", "op": ">=", "value": threshold}]}]}
+        path.write_text(json.dumps(spec))
+
+    def test_reloads_when_the_file_changes(self, tmp_path):
+        path = tmp_path / "rules.json"
+        self._write(path, 10)
+        registry = RuleRegistry(str(path), check_interval=0)
+        assert registry.get().evaluate_one({"x": 5}) is None
+
+        self._write(path, 5)
+        os.utime(path, (1, 1))  # a distinct mtime even on coarse-grained filesystems
+        assert registry.get().evaluate_one({"x": 5}).id == "over-5"
+
+    def test_invalid_file_keeps_previous_rules(self, tmp_path):
+        path = tmp_path / "rules.json"
+        self._write(path, 10)
+        registry = RuleRegistry(str(path), check_interval=0)
+        previous = registry.get()
+
+        path.write_text("{not json")
+        os.utime(path, (1, 1))
+        assert registry.get() is previous
+        with pytest.raises(ValueError):
+            registry.reload()
+        assert registry.get() is previous
+
+
+class TestReloadEndpoint:
+    def test_reloads_both_rule_sets(self, client, admin_headers):
+        response = client.post("/admin/rules/reload", headers=admin_headers)
+        assert response.status_code == 200
+        body = response.json()
+        assert body["alert_rules"]["rules"][0] == "hypertensive_crisis"
+        assert body["fallback_risk_rules"]["path"] == fallback_risk_rules.path
+
+    def test_invalid_file_is_reported(self, client, tmp_path, admin_headers):
+        path = tmp_path / "rules.json"
+        path.write_text("{not json")
+        with patch("app.api.routes.admin.alert_rules", RuleRegistry(str(path))):
+            response = client.post("/admin/rules/reload", headers=admin_headers)
+        assert response.status_code == 422
+
+    def test_requires_admin_token(self, client):
+        with patch("app.api.routes.admin.settings.ADMIN_TOKEN", "secret"):
+            response = client.post("/admin/rules/reload", headers={"X-Admin-Token": "wrong"})
+        assert response.status_code == 403
+        assert alert_rules.get().rules
@@ -0,0 +1,88 @@
+"""Tests for the micro-batching scoring executor."""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from unittest.mock import patch
+
+from app.services import risk_engine
+from app.services.risk_engine import calculate_risk, calculate_risk_batch, get_scoring_executor
+from app.services.scoring_executor import ScoringExecutor
+
+READING = {"cholesterol": 200.0, "hdl": 50.0, "age": 55, "weight": 85.0, "bp_systolic": 130.0, "bp_diastolic": 85.0}
+
+
+def _recording_scorer(calls):
+    def score_batch(rows):
+        calls.append(len(rows))
+        return [r["bp_systolic"] / 1000 for r in rows], ["Low"] * len(rows), "v-test"
+    return score_batch
+
+
+class TestScoringExecutor:
+    def test_concurrent_requests_are_micro_batched(self):
+        calls = []
+        executor = ScoringExecutor(_recording_scorer(calls), mode="thread", workers=1, window_ms=50)
+        try:
+            barrier = threading.Barrier(20)
+
+            def submit(i):
+                barrier.wait()
+                return executor.score({**READING, "bp_systolic": 100.0 + i})
+
+            with ThreadPoolExecutor(max_workers=20) as clients:
+                results = list(clients.map(submit, range(20)))
+        finally:
+            executor.shutdown()
+
+        assert sum(calls) == 20
+        assert len(calls) < 20
+        assert [r[0] for r in results] == [pytest.approx((100 + i) / 1000) for i in range(20)]
+        assert {r[2] for r in results} == {"v-test"}
+
+    def test_batch_errors_propagate_to_every_caller(self):
+        def failing(rows):
+            raise ValueError("model exploded")
+
+        executor = ScoringExecutor(failing, mode="thread", workers=1, window_ms=1)
+        try:
+            with pytest.raises(ValueError, match="model exploded"):
+                executor.score(READING)
+        finally:
+            executor.shutdown()
+
+    def test_rejects_unknown_mode(self):
+        with pytest.raises(ValueError):
+            ScoringExecutor(_recording_scorer([]), mode="gpu")
+
+    def test_process_pool_matches_in_process_scoring(self):
+        executor = ScoringExecutor(calculate_risk_batch, mode="process", workers=1, window_ms=1,
+                                   initializer=risk_engine.warm_up)
+        try:
+            risk_score, risk_level, model_version = executor.score(READING)
+        finally:
+            executor.shutdown()
+
+        expected = calculate_risk(READING)
+        assert risk_score == pytest.approx(expected["risk_score"], abs=1e-4)
+        assert risk_level == expected["risk_level"]
+        assert model_version == expected["model_version"]
+
+
+class TestCalculateRiskExecutorRouting:
+    def test_inprocess_mode_has_no_executor(self):
+        with patch.object(risk_engine.settings, "SCORING_EXECUTOR", "inprocess"):
+            assert get_scoring_executor() is None
+
+    def test_thread_mode_routes_through_executor(self):
+        expected = calculate_risk(READING)
+        with patch.object(risk_engine.settings, "SCORING_EXECUTOR", "thread"):
+            try:
+                result = calculate_risk(READING)
+                assert get_scoring_executor() is not None
+            finally:
+                risk_engine.shutdown_scoring_executor()
+
+        assert result["risk_level"] == expected["risk_level"]
+        assert result["risk_score"] == pytest.approx(expected["risk_score"], abs=1e-4)
+        assert result["recommendations"] == expected["recommendations"]
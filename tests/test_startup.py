@@ -0,0 +1,92 @@
+"""Tests for fast startup, the background warm-up and readiness gating."""
+import asyncio
+import subprocess
+import sys
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.repositories.supabase import build_supabase_repository
+from app.services import warmup
+from app.services.assistant_cache import assistant_cache
+from app.services.patient_cache import patient_cache
+from app.services.warmup import WarmUpState, configured_steps, run_warm_up, warm_up_state
+from tests.conftest import PATIENT_ID, SAMPLE_PATIENT, make_supabase_mock
+
+
+@pytest.fixture(autouse=True)
+def reset_readiness():
+    warm_up_state.reset()
+    yield
+    warm_up_state.reset()
+
+
+class TestStartup:
+    def test_importing_the_app_does_not_import_database_clients(self):
+        code = "import sys, app.main; print(sorted({'sqlalchemy', 'supabase', 'postgrest'} & set(sys.modules)))"
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        assert result.stdout.strip() == "[]"
+
+    def test_ready_only_after_the_warm_up(self):
+        client = TestClient(main.app)
+        assert client.get("/health").status_code == 200
+        warming = client.get("/ready")
+        assert warming.status_code == 503 and warming.json()["status"] == "warming_up"
+
+        asyncio.run(run_warm_up(warm_up_state, ["rules"], timeout_seconds=5))
+        ready = client.get("/ready")
+        assert ready.status_code == 200
+        assert ready.json()["steps"]["rules"]["status"] == "ok"
+
+    def test_lifespan_starts_the_warm_up(self):
+        with patch.object(main.settings, "ALERT_WRITE_BEHIND", False), \
+             patch.object(main.settings, "WARM_UP_STEPS", "rules"):
+            with TestClient(main.app) as client:
+                for _ in range(100):
+                    if client.get("/ready").status_code == 200:
+                        break
+                    time.sleep(0.01)
+                assert client.get("/ready").json()["steps"] == {"rules": {"status": "ok", "ms": pytest.approx(0, abs=5000)}}
+
+
+class TestWarmUp:
+    def test_steps_are_parsed(self):
+        assert configured_steps("all") == list(warmup.STEPS)
+        assert configured_steps(" model, predict ") == ["model", "predict"]
+        assert configured_steps("") == []
+        with pytest.raises(ValueError):
+            configured_steps("model,coffee")
+
+    def test_failed_and_slow_steps_are_reported_and_the_worker_still_becomes_ready(self):
+        state = WarmUpState()
+
+        async def slow():
+            await asyncio.sleep(1)
+
+        with patch.dict(warmup.STEP_FUNCTIONS, {"model": AsyncMock(side_effect=RuntimeError("no artefacts")),
+                                                "corpus": slow}):
+            asyncio.run(run_warm_up(state, ["model", "corpus", "rules"], timeout_seconds=0.05))
+        assert state.ready
+        assert state.steps["model"]["status"] == "failed" and "no artefacts" in state.steps["model"]["error"]
+        assert state.steps["corpus"]["status"] == "timed_out"
+        assert state.steps["rules"]["status"] == "timed_out"
+
+    def test_connection_and_cache_steps_use_the_repository(self):
+        mock_db, _ = make_supabase_mock([SAMPLE_PATIENT])
+        state = WarmUpState()
+        with patch("app.services.warmup.get_repository", lambda: build_supabase_repository(mock_db)), \
+             patch.object(warmup.settings, "WARM_UP_MIN_CONNECTIONS", 3):
+            asyncio.run(run_warm_up(state, ["connections", "caches"], timeout_seconds=5))
+        assert {s["status"] for s in state.steps.values()} == {"ok"}
+        assert mock_db.table.return_value.execute.await_count == 4  # 3 connections + 1 patient page
+        assert len(patient_cache.local) == 1 and patient_cache.local.get(PATIENT_ID)
+        assert assistant_cache.stats()["size"] > 0
+
+    def test_model_and_prediction_steps(self):
+        state = WarmUpState()
+        asyncio.run(run_warm_up(state, ["model", "predict"], timeout_seconds=30))
+        assert state.steps["predict"]["status"] == "ok"
+        assert state.steps["model"]["status"] in ("ok", "failed")  # failed only without model artefacts
@@ -1,14 +1,20 @@
 """Tests for /vitals endpoints."""
+import numpy as np
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
 
 from app.main import app
-from app.core.database import get_supabase
+from app.repositories import get_repository
+from app.repositories.supabase import build_supabase_repository
+from app.services.risk_engine import RiskBatchResult
 from tests.conftest import SAMPLE_VITAL, PATIENT_ID, make_supabase_mock
 
-RISK_LOW = {"risk_score": 0.2, "risk_level": "Low", "recommendations": ["Keep it up!"]}
-RISK_HIGH = {"risk_score": 0.85, "risk_level": "High", "recommendations": ["See a doctor."]}
+MODEL_VERSION = "test-model-v1"
+RISK_LOW = {"risk_score": 0.2, "risk_level": "Low", "recommendations": ["Keep it up!"],
+            "model_version": MODEL_VERSION}
+RISK_HIGH = {"risk_score": 0.85, "risk_level": "High", "recommendations": ["See a doctor."],
+             "model_version": MODEL_VERSION}
 
 VITAL_PAYLOAD = {
     "cholesterol": 200.0,
@@ -41,9 +47,9 @@ class TestSubmitVitals:
     def test_submit_vitals_low_risk_no_alert(self, client):
         saved_vital = {**SAMPLE_VITAL, "risk_level": "Low", "risk_score": 0.2}
         mock_db, _ = make_supabase_mock([saved_vital])
-        app.dependency_overrides[get_supabase] = lambda: mock_db
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
 
-        with patch("app.api.routes.vitals.calculate_risk", return_value=RISK_LOW), \
+        with patch("app.api.routes.vitals.calculate_risk_async", return_value=RISK_LOW), \
              patch("app.api.routes.vitals.create_alert_if_needed", return_value=None):
             response = client.post(f"/vitals/{PATIENT_ID}", json=VITAL_PAYLOAD)
 
@@ -51,17 +57,19 @@ class TestSubmitVitals:
         data = response.json()
         assert data["risk_level"] == "Low"
         assert data["alert_triggered"] is False
+        inserted = mock_db.table.return_value.insert.call_args.args[0]
+        assert inserted["model_version"] == MODEL_VERSION
 
         app.dependency_overrides.clear()
 
     def test_submit_vitals_high_risk_triggers_alert(self, client):
         saved_vital = {**SAMPLE_VITAL, "risk_level": "High", "risk_score": 0.85}
         mock_db, _ = make_supabase_mock([saved_vital])
-        app.dependency_overrides[get_supabase] = lambda: mock_db
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
 
         mock_alert = {"id": "alert-001", "severity": "Critical"}
 
-        with patch("app.api.routes.vitals.calculate_risk", return_value=RISK_HIGH), \
+        with patch("app.api.routes.vitals.calculate_risk_async", return_value=RISK_HIGH), \
              patch("app.api.routes.vitals.create_alert_if_needed", return_value=mock_alert):
             response = client.post(f"/vitals/{PATIENT_ID}", json=CRITICAL_VITAL_PAYLOAD)
 
@@ -74,9 +82,9 @@ class TestSubmitVitals:
     def test_submit_vitals_db_error_returns_500(self, client):
         mock_db = MagicMock()
         mock_db.table.return_value.insert.return_value.execute.side_effect = Exception("DB down")
-        app.dependency_overrides[get_supabase] = lambda: mock_db
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
 
-        with patch("app.api.routes.vitals.calculate_risk", return_value=RISK_LOW):
+        with patch("app.api.routes.vitals.calculate_risk_async", return_value=RISK_LOW):
             response = client.post(f"/vitals/{PATIENT_ID}", json=VITAL_PAYLOAD)
 
         assert response.status_code == 500
@@ -90,7 +98,7 @@ class TestSubmitVitals:
 class TestGetVitalHistory:
     def test_get_vital_history_returns_list(self, client):
         mock_db, _ = make_supabase_mock([SAMPLE_VITAL])
-        app.dependency_overrides[get_supabase] = lambda: mock_db
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
 
         response = client.get(f"/vitals/{PATIENT_ID}")
         assert response.status_code == 200
@@ -102,10 +110,80 @@ class TestGetVitalHistory:
 
     def test_get_vital_history_empty(self, client):
         mock_db, _ = make_supabase_mock([])
-        app.dependency_overrides[get_supabase] = lambda: mock_db
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
 
         response = client.get(f"/vitals/{PATIENT_ID}")
         assert response.status_code == 200
         assert response.json() == []
 
         app.dependency_overrides.clear()
+
+
+# ---------------------------------------------------------------------------
+# POST /vitals/batch
+# ---------------------------------------------------------------------------
+OTHER_PATIENT_ID = "8d2e4b61-1f3a-4c7d-b5e9-2a6c0f9d7e13"
+
+BATCH_RISK = RiskBatchResult(np.array([0.2, 0.85]), np.array(["Low", "High"]), MODEL_VERSION)
+
+BATCH_PAYLOAD = {
+    "readings": [
+        {**VITAL_PAYLOAD, "patient_id": PATIENT_ID},
+        {**CRITICAL_VITAL_PAYLOAD, "patient_id": OTHER_PATIENT_ID},
+    ]
+}
+
+
+class TestSubmitVitalsBatch:
+    def test_batch_scores_once_and_inserts_once(self, client):
+        saved_rows = [
+            {**SAMPLE_VITAL, "id": "vital-1", "risk_level": "Low", "risk_score": 0.2},
+            {**SAMPLE_VITAL, "id": "vital-2", "patient_id": OTHER_PATIENT_ID,
+             "risk_level": "High", "risk_score": 0.85},
+        ]
+        mock_db, _ = make_supabase_mock(saved_rows)
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
+
+        with patch("app.api.routes.vitals.calculate_risk_batch",
+                   return_value=BATCH_RISK) as mock_risk, \
+             patch("app.api.routes.vitals.create_alerts_batch",
+                   return_value=[None, {"id": "alert-001"}]) as mock_alerts:
+            response = client.post("/vitals/batch", json=BATCH_PAYLOAD)
+
+        assert response.status_code == 201
+        data = response.json()
+        assert data["count"] == 2
+        assert data["alerts_triggered"] == 1
+        assert [r["alert_triggered"] for r in data["results"]] == [False, True]
+        assert data["results"][1]["patient_id"] == OTHER_PATIENT_ID
+
+        mock_risk.assert_called_once()
+        assert len(mock_risk.call_args.args[0]) == 2
+        mock_db.table.return_value.insert.assert_called_once()
+        inserted = mock_db.table.return_value.insert.call_args.args[0]
+        assert [r["patient_id"] for r in inserted] == [PATIENT_ID, OTHER_PATIENT_ID]
+        assert {r["model_version"] for r in inserted} == {MODEL_VERSION}
+        assert len(mock_alerts.call_args.args[1]) == 2
+
+        app.dependency_overrides.clear()
+
+    def test_batch_empty_returns_422(self, client):
+        mock_db, _ = make_supabase_mock([])
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
+
+        response = client.post("/vitals/batch", json={"readings": []})
+        assert response.status_code == 422
+
+        app.dependency_overrides.clear()
+
+    def test_batch_db_error_returns_500(self, client):
+        mock_db = MagicMock()
+        mock_db.table.return_value.insert.return_value.execute.side_effect = Exception("DB down")
+        app.dependency_overrides[get_repository] = lambda: build_supabase_repository(mock_db)
+
+        with patch("app.api.routes.vitals.calculate_risk_batch", return_value=BATCH_RISK):
+            response = client.post("/vitals/batch", json=BATCH_PAYLOAD)
+
+        assert response.status_code == 500
+
+        app.dependency_overrides.clear()